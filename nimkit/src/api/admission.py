@@ -0,0 +1,335 @@
+"""Per-NIM admission control with a bounded wait queue."""
+
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional, TypeVar
+
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+from prometheus_client import Counter, Gauge, Histogram
+
+from .config.nims import NIMData
+
+logger = logging.getLogger(__name__)
+
+# Defaults for NIMs that do not configure their own limits
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("NIM_MAX_CONCURRENCY", "32"))
+DEFAULT_MAX_QUEUE_SIZE = int(os.getenv("NIM_MAX_QUEUE_SIZE", "64"))
+DEFAULT_QUEUE_TIMEOUT = float(os.getenv("NIM_QUEUE_TIMEOUT", "30"))
+MAX_RETRY_AFTER_SECONDS = 60
+
+QUEUE_WAIT_SECONDS = Histogram(
+    "nimkit_admission_queue_wait_seconds",
+    "Time requests spent waiting for a NIM concurrency slot",
+    ["nim_id"],
+    buckets=(0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+IN_FLIGHT = Gauge(
+    "nimkit_admission_in_flight",
+    "Requests currently holding a NIM concurrency slot",
+    ["nim_id"],
+)
+QUEUE_DEPTH = Gauge(
+    "nimkit_admission_queue_depth",
+    "Requests waiting for a NIM concurrency slot",
+    ["nim_id"],
+)
+REJECTED = Counter(
+    "nimkit_admission_rejected_total",
+    "Requests shed by admission control",
+    ["nim_id", "reason"],
+)
+
+T = TypeVar("T")
+
+
+class AdmissionPermit:
+    """A held concurrency slot; release it exactly once when the call ends."""
+
+    def __init__(self, limiter: "NIMLimiter"):
+        self._limiter = limiter
+        self._acquired_at = time.monotonic()
+        self._released = False
+        self._claimed = False
+
+    def claim(self) -> None:
+        """Hand the permit to a running stream, which releases it when it ends."""
+        self._claimed = True
+
+    def release_unclaimed(self) -> None:
+        """Release the permit unless a running stream has claimed it."""
+        if not self._claimed:
+            self.release()
+
+    def release(self) -> None:
+        """Return the slot to the limiter (idempotent)."""
+        if self._released:
+            return
+        self._released = True
+        self._limiter._release(time.monotonic() - self._acquired_at)
+
+
+class NIMLimiter:
+    """
+    Concurrency limiter for one NIM.
+
+    At most `max_concurrency` requests run at once and at most
+    `max_queue_size` wait, in FIFO order, for a slot. Requests beyond that
+    are rejected immediately so a saturated NIM sheds load instead of
+    building an unbounded backlog.
+    """
+
+    def __init__(
+        self,
+        nim_id: str,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE,
+        queue_timeout: float = DEFAULT_QUEUE_TIMEOUT,
+    ):
+        """
+        Initialize the limiter.
+
+        Args:
+            nim_id: NIM the limiter protects (used for metric labels)
+            max_concurrency: Requests allowed to run at once
+            max_queue_size: Requests allowed to wait for a slot
+            queue_timeout: Seconds a request may wait before giving up
+        """
+        self.nim_id = nim_id
+        self.max_concurrency = max_concurrency
+        self.max_queue_size = max_queue_size
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: Deque["asyncio.Future[None]"] = deque()
+        # Moving average of how long a slot is held, for Retry-After hints
+        self._avg_hold_seconds = 1.0
+
+    @property
+    def waiting(self) -> int:
+        """Number of requests waiting for a slot."""
+        return len(self._waiters)
+
+    def configure(
+        self, max_concurrency: int, max_queue_size: int, queue_timeout: float
+    ) -> None:
+        """Apply new limits, admitting waiters if the concurrency limit grew."""
+        self.max_concurrency = max_concurrency
+        self.max_queue_size = max_queue_size
+        self.queue_timeout = queue_timeout
+        self._wake_waiters()
+
+    def retry_after(self) -> int:
+        """Estimate how many seconds a shed request should wait before retrying."""
+        estimate = self._avg_hold_seconds * (self.waiting + 1) / self.max_concurrency
+        return max(1, min(MAX_RETRY_AFTER_SECONDS, math.ceil(estimate)))
+
+    async def acquire(self) -> AdmissionPermit:
+        """
+        Wait for a concurrency slot.
+
+        Returns:
+            A permit that must be released when the upstream call finishes
+
+        Raises:
+            HTTPException: 429 when the queue is full, 503 when the wait
+                exceeds the queue timeout
+        """
+        start = time.monotonic()
+        if self.active < self.max_concurrency and not self._waiters:
+            self.active += 1
+            self._observe(start)
+            return AdmissionPermit(self)
+
+        if self.waiting >= self.max_queue_size:
+            REJECTED.labels(nim_id=self.nim_id, reason="queue_full").inc()
+            retry_after = self.retry_after()
+            logger.warning(
+                f"Shedding request for NIM {self.nim_id}: {self.active} running, "
+                f"{self.waiting} queued"
+            )
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"NIM {self.nim_id} is at capacity, retry later",
+                headers={"Retry-After": str(retry_after)},
+            )
+
+        waiter: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        QUEUE_DEPTH.labels(nim_id=self.nim_id).set(self.waiting)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            REJECTED.labels(nim_id=self.nim_id, reason="timeout").inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Timed out waiting for NIM {self.nim_id}",
+                headers={"Retry-After": str(self.retry_after())},
+            )
+        except BaseException:
+            self._abandon(waiter)
+            raise
+        finally:
+            QUEUE_DEPTH.labels(nim_id=self.nim_id).set(self.waiting)
+
+        # _wake_waiters already counted this request as active
+        self._observe(start)
+        return AdmissionPermit(self)
+
+    def _abandon(self, waiter: "asyncio.Future[None]") -> None:
+        """Drop a waiter that gave up, passing on a slot it was just handed."""
+        if waiter in self._waiters:
+            self._waiters.remove(waiter)
+        elif waiter.done() and not waiter.cancelled():
+            self._release(None)
+
+    def _observe(self, start: float) -> None:
+        QUEUE_WAIT_SECONDS.labels(nim_id=self.nim_id).observe(time.monotonic() - start)
+        IN_FLIGHT.labels(nim_id=self.nim_id).set(self.active)
+
+    def _release(self, held_seconds: Optional[float]) -> None:
+        """Hand the slot to the next waiter, or free it."""
+        if held_seconds is not None:
+            self._avg_hold_seconds = 0.8 * self._avg_hold_seconds + 0.2 * held_seconds
+        self.active -= 1
+        self._wake_waiters()
+        IN_FLIGHT.labels(nim_id=self.nim_id).set(self.active)
+
+    def _wake_waiters(self) -> None:
+        while self._waiters and self.active < self.max_concurrency:
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self.active += 1
+            waiter.set_result(None)
+
+
+class AdmissionController:
+    """Registry of per-NIM limiters, configured from NIMData."""
+
+    def __init__(self):
+        """Initialize with no limiters."""
+        self._limiters: Dict[str, NIMLimiter] = {}
+
+    def get_limiter(
+        self, nim_id: str, nim_data: Optional[NIMData] = None
+    ) -> NIMLimiter:
+        """
+        Get the limiter for a NIM, applying its configured limits.
+
+        Args:
+            nim_id: NIM instance ID
+            nim_data: Optional NIM configuration with per-NIM limits
+
+        Returns:
+            The NIM's limiter
+        """
+        max_concurrency = DEFAULT_MAX_CONCURRENCY
+        max_queue_size = DEFAULT_MAX_QUEUE_SIZE
+        queue_timeout = DEFAULT_QUEUE_TIMEOUT
+        if nim_data is not None:
+            if nim_data.max_concurrency is not None:
+                max_concurrency = nim_data.max_concurrency
+            if nim_data.max_queue_size is not None:
+                max_queue_size = nim_data.max_queue_size
+            if nim_data.queue_timeout is not None:
+                queue_timeout = nim_data.queue_timeout
+            # Concurrency limits are per replica
+            max_concurrency *= len(nim_data.get_replicas())
+
+        limiter = self._limiters.get(nim_id)
+        if limiter is None:
+            limiter = NIMLimiter(nim_id, max_concurrency, max_queue_size, queue_timeout)
+            self._limiters[nim_id] = limiter
+        elif (
+            limiter.max_concurrency,
+            limiter.max_queue_size,
+            limiter.queue_timeout,
+        ) != (max_concurrency, max_queue_size, queue_timeout):
+            limiter.configure(max_concurrency, max_queue_size, queue_timeout)
+        return limiter
+
+    async def acquire(
+        self, nim_id: str, nim_data: Optional[NIMData] = None
+    ) -> AdmissionPermit:
+        """Wait for a slot on a NIM; see NIMLimiter.acquire."""
+        return await self.get_limiter(nim_id, nim_data).acquire()
+
+    @asynccontextmanager
+    async def admit(
+        self, nim_id: str, nim_data: Optional[NIMData] = None
+    ) -> AsyncIterator[None]:
+        """Hold a slot on a NIM for the duration of the block."""
+        permit = await self.acquire(nim_id, nim_data)
+        try:
+            yield
+        finally:
+            permit.release()
+
+
+async def release_after(
+    permit: AdmissionPermit, source: AsyncIterator[T]
+) -> AsyncIterator[T]:
+    """Forward a stream, releasing its permit when it ends or is cancelled."""
+    permit.claim()
+    try:
+        async for chunk in source:
+            yield chunk
+    finally:
+        permit.release()
+
+
+class PermitStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that returns an admission permit its body never used.
+
+    Streaming permits are acquired before the response is returned, so an
+    overloaded NIM is reported as 429/503 instead of a broken stream. If
+    the client goes away before the body starts, the stream that would have
+    released the permit never runs, so the response releases it when it
+    ends. A BackgroundTask would not do: it is skipped on a disconnect.
+
+    The same goes for the upstream iterator behind the body: it is closed
+    when the response ends, so a shared stream loses the subscriber (and
+    stops its upstream call once nobody is left) even if it was never read.
+    """
+
+    def __init__(
+        self,
+        content: Any,
+        permit: Optional[AdmissionPermit] = None,
+        source: Optional[AsyncIterator[Any]] = None,
+        **kwargs: Any,
+    ):
+        """
+        Initialize the response.
+
+        Args:
+            content: Body iterator, as for StreamingResponse
+            permit: Permit to release if no stream has claimed it by the end
+            source: Upstream iterator wrapped by content, closed at the end
+            **kwargs: Other StreamingResponse arguments
+        """
+        super().__init__(content, **kwargs)
+        self.permit = permit
+        self.source = source
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            if self.permit is not None:
+                self.permit.release_unclaimed()
+            aclose = getattr(self.source, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+
+# Global instance for use throughout the application
+admission_controller = AdmissionController()
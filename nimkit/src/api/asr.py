@@ -1,5 +1,6 @@
 """ASR (Automatic Speech Recognition) API endpoints."""
 
+import asyncio
 import json
 import logging
 import os
@@ -20,7 +21,8 @@ from fastapi import (
 from pydantic import BaseModel, field_validator
 
 from .llm.models import InferenceRequest
-from .utils import validate_nim_exists
+from .persistence import request_persister
+from .route_table import route_table
 from .inference_utils import perform_asr_inference
 
 logger = logging.getLogger(__name__)
@@ -74,13 +76,12 @@ async def asr_inference(
     )
 
     try:
-        # Validate NIM exists
-        nim_data, nim_metadata = validate_nim_exists(nim_id)
+        # Validate NIM exists and resolve its compiled route
+        route = await route_table.get(nim_id, use_nvidia_api)
+        nim_data, nim_metadata = route.nim_data, route.metadata
 
         # Check if this is an ASR NIM
-        nim_type = nim_metadata.get("type", "").lower()
-        if not nim_type:
-            nim_type = getattr(nim_data, "nim_type", "").lower()
+        nim_type = route.nim_type
 
         if nim_type != "asr":
             raise HTTPException(
@@ -137,8 +138,8 @@ async def asr_inference(
             "content_type": audio_file.content_type,
         }
 
-        inference_request.set_input(request_data)
-        inference_request.save()
+        await asyncio.to_thread(inference_request.set_input, request_data)
+        request_persister.save(inference_request)
 
         logger.info(f"Created ASR inference request {request_id} for NIM {nim_id}")
 
@@ -0,0 +1,259 @@
+"""Content-addressed storage for large inference payload values."""
+
+import base64
+import binascii
+import hashlib
+import logging
+import os
+import re
+import tempfile
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+MEDIA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "media"
+)
+BLOB_DIR = os.path.join(MEDIA_DIR, "blobs")
+# String values at least this long are moved out of the stored JSON
+BLOB_THRESHOLD_BYTES = int(os.getenv("BLOB_THRESHOLD_BYTES", "32768"))
+
+# Key marking a reference to a stored blob inside payload JSON
+BLOB_REF_KEY = "$blob"
+
+_DATA_URL = re.compile(r"^data:[\w.+-]+/[\w.+-]+;base64,")
+_BASE64 = re.compile(r"^[A-Za-z0-9+/]+={0,2}$")
+_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"glTF", ".glb"),
+    (b"RIFF", ".wav"),
+)
+
+
+# Names put() produces: <first two hex digits>/<sha256><extension>
+_BLOB_NAME = re.compile(r"^([0-9a-f]{2})/(\1[0-9a-f]{62})\.(png|jpg|glb|wav|bin|txt)$")
+# User keys that look like BLOB_REF_KEY get one more "$" when stored
+_ESCAPED_REF_KEY = re.compile(r"^\$+blob$")
+
+
+def is_blob_name(name: Any) -> bool:
+    """Check whether a string is a blob name in the store's own layout."""
+    return isinstance(name, str) and _BLOB_NAME.match(name) is not None
+
+
+def is_blob_ref(value: Any) -> bool:
+    """Check whether a payload value is a blob reference."""
+    return isinstance(value, dict) and is_blob_name(value.get(BLOB_REF_KEY))
+
+
+def media_path(path: Any, root: Optional[str] = None) -> Optional[str]:
+    """
+    Resolve a file path, refusing anything outside the media directory.
+
+    Args:
+        path: Absolute path, or path relative to root
+        root: Directory the path must lie strictly inside; MEDIA_DIR by default
+
+    Returns:
+        The resolved path, or None if it is empty or escapes root
+    """
+    if not isinstance(path, str) or not path:
+        return None
+    root = os.path.realpath(MEDIA_DIR if root is None else root)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if resolved == root or os.path.commonpath([root, resolved]) != root:
+        return None
+    return resolved
+
+
+def _escape_key(key: Any) -> Any:
+    """Keep user keys such as "$blob" from being read back as references."""
+    if isinstance(key, str) and _ESCAPED_REF_KEY.match(key):
+        return "$" + key
+    return key
+
+
+def _unescape_key(key: Any) -> Any:
+    if isinstance(key, str) and key != BLOB_REF_KEY and _ESCAPED_REF_KEY.match(key):
+        return key[1:]
+    return key
+
+
+class BlobStore:
+    """
+    Store large payload strings as deduplicated files under media/blobs.
+
+    offload() replaces every string value of at least `threshold` bytes with
+    a small reference dict. Base64 payloads (bare or data URLs) are decoded
+    and stored as binary files named by their SHA-256, so identical images
+    or models are stored once and can be served directly from /media.
+    resolve() turns references back into the original strings, or into
+    /media URLs for listings that should not ship the content inline.
+    """
+
+    def __init__(self, root: str = BLOB_DIR, threshold: int = BLOB_THRESHOLD_BYTES):
+        """
+        Initialize the store.
+
+        Args:
+            root: Directory blobs are written to
+            threshold: Minimum string length to offload
+        """
+        self.root = root
+        self.threshold = threshold
+
+    def path_for(self, ref: Dict[str, Any]) -> str:
+        """
+        Get the file path of a referenced blob.
+
+        Raises:
+            ValueError: If the reference does not name a blob under root
+        """
+        name = ref.get(BLOB_REF_KEY)
+        if not is_blob_name(name):
+            raise ValueError(f"Invalid blob reference: {name!r}")
+        root = os.path.realpath(self.root)
+        path = os.path.realpath(os.path.join(root, name))
+        if os.path.commonpath([root, path]) != root:
+            raise ValueError(f"Blob reference outside the blob store: {name!r}")
+        return path
+
+    def url_for(self, ref: Dict[str, Any]) -> str:
+        """Get the /media URL of a referenced blob."""
+        self.path_for(ref)
+        relative = os.path.relpath(
+            os.path.join(self.root, ref[BLOB_REF_KEY]), MEDIA_DIR
+        )
+        return f"/media/{relative.replace(os.sep, '/')}"
+
+    def put(self, value: str) -> Dict[str, Any]:
+        """
+        Store a string and return a reference to it.
+
+        Args:
+            value: String to store
+
+        Returns:
+            Reference dict that resolve() turns back into the string
+        """
+        prefix_match = _DATA_URL.match(value)
+        prefix = prefix_match.group(0) if prefix_match else ""
+        payload = value[len(prefix) :]
+
+        content: Optional[bytes] = None
+        if prefix or _BASE64.match(payload):
+            try:
+                decoded = base64.b64decode(payload, validate=True)
+                # Only store decoded bytes when they re-encode to the same text
+                if base64.b64encode(decoded).decode("ascii") == payload:
+                    content = decoded
+            except (binascii.Error, ValueError):
+                pass
+
+        if content is not None:
+            encoding = "base64"
+            extension = next(
+                (ext for sig, ext in _SIGNATURES if content.startswith(sig)), ".bin"
+            )
+        else:
+            encoding, prefix, extension = "text", "", ".txt"
+            content = value.encode("utf-8")
+
+        digest = hashlib.sha256(content).hexdigest()
+        name = f"{digest[:2]}/{digest}{extension}"
+        ref = {
+            BLOB_REF_KEY: name,
+            "encoding": encoding,
+            "prefix": prefix,
+            "size": len(value),
+        }
+        self._write(self.path_for(ref), content)
+        return ref
+
+    def _write(self, path: str, content: bytes) -> None:
+        """Write a blob once; identical content is already on disk."""
+        if os.path.exists(path):
+            # Refresh the mtime so sweeps treat the blob as recently used
+            os.utime(path)
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def read(self, ref: Dict[str, Any]) -> str:
+        """
+        Get the original string of a reference.
+
+        Args:
+            ref: Reference from put()
+
+        Returns:
+            The stored string, or "" if the blob is missing
+        """
+        try:
+            with open(self.path_for(ref), "rb") as fh:
+                content = fh.read()
+        except FileNotFoundError:
+            logger.warning(f"Missing blob {ref[BLOB_REF_KEY]}")
+            return ""
+        except ValueError as e:
+            logger.warning(f"Not reading blob: {e}")
+            return ""
+        if ref.get("encoding") == "base64":
+            return ref.get("prefix", "") + base64.b64encode(content).decode("ascii")
+        return content.decode("utf-8")
+
+    def offload(self, data: Any) -> Any:
+        """
+        Replace large string values with blob references.
+
+        Keys in the payload that look like BLOB_REF_KEY are escaped, so
+        user data is never mistaken for a reference; resolve() restores them.
+
+        Args:
+            data: JSON-serializable payload
+
+        Returns:
+            A copy of the payload with large strings offloaded
+        """
+        if isinstance(data, dict):
+            return {_escape_key(k): self.offload(v) for k, v in data.items()}
+        if isinstance(data, list):
+            return [self.offload(v) for v in data]
+        if isinstance(data, str) and len(data) >= self.threshold:
+            try:
+                return self.put(data)
+            except OSError as e:
+                logger.warning(f"Failed to store blob, keeping value inline: {e}")
+        return data
+
+    def resolve(self, data: Any, mode: str = "inline") -> Any:
+        """
+        Replace blob references in a payload.
+
+        Args:
+            data: Payload that may contain references
+            mode: "inline" for the original strings, "url" for /media URLs
+
+        Returns:
+            A copy of the payload without references
+        """
+        if is_blob_ref(data):
+            return self.url_for(data) if mode == "url" else self.read(data)
+        if isinstance(data, dict):
+            return {_unescape_key(k): self.resolve(v, mode) for k, v in data.items()}
+        if isinstance(data, list):
+            return [self.resolve(v, mode) for v in data]
+        return data
+
+
+# Global instance for use throughout the application
+blob_store = BlobStore()
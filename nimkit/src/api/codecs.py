@@ -0,0 +1,152 @@
+"""Encoding of JSON payloads stored in inference request hash fields."""
+
+import base64
+import json
+import logging
+import os
+import zlib
+from typing import Any, Optional
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+try:
+    import msgpack
+    import zstandard
+
+    _ZSTD_AVAILABLE = True
+except ImportError:
+    _ZSTD_AVAILABLE = False
+
+# "zstd" (needs msgpack and zstandard), "zlib", "none", or "auto" for zstd
+# when installed and zlib otherwise
+PAYLOAD_COMPRESSION = os.getenv("PAYLOAD_COMPRESSION", "auto").lower()
+# Encoded JSON at least this long is compressed
+PAYLOAD_COMPRESS_THRESHOLD = int(os.getenv("PAYLOAD_COMPRESS_THRESHOLD", "4096"))
+PAYLOAD_ZSTD_LEVEL = int(os.getenv("PAYLOAD_ZSTD_LEVEL", "3"))
+
+# Format tags prefixed to compressed values. Plain JSON is stored untagged,
+# which is also how every record written before this module looks.
+ZSTD_MSGPACK_TAG = "zstd+msgpack:"
+ZLIB_JSON_TAG = "zlib+json:"
+_TAGS = (ZSTD_MSGPACK_TAG, ZLIB_JSON_TAG)
+
+
+def _dumps(data: Any) -> bytes:
+    try:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    except TypeError:
+        # orjson rejects integers wider than 64 bits
+        return json.dumps(data).encode("utf-8")
+
+
+def _loads(raw: str) -> Any:
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        # json.dumps wrote NaN/Infinity, which orjson does not accept
+        return json.loads(raw)
+
+
+class PayloadCodec:
+    """
+    Encode payloads as compact JSON, compressing large ones.
+
+    Hash fields hold text, so compressed values are base64 encoded behind a
+    format tag. Values carry their own tag rather than relying on a record
+    flag, which keeps fields copied between records (copy_result_from) and
+    records written by older versions readable.
+    """
+
+    def __init__(
+        self,
+        compression: str = PAYLOAD_COMPRESSION,
+        threshold: int = PAYLOAD_COMPRESS_THRESHOLD,
+    ):
+        """
+        Initialize the codec.
+
+        Args:
+            compression: "zstd", "zlib", "none" or "auto"
+            threshold: Minimum encoded JSON size to compress
+        """
+        if compression == "auto":
+            compression = "zstd" if _ZSTD_AVAILABLE else "zlib"
+        elif compression == "zstd" and not _ZSTD_AVAILABLE:
+            logger.warning(
+                "PAYLOAD_COMPRESSION=zstd needs msgpack and zstandard; using zlib"
+            )
+            compression = "zlib"
+        self.compression = compression
+        self.threshold = threshold
+
+    def is_compressed(self, raw: Optional[str]) -> bool:
+        """Check whether a stored value carries a compression tag."""
+        return bool(raw) and raw.startswith(_TAGS)
+
+    def encode(self, data: Any) -> str:
+        """
+        Encode a payload for storage.
+
+        Args:
+            data: JSON-serializable payload
+
+        Returns:
+            Compact JSON, or a tagged compressed value for large payloads
+        """
+        encoded = _dumps(data)
+        if self.compression == "none" or len(encoded) < self.threshold:
+            return encoded.decode("utf-8")
+
+        if self.compression == "zstd":
+            try:
+                packed = msgpack.packb(data, use_bin_type=True)
+            except (TypeError, OverflowError, ValueError):
+                packed = None
+            if packed is not None:
+                compressed = zstandard.ZstdCompressor(
+                    level=PAYLOAD_ZSTD_LEVEL
+                ).compress(packed)
+                return ZSTD_MSGPACK_TAG + base64.b64encode(compressed).decode("ascii")
+
+        compressed = zlib.compress(encoded, 6)
+        return ZLIB_JSON_TAG + base64.b64encode(compressed).decode("ascii")
+
+    def decode(self, raw: Optional[str]) -> Any:
+        """
+        Decode a stored value in any supported format.
+
+        Args:
+            raw: Stored value; empty values decode to {}
+
+        Returns:
+            The decoded payload
+
+        Raises:
+            ValueError: If the value is corrupt or needs a missing package
+        """
+        if not raw:
+            return {}
+        if raw.startswith(ZSTD_MSGPACK_TAG):
+            if not _ZSTD_AVAILABLE:
+                raise ValueError("Reading zstd payloads needs msgpack and zstandard")
+            try:
+                packed = zstandard.ZstdDecompressor().decompress(
+                    base64.b64decode(raw[len(ZSTD_MSGPACK_TAG) :])
+                )
+                return msgpack.unpackb(packed, raw=False, strict_map_key=False)
+            except (zstandard.ZstdError, ValueError) as e:
+                raise ValueError(f"Corrupt zstd payload: {e}") from e
+        if raw.startswith(ZLIB_JSON_TAG):
+            try:
+                return _loads(
+                    zlib.decompress(base64.b64decode(raw[len(ZLIB_JSON_TAG) :]))
+                )
+            except zlib.error as e:
+                raise ValueError(f"Corrupt zlib payload: {e}") from e
+        return _loads(raw)
+
+
+# Global instance for use throughout the application
+payload_codec = PayloadCodec()
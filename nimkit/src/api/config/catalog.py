@@ -0,0 +1,186 @@
+"""In-memory NIM catalog loaded from nims.yml with hot reload."""
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+CATALOG_PATH = os.getenv(
+    "NIM_CATALOG_PATH", str(Path(__file__).parent.parent / "nims.yml")
+)
+# How often readers check the file's mtime; 0 checks on every read
+CATALOG_RELOAD_INTERVAL = float(os.getenv("NIM_CATALOG_RELOAD_INTERVAL", "2"))
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """
+    One parsed version of the catalog, indexed for lookups.
+
+    Snapshots are replaced as a whole on reload and never modified, so a
+    reader always sees a consistent catalog. Treat the entries as read-only.
+    """
+
+    entries: Tuple[Dict[str, Any], ...] = ()
+    by_id: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    by_type: Dict[str, Tuple[Dict[str, Any], ...]] = field(default_factory=dict)
+    by_tag: Dict[str, Tuple[Dict[str, Any], ...]] = field(default_factory=dict)
+    mtime_ns: int = 0
+    version: int = 0
+
+
+def build_snapshot(
+    entries: List[Dict[str, Any]], mtime_ns: int = 0, version: int = 0
+) -> CatalogSnapshot:
+    """
+    Index catalog entries by id, type and tag.
+
+    Args:
+        entries: Entries as listed in nims.yml
+        mtime_ns: Modification time of the file they were read from
+        version: Load counter, increased on every reload
+
+    Returns:
+        The indexed snapshot
+    """
+    if not isinstance(entries, list):
+        raise ValueError("NIMs catalog must be a list of entries")
+    by_id: Dict[str, Dict[str, Any]] = {}
+    by_type: Dict[str, List[Dict[str, Any]]] = {}
+    by_tag: Dict[str, List[Dict[str, Any]]] = {}
+    for entry in entries:
+        if not isinstance(entry, dict) or not entry.get("id"):
+            raise ValueError(f"Invalid NIMs catalog entry: {entry!r}")
+        # The first entry wins, as with the linear scan this replaces
+        by_id.setdefault(entry["id"], entry)
+        if entry.get("type"):
+            by_type.setdefault(entry["type"], []).append(entry)
+        for tag in entry.get("tags") or []:
+            by_tag.setdefault(tag, []).append(entry)
+    return CatalogSnapshot(
+        entries=tuple(entries),
+        by_id=by_id,
+        by_type={k: tuple(v) for k, v in by_type.items()},
+        by_tag={k: tuple(v) for k, v in by_tag.items()},
+        mtime_ns=mtime_ns,
+        version=version,
+    )
+
+
+class NIMCatalog:
+    """
+    Process-wide view of nims.yml.
+
+    The file is parsed once and then re-parsed only when its mtime changes,
+    checked at most every reload_interval seconds. A reload that fails to
+    parse keeps serving the previous snapshot.
+    """
+
+    def __init__(
+        self,
+        path: str = CATALOG_PATH,
+        reload_interval: float = CATALOG_RELOAD_INTERVAL,
+    ):
+        """
+        Initialize the catalog without reading the file.
+
+        Args:
+            path: Path to nims.yml
+            reload_interval: Minimum seconds between mtime checks
+        """
+        self.path = path
+        self.reload_interval = reload_interval
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def load(self) -> CatalogSnapshot:
+        """
+        Read the file if it changed since the last load.
+
+        Returns:
+            The current snapshot
+
+        Raises:
+            FileNotFoundError: If the file is missing and nothing was loaded
+            ValueError: If the file is invalid and nothing was loaded
+        """
+        with self._lock:
+            self._checked_at = time.monotonic()
+            current = self._snapshot
+            try:
+                mtime_ns = os.stat(self.path).st_mtime_ns
+                if current is not None and mtime_ns == current.mtime_ns:
+                    return current
+                with open(self.path, "r", encoding="utf-8") as f:
+                    entries = yaml.safe_load(f) or []
+                version = current.version + 1 if current else 1
+                snapshot = build_snapshot(entries, mtime_ns, version)
+            except (OSError, ValueError, yaml.YAMLError) as e:
+                if current is None:
+                    raise
+                logger.error(f"Keeping previous NIMs catalog, reload failed: {e}")
+                return current
+            self._snapshot = snapshot
+            logger.info(
+                f"Loaded NIMs catalog v{version} with {len(snapshot.entries)} entries"
+            )
+            return snapshot
+
+    def snapshot(self) -> CatalogSnapshot:
+        """Get the current snapshot, reloading it if the file changed."""
+        snapshot = self._snapshot
+        if (
+            snapshot is None
+            or time.monotonic() - self._checked_at >= self.reload_interval
+        ):
+            snapshot = self.load()
+        return snapshot
+
+    def all(self) -> List[Dict[str, Any]]:
+        """Get every entry in file order."""
+        return list(self.snapshot().entries)
+
+    def get(self, nim_id: str) -> Optional[Dict[str, Any]]:
+        """Get the entry for a NIM ID, or None."""
+        return self.snapshot().by_id.get(nim_id)
+
+    def find(
+        self, type: Optional[str] = None, tag: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get the entries of a type and/or with a tag, in file order.
+
+        Args:
+            type: Optional NIM type, e.g. llm
+            tag: Optional tag, e.g. run-on-rtx
+
+        Returns:
+            Matching entries
+        """
+        snapshot = self.snapshot()
+        if type is None and tag is None:
+            return list(snapshot.entries)
+        if type is None:
+            return list(snapshot.by_tag.get(tag, ()))
+        entries = snapshot.by_type.get(type, ())
+        if tag is not None:
+            tagged = {id(entry) for entry in snapshot.by_tag.get(tag, ())}
+            entries = tuple(entry for entry in entries if id(entry) in tagged)
+        return list(entries)
+
+    @property
+    def version(self) -> int:
+        """Load counter of the current snapshot; changes on every reload."""
+        return self.snapshot().version
+
+
+# Global instance for use throughout the application
+nim_catalog = NIMCatalog()
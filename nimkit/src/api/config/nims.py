@@ -1,35 +1,38 @@
 """NIM configuration and data models."""
 
+import asyncio
 import json
 import logging
 import os
-from typing import Optional, Dict, Any
+import time
+from typing import Optional, Dict, Any, List, Tuple
 from pydantic import BaseModel, Field
 
-import redis
+import redis.asyncio as aioredis
+
+from ..db import create_async_redis_pool, get_async_redis_client
 
 logger = logging.getLogger(__name__)
 
+# Set of configured NIM IDs, so listing them does not scan the keyspace
+NIM_IDS_KEY = "nims:ids"
+# Set once NIMs configured before NIM_IDS_KEY existed have been added to it
+NIM_IDS_BACKFILLED_KEY = "nims:ids:backfilled"
+# Channel on which NIM config writes announce the changed NIM ID; an empty
+# message invalidates every NIM, e.g. after the NVIDIA API key changes
+NIM_CONFIG_CHANNEL = "nims:config:changed"
+# Upper bound on how long a cached config is used, even without a message
+NIM_CONFIG_CACHE_TTL = float(os.getenv("NIM_CONFIG_CACHE_TTL", "300"))
 
-class NIMData(BaseModel):
-    """NIM data model containing host, port, and type information."""
 
-    nim_id: str = Field(..., description="Unique identifier for the NIM")
-    host: str = Field(..., description="Host address for the NIM")
+class NIMReplica(BaseModel):
+    """One endpoint serving a NIM."""
+
+    host: str = Field(..., description="Host address for the replica")
     port: int = Field(
-        ..., ge=1, le=65535, description="Port number for the NIM (1-65535)"
-    )
-    nim_type: str = Field(
-        ...,
-        description="Type of NIM (llm, image_gen, 3d, asr, tts, studio_voice, document)",
+        ..., ge=1, le=65535, description="Port number for the replica (1-65535)"
     )
 
-    model_config = {
-        "json_encoders": {
-            # Ensure proper JSON serialization
-        }
-    }
-
 
 class NIMDataUpdate(BaseModel):
     """Model for updating NIM data."""
@@ -42,72 +45,296 @@ class NIMDataUpdate(BaseModel):
         ...,
         description="Type of NIM (llm, image_gen, 3d, asr, tts, studio_voice, document)",
     )
+    max_connections: Optional[int] = Field(
+        default=None, ge=1, description="Max upstream connections for this NIM"
+    )
+    max_keepalive_connections: Optional[int] = Field(
+        default=None, ge=0, description="Max idle keep-alive connections to keep open"
+    )
+    keepalive_expiry: Optional[float] = Field(
+        default=None, gt=0, description="Seconds an idle connection is kept alive"
+    )
+    max_concurrency: Optional[int] = Field(
+        default=None, ge=1, description="Max requests running on each replica at once"
+    )
+    max_queue_size: Optional[int] = Field(
+        default=None, ge=0, description="Max requests waiting for a free slot"
+    )
+    queue_timeout: Optional[float] = Field(
+        default=None, gt=0, description="Seconds a request may wait for a slot"
+    )
+    replicas: List[NIMReplica] = Field(
+        default_factory=list,
+        description="Additional endpoints serving the same model as host/port",
+    )
+
+
+class NIMData(NIMDataUpdate):
+    """NIM data model: the settings of NIMDataUpdate plus the NIM's ID."""
+
+    nim_id: str = Field(..., description="Unique identifier for the NIM")
+
+    model_config = {
+        "json_encoders": {
+            # Ensure proper JSON serialization
+        }
+    }
+
+    def get_replicas(self) -> List[NIMReplica]:
+        """Get every endpoint serving this NIM, starting with host/port."""
+        replicas = [NIMReplica(host=self.host, port=self.port)]
+        for replica in self.replicas:
+            if replica not in replicas:
+                replicas.append(replica)
+        return replicas
 
 
 class RedisNIMManager:
-    """Redis-based NIM data manager."""
+    """
+    Redis-based NIM data manager using the asyncio client.
+
+    Reads are served from a process-local cache while the invalidation
+    listener is subscribed. Every write publishes the NIM ID on
+    NIM_CONFIG_CHANNEL, so all API workers drop their copy; without the
+    listener (Celery workers, scripts) every read goes to Redis.
+    """
 
     def __init__(self, redis_url: str = None):
-        """Initialize Redis connection."""
-        if redis_url is None:
-            # Use environment variable or default to localhost for development
-            redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        """
+        Initialize Redis connection.
 
-        self.redis_client = redis.from_url(redis_url, decode_responses=True)
+        Args:
+            redis_url: Optional Redis URL; by default the process-wide
+                asyncio client and pool are shared
+        """
+        if redis_url is None:
+            self.redis_client = get_async_redis_client()
+        else:
+            self.redis_client = aioredis.Redis(
+                connection_pool=create_async_redis_pool(redis_url)
+            )
         self.key_prefix = "nim:"
+        self.cache_ttl = NIM_CONFIG_CACHE_TTL
+        # nim_id -> (expires_at, config or None when not configured)
+        self._cache: Dict[str, Tuple[float, Optional[NIMData]]] = {}
+        # Bumped on every invalidation so reads that raced one are not cached
+        self._generation = 0
+        self._listening = False
+        self._ids_backfilled = False
 
     def _get_key(self, nim_id: str) -> str:
         """Generate Redis key for NIM data."""
         return f"{self.key_prefix}{nim_id}"
 
-    def set_nim_data(self, nim_id: str, host: str, port: int, nim_type: str) -> bool:
-        """Set NIM data in Redis."""
+    def invalidate(self, nim_id: Optional[str] = None) -> None:
+        """Drop one NIM, or every NIM, from the local cache."""
+        self._generation += 1
+        if nim_id is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(nim_id, None)
+
+    @property
+    def generation(self) -> int:
+        """Invalidation counter; changes whenever any cached config is dropped."""
+        return self._generation
+
+    @property
+    def caching(self) -> bool:
+        """Whether the invalidation listener is keeping the cache coherent."""
+        return self._listening
+
+    async def publish_invalidation(self, nim_id: Optional[str] = None) -> None:
+        """
+        Invalidate a NIM, or every NIM, locally and in every other worker.
+
+        Also used for settings that state derived from NIM configs depends
+        on, such as the NVIDIA API key.
+
+        Args:
+            nim_id: The changed NIM, or None for all of them
+        """
+        self.invalidate(nim_id)
         try:
-            nim_data = NIMData(nim_id=nim_id, host=host, port=port, nim_type=nim_type)
+            await self.redis_client.publish(NIM_CONFIG_CHANNEL, nim_id or "")
+        except Exception as e:
+            logger.warning(
+                f"Failed to publish NIM config change for {nim_id or 'all NIMs'}: {e}"
+            )
+
+    async def _load_nim_data(self, nim_id: str) -> Optional[NIMData]:
+        """Read NIM data from Redis, bypassing the cache."""
+        data = await self.redis_client.get(self._get_key(nim_id))
+        if data:
+            return NIMData(**json.loads(data))
+        return None
+
+    async def set_nim_data(
+        self, nim_id: str, host: str, port: int, nim_type: str, **settings: Any
+    ) -> bool:
+        """Set NIM data in Redis, including optional settings such as pool limits."""
+        try:
+            nim_data = NIMData(
+                nim_id=nim_id, host=host, port=port, nim_type=nim_type, **settings
+            )
             key = self._get_key(nim_id)
-            self.redis_client.set(key, nim_data.model_dump_json())
+            await self.redis_client.set(key, nim_data.model_dump_json())
+            await self.redis_client.sadd(NIM_IDS_KEY, nim_id)
+            await self.publish_invalidation(nim_id)
             logger.info(f"Set NIM data for {nim_id}: {host}:{port} (type: {nim_type})")
             return True
         except Exception as e:
             logger.error(f"Failed to set NIM data for {nim_id}: {e}")
             return False
 
-    def get_nim_data(self, nim_id: str) -> Optional[NIMData]:
-        """Get NIM data from Redis."""
+    async def get_nim_data(self, nim_id: str) -> Optional[NIMData]:
+        """
+        Get NIM data, from the local cache when it is being kept coherent.
+
+        The returned object may be shared with other requests; do not modify it.
+        """
         try:
-            key = self._get_key(nim_id)
-            data = self.redis_client.get(key)
-            if data:
-                nim_data_dict = json.loads(data)
-                return NIMData(**nim_data_dict)
-            return None
+            if self._listening:
+                entry = self._cache.get(nim_id)
+                if entry is not None and entry[0] > time.monotonic():
+                    return entry[1]
+
+            generation = self._generation
+            nim_data = await self._load_nim_data(nim_id)
+            if self._listening and generation == self._generation:
+                self._cache[nim_id] = (time.monotonic() + self.cache_ttl, nim_data)
+            return nim_data
         except Exception as e:
             logger.error(f"Failed to get NIM data for {nim_id}: {e}")
             return None
 
-    def delete_nim_data(self, nim_id: str) -> bool:
+    async def get_all_nim_data(self) -> List[NIMData]:
+        """Get every configured NIM with a single MGET."""
+        try:
+            nim_ids = await self.list_nim_ids()
+            if not nim_ids:
+                return []
+            values = await self.redis_client.mget(
+                [self._get_key(nim_id) for nim_id in nim_ids]
+            )
+            return [NIMData(**json.loads(data)) for data in values if data]
+        except Exception as e:
+            logger.error(f"Failed to get all NIM data: {e}")
+            return []
+
+    async def add_replica(self, nim_id: str, host: str, port: int) -> bool:
+        """Add a replica endpoint to an existing NIM."""
+        try:
+            nim_data = await self._load_nim_data(nim_id)
+            if nim_data is None:
+                return False
+            replica = NIMReplica(host=host, port=port)
+            if replica not in nim_data.get_replicas():
+                nim_data.replicas.append(replica)
+                await self.redis_client.set(
+                    self._get_key(nim_id), nim_data.model_dump_json()
+                )
+                await self.publish_invalidation(nim_id)
+            logger.info(f"Added replica {host}:{port} to NIM {nim_id}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to add replica for {nim_id}: {e}")
+            return False
+
+    async def remove_replica(self, nim_id: str, host: str, port: int) -> bool:
+        """Remove a replica endpoint from a NIM; host/port itself cannot be removed."""
+        try:
+            nim_data = await self._load_nim_data(nim_id)
+            if nim_data is None:
+                return False
+            replica = NIMReplica(host=host, port=port)
+            if replica not in nim_data.replicas:
+                return False
+            nim_data.replicas.remove(replica)
+            await self.redis_client.set(
+                self._get_key(nim_id), nim_data.model_dump_json()
+            )
+            await self.publish_invalidation(nim_id)
+            logger.info(f"Removed replica {host}:{port} from NIM {nim_id}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to remove replica for {nim_id}: {e}")
+            return False
+
+    async def delete_nim_data(self, nim_id: str) -> bool:
         """Delete NIM data from Redis."""
         try:
             key = self._get_key(nim_id)
-            result = self.redis_client.delete(key)
+            result = await self.redis_client.delete(key)
+            await self.redis_client.srem(NIM_IDS_KEY, nim_id)
+            await self.publish_invalidation(nim_id)
             logger.info(f"Deleted NIM data for {nim_id}")
             return bool(result)
         except Exception as e:
             logger.error(f"Failed to delete NIM data for {nim_id}: {e}")
             return False
 
-    def list_nim_ids(self) -> list[str]:
+    async def _backfill_nim_ids(self) -> None:
+        """Add NIMs configured before the ID set existed, once per deployment."""
+        if self._ids_backfilled:
+            return
+        if not await self.redis_client.exists(NIM_IDS_BACKFILLED_KEY):
+            nim_ids = [
+                key[len(self.key_prefix) :]
+                async for key in self.redis_client.scan_iter(
+                    match=f"{self.key_prefix}*"
+                )
+            ]
+            if nim_ids:
+                await self.redis_client.sadd(NIM_IDS_KEY, *nim_ids)
+                logger.info(f"Added {len(nim_ids)} NIM IDs to {NIM_IDS_KEY}")
+            await self.redis_client.set(NIM_IDS_BACKFILLED_KEY, "1")
+        self._ids_backfilled = True
+
+    async def list_nim_ids(self) -> list[str]:
         """List all NIM IDs in Redis."""
         try:
-            pattern = f"{self.key_prefix}*"
-            keys = self.redis_client.keys(pattern)
-            # Extract nim_id from keys
-            nim_ids = [key.replace(self.key_prefix, "") for key in keys]
-            return nim_ids
+            await self._backfill_nim_ids()
+            return sorted(await self.redis_client.smembers(NIM_IDS_KEY))
         except Exception as e:
             logger.error(f"Failed to list NIM IDs: {e}")
             return []
 
+    async def listen_for_invalidations(self) -> None:
+        """
+        Keep the local cache coherent until cancelled.
+
+        Run as a background task in each API worker. The cache is only used
+        while subscribed and is cleared whenever the subscription is
+        (re)established, so changes published while disconnected are not missed.
+        """
+        backoff = 1.0
+        while True:
+            pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(NIM_CONFIG_CHANNEL)
+                self.invalidate()
+                self._listening = True
+                backoff = 1.0
+                logger.info("Listening for NIM config changes")
+                while True:
+                    message = await pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        self.invalidate(message["data"] or None)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"NIM config listener disconnected: {e}")
+            finally:
+                self._listening = False
+                self.invalidate()
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
 
 # Global instance for use throughout the application
 nim_manager = RedisNIMManager()
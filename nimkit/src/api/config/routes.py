@@ -1,91 +1,191 @@
 """API routes for NIM configuration."""
 
 import logging
-import yaml
-from pathlib import Path
-from typing import Dict, Any, List
-from fastapi import APIRouter, HTTPException, status
+from typing import Dict, Any, List, Optional
+from fastapi import APIRouter, HTTPException, Query, status
 
-from .nims import NIMData, NIMDataUpdate, nim_manager
+from .catalog import nim_catalog
+from .nims import NIMData, NIMDataUpdate, NIMReplica, nim_manager
+from ..replicas import replica_router
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/nims", tags=["nims"])
 
 
+def merge_nim_data(
+    existing: Optional[NIMData], nim_data: NIMDataUpdate
+) -> Dict[str, Any]:
+    """
+    Apply the fields a client sent on top of the stored config.
+
+    Clients such as the NIM config page only send host, port and type, so
+    settings they leave out (replicas, pool and admission limits) are kept.
+
+    Args:
+        existing: The stored config, or None for a new NIM
+        nim_data: The request body
+
+    Returns:
+        The settings to store, without nim_id
+    """
+    if existing is None:
+        return nim_data.model_dump()
+    return {
+        **existing.model_dump(exclude={"nim_id"}),
+        **nim_data.model_dump(exclude_unset=True),
+    }
+
+
 @router.get("/catalog", response_model=List[Dict[str, Any]])
-async def get_nims_catalog() -> List[Dict[str, Any]]:
+async def get_nims_catalog(
+    type: Optional[str] = Query(None, description="Only NIMs of this type"),
+    tag: Optional[str] = Query(None, description="Only NIMs with this tag"),
+) -> List[Dict[str, Any]]:
     """Get the NIMs catalog from nims.yml file."""
     try:
-        # Get the path to nims.yml relative to this file
-        current_dir = Path(__file__).parent
-        nims_file = current_dir.parent / "nims.yml"
+        return nim_catalog.find(type=type, tag=tag)
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="NIMs catalog file not found",
+        )
+    except Exception as e:
+        logger.error(f"Error reading NIMs catalog: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}",
+        )
 
-        if not nims_file.exists():
+
+@router.get("/catalog/{nim_id:path}", response_model=Dict[str, Any])
+async def get_nim_details(nim_id: str) -> Dict[str, Any]:
+    """Get details for a specific NIM by ID."""
+    try:
+        nim = nim_catalog.get(nim_id)
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="NIMs catalog file not found",
+        )
+    except Exception as e:
+        logger.error(f"Error reading NIM details for {nim_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}",
+        )
+
+    if nim is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"NIM with ID '{nim_id}' not found",
+        )
+    return nim
+
+
+@router.get("/", response_model=Dict[str, Any])
+async def list_nims() -> Dict[str, Any]:
+    """List all configured NIMs with their configuration."""
+    try:
+        nims = await nim_manager.get_all_nim_data()
+        nim_ids = [nim.nim_id for nim in nims]
+        return {
+            "nim_ids": nim_ids,
+            "nims": [nim.model_dump() for nim in nims],
+            "count": len(nim_ids),
+            "status": "success",
+        }
+    except Exception as e:
+        logger.error(f"Error listing NIMs: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}",
+        )
+
+
+@router.get("/replicas/{nim_id:path}", response_model=Dict[str, Any])
+async def get_nim_replicas(nim_id: str) -> Dict[str, Any]:
+    """Get the replica endpoints of a NIM with their routing state."""
+    try:
+        nim_data = await nim_manager.get_nim_data(nim_id)
+        if not nim_data:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail="NIMs catalog file not found",
+                detail=f"NIM data not found for {nim_id}",
             )
 
-        with open(nims_file, "r", encoding="utf-8") as f:
-            nims_data = yaml.safe_load(f)
-
-        return nims_data
+        return {
+            "nim_id": nim_id,
+            "replicas": replica_router.describe(nim_data),
+            "status": "success",
+        }
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error reading NIMs catalog: {e}")
+        logger.error(f"Error getting replicas for {nim_id}: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}",
         )
 
 
-@router.get("/catalog/{nim_id:path}", response_model=Dict[str, Any])
-async def get_nim_details(nim_id: str) -> Dict[str, Any]:
-    """Get details for a specific NIM by ID."""
+@router.post("/replicas/{nim_id:path}", response_model=Dict[str, Any])
+async def add_nim_replica(nim_id: str, replica: NIMReplica) -> Dict[str, Any]:
+    """Add a replica endpoint to an existing NIM."""
     try:
-        # Get the path to nims.yml relative to this file
-        current_dir = Path(__file__).parent
-        nims_file = current_dir.parent / "nims.yml"
-
-        if not nims_file.exists():
+        if not await nim_manager.get_nim_data(nim_id):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail="NIMs catalog file not found",
+                detail=f"NIM data not found for {nim_id}",
             )
 
-        with open(nims_file, "r", encoding="utf-8") as f:
-            nims_data = yaml.safe_load(f)
-
-        # Find the NIM with the matching ID
-        for nim in nims_data:
-            if nim.get("id") == nim_id:
-                return nim
+        if not await nim_manager.add_replica(nim_id, replica.host, replica.port):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to add replica for {nim_id}",
+            )
 
-        # If not found, return 404
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"NIM with ID '{nim_id}' not found",
-        )
+        return {
+            "nim_id": nim_id,
+            **replica.model_dump(),
+            "status": "success",
+            "message": f"Replica {replica.host}:{replica.port} added to {nim_id}",
+        }
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error reading NIM details for {nim_id}: {e}")
+        logger.error(f"Error adding replica for {nim_id}: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}",
         )
 
 
-@router.get("/", response_model=Dict[str, Any])
-async def list_nims() -> Dict[str, Any]:
-    """List all NIM IDs."""
+@router.delete("/replicas/{nim_id:path}", response_model=Dict[str, Any])
+async def remove_nim_replica(
+    nim_id: str,
+    host: str = Query(..., description="Replica host"),
+    port: int = Query(..., ge=1, le=65535, description="Replica port"),
+) -> Dict[str, Any]:
+    """Remove a replica endpoint from a NIM."""
     try:
-        nim_ids = nim_manager.list_nim_ids()
-        return {"nim_ids": nim_ids, "count": len(nim_ids), "status": "success"}
+        if not await nim_manager.remove_replica(nim_id, host, port):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Replica {host}:{port} not found for {nim_id}",
+            )
+
+        return {
+            "nim_id": nim_id,
+            "host": host,
+            "port": port,
+            "status": "success",
+            "message": f"Replica {host}:{port} removed from {nim_id}",
+        }
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error listing NIMs: {e}")
+        logger.error(f"Error removing replica for {nim_id}: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}",
@@ -96,19 +196,13 @@ async def list_nims() -> Dict[str, Any]:
 async def set_nim_data(nim_id: str, nim_data: NIMDataUpdate) -> Dict[str, Any]:
     """Set NIM data for a given NIM ID."""
     try:
-        success = nim_manager.set_nim_data(
-            nim_id=nim_id,
-            host=nim_data.host,
-            port=nim_data.port,
-            nim_type=nim_data.nim_type,
-        )
+        settings = merge_nim_data(await nim_manager.get_nim_data(nim_id), nim_data)
+        success = await nim_manager.set_nim_data(nim_id=nim_id, **settings)
 
         if success:
             return {
                 "nim_id": nim_id,
-                "host": nim_data.host,
-                "port": nim_data.port,
-                "nim_type": nim_data.nim_type,
+                **settings,
                 "status": "success",
                 "message": f"NIM data set successfully for {nim_id}",
             }
@@ -129,7 +223,7 @@ async def set_nim_data(nim_id: str, nim_data: NIMDataUpdate) -> Dict[str, Any]:
 async def get_nim_config(nim_id: str) -> Dict[str, Any]:
     """Get NIM configuration (host and port) for a given NIM ID."""
     try:
-        nim_data = nim_manager.get_nim_data(nim_id)
+        nim_data = await nim_manager.get_nim_data(nim_id)
 
         if nim_data:
             return {
@@ -155,14 +249,11 @@ async def get_nim_config(nim_id: str) -> Dict[str, Any]:
 async def get_nim_data(nim_id: str) -> Dict[str, Any]:
     """Get NIM data for a given NIM ID."""
     try:
-        nim_data = nim_manager.get_nim_data(nim_id)
+        nim_data = await nim_manager.get_nim_data(nim_id)
 
         if nim_data:
             return {
-                "nim_id": nim_data.nim_id,
-                "host": nim_data.host,
-                "port": nim_data.port,
-                "nim_type": nim_data.nim_type,
+                **nim_data.model_dump(),
                 "status": "success",
             }
         else:
@@ -185,26 +276,20 @@ async def update_nim_data(nim_id: str, nim_data: NIMDataUpdate) -> Dict[str, Any
     """Update NIM data for a given NIM ID."""
     try:
         # Check if NIM data exists
-        existing_data = nim_manager.get_nim_data(nim_id)
+        existing_data = await nim_manager.get_nim_data(nim_id)
         if not existing_data:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"NIM data not found for {nim_id}",
             )
 
-        success = nim_manager.set_nim_data(
-            nim_id=nim_id,
-            host=nim_data.host,
-            port=nim_data.port,
-            nim_type=nim_data.nim_type,
-        )
+        settings = merge_nim_data(existing_data, nim_data)
+        success = await nim_manager.set_nim_data(nim_id=nim_id, **settings)
 
         if success:
             return {
                 "nim_id": nim_id,
-                "host": nim_data.host,
-                "port": nim_data.port,
-                "nim_type": nim_data.nim_type,
+                **settings,
                 "status": "success",
                 "message": f"NIM data updated successfully for {nim_id}",
             }
@@ -227,7 +312,7 @@ async def update_nim_data(nim_id: str, nim_data: NIMDataUpdate) -> Dict[str, Any
 async def delete_nim_data(nim_id: str) -> Dict[str, Any]:
     """Delete NIM data for a given NIM ID."""
     try:
-        success = nim_manager.delete_nim_data(nim_id)
+        success = await nim_manager.delete_nim_data(nim_id)
 
         if success:
             return {
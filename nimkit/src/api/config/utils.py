@@ -8,7 +8,7 @@ from .nims import nim_manager
 logger = logging.getLogger(__name__)
 
 
-def get_nim_endpoint(nim_id: str) -> Optional[Tuple[str, int]]:
+async def get_nim_endpoint(nim_id: str) -> Optional[Tuple[str, int]]:
     """
     Get the host and port for a NIM by its ID.
 
@@ -19,7 +19,7 @@ def get_nim_endpoint(nim_id: str) -> Optional[Tuple[str, int]]:
         Tuple of (host, port) if found, None otherwise
     """
     try:
-        nim_data = nim_manager.get_nim_data(nim_id)
+        nim_data = await nim_manager.get_nim_data(nim_id)
         if nim_data:
             return (nim_data.host, nim_data.port)
         return None
@@ -28,7 +28,7 @@ def get_nim_endpoint(nim_id: str) -> Optional[Tuple[str, int]]:
         return None
 
 
-def get_nim_host(nim_id: str) -> Optional[str]:
+async def get_nim_host(nim_id: str) -> Optional[str]:
     """
     Get the host for a NIM by its ID.
 
@@ -39,7 +39,7 @@ def get_nim_host(nim_id: str) -> Optional[str]:
         Host string if found, None otherwise
     """
     try:
-        nim_data = nim_manager.get_nim_data(nim_id)
+        nim_data = await nim_manager.get_nim_data(nim_id)
         if nim_data:
             return nim_data.host
         return None
@@ -48,7 +48,7 @@ def get_nim_host(nim_id: str) -> Optional[str]:
         return None
 
 
-def get_nim_port(nim_id: str) -> Optional[int]:
+async def get_nim_port(nim_id: str) -> Optional[int]:
     """
     Get the port for a NIM by its ID.
 
@@ -59,7 +59,7 @@ def get_nim_port(nim_id: str) -> Optional[int]:
         Port number if found, None otherwise
     """
     try:
-        nim_data = nim_manager.get_nim_data(nim_id)
+        nim_data = await nim_manager.get_nim_data(nim_id)
         if nim_data:
             return nim_data.port
         return None
@@ -68,7 +68,7 @@ def get_nim_port(nim_id: str) -> Optional[int]:
         return None
 
 
-def get_nim_url(nim_id: str, protocol: str = "http") -> Optional[str]:
+async def get_nim_url(nim_id: str, protocol: str = "http") -> Optional[str]:
     """
     Get the full URL for a NIM by its ID.
 
@@ -80,7 +80,7 @@ def get_nim_url(nim_id: str, protocol: str = "http") -> Optional[str]:
         Full URL string if found, None otherwise
     """
     try:
-        endpoint = get_nim_endpoint(nim_id)
+        endpoint = await get_nim_endpoint(nim_id)
         if endpoint:
             host, port = endpoint
             return f"{protocol}://{host}:{port}"
@@ -90,7 +90,7 @@ def get_nim_url(nim_id: str, protocol: str = "http") -> Optional[str]:
         return None
 
 
-def is_nim_available(nim_id: str) -> bool:
+async def is_nim_available(nim_id: str) -> bool:
     """
     Check if NIM data is available for a given NIM ID.
 
@@ -101,7 +101,7 @@ def is_nim_available(nim_id: str) -> bool:
         True if NIM data exists, False otherwise
     """
     try:
-        nim_data = nim_manager.get_nim_data(nim_id)
+        nim_data = await nim_manager.get_nim_data(nim_id)
         return nim_data is not None
     except Exception as e:
         logger.error(f"Error checking NIM availability for {nim_id}: {e}")
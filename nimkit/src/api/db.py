@@ -1,24 +1,299 @@
-"""Database connection management for Redis."""
+"""Database connection management for Redis.
+
+Every Redis client in the process shares one of two connection pools built
+here: a blocking pool for synchronous code (Celery tasks, worker threads and
+functions run through asyncio.to_thread) and an asyncio pool for request
+handlers. Both take their size, timeouts, health checks and retry policy
+from the REDIS_* settings below and export Prometheus metrics for pool
+utilization and command latency.
+"""
 
 import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
 import redis
-from typing import Optional
+import redis.asyncio as aioredis
+from prometheus_client import Counter, Gauge, Histogram
+from redis.asyncio.client import Pipeline as AsyncPipeline
+from redis.asyncio.retry import Retry as AsyncRetry
+from redis.backoff import ExponentialWithJitterBackoff
+from redis.client import Pipeline
+from redis.retry import Retry
+
+# Connections per pool; each process (uvicorn or Celery worker) has its own
+# pools, so size Redis maxclients for workers x (sync + async) x this
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+# Seconds to wait for a free connection before failing the command
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", "5"))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "10"))
+REDIS_SOCKET_CONNECT_TIMEOUT = float(os.getenv("REDIS_SOCKET_CONNECT_TIMEOUT", "5"))
+# Idle connections are pinged before reuse after this many seconds
+REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30"))
+# Retries on connection errors and timeouts, with jittered exponential backoff
+REDIS_RETRY_ATTEMPTS = int(os.getenv("REDIS_RETRY_ATTEMPTS", "3"))
+REDIS_RETRY_BACKOFF_BASE = float(os.getenv("REDIS_RETRY_BACKOFF_BASE", "0.008"))
+REDIS_RETRY_BACKOFF_CAP = float(os.getenv("REDIS_RETRY_BACKOFF_CAP", "0.512"))
+
+POOL_MAX_CONNECTIONS = Gauge(
+    "nimkit_redis_pool_max_connections",
+    "Configured size of the Redis connection pool",
+    ["pool"],
+)
+POOL_CONNECTIONS_IN_USE = Gauge(
+    "nimkit_redis_pool_connections_in_use",
+    "Redis connections currently checked out of the pool",
+    ["pool"],
+)
+POOL_WAIT_SECONDS = Histogram(
+    "nimkit_redis_pool_wait_seconds",
+    "Time spent waiting to check a connection out of the Redis pool",
+    ["pool"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5),
+)
+COMMAND_DURATION_SECONDS = Histogram(
+    "nimkit_redis_command_duration_seconds",
+    "Redis command and pipeline round-trip time, including pool wait",
+    ["pool", "command"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1, 5),
+)
+COMMAND_ERRORS = Counter(
+    "nimkit_redis_command_errors_total",
+    "Redis commands and pipelines that raised",
+    ["pool", "command"],
+)
+
+SYNC_POOL = "sync"
+ASYNC_POOL = "async"
+
+
+def _command_name(args: tuple) -> str:
+    return str(args[0]).upper() if args else "UNKNOWN"
+
+
+@contextmanager
+def _observe(pool: str, command: str) -> Iterator[None]:
+    """Record the latency of a command, and count it if it fails."""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        COMMAND_ERRORS.labels(pool, command).inc()
+        raise
+    finally:
+        COMMAND_DURATION_SECONDS.labels(pool, command).observe(
+            time.perf_counter() - started
+        )
+
+
+class InstrumentedBlockingConnectionPool(redis.BlockingConnectionPool):
+    """Blocking pool that reports checkout wait time and connections in use."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.in_use = 0
+        POOL_MAX_CONNECTIONS.labels(SYNC_POOL).set(self.max_connections)
+
+    def get_connection(self, *args: Any, **kwargs: Any) -> redis.Connection:
+        started = time.perf_counter()
+        connection = super().get_connection(*args, **kwargs)
+        POOL_WAIT_SECONDS.labels(SYNC_POOL).observe(time.perf_counter() - started)
+        self.in_use += 1
+        POOL_CONNECTIONS_IN_USE.labels(SYNC_POOL).set(self.in_use)
+        return connection
+
+    def release(self, connection: redis.Connection) -> None:
+        super().release(connection)
+        self.in_use = max(self.in_use - 1, 0)
+        POOL_CONNECTIONS_IN_USE.labels(SYNC_POOL).set(self.in_use)
+
+
+class InstrumentedAsyncBlockingConnectionPool(aioredis.BlockingConnectionPool):
+    """Asyncio pool that reports checkout wait time and connections in use."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.in_use = 0
+        POOL_MAX_CONNECTIONS.labels(ASYNC_POOL).set(self.max_connections)
+
+    async def get_connection(self, *args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        connection = await super().get_connection(*args, **kwargs)
+        POOL_WAIT_SECONDS.labels(ASYNC_POOL).observe(time.perf_counter() - started)
+        self.in_use += 1
+        POOL_CONNECTIONS_IN_USE.labels(ASYNC_POOL).set(self.in_use)
+        return connection
+
+    async def release(self, connection: Any) -> None:
+        await super().release(connection)
+        self.in_use = max(self.in_use - 1, 0)
+        POOL_CONNECTIONS_IN_USE.labels(ASYNC_POOL).set(self.in_use)
+
+
+class InstrumentedPipeline(Pipeline):
+    """Pipeline that records the latency of each execute()."""
+
+    def execute(self, raise_on_error: bool = True) -> list:
+        with _observe(SYNC_POOL, "MULTI" if self.transaction else "PIPELINE"):
+            return super().execute(raise_on_error)
+
+
+class InstrumentedRedis(redis.Redis):
+    """Synchronous client that records command latency."""
+
+    def execute_command(self, *args: Any, **options: Any) -> Any:
+        with _observe(SYNC_POOL, _command_name(args)):
+            return super().execute_command(*args, **options)
+
+    def pipeline(self, transaction: bool = True, shard_hint: Optional[str] = None):
+        return InstrumentedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+
+class InstrumentedAsyncPipeline(AsyncPipeline):
+    """Asyncio pipeline that records the latency of each execute()."""
+
+    async def execute(self, raise_on_error: bool = True) -> list:
+        with _observe(ASYNC_POOL, "MULTI" if self.is_transaction else "PIPELINE"):
+            return await super().execute(raise_on_error)
+
+
+class InstrumentedAsyncRedis(aioredis.Redis):
+    """Asyncio client that records command latency."""
+
+    async def execute_command(self, *args: Any, **options: Any) -> Any:
+        with _observe(ASYNC_POOL, _command_name(args)):
+            return await super().execute_command(*args, **options)
 
-# Global Redis connection instance
-_redis_client: Optional[redis.Redis] = None
+    def pipeline(self, transaction: bool = True, shard_hint: Optional[str] = None):
+        return InstrumentedAsyncPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+
+# Global pool and client instances
+_pool: Optional[InstrumentedBlockingConnectionPool] = None
+_async_pool: Optional[InstrumentedAsyncBlockingConnectionPool] = None
+_redis_client: Optional[InstrumentedRedis] = None
+_async_redis_client: Optional[InstrumentedAsyncRedis] = None
+
+
+def get_redis_url() -> str:
+    """Get the Redis URL from the environment."""
+    return os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+
+def _connection_kwargs() -> Dict[str, Any]:
+    """Connection settings shared by both pools."""
+    return {
+        # Every client decodes; stored payloads are text (JSON or base64)
+        "decode_responses": True,
+        "max_connections": REDIS_MAX_CONNECTIONS,
+        "timeout": REDIS_POOL_TIMEOUT,
+        "socket_timeout": REDIS_SOCKET_TIMEOUT,
+        "socket_connect_timeout": REDIS_SOCKET_CONNECT_TIMEOUT,
+        "health_check_interval": REDIS_HEALTH_CHECK_INTERVAL,
+    }
+
+
+def _backoff() -> ExponentialWithJitterBackoff:
+    return ExponentialWithJitterBackoff(
+        cap=REDIS_RETRY_BACKOFF_CAP, base=REDIS_RETRY_BACKOFF_BASE
+    )
+
+
+def create_redis_pool(url: Optional[str] = None) -> InstrumentedBlockingConnectionPool:
+    """
+    Create a synchronous connection pool with the configured settings.
+
+    Args:
+        url: Redis URL; defaults to REDIS_URL
+
+    Returns:
+        A new blocking connection pool
+    """
+    return InstrumentedBlockingConnectionPool.from_url(
+        url or get_redis_url(),
+        retry=Retry(_backoff(), REDIS_RETRY_ATTEMPTS),
+        **_connection_kwargs(),
+    )
+
+
+def create_async_redis_pool(
+    url: Optional[str] = None,
+) -> InstrumentedAsyncBlockingConnectionPool:
+    """
+    Create an asyncio connection pool with the configured settings.
+
+    Args:
+        url: Redis URL; defaults to REDIS_URL
+
+    Returns:
+        A new blocking connection pool for redis.asyncio clients
+    """
+    return InstrumentedAsyncBlockingConnectionPool.from_url(
+        url or get_redis_url(),
+        retry=AsyncRetry(_backoff(), REDIS_RETRY_ATTEMPTS),
+        **_connection_kwargs(),
+    )
+
+
+def get_redis_pool() -> InstrumentedBlockingConnectionPool:
+    """Get or create the process-wide synchronous connection pool."""
+    global _pool
+
+    if _pool is None:
+        _pool = create_redis_pool()
+
+    return _pool
+
+
+def get_async_redis_pool() -> InstrumentedAsyncBlockingConnectionPool:
+    """Get or create the process-wide asyncio connection pool."""
+    global _async_pool
+
+    if _async_pool is None:
+        _async_pool = create_async_redis_pool()
+
+    return _async_pool
 
 
 def get_redis_client() -> redis.Redis:
-    """Get or create Redis client instance."""
+    """
+    Get or create the synchronous Redis client instance.
+
+    Only use this outside the event loop: Celery tasks, worker threads and
+    functions run through asyncio.to_thread. Request handlers should use
+    get_async_redis_client so a slow Redis does not block other requests.
+    """
     global _redis_client
 
     if _redis_client is None:
-        redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-        _redis_client = redis.from_url(redis_url, decode_responses=True)
+        _redis_client = InstrumentedRedis(connection_pool=get_redis_pool())
 
     return _redis_client
 
 
+def get_async_redis_client() -> aioredis.Redis:
+    """Get or create the asyncio Redis client instance for request handlers."""
+    global _async_redis_client
+
+    if _async_redis_client is None:
+        _async_redis_client = InstrumentedAsyncRedis(
+            connection_pool=get_async_redis_pool()
+        )
+
+    return _async_redis_client
+
+
+async def disconnect_async_redis() -> None:
+    """Close the asyncio pool's connections on shutdown."""
+    if _async_pool is not None:
+        await _async_pool.disconnect()
+
+
 def get_redis_connection() -> redis.Redis:
     """Alias for get_redis_client for backward compatibility."""
     return get_redis_client()
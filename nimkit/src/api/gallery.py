@@ -1,12 +1,20 @@
 """Gallery API endpoints for displaying inference requests."""
 
+import asyncio
 import logging
 from typing import List, Dict, Any, Optional
 from fastapi import APIRouter, Query, HTTPException, status
 
+from .llm.cursors import decode_cursor, encode_cursor
 from .llm.models import InferenceRequest
-from .db import get_redis_client
-from redis_om import Migrator
+from .llm.projections import parse_fields
+from .llm.search import (
+    build_search_query,
+    search_after,
+    search_inference_requests,
+    search_projections,
+)
+from .persistence import request_persister
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +33,21 @@ async def get_inference_requests(
     nim_ids: Optional[str] = Query(
         default=None, description="Comma-separated list of NIM IDs to filter by"
     ),
+    statuses: Optional[str] = Query(
+        default=None, description="Comma-separated list of statuses to filter by"
+    ),
+    types: Optional[str] = Query(
+        default=None, description="Comma-separated list of request types to filter by"
+    ),
+    fields: str = Query(
+        default="full",
+        description='"full", "summary", or a comma-separated list of fields',
+    ),
+    cursor: Optional[str] = Query(
+        default=None,
+        description="next_cursor of the previous page; pass it empty to start "
+        "cursor pagination",
+    ),
 ) -> Dict[str, Any]:
     """
     Get paginated inference requests with optional filtering.
@@ -32,96 +55,65 @@ async def get_inference_requests(
     Args:
         limit: Maximum number of results to return (1-100)
         offset: Number of results to skip for pagination
-        search: Optional search term to filter by (searches input/output JSON)
+        search: Optional search term to filter by (matches prompt and response
+            text by word prefix)
         nim_ids: Optional comma-separated list of NIM IDs to filter by
+        statuses: Optional comma-separated list of statuses to filter by
+        types: Optional comma-separated list of request types to filter by
+        fields: "full" for complete records, "summary" for the preview
+            fields only, or a comma-separated list of fields to return
+        cursor: Cursor token for keyset pagination; when given, offset is
+            ignored and each page costs the same however deep it is
 
     Returns:
         Dictionary containing the inference requests, pagination info, and metadata
     """
     logger.info(
-        f"Gallery request: limit={limit}, offset={offset}, search='{search}', nim_ids='{nim_ids}'"
+        f"Gallery request: limit={limit}, offset={offset}, search='{search}', nim_ids='{nim_ids}', statuses='{statuses}', types='{types}'"
     )
 
     try:
-        # Create index if it doesn't exist
-        try:
-            Migrator().run()
-            logger.debug("Redis index created/verified successfully")
-        except Exception as e:
-            logger.warning(f"Failed to create Redis index: {e}")
-
-        # Get all inference requests using direct Redis query since redis-om find().all() seems limited
-        logger.debug("Fetching all inference requests from Redis using direct query")
-        redis_client = get_redis_client()
-
-        # Get all InferenceRequest keys
-        pattern = ":nimkit.src.api.llm.models.InferenceRequest:*"
-        keys = redis_client.keys(pattern)
-        # Filter out the index key
-        keys = [key for key in keys if not key.endswith(":index:hash")]
-
-        logger.debug(f"Found {len(keys)} inference request keys in Redis")
-
-        # Load all inference requests
-        all_results = []
-        for key in keys:
-            try:
-                # Get the hash data
-                hash_data = redis_client.hgetall(key)
-                if hash_data:
-                    # Convert bytes to strings
-                    data = {
-                        k.decode("utf-8") if isinstance(k, bytes) else k: (
-                            v.decode("utf-8") if isinstance(v, bytes) else v
-                        )
-                        for k, v in hash_data.items()
-                    }
-
-                    # Create InferenceRequest object from the data
-                    request = InferenceRequest(**data)
-                    all_results.append(request)
-            except Exception as e:
-                logger.warning(f"Failed to load inference request from key {key}: {e}")
-                continue
-
-        # Apply filters in Python
-        filtered_results = []
+        projection = parse_fields(fields)
+        page_cursor = decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-        for request in all_results:
-            # Apply NIM ID filter
-            if nim_ids:
-                nim_id_list = [
-                    nim_id.strip() for nim_id in nim_ids.split(",") if nim_id.strip()
-                ]
-                if nim_id_list and request.nim_id not in nim_id_list:
-                    continue
-
-            # Apply search filter
-            if search:
-                search_term = search.lower()
-                # Search in input_json and output_json fields
-                input_matches = search_term in (request.input_json or "").lower()
-                output_matches = search_term in (request.output_json or "").lower()
-                if not input_matches and not output_matches:
-                    continue
-
-            filtered_results.append(request)
-
-        logger.debug(f"After filtering: {len(filtered_results)} results")
+    try:
+        # Filtering, sorting, counting and paging all run inside RediSearch
+        query = build_search_query(
+            search,
+            nim_ids.split(",") if nim_ids else None,
+            statuses.split(",") if statuses else None,
+            types.split(",") if types else None,
+        )
+        logger.debug(f"Gallery search query: {query}")
 
-        # Sort by date_created descending (most recent first) in Python
-        filtered_results.sort(key=lambda x: x.date_created, reverse=True)
+        next_cursor = None
+        if cursor is not None:
+            # Keyset pagination: the cursor becomes a created_ts range filter
+            total_count, page, next_cursor = await asyncio.to_thread(
+                search_after, query, page_cursor, limit=limit, fields=projection
+            )
+        elif projection is not None:
+            total_count, page = await asyncio.to_thread(
+                search_projections, query, projection, offset=offset, limit=limit
+            )
+        else:
+            total_count, page = await asyncio.to_thread(
+                search_inference_requests, query, offset=offset, limit=limit
+            )
 
-        # Apply pagination manually since redis-om doesn't have built-in pagination
-        total_count = len(filtered_results)
-        paginated_results = filtered_results[offset : offset + limit]
+        if projection is not None:
+            # Only the projected fields are read; no records are constructed
+            serialized_results, paginated_results = page, []
+        else:
+            serialized_results, paginated_results = [], page
 
         logger.info(
-            f"Query returned {total_count} total results, returning {len(paginated_results)} results"
+            f"Query returned {total_count} total results, returning {len(page)} results"
         )
 
         # Convert InferenceRequest objects to dictionaries for JSON serialization
-        serialized_results = []
         for request in paginated_results:
             try:
                 # Get the basic request data
@@ -139,7 +131,7 @@ async def get_inference_requests(
 
                 # Add parsed input/output data
                 try:
-                    request_data["input_data"] = request.get_input()
+                    request_data["input_data"] = request.get_input(blobs="url")
                 except Exception as e:
                     logger.warning(
                         f"Failed to parse input data for request {request.request_id}: {e}"
@@ -147,7 +139,7 @@ async def get_inference_requests(
                     request_data["input_data"] = {}
 
                 try:
-                    request_data["output_data"] = request.get_output()
+                    request_data["output_data"] = request.get_output(blobs="url")
                 except Exception as e:
                     logger.warning(
                         f"Failed to parse output data for request {request.request_id}: {e}"
@@ -169,14 +161,20 @@ async def get_inference_requests(
                 continue
 
         # Calculate pagination metadata
-        has_next = offset + limit < total_count
-        has_previous = offset > 0
-        total_pages = (total_count + limit - 1) // limit  # Ceiling division
-        current_page = (offset // limit) + 1
-
-        response_data = {
-            "results": serialized_results,
-            "pagination": {
+        if cursor is not None:
+            # total_count is only known on the first page of a cursor walk
+            pagination = {
+                "total_count": total_count,
+                "limit": limit,
+                "has_next": next_cursor is not None,
+                "next_cursor": encode_cursor(next_cursor) if next_cursor else None,
+            }
+        else:
+            has_next = offset + limit < total_count
+            has_previous = offset > 0
+            total_pages = (total_count + limit - 1) // limit  # Ceiling division
+            current_page = (offset // limit) + 1
+            pagination = {
                 "total_count": total_count,
                 "limit": limit,
                 "offset": offset,
@@ -184,10 +182,17 @@ async def get_inference_requests(
                 "total_pages": total_pages,
                 "has_next": has_next,
                 "has_previous": has_previous,
-            },
+            }
+
+        response_data = {
+            "results": serialized_results,
+            "pagination": pagination,
             "filters": {
                 "search": search,
                 "nim_ids": nim_ids,
+                "statuses": statuses,
+                "types": types,
+                "fields": fields,
             },
             "status": "success",
         }
@@ -221,7 +226,12 @@ async def delete_inference_request(request_id: str) -> Dict[str, Any]:
     try:
         # Use the clean model method to delete the request
         logger.debug(f"Attempting to delete inference request {request_id}")
-        success = InferenceRequest.delete_by_request_id(request_id)
+        # Drop queued saves first so a flush cannot recreate the record
+        discarded = request_persister.discard(request_id)
+        deleted = await asyncio.to_thread(
+            InferenceRequest.delete_by_request_id, request_id
+        )
+        success = deleted or discarded
 
         if success:
             logger.info(f"Successfully deleted inference request {request_id}")
@@ -0,0 +1,145 @@
+"""Pooled, long-lived HTTP clients for upstream NIM and NVIDIA API calls."""
+
+import logging
+import os
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from .config.nims import NIMData
+
+logger = logging.getLogger(__name__)
+
+# Defaults for upstreams that do not configure their own pool limits
+DEFAULT_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "100"))
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = int(
+    os.getenv("UPSTREAM_MAX_KEEPALIVE_CONNECTIONS", "20")
+)
+DEFAULT_KEEPALIVE_EXPIRY = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", "30"))
+HTTP2_ENABLED = os.getenv("UPSTREAM_HTTP2", "true").lower() == "true"
+
+try:
+    import h2  # noqa: F401
+
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+
+def get_upstream_key(url: str) -> str:
+    """
+    Get the origin (scheme://host:port) that identifies an upstream.
+
+    Args:
+        url: Any URL on the upstream, e.g. a full chat completions endpoint
+
+    Returns:
+        The normalized origin of the URL
+    """
+    parts = urlsplit(url)
+    scheme = parts.scheme or "http"
+    port = parts.port or (443 if scheme == "https" else 80)
+    return f"{scheme}://{parts.hostname}:{port}"
+
+
+def get_pool_limits(nim_data: Optional[NIMData] = None) -> httpx.Limits:
+    """
+    Build connection pool limits for an upstream.
+
+    Args:
+        nim_data: Optional NIM configuration with per-NIM pool overrides
+
+    Returns:
+        httpx.Limits for the upstream's client
+    """
+    max_connections = DEFAULT_MAX_CONNECTIONS
+    max_keepalive_connections = DEFAULT_MAX_KEEPALIVE_CONNECTIONS
+    keepalive_expiry = DEFAULT_KEEPALIVE_EXPIRY
+
+    if nim_data is not None:
+        if nim_data.max_connections is not None:
+            max_connections = nim_data.max_connections
+        if nim_data.max_keepalive_connections is not None:
+            max_keepalive_connections = nim_data.max_keepalive_connections
+        if nim_data.keepalive_expiry is not None:
+            keepalive_expiry = nim_data.keepalive_expiry
+
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=min(max_keepalive_connections, max_connections),
+        keepalive_expiry=keepalive_expiry,
+    )
+
+
+class UpstreamClientRegistry:
+    """
+    Registry of shared httpx.AsyncClient instances.
+
+    Clients are keyed by upstream origin and pool limits, so NIMs served
+    from the same host:port with different limits each keep their own
+    client instead of replacing each other's. A client left behind by a
+    limit change stays registered: its in-flight streams finish, and its
+    idle connections close after keepalive_expiry. There is one such client
+    per distinct limits ever configured for an origin, and all of them are
+    closed on shutdown.
+    """
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        # (origin, max_connections, max_keepalive_connections, keepalive_expiry)
+        self._clients: Dict[
+            Tuple[str, Optional[int], Optional[int], Optional[float]],
+            httpx.AsyncClient,
+        ] = {}
+
+    def get_client(
+        self, url: str, nim_data: Optional[NIMData] = None
+    ) -> httpx.AsyncClient:
+        """
+        Get the shared client for the upstream serving the given URL.
+
+        Args:
+            url: The endpoint URL that will be requested
+            nim_data: Optional NIM configuration with per-NIM pool limits
+
+        Returns:
+            A long-lived httpx.AsyncClient with keep-alive enabled
+        """
+        origin = get_upstream_key(url)
+        limits = get_pool_limits(nim_data)
+        key = (
+            origin,
+            limits.max_connections,
+            limits.max_keepalive_connections,
+            limits.keepalive_expiry,
+        )
+
+        client = self._clients.get(key)
+        if client is not None and not client.is_closed:
+            return client
+
+        http2 = HTTP2_ENABLED and _HTTP2_AVAILABLE and origin.startswith("https://")
+        client = httpx.AsyncClient(limits=limits, http2=http2, timeout=120.0)
+        self._clients[key] = client
+        logger.info(
+            f"Created upstream client for {origin} (http2={http2}, "
+            f"max_connections={limits.max_connections}, "
+            f"max_keepalive_connections={limits.max_keepalive_connections})"
+        )
+        return client
+
+    async def aclose(self) -> None:
+        """Close every client owned by the registry."""
+        clients = list(self._clients.values())
+        self._clients = {}
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Failed to close upstream client: {e}")
+        logger.info(f"Closed {len(clients)} upstream HTTP clients")
+
+
+# Global instance for use throughout the application
+client_registry = UpstreamClientRegistry()
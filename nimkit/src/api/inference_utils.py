@@ -1,5 +1,6 @@
 """Inference utility functions for different NIM types."""
 
+import asyncio
 import json
 import logging
 import os
@@ -9,7 +10,9 @@ from typing import Dict, Any, Optional
 from fastapi import HTTPException, status
 
 from .llm.models import InferenceRequest
-from .utils import get_nvidia_api_headers, validate_nim_exists
+from .persistence import request_persister
+from .replicas import replica_router
+from .route_table import route_table
 
 logger = logging.getLogger(__name__)
 
@@ -91,6 +94,7 @@ async def process_glb_artifacts(response_data: Dict[str, Any], request_id: str)
         )
 
 
+@replica_router.dispatched
 async def perform_image_generation_inference(
     nim_id: str,
     request_data: Dict[str, Any],
@@ -112,29 +116,13 @@ async def perform_image_generation_inference(
         HTTPException: If inference fails
     """
     try:
-        # Validate NIM exists and get configuration
-        nim_data, nim_metadata = validate_nim_exists(nim_id)
+        # Resolve the compiled route for the NIM
+        route = await route_table.get(nim_id, use_nvidia_api)
+        nim_data, nim_metadata = route.nim_data, route.metadata
 
-        if use_nvidia_api:
-            # Use NVIDIA API endpoint
-            invoke_url = nim_metadata.get("invoke_url")
-            if not invoke_url:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"NVIDIA API invoke_url not found for NIM {nim_id}",
-                )
-
-            # For NVIDIA API, the invoke_url is already the complete endpoint
-            # No need to append additional paths
-
-            headers = get_nvidia_api_headers()
-        else:
-            # Use the local NIM endpoint from Redis configuration
-            base_url = f"http://{nim_data.host}:{nim_data.port}"
-            invoke_url = f"{base_url}/v1/infer"
-
-            # Prepare headers for local NIM
-            headers = {"accept": "application/json", "content-type": "application/json"}
+        # The invoke_url, or the NIM type's endpoint on a local replica
+        invoke_url = route.endpoint()
+        headers = route.headers()
 
         logger.info(f"Performing image generation inference for {nim_id}")
         logger.debug(f"NIM type: {nim_data.nim_type}")
@@ -171,7 +159,7 @@ async def perform_image_generation_inference(
                 }
             )
             inference_request.update_timestamp()
-            inference_request.save()
+            request_persister.save(inference_request)
 
             raise HTTPException(
                 status_code=status.HTTP_502_BAD_GATEWAY, detail=error_msg
@@ -188,10 +176,10 @@ async def perform_image_generation_inference(
         # Update inference request with success
         logger.debug("Updating InferenceRequest with success status")
         inference_request.status = "completed"
-        inference_request.set_output(response_data)
+        await asyncio.to_thread(inference_request.set_output, response_data)
         inference_request.update_timestamp()
         try:
-            inference_request.save()
+            request_persister.save(inference_request)
             logger.debug("InferenceRequest updated and saved successfully")
         except Exception as save_error:
             logger.error(f"Failed to save updated InferenceRequest: {save_error}")
@@ -210,7 +198,7 @@ async def perform_image_generation_inference(
             {"error": "Request timeout", "nim_id": nim_id, "timeout_seconds": 300}
         )
         inference_request.update_timestamp()
-        inference_request.save()
+        request_persister.save(inference_request)
 
         raise HTTPException(
             status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=error_msg
@@ -226,7 +214,7 @@ async def perform_image_generation_inference(
             {"error": str(e), "nim_id": nim_id, "error_type": "RequestException"}
         )
         inference_request.update_timestamp()
-        inference_request.save()
+        request_persister.save(inference_request)
 
         raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=error_msg)
 
@@ -240,13 +228,14 @@ async def perform_image_generation_inference(
             {"error": str(e), "nim_id": nim_id, "error_type": "UnexpectedError"}
         )
         inference_request.update_timestamp()
-        inference_request.save()
+        request_persister.save(inference_request)
 
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=error_msg
         )
 
 
+@replica_router.dispatched
 async def perform_3d_generation_inference(
     nim_id: str,
     request_data: Dict[str, Any],
@@ -269,26 +258,13 @@ async def perform_3d_generation_inference(
         HTTPException: If inference fails
     """
     try:
-        # Validate NIM exists and get configuration
-        nim_data, nim_metadata = validate_nim_exists(nim_id)
-
-        if use_nvidia_api:
-            # Use NVIDIA API endpoint
-            invoke_url = nim_metadata.get("invoke_url")
-            if not invoke_url:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"NVIDIA API invoke_url not found for NIM {nim_id}",
-                )
-
-            headers = get_nvidia_api_headers()
-        else:
-            # Use the local NIM endpoint from Redis configuration
-            base_url = f"http://{nim_data.host}:{nim_data.port}"
-            invoke_url = f"{base_url}/v1/infer"
+        # Resolve the compiled route for the NIM
+        route = await route_table.get(nim_id, use_nvidia_api)
+        nim_data, nim_metadata = route.nim_data, route.metadata
 
-            # Prepare headers for local NIM
-            headers = {"accept": "application/json", "content-type": "application/json"}
+        # The invoke_url, or the NIM type's endpoint on a local replica
+        invoke_url = route.endpoint()
+        headers = route.headers()
 
         logger.info(f"Performing 3D model generation inference for {nim_id}")
         logger.debug(f"NIM type: {nim_data.nim_type}")
@@ -331,7 +307,7 @@ async def perform_3d_generation_inference(
                 }
             )
             inference_request.update_timestamp()
-            inference_request.save()
+            request_persister.save(inference_request)
 
             raise HTTPException(
                 status_code=status.HTTP_502_BAD_GATEWAY, detail=error_msg
@@ -353,10 +329,10 @@ async def perform_3d_generation_inference(
         # Update inference request with success
         logger.debug("Updating InferenceRequest with success status")
         inference_request.status = "completed"
-        inference_request.set_output(response_data)
+        await asyncio.to_thread(inference_request.set_output, response_data)
         inference_request.update_timestamp()
         try:
-            inference_request.save()
+            request_persister.save(inference_request)
             logger.debug("InferenceRequest updated and saved successfully")
         except Exception as save_error:
             logger.error(f"Failed to save updated InferenceRequest: {save_error}")
@@ -375,7 +351,7 @@ async def perform_3d_generation_inference(
             {"error": "Request timeout", "nim_id": nim_id, "timeout_seconds": 600}
         )
         inference_request.update_timestamp()
-        inference_request.save()
+        request_persister.save(inference_request)
 
         raise HTTPException(
             status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=error_msg
@@ -391,7 +367,7 @@ async def perform_3d_generation_inference(
             {"error": str(e), "nim_id": nim_id, "error_type": "RequestException"}
         )
         inference_request.update_timestamp()
-        inference_request.save()
+        request_persister.save(inference_request)
 
         raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=error_msg)
 
@@ -405,13 +381,14 @@ async def perform_3d_generation_inference(
             {"error": str(e), "nim_id": nim_id, "error_type": "UnexpectedError"}
         )
         inference_request.update_timestamp()
-        inference_request.save()
+        request_persister.save(inference_request)
 
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=error_msg
         )
 
 
+@replica_router.dispatched
 async def perform_asr_inference(
     nim_id: str,
     request_data: Dict[str, Any],
@@ -434,8 +411,9 @@ async def perform_asr_inference(
         HTTPException: If inference fails
     """
     try:
-        # Validate NIM exists and get configuration
-        nim_data, nim_metadata = validate_nim_exists(nim_id)
+        # Resolve the compiled route for the NIM
+        route = await route_table.get(nim_id, use_nvidia_api)
+        nim_data, nim_metadata = route.nim_data, route.metadata
 
         # Get audio file path from request data
         audio_file_path = request_data.get("audio_file_path")
@@ -474,10 +452,8 @@ async def perform_asr_inference(
                     detail="RIVA client library not available",
                 )
 
-            # Get NVIDIA API key
-            from nimkit.src.api.utils import get_nvidia_api_key
-
-            api_key = get_nvidia_api_key()
+            # NVIDIA API key, compiled into the route
+            api_key = route.api_key
 
             if not api_key:
                 raise HTTPException(
@@ -718,7 +694,8 @@ async def perform_asr_inference(
                 )
 
             # Configure RIVA client for local NIM
-            riva_uri = f"{nim_data.host}:50051"  # gRPC port
+            replica = replica_router.choose(nim_id, nim_data)
+            riva_uri = f"{replica.host}:50051"  # gRPC port
             auth = riva.client.Auth(uri=riva_uri, use_ssl=False)
 
             logger.info(f"Connecting to local RIVA service at: {riva_uri}")
@@ -933,10 +910,10 @@ async def perform_asr_inference(
         # Update inference request with success
         logger.debug("Updating InferenceRequest with success status")
         inference_request.status = "completed"
-        inference_request.set_output(response_data)
+        await asyncio.to_thread(inference_request.set_output, response_data)
         inference_request.update_timestamp()
         try:
-            inference_request.save()
+            request_persister.save(inference_request)
             logger.debug("InferenceRequest updated and saved successfully")
         except Exception as save_error:
             logger.error(f"Failed to save updated InferenceRequest: {save_error}")
@@ -958,13 +935,14 @@ async def perform_asr_inference(
             {"error": str(e), "nim_id": nim_id, "error_type": "UnexpectedError"}
         )
         inference_request.update_timestamp()
-        inference_request.save()
+        request_persister.save(inference_request)
 
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=error_msg
         )
 
 
+@replica_router.dispatched
 async def perform_speech_enhancement_inference(
     nim_id: str,
     request_data: Dict[str, Any],
@@ -989,8 +967,9 @@ async def perform_speech_enhancement_inference(
     import os  # Import os at the top of the function
 
     try:
-        # Validate NIM exists and get configuration
-        nim_data, nim_metadata = validate_nim_exists(nim_id)
+        # Resolve the compiled route for the NIM
+        route = await route_table.get(nim_id, use_nvidia_api)
+        nim_data, nim_metadata = route.nim_data, route.metadata
 
         # Get audio file path from request data
         audio_file_path = request_data.get("audio_file_path")
@@ -1070,7 +1049,7 @@ async def perform_speech_enhancement_inference(
         # Update inference request with output path
         inference_request.output_audio_path = output_path
         inference_request.update_timestamp()
-        inference_request.save()
+        request_persister.save(inference_request)
 
         # Handle NVIDIA API vs Local NIM differently
         if use_nvidia_api:
@@ -1154,8 +1133,8 @@ async def perform_speech_enhancement_inference(
                         "output_file": output_path,
                         "api_type": "nvidia_cloud",
                     }
-                    inference_request.set_output(output_data)
-                    inference_request.save()
+                    await asyncio.to_thread(inference_request.set_output, output_data)
+                    request_persister.save(inference_request)
 
                     logger.info(
                         f"NVIDIA Cloud speech enhancement inference completed successfully for request {request_id}"
@@ -1174,7 +1153,7 @@ async def perform_speech_enhancement_inference(
                         "grpc_details": grpc_error.details(),
                     }
                 )
-                inference_request.save()
+                request_persister.save(inference_request)
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     detail=f"gRPC error during NVIDIA Cloud Studio Voice inference: {str(grpc_error)}",
@@ -1186,7 +1165,7 @@ async def perform_speech_enhancement_inference(
                 inference_request.set_error(
                     {"error": str(e), "error_type": type(e).__name__}
                 )
-                inference_request.save()
+                request_persister.save(inference_request)
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     detail=f"Unexpected error during NVIDIA Cloud Studio Voice inference: {str(e)}",
@@ -1196,7 +1175,7 @@ async def perform_speech_enhancement_inference(
             logger.info("Using local NIM for speech enhancement")
 
             # Get NIM endpoint - hardcode port 8001 for Studio Voice gRPC
-            target_host = nim_data.host
+            target_host = replica_router.choose(nim_id, nim_data).host
             target_port = 8001  # Hardcoded for Studio Voice gRPC
             target = f"{target_host}:{target_port}"
 
@@ -1262,8 +1241,8 @@ async def perform_speech_enhancement_inference(
                         "output_file": output_path,
                         "api_type": "local_nim",
                     }
-                    inference_request.set_output(output_data)
-                    inference_request.save()
+                    await asyncio.to_thread(inference_request.set_output, output_data)
+                    request_persister.save(inference_request)
 
                     logger.info(
                         f"Speech enhancement inference completed successfully for request {request_id}"
@@ -1280,7 +1259,7 @@ async def perform_speech_enhancement_inference(
                 inference_request.set_error(
                     {"error": error_msg, "grpc_code": grpc_error.code().name}
                 )
-                inference_request.save()
+                request_persister.save(inference_request)
 
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=error_msg
@@ -1301,7 +1280,7 @@ async def perform_speech_enhancement_inference(
         inference_request.status = "error"
         inference_request.update_timestamp()
         inference_request.set_error({"error": str(e), "error_type": type(e).__name__})
-        inference_request.save()
+        request_persister.save(inference_request)
 
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1309,6 +1288,7 @@ async def perform_speech_enhancement_inference(
         )
 
 
+@replica_router.dispatched
 async def perform_tts_inference(
     nim_id: str,
     request_data: Dict[str, Any],
@@ -1331,8 +1311,9 @@ async def perform_tts_inference(
         HTTPException: If inference fails
     """
     try:
-        # Validate NIM exists and get configuration
-        nim_data, nim_metadata = validate_nim_exists(nim_id)
+        # Resolve the compiled route for the NIM
+        route = await route_table.get(nim_id, use_nvidia_api)
+        nim_data, nim_metadata = route.nim_data, route.metadata
 
         # Get request parameters
         text = request_data.get("text", "")
@@ -1340,23 +1321,9 @@ async def perform_tts_inference(
         voice = request_data.get("voice")
         sample_rate_hz = request_data.get("sample_rate_hz", 22050)
 
-        if use_nvidia_api:
-            # Use NVIDIA API endpoint
-            invoke_url = nim_metadata.get("invoke_url")
-            if not invoke_url:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"NVIDIA API invoke_url not found for NIM {nim_id}",
-                )
-
-            headers = get_nvidia_api_headers()
-        else:
-            # Use the local NIM endpoint from Redis configuration
-            base_url = f"http://{nim_data.host}:{nim_data.port}"
-            invoke_url = f"{base_url}/v1/audio/synthesize"
-
-            # Prepare headers for local NIM
-            headers = {"accept": "audio/wav"}
+        # The invoke_url, or the NIM type's endpoint on a local replica
+        invoke_url = route.endpoint()
+        headers = route.headers()
 
         logger.info(f"Performing TTS inference for {nim_id}")
         logger.debug(f"NIM type: {nim_data.nim_type}")
@@ -1403,7 +1370,7 @@ async def perform_tts_inference(
                 }
             )
             inference_request.update_timestamp()
-            inference_request.save()
+            request_persister.save(inference_request)
 
             raise HTTPException(
                 status_code=status.HTTP_502_BAD_GATEWAY, detail=error_msg
@@ -1447,10 +1414,10 @@ async def perform_tts_inference(
         # Update inference request with success
         logger.debug("Updating InferenceRequest with success status")
         inference_request.status = "completed"
-        inference_request.set_output(response_data)
+        await asyncio.to_thread(inference_request.set_output, response_data)
         inference_request.update_timestamp()
         try:
-            inference_request.save()
+            request_persister.save(inference_request)
             logger.debug("InferenceRequest updated and saved successfully")
         except Exception as save_error:
             logger.error(f"Failed to save updated InferenceRequest: {save_error}")
@@ -1469,7 +1436,7 @@ async def perform_tts_inference(
             {"error": "Request timeout", "nim_id": nim_id, "timeout_seconds": 120}
         )
         inference_request.update_timestamp()
-        inference_request.save()
+        request_persister.save(inference_request)
 
         raise HTTPException(
             status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=error_msg
@@ -1485,7 +1452,7 @@ async def perform_tts_inference(
             {"error": str(e), "nim_id": nim_id, "error_type": "RequestException"}
         )
         inference_request.update_timestamp()
-        inference_request.save()
+        request_persister.save(inference_request)
 
         raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=error_msg)
 
@@ -1503,13 +1470,14 @@ async def perform_tts_inference(
             {"error": str(e), "nim_id": nim_id, "error_type": "UnexpectedError"}
         )
         inference_request.update_timestamp()
-        inference_request.save()
+        request_persister.save(inference_request)
 
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=error_msg
         )
 
 
+@replica_router.dispatched
 async def perform_paddleocr_inference(
     nim_id: str,
     request_data: Dict[str, Any],
@@ -1539,26 +1507,13 @@ async def perform_paddleocr_inference(
             process_paddleocr_response,
         )
 
-        # Validate NIM exists and get configuration
-        nim_data, nim_metadata = validate_nim_exists(nim_id)
-
-        if use_nvidia_api:
-            # Use NVIDIA API endpoint
-            invoke_url = nim_metadata.get("invoke_url")
-            if not invoke_url:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"NVIDIA API invoke_url not found for NIM {nim_id}",
-                )
-
-            headers = get_nvidia_api_headers()
-        else:
-            # Use the local NIM endpoint from Redis configuration
-            base_url = f"http://{nim_data.host}:{nim_data.port}"
-            invoke_url = base_url
+        # Resolve the compiled route for the NIM
+        route = await route_table.get(nim_id, use_nvidia_api)
+        nim_data, nim_metadata = route.nim_data, route.metadata
 
-            # Prepare headers for local NIM
-            headers = {"accept": "application/json", "content-type": "application/json"}
+        # The invoke_url, or the NIM type's endpoint on a local replica
+        invoke_url = route.endpoint()
+        headers = route.headers()
 
         logger.info(f"Performing PaddleOCR inference for {nim_id}")
         logger.debug(f"NIM type: {nim_data.nim_type}")
@@ -1605,10 +1560,10 @@ async def perform_paddleocr_inference(
         # Update inference request with success
         logger.debug("Updating InferenceRequest with success status")
         inference_request.status = "completed"
-        inference_request.set_output(response_data)
+        await asyncio.to_thread(inference_request.set_output, response_data)
         inference_request.update_timestamp()
         try:
-            inference_request.save()
+            request_persister.save(inference_request)
             logger.debug("InferenceRequest updated and saved successfully")
         except Exception as save_error:
             logger.error(f"Failed to save updated InferenceRequest: {save_error}")
@@ -1627,7 +1582,7 @@ async def perform_paddleocr_inference(
             {"error": "Request timeout", "nim_id": nim_id, "timeout_seconds": 60}
         )
         inference_request.update_timestamp()
-        inference_request.save()
+        request_persister.save(inference_request)
 
         raise HTTPException(
             status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=error_msg
@@ -1643,7 +1598,7 @@ async def perform_paddleocr_inference(
             {"error": str(e), "nim_id": nim_id, "error_type": "RequestException"}
         )
         inference_request.update_timestamp()
-        inference_request.save()
+        request_persister.save(inference_request)
 
         raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=error_msg)
 
@@ -1659,7 +1614,7 @@ async def perform_paddleocr_inference(
             {"error": str(e), "nim_id": nim_id, "error_type": "UnexpectedError"}
         )
         inference_request.update_timestamp()
-        inference_request.save()
+        request_persister.save(inference_request)
 
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=error_msg
@@ -1683,18 +1638,9 @@ async def perform_inference(
     Returns:
         The response data from the NIM
     """
-    # Get NIM metadata to determine type
-    nim_data, nim_metadata = validate_nim_exists(nim_id)
-
-    # Get NIM type from metadata (YAML) first, fallback to Redis config
-    nim_type = nim_metadata.get("type", "").lower()
-    if not nim_type:
-        # Fallback to Redis config nim_type
-        nim_type = getattr(nim_data, "nim_type", "").lower()
-
-    logger.debug(
-        f"Determined NIM type: {nim_type} (from metadata: {nim_metadata.get('type', '')}, from Redis: {getattr(nim_data, 'nim_type', '')})"
-    )
+    # NIM type from metadata (YAML) first, compiled into the route
+    nim_type = (await route_table.get(nim_id, use_nvidia_api)).nim_type
+    logger.debug(f"Determined NIM type: {nim_type}")
 
     # Route to appropriate handler based on NIM type
     if nim_type == "image":
@@ -0,0 +1,78 @@
+"""Read-only endpoints for archived inference requests."""
+
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from nimkit.src.api.llm.retention import (
+    get_retention_policy,
+    list_archives,
+    read_archive,
+)
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/llm/archive", tags=["archive"])
+
+
+@router.get("")
+async def get_archives() -> Dict[str, Any]:
+    """List the archive files and the active retention policy."""
+    try:
+        archives = await asyncio.to_thread(list_archives)
+        policy = await asyncio.to_thread(get_retention_policy)
+        return {"archives": archives, "retention_days": policy}
+    except Exception as e:
+        logger.error(f"Failed to list request archives: {e}")
+        raise HTTPException(
+            status_code=500, detail=f"Failed to list archives: {str(e)}"
+        )
+
+
+@router.get("/{type}/{date}")
+async def get_archived_requests(
+    type: str,
+    date: str,
+    request_id: Optional[str] = None,
+    nim_id: Optional[str] = None,
+    status: Optional[str] = None,
+    offset: int = Query(default=0, ge=0, description="Number of results to skip"),
+    limit: int = Query(
+        default=100, ge=1, le=1000, description="Number of results to return"
+    ),
+) -> Dict[str, Any]:
+    """
+    Read archived requests of one type and day.
+
+    Args:
+        type: Request type, e.g. LLM
+        date: Day the requests were created, YYYY-MM-DD (UTC)
+        request_id: Optional request ID to look for
+        nim_id: Optional NIM ID to filter by
+        status: Optional status to filter by
+        offset: Number of matching records to skip
+        limit: Maximum number of records to return
+
+    Returns:
+        Dictionary containing the archived requests and pagination info
+    """
+    filters = {"request_id": request_id, "nim_id": nim_id, "status": status}
+    try:
+        requests, has_next = await asyncio.to_thread(
+            read_archive, type, date, filters, offset, limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Archive not found")
+    except Exception as e:
+        logger.error(f"Failed to read archive {type}/{date}: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to read archive: {str(e)}")
+
+    return {
+        "requests": requests,
+        "pagination": {"offset": offset, "limit": limit, "has_next": has_next},
+        "filters": filters,
+    }
@@ -0,0 +1,189 @@
+"""Micro-batching of concurrent non-streaming completion requests."""
+
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+COMPLETION_BATCHING_ENABLED = (
+    os.getenv("COMPLETION_BATCHING_ENABLED", "false").lower() == "true"
+)
+COMPLETION_BATCH_MAX_WAIT_MS = float(os.getenv("COMPLETION_BATCH_MAX_WAIT_MS", "10"))
+COMPLETION_BATCH_MAX_SIZE = int(os.getenv("COMPLETION_BATCH_MAX_SIZE", "32"))
+
+
+def get_batch_key(endpoint: str, request_data: Dict[str, Any]) -> str:
+    """
+    Build the key that decides which requests may share an upstream call.
+
+    Requests are only coalesced when they target the same endpoint with
+    identical parameters apart from the prompt.
+
+    Args:
+        endpoint: Upstream completions URL
+        request_data: Request payload that will be sent upstream
+
+    Returns:
+        Canonical string key
+    """
+    params = {k: v for k, v in request_data.items() if k != "prompt"}
+    return f"{endpoint}|{json.dumps(params, sort_keys=True, default=str)}"
+
+
+class _PendingBatch:
+    """Prompts waiting to be sent together in one upstream call."""
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        endpoint: str,
+        headers: dict,
+        request_data: Dict[str, Any],
+    ):
+        self.client = client
+        self.endpoint = endpoint
+        self.headers = headers
+        self.request_data = request_data
+        self.prompts: List[str] = []
+        self.futures: List["asyncio.Future[Dict[str, Any]]"] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class CompletionBatcher:
+    """
+    Coalesce concurrent completion requests into list-prompt upstream calls.
+
+    The OpenAI-compatible `/v1/completions` API accepts a list of prompts and
+    returns one choice per prompt, so callers with matching parameters that
+    arrive within `max_wait_ms` of each other share a single upstream call.
+    """
+
+    def __init__(
+        self,
+        max_wait_ms: float = COMPLETION_BATCH_MAX_WAIT_MS,
+        max_batch_size: int = COMPLETION_BATCH_MAX_SIZE,
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            max_wait_ms: Longest time the first request of a batch waits
+            max_batch_size: Batch is sent as soon as it holds this many prompts
+        """
+        self.max_wait_ms = max_wait_ms
+        self.max_batch_size = max_batch_size
+        self._pending: Dict[str, _PendingBatch] = {}
+        self._tasks: set = set()
+
+    async def submit(
+        self,
+        client: httpx.AsyncClient,
+        endpoint: str,
+        headers: dict,
+        request_data: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """
+        Queue one completion request and wait for its share of the response.
+
+        Args:
+            client: Pooled client for the upstream
+            endpoint: Upstream completions URL
+            headers: Request headers
+            request_data: Request payload with a single string prompt
+
+        Returns:
+            A completion response containing only this request's choice
+
+        Raises:
+            httpx.HTTPError: If the shared upstream call fails
+        """
+        loop = asyncio.get_running_loop()
+        key = get_batch_key(endpoint, request_data)
+
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = _PendingBatch(client, endpoint, headers, request_data)
+            self._pending[key] = batch
+            batch.timer = loop.call_later(
+                self.max_wait_ms / 1000.0, self._flush, key, batch
+            )
+
+        future: "asyncio.Future[Dict[str, Any]]" = loop.create_future()
+        batch.prompts.append(request_data["prompt"])
+        batch.futures.append(future)
+
+        if len(batch.prompts) >= self.max_batch_size:
+            self._flush(key, batch)
+
+        return await future
+
+    def _flush(self, key: str, batch: _PendingBatch) -> None:
+        """Stop collecting for a batch and send it in the background."""
+        if self._pending.get(key) is batch:
+            del self._pending[key]
+        if batch.timer is not None:
+            batch.timer.cancel()
+            batch.timer = None
+
+        task = asyncio.ensure_future(self._send(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: _PendingBatch) -> None:
+        """Send one upstream call for the batch and fan the results out."""
+        size = len(batch.prompts)
+        payload = dict(batch.request_data)
+        # A batch of one is sent exactly as an unbatched request would be
+        payload["prompt"] = batch.prompts if size > 1 else batch.prompts[0]
+
+        logger.info(f"Sending completion batch of {size} prompts to {batch.endpoint}")
+        try:
+            response = await batch.client.post(
+                batch.endpoint, json=payload, headers=batch.headers
+            )
+            response.raise_for_status()
+            response_data = response.json()
+        except Exception as e:
+            logger.error(f"Completion batch of {size} prompts failed: {e}")
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        if size == 1:
+            if not batch.futures[0].done():
+                batch.futures[0].set_result(response_data)
+            return
+
+        choices_by_index: Dict[int, List[Dict[str, Any]]] = {}
+        for choice in response_data.get("choices") or []:
+            choices_by_index.setdefault(choice.get("index", 0), []).append(choice)
+
+        base = {k: v for k, v in response_data.items() if k not in ("choices", "usage")}
+        for index, future in enumerate(batch.futures):
+            if future.done():
+                continue
+            choices = [
+                {**choice, "index": 0} for choice in choices_by_index.get(index, [])
+            ]
+            future.set_result(
+                {
+                    **base,
+                    "choices": choices,
+                    # Token usage is only reported for the whole upstream call
+                    "batch": {
+                        "size": size,
+                        "index": index,
+                        "usage": response_data.get("usage"),
+                    },
+                }
+            )
+
+
+# Global instance for use throughout the application
+completion_batcher = CompletionBatcher()
@@ -0,0 +1,230 @@
+"""Exact-match response cache for deterministic LLM requests."""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from nimkit.src.api.db import get_async_redis_client
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+
+CACHE_KEY_PREFIX = "nimkit:llm:cache:"
+
+# Keys that only describe how a response was delivered, not what it contains
+_DELIVERY_KEYS = ("streaming", "total_chunks", "batch")
+
+
+def is_cacheable(request_data: Dict[str, Any]) -> bool:
+    """
+    Check whether a request is deterministic enough to serve from cache.
+
+    Args:
+        request_data: Request payload that will be sent upstream
+
+    Returns:
+        True when temperature is 0 or a seed is pinned
+    """
+    return request_data.get("temperature") == 0 or request_data.get("seed") is not None
+
+
+def get_cache_key(nim_id: str, route: str, request_data: Dict[str, Any]) -> str:
+    """
+    Build the canonical cache key for a request.
+
+    The key covers the NIM, the upstream route and every upstream parameter
+    (model, messages/prompt and sampling params). Whether the client asked
+    for a stream does not change the answer, so it is ignored.
+
+    Args:
+        nim_id: NIM instance ID
+        route: Upstream API the request is sent to, independent of the
+            replica that serves it
+        request_data: Request payload that will be sent upstream
+
+    Returns:
+        Redis key for the cached response
+    """
+    params = {k: v for k, v in request_data.items() if k != "stream"}
+    canonical = json.dumps(
+        {"nim_id": nim_id, "route": route, "params": params},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    return f"{CACHE_KEY_PREFIX}{digest}"
+
+
+class ResponseCache:
+    """
+    Two-tier cache of LLM responses: an in-process LRU in front of Redis.
+
+    Entries are stored in the non-streaming response shape, so a response
+    produced by either a streaming or a non-streaming request can serve both.
+    Redis errors are logged and treated as misses; the cache never fails a
+    request.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        ttl_seconds: int = LLM_CACHE_TTL_SECONDS,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Capacity of the in-process LRU
+            ttl_seconds: Lifetime of entries in both tiers
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._local: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response.
+
+        Args:
+            key: Key from get_cache_key
+
+        Returns:
+            The cached response, or None on a miss
+        """
+        entry = self._local.get(key)
+        if entry is not None:
+            expires_at, response = entry
+            if expires_at > time.monotonic():
+                self._local.move_to_end(key)
+                return response
+            del self._local[key]
+
+        try:
+            raw = await get_async_redis_client().get(key)
+        except Exception as e:
+            logger.warning(f"Response cache lookup failed: {e}")
+            return None
+        if raw is None:
+            return None
+
+        try:
+            response = json.loads(raw)
+        except json.JSONDecodeError:
+            logger.warning(f"Discarding unreadable response cache entry {key}")
+            return None
+        self._set_local(key, response)
+        return response
+
+    async def set(self, key: str, response: Dict[str, Any]) -> None:
+        """
+        Store a response in both tiers.
+
+        Args:
+            key: Key from get_cache_key
+            response: Completed response (non-streaming or reduced stream)
+        """
+        response = {k: v for k, v in response.items() if k not in _DELIVERY_KEYS}
+        self._set_local(key, response)
+        try:
+            await get_async_redis_client().set(
+                key, json.dumps(response), ex=self.ttl_seconds
+            )
+        except Exception as e:
+            logger.warning(f"Response cache store failed: {e}")
+
+    def _set_local(self, key: str, response: Dict[str, Any]) -> None:
+        """Insert into the LRU, evicting the least recently used entry."""
+        self._local[key] = (time.monotonic() + self.ttl_seconds, response)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every entry from the in-process tier."""
+        self._local.clear()
+
+
+def _to_chat_stream_logprobs(logprobs: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert compact logprob arrays back to the chat `content` list shape."""
+    if "content" in logprobs:
+        return logprobs
+    content = []
+    for token, logprob, top in zip(
+        logprobs.get("tokens") or [],
+        logprobs.get("token_logprobs") or [],
+        logprobs.get("top_logprobs") or [],
+    ):
+        content.append(
+            {
+                "token": token,
+                "logprob": logprob,
+                "top_logprobs": [
+                    {"token": t, "logprob": lp} for t, lp in (top or {}).items()
+                ],
+            }
+        )
+    return {"content": content}
+
+
+def iter_sse_replay(response: Dict[str, Any], request_type: str) -> Iterator[str]:
+    """
+    Replay a cached response as an OpenAI-compatible SSE stream.
+
+    Each choice is sent as one chunk carrying its full text, followed by a
+    usage chunk (when known) and the `[DONE]` terminator.
+
+    Args:
+        response: Cached response in the non-streaming shape
+        request_type: "chat" or "completion"
+
+    Yields:
+        SSE event strings
+    """
+    base = {
+        "id": response.get("id"),
+        "object": (
+            "chat.completion.chunk" if request_type == "chat" else "text_completion"
+        ),
+        "created": response.get("created"),
+        "model": response.get("model"),
+    }
+
+    for choice in response.get("choices") or []:
+        if request_type == "chat":
+            message = choice.get("message") or {}
+            chunk_choice: Dict[str, Any] = {
+                "index": choice.get("index", 0),
+                "delta": {
+                    "role": message.get("role") or "assistant",
+                    "content": message.get("content") or "",
+                },
+            }
+            if choice.get("logprobs"):
+                chunk_choice["logprobs"] = _to_chat_stream_logprobs(choice["logprobs"])
+        else:
+            chunk_choice = {
+                "index": choice.get("index", 0),
+                "text": choice.get("text") or "",
+            }
+            if choice.get("logprobs"):
+                chunk_choice["logprobs"] = choice["logprobs"]
+        chunk_choice["finish_reason"] = choice.get("finish_reason")
+        yield f"data: {json.dumps({**base, 'choices': [chunk_choice]})}\n\n"
+
+    if response.get("usage"):
+        usage_chunk = {**base, "choices": [], "usage": response["usage"]}
+        yield f"data: {json.dumps(usage_chunk)}\n\n"
+
+    yield "data: [DONE]\n\n"
+
+
+# Global instance for use throughout the application
+response_cache = ResponseCache()
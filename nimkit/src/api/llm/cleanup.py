@@ -0,0 +1,239 @@
+"""Bulk deletion of stored inference requests, their media and stale blobs."""
+
+import logging
+import os
+import shutil
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from nimkit.src.api.blobs import (
+    BLOB_REF_KEY,
+    MEDIA_DIR,
+    blob_store,
+    is_blob_ref,
+    media_path,
+)
+from nimkit.src.api.codecs import payload_codec
+from nimkit.src.api.llm.indexes import (
+    INDEXED_FIELDS,
+    REQUEST_ID_INDEX_KEY,
+    remove_from_indexes,
+    update_counters,
+)
+from nimkit.src.api.llm.models import InferenceRequest
+
+logger = logging.getLogger(__name__)
+
+DELETE_BATCH_SIZE = int(os.getenv("DELETE_BATCH_SIZE", "500"))
+
+# Record fields that point at uploaded or generated files
+_MEDIA_FIELDS = ("audio_file_path", "output_audio_path")
+
+
+def _decode(value: Optional[bytes]) -> Optional[str]:
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+def get_media_paths(request_id: str, values: Dict[str, Optional[str]]) -> List[str]:
+    """
+    Get the files and directories written for a request.
+
+    Paths are resolved and confined to MEDIA_DIR, and generated files to
+    their own directory, so a tampered record cannot point a delete at
+    anything else.
+
+    Args:
+        request_id: The request ID, used to name generated files
+        values: Stored record fields, including the media path fields
+
+    Returns:
+        Paths under MEDIA_DIR that may exist on disk for the request
+    """
+    candidates = [
+        (MEDIA_DIR, values[field]) for field in _MEDIA_FIELDS if values.get(field)
+    ]
+    candidates += [
+        (os.path.join(MEDIA_DIR, "models"), f"{request_id}.glb"),
+        (os.path.join(MEDIA_DIR, "tts", "output"), f"{request_id}.wav"),
+        (os.path.join(MEDIA_DIR, "paddleocr"), request_id),
+    ]
+    paths = []
+    for root, path in candidates:
+        resolved = media_path(path, root)
+        if resolved is None:
+            logger.warning(
+                f"Not removing {path!r} for request {request_id}: outside {root}"
+            )
+            continue
+        paths.append(resolved)
+    return paths
+
+
+def _remove_path(path: str) -> None:
+    try:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Failed to remove media file {path}: {e}")
+
+
+def delete_records(pks: List[str], delete_media: bool = False) -> List[str]:
+    """
+    Delete one batch of records by primary key in two round-trips.
+
+    The first reads the fields needed to clean up. The second deletes the
+    hashes and their index entries in one MULTI.
+
+    Args:
+        pks: Primary keys of the records
+        delete_media: Also remove uploaded and generated files
+
+    Returns:
+        Request IDs of the records that were deleted
+    """
+    redis_client = InferenceRequest.db()
+    fields = ["pk", "request_id", *INDEXED_FIELDS, *_MEDIA_FIELDS]
+    pipe = redis_client.pipeline(transaction=False)
+    for pk in pks:
+        pipe.hmget(InferenceRequest.make_key(pk), fields)
+    rows = pipe.execute() if pks else []
+
+    pipe = redis_client.pipeline(transaction=True)
+    changes = []
+    positions = []
+    records = []
+    for pk, row in zip(pks, rows):
+        values = dict(zip(fields, (_decode(v) for v in row)))
+        changes.extend(remove_from_indexes(pipe, pk, values))
+        positions.append(len(pipe.command_stack))
+        pipe.delete(InferenceRequest.make_key(pk))
+        records.append(values)
+    results = pipe.execute() if records else []
+    update_counters(redis_client, results, changes)
+
+    deleted = []
+    for position, values in zip(positions, records):
+        if not results[position]:
+            continue
+        deleted.append(values["request_id"])
+        if delete_media:
+            for path in get_media_paths(values["request_id"], values):
+                _remove_path(path)
+    return deleted
+
+
+def delete_requests(
+    request_ids: Iterable[str],
+    delete_media: bool = False,
+    batch_size: int = DELETE_BATCH_SIZE,
+) -> Tuple[List[str], List[str]]:
+    """
+    Delete records by request_id in pipelined batches.
+
+    Each batch costs three round-trips regardless of its size: resolve
+    request_ids to keys, then delete_records().
+
+    Args:
+        request_ids: Request IDs to delete
+        delete_media: Also remove uploaded and generated files
+        batch_size: Records per batch
+
+    Returns:
+        Tuple of (deleted request IDs, request IDs that were not found)
+    """
+    request_ids = list(dict.fromkeys(request_ids))
+    redis_client = InferenceRequest.db()
+    deleted: List[str] = []
+    not_found: List[str] = []
+
+    for start in range(0, len(request_ids), batch_size):
+        batch = request_ids[start : start + batch_size]
+        pks = [_decode(pk) for pk in redis_client.hmget(REQUEST_ID_INDEX_KEY, batch)]
+        found = [(rid, pk) for rid, pk in zip(batch, pks) if pk]
+        not_found.extend(rid for rid, pk in zip(batch, pks) if not pk)
+        if not found:
+            continue
+
+        batch_deleted = set(delete_records([pk for _, pk in found], delete_media))
+        for request_id, _ in found:
+            if request_id in batch_deleted:
+                deleted.append(request_id)
+            else:
+                not_found.append(request_id)
+
+    logger.info(
+        f"Deleted {len(deleted)} inference requests "
+        f"({len(not_found)} not found, media {'removed' if delete_media else 'kept'})"
+    )
+    return deleted, not_found
+
+
+def _collect_blob_names(data: Any, names: Set[str]) -> None:
+    if is_blob_ref(data):
+        names.add(data[BLOB_REF_KEY])
+    elif isinstance(data, dict):
+        for value in data.values():
+            _collect_blob_names(value, names)
+    elif isinstance(data, list):
+        for value in data:
+            _collect_blob_names(value, names)
+
+
+def _referenced_blobs(batch_size: int = DELETE_BATCH_SIZE) -> Set[str]:
+    """Collect the blob names referenced by any stored record."""
+    redis_client = InferenceRequest.db()
+    referenced: Set[str] = set()
+    cursor = 0
+    while True:
+        cursor, keys = redis_client.scan(
+            cursor, match=InferenceRequest.make_key("*"), count=batch_size
+        )
+        pipe = redis_client.pipeline(transaction=False)
+        for key in keys:
+            if not _decode(key).endswith(":index:hash"):
+                pipe.hmget(key, ["input_json", "output_json"])
+        for row in pipe.execute():
+            for raw in row:
+                # Undecodable values raise so the sweep cannot remove blobs
+                # that a record it failed to read still references
+                _collect_blob_names(payload_codec.decode(_decode(raw)), referenced)
+        if cursor == 0:
+            return referenced
+
+
+def sweep_blobs(min_age_seconds: float = 3600) -> int:
+    """
+    Remove blobs no stored record references any more.
+
+    Blobs are shared between records, so they are not removed with a record;
+    run this periodically instead. Recent blobs are kept because the record
+    referencing them may still be queued for write-behind.
+
+    Args:
+        min_age_seconds: Only remove blobs older than this
+
+    Returns:
+        Number of blobs removed
+    """
+    referenced = _referenced_blobs()
+    cutoff = time.time() - min_age_seconds
+    removed = 0
+    for dirpath, _, filenames in os.walk(blob_store.root):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            name = os.path.relpath(path, blob_store.root).replace(os.sep, "/")
+            if name in referenced or os.path.getmtime(path) > cutoff:
+                continue
+            _remove_path(path)
+            removed += 1
+    logger.info(f"Removed {removed} unreferenced blobs")
+    return removed
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sweep_blobs()
@@ -0,0 +1,78 @@
+"""Opaque cursor tokens for keyset pagination of request history."""
+
+import base64
+import json
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+
+class Cursor(NamedTuple):
+    """
+    Position after the last item of a page, newest-first.
+
+    Items are ordered by created_ts. Several items can share a timestamp,
+    so the cursor also lists the primary keys already returned at `ts`;
+    the next page starts at `ts` inclusive and skips those.
+    """
+
+    ts: float
+    pks: Tuple[str, ...]
+
+
+def encode_cursor(cursor: Cursor) -> str:
+    """Encode a cursor as a URL-safe token."""
+    raw = json.dumps([cursor.ts, list(cursor.pks)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: Optional[str]) -> Optional[Cursor]:
+    """
+    Decode a token from encode_cursor.
+
+    Args:
+        token: Cursor token, or None for the first page
+
+    Returns:
+        The cursor, or None for the first page
+
+    Raises:
+        ValueError: If the token is malformed
+    """
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        ts, pks = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return Cursor(float(ts), tuple(str(pk) for pk in pks))
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def paginate_after(
+    cursor: Optional[Cursor], items: Sequence[Tuple[float, str]], limit: int
+) -> Tuple[List[Tuple[float, str]], Optional[Cursor]]:
+    """
+    Cut a page out of items fetched from a cursor position.
+
+    Args:
+        cursor: Position the items were fetched from, or None
+        items: (created_ts, pk) newest first, starting at cursor.ts inclusive;
+            fetch limit + len(cursor.pks) + 1 so the page and whether another
+            one follows are both known
+        limit: Page size
+
+    Returns:
+        Tuple of (items on this page, cursor for the next page or None)
+    """
+    seen = set(cursor.pks) if cursor else set()
+    remaining = [
+        (ts, pk) for ts, pk in items if not (cursor and ts == cursor.ts and pk in seen)
+    ]
+    page = remaining[:limit]
+    if len(remaining) <= limit or not page:
+        return page, None
+
+    last_ts = page[-1][0]
+    pks = [pk for ts, pk in page if ts == last_ts]
+    if cursor and last_ts == cursor.ts:
+        pks = list(cursor.pks) + pks
+    return page, Cursor(last_ts, tuple(pks))
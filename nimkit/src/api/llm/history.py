@@ -0,0 +1,108 @@
+"""Endpoints for exporting and importing inference request history."""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from nimkit.src.api.llm.transfer import (
+    MAX_REPORTED_ERRORS,
+    TRANSFER_BATCH_SIZE,
+    export_requests,
+    import_requests,
+    to_timestamp,
+)
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/llm/history", tags=["history"])
+
+
+@router.get("/export")
+async def export_history(
+    start: Optional[datetime] = Query(
+        default=None, description="Only export requests created at or after this"
+    ),
+    end: Optional[datetime] = Query(
+        default=None, description="Only export requests created at or before this"
+    ),
+    nim_id: Optional[str] = None,
+    type: Optional[str] = None,
+) -> StreamingResponse:
+    """
+    Stream matching inference requests as NDJSON, newest first.
+
+    Args:
+        start: Optional start of the creation time range (naive means UTC)
+        end: Optional end of the creation time range (naive means UTC)
+        nim_id: Optional NIM ID to filter by
+        type: Optional request type to filter by
+
+    Returns:
+        Streaming NDJSON response, one request per line
+    """
+    lines = export_requests(to_timestamp(start), to_timestamp(end), nim_id, type)
+    return StreamingResponse(
+        lines,
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="requests.ndjson"'},
+    )
+
+
+@router.post("/import")
+async def import_history(
+    request: Request,
+    on_conflict: str = Query(
+        default="skip",
+        pattern="^(skip|replace)$",
+        description="What to do with request IDs that already exist",
+    ),
+) -> Dict[str, Any]:
+    """
+    Bulk import an NDJSON export.
+
+    The body is read incrementally and written in pipelined batches, so
+    large files are never held in memory at once.
+
+    Args:
+        request: Request whose body is NDJSON from the export endpoint
+        on_conflict: "skip" to keep existing records, "replace" to overwrite
+
+    Returns:
+        Counts of imported, skipped and failed lines, plus the first errors
+    """
+    totals: Dict[str, Any] = {"imported": 0, "skipped": 0, "failed": 0, "errors": []}
+
+    async def flush(lines: List[bytes]) -> None:
+        result = await asyncio.to_thread(import_requests, lines, on_conflict)
+        for key in ("imported", "skipped", "failed"):
+            totals[key] += result[key]
+        room = MAX_REPORTED_ERRORS - len(totals["errors"])
+        totals["errors"].extend(result["errors"][:room])
+
+    try:
+        buffer = b""
+        lines: List[bytes] = []
+        async for chunk in request.stream():
+            buffer += chunk
+            *complete, buffer = buffer.split(b"\n")
+            lines.extend(complete)
+            if len(lines) >= TRANSFER_BATCH_SIZE:
+                await flush(lines)
+                lines = []
+        lines.append(buffer)
+        await flush(lines)
+    except Exception as e:
+        logger.error(f"Failed to import request history: {e}")
+        raise HTTPException(
+            status_code=500, detail=f"Failed to import history: {str(e)}"
+        )
+
+    logger.info(
+        f"Imported {totals['imported']} inference requests "
+        f"({totals['skipped']} skipped, {totals['failed']} failed)"
+    )
+    return totals
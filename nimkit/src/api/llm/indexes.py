@@ -0,0 +1,490 @@
+"""Sorted-set secondary indexes over stored inference requests."""
+
+import logging
+import os
+import time
+import uuid
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from redis.client import Pipeline
+from redis.exceptions import WatchError
+
+from nimkit.src.api.llm.cursors import Cursor, paginate_after
+from nimkit.src.api.llm.models import InferenceRequest, to_timestamp
+
+logger = logging.getLogger(__name__)
+
+INDEX_KEY_PREFIX = "nimkit:requests:index:"
+# Every request, scored by created_ts
+TIME_INDEX_KEY = f"{INDEX_KEY_PREFIX}created"
+# Bumped when the index layout changes so ensure_indexes() rebuilds it
+INDEX_VERSION_KEY = f"{INDEX_KEY_PREFIX}version"
+INDEX_VERSION = "3"
+# Hash of counters mirroring index sizes: "total" and "<field>:<value>"
+STATS_KEY = f"{INDEX_KEY_PREFIX}stats"
+# Hash of request_id -> pk, so lookups by request_id need no keyspace scan
+REQUEST_ID_INDEX_KEY = f"{INDEX_KEY_PREFIX}request_id"
+# Held by the process rebuilding the indexes; refreshed after every batch
+REBUILD_LOCK_KEY = f"{INDEX_KEY_PREFIX}rebuild_lock"
+REBUILD_LOCK_TTL = int(os.getenv("INDEX_REBUILD_LOCK_TTL", "300"))
+# Records created this long before a rebuild started are indexed again after
+# it, to pick up saves the rebuild's scan missed
+REBUILD_CATCH_UP_SECONDS = float(os.getenv("INDEX_REBUILD_CATCH_UP_SECONDS", "3600"))
+
+INDEXED_FIELDS = ("nim_id", "status", "type", "request_type", "stream")
+# status is the only indexed field that changes after a request is created
+REQUEST_STATUSES = ("pending", "completed", "error")
+
+# (position of a ZADD/ZREM in its pipeline, counter, delta if it took effect)
+CounterChange = Tuple[int, str, int]
+
+
+def get_index_key(field: str, value: str) -> str:
+    """Get the sorted set holding requests whose field has the given value."""
+    return f"{INDEX_KEY_PREFIX}{field}:{value}"
+
+
+def get_counter_name(field: str, value: str) -> str:
+    """Get the stats counter that mirrors an index set."""
+    return f"{field}:{value}"
+
+
+def _decode(value: Any) -> Any:
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+def add_to_indexes(
+    pipe: Pipeline, inference_request: InferenceRequest
+) -> List[CounterChange]:
+    """
+    Queue the index updates for a saved record on a pipeline.
+
+    Args:
+        pipe: Pipeline that also carries the record's save
+        inference_request: Record being saved
+
+    Returns:
+        Counter changes to pass to update_counters with the pipeline results
+    """
+    pk = inference_request.pk
+    score = inference_request.created_ts or 0
+    pipe.hset(REQUEST_ID_INDEX_KEY, inference_request.request_id, pk)
+    changes: List[CounterChange] = [(len(pipe.command_stack), "total", 1)]
+    pipe.zadd(TIME_INDEX_KEY, {pk: score})
+    for field in INDEXED_FIELDS:
+        value = getattr(inference_request, field)
+        if field == "status":
+            for other in REQUEST_STATUSES:
+                if other != value:
+                    counter = get_counter_name(field, other)
+                    changes.append((len(pipe.command_stack), counter, -1))
+                    pipe.zrem(get_index_key(field, other), pk)
+        if value:
+            counter = get_counter_name(field, value)
+            changes.append((len(pipe.command_stack), counter, 1))
+            pipe.zadd(get_index_key(field, value), {pk: score})
+    return changes
+
+
+def remove_from_indexes(
+    pipe: Pipeline, pk: str, values: Dict[str, Optional[str]]
+) -> List[CounterChange]:
+    """
+    Queue the removal of a record from every index on a pipeline.
+
+    Args:
+        pipe: Pipeline that also carries the record's deletion
+        pk: Primary key of the record
+        values: request_id and indexed field values of the record
+
+    Returns:
+        Counter changes to pass to update_counters with the pipeline results
+    """
+    if values.get("request_id"):
+        pipe.hdel(REQUEST_ID_INDEX_KEY, values["request_id"])
+    changes: List[CounterChange] = [(len(pipe.command_stack), "total", -1)]
+    pipe.zrem(TIME_INDEX_KEY, pk)
+    for field in INDEXED_FIELDS:
+        value = values.get(field)
+        if value:
+            changes.append(
+                (len(pipe.command_stack), get_counter_name(field, value), -1)
+            )
+            pipe.zrem(get_index_key(field, value), pk)
+    return changes
+
+
+def update_counters(
+    redis_client: Any, results: List[Any], changes: List[CounterChange]
+) -> None:
+    """
+    Apply the counter changes whose index commands took effect.
+
+    ZADD and ZREM report whether membership actually changed, so each
+    create, status transition or delete is counted exactly once even when
+    the same record is written concurrently or repeatedly.
+
+    Args:
+        redis_client: Redis client holding the stats hash
+        results: Results of the executed pipeline
+        changes: Changes returned by add_to_indexes/remove_from_indexes
+    """
+    deltas: Counter = Counter()
+    for position, counter, delta in changes:
+        if results[position]:
+            deltas[counter] += delta
+    deltas = Counter({k: v for k, v in deltas.items() if v})
+    if not deltas:
+        return
+    pipe = redis_client.pipeline(transaction=True)
+    for counter, delta in deltas.items():
+        pipe.hincrby(STATS_KEY, counter, delta)
+    pipe.execute()
+
+
+def get_pk(request_id: str) -> Optional[str]:
+    """
+    Get the primary key of the record with a request_id.
+
+    Args:
+        request_id: The request ID to look up
+
+    Returns:
+        The record's primary key, or None if it is not indexed
+    """
+    return _decode(InferenceRequest.db().hget(REQUEST_ID_INDEX_KEY, request_id))
+
+
+def get_counters() -> Dict[str, int]:
+    """
+    Read every stats counter in one call.
+
+    Returns:
+        Counter name -> value, e.g. {"total": 3, "status:error": 1}
+    """
+    raw = InferenceRequest.db().hgetall(STATS_KEY)
+    return {_decode(k): int(v) for k, v in raw.items()}
+
+
+def query_indexes(
+    filters: Dict[str, Optional[str]], offset: int = 0, limit: int = 100
+) -> Tuple[int, List[str]]:
+    """
+    Find requests matching every filter, newest first.
+
+    Args:
+        filters: Indexed field -> required value; None values are ignored
+        offset: Number of matches to skip
+        limit: Maximum number of primary keys to return
+
+    Returns:
+        Tuple of (total matches, primary keys on this page)
+    """
+    keys = [get_index_key(f, v) for f, v in filters.items() if v] or [TIME_INDEX_KEY]
+    offset = max(offset, 0)
+    # ZREVRANGE reads a negative stop as counted from the end, so an empty
+    # page must not be requested at all
+    stop = offset + limit - 1 if limit > 0 else None
+    redis_client = InferenceRequest.db()
+
+    if len(keys) == 1:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.zcard(keys[0])
+        if stop is not None:
+            pipe.zrevrange(keys[0], offset, stop)
+        total, *pages = pipe.execute()
+    else:
+        # Intersect into a short-lived key; scores are created_ts everywhere
+        tmp_key = f"{INDEX_KEY_PREFIX}tmp:{uuid.uuid4().hex}"
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.zinterstore(tmp_key, keys, aggregate="MAX")
+        if stop is not None:
+            pipe.zrevrange(tmp_key, offset, stop)
+        pipe.delete(tmp_key)
+        total, *pages, _ = pipe.execute()
+    pks = pages[0] if pages else []
+    return total, [_decode(pk) for pk in pks]
+
+
+def _range_after(
+    redis_client: Any, key: str, max_score: Any, min_score: Any, start: int, count: int
+) -> List[Tuple[float, str]]:
+    rows = redis_client.zrevrangebyscore(
+        key, max_score, min_score, start=start, num=count, withscores=True
+    )
+    return [(score, _decode(member)) for member, score in rows]
+
+
+def query_indexes_after(
+    filters: Dict[str, Optional[str]],
+    cursor: Optional[Cursor],
+    limit: int = 100,
+    min_ts: Optional[float] = None,
+) -> Tuple[List[str], Optional[Cursor]]:
+    """
+    Find requests matching every filter, newest first, after a cursor.
+
+    With one filter, a page reads only about `limit` index entries however
+    deep it is. With several, the smallest index is walked from the cursor
+    and each chunk is checked against the others with ZMSCORE, so the work
+    depends on how many entries are skipped rather than on the history size.
+
+    Args:
+        filters: Indexed field -> required value; None values are ignored
+        cursor: Position from a previous page, or None for the first page
+        limit: Maximum number of primary keys to return
+        min_ts: Only include requests created at or after this Unix time
+
+    Returns:
+        Tuple of (primary keys on this page, cursor for the next page or None)
+    """
+    keys = [get_index_key(f, v) for f, v in filters.items() if v] or [TIME_INDEX_KEY]
+    redis_client = InferenceRequest.db()
+    want = limit + (len(cursor.pks) if cursor else 0) + 1
+    max_score = cursor.ts if cursor else "+inf"
+    min_score = "-inf" if min_ts is None else min_ts
+
+    if len(keys) == 1:
+        items = _range_after(redis_client, keys[0], max_score, min_score, 0, want)
+    else:
+        pipe = redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.zcard(key)
+        sizes = pipe.execute()
+        driver, *others = [key for _, key in sorted(zip(sizes, keys))]
+
+        items = []
+        chunk_size = max(want, 100)
+        start = 0
+        while len(items) < want:
+            chunk = _range_after(
+                redis_client, driver, max_score, min_score, start, chunk_size
+            )
+            start += len(chunk)
+            if not chunk:
+                break
+            members = [pk for _, pk in chunk]
+            pipe = redis_client.pipeline(transaction=False)
+            for key in others:
+                pipe.zmscore(key, members)
+            scores = pipe.execute()
+            items.extend(
+                item
+                for i, item in enumerate(chunk)
+                if all(key_scores[i] is not None for key_scores in scores)
+            )
+            if len(chunk) < chunk_size:
+                break
+
+    page, next_cursor = paginate_after(cursor, items, limit)
+    return [pk for _, pk in page], next_cursor
+
+
+def load_requests(pks: Iterable[str]) -> List[InferenceRequest]:
+    """
+    Fetch records by primary key in one pipelined read.
+
+    Records deleted since they were indexed are skipped.
+
+    Args:
+        pks: Primary keys, in the order results should be returned
+
+    Returns:
+        The records that still exist
+    """
+    pks = list(pks)
+    pipe = InferenceRequest.db().pipeline(transaction=False)
+    for pk in pks:
+        pipe.hgetall(InferenceRequest.make_key(pk))
+
+    requests = []
+    for pk, hash_data in zip(pks, pipe.execute() if pks else []):
+        if not hash_data:
+            continue
+        data = {_decode(k): _decode(v) for k, v in hash_data.items()}
+        try:
+            requests.append(InferenceRequest(**data))
+        except Exception as e:
+            logger.warning(f"Failed to load inference request {pk}: {e}")
+    return requests
+
+
+def _acquire_rebuild_lock(redis_client: Any) -> Optional[str]:
+    token = uuid.uuid4().hex
+    if redis_client.set(REBUILD_LOCK_KEY, token, nx=True, ex=REBUILD_LOCK_TTL):
+        return token
+    return None
+
+
+def _release_rebuild_lock(redis_client: Any, token: str) -> None:
+    # Only delete the lock if it was not taken over after expiring
+    with redis_client.pipeline(transaction=True) as pipe:
+        try:
+            pipe.watch(REBUILD_LOCK_KEY)
+            if _decode(pipe.get(REBUILD_LOCK_KEY)) == token:
+                pipe.multi()
+                pipe.delete(REBUILD_LOCK_KEY)
+                pipe.execute()
+        except WatchError:
+            pass
+
+
+def _is_live_index_key(key: str) -> bool:
+    name = key[len(INDEX_KEY_PREFIX) :]
+    return key not in (INDEX_VERSION_KEY, REBUILD_LOCK_KEY) and not name.startswith(
+        ("tmp:", "rebuild:")
+    )
+
+
+def _build_indexes(redis_client: Any, prefix: str, batch_size: int) -> int:
+    """Index every stored record into keys under a temporary prefix."""
+
+    def temp(key: str) -> str:
+        return prefix + key[len(INDEX_KEY_PREFIX) :]
+
+    fields = ("pk", "request_id", "created_ts", "date_created") + INDEXED_FIELDS
+    counters: Counter = Counter()
+    indexed = 0
+    cursor = 0
+    while True:
+        cursor, keys = redis_client.scan(
+            cursor, match=InferenceRequest.make_key("*"), count=batch_size
+        )
+        keys = [key for key in keys if not _decode(key).endswith(":index:hash")]
+        pipe = redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.hmget(key, fields)
+        rows = pipe.execute() if keys else []
+
+        pipe = redis_client.pipeline(transaction=False)
+        for row in rows:
+            values = dict(zip(fields, (_decode(v) for v in row)))
+            if not values["pk"]:
+                continue
+            score = float(
+                values["created_ts"] or to_timestamp(values["date_created"]) or 0
+            )
+            if values["request_id"]:
+                pipe.hset(
+                    temp(REQUEST_ID_INDEX_KEY), values["request_id"], values["pk"]
+                )
+            pipe.zadd(temp(TIME_INDEX_KEY), {values["pk"]: score})
+            counters["total"] += 1
+            for field in INDEXED_FIELDS:
+                if values[field]:
+                    pipe.zadd(
+                        temp(get_index_key(field, values[field])),
+                        {values["pk"]: score},
+                    )
+                    counters[get_counter_name(field, values[field])] += 1
+            indexed += 1
+        # Keep the lock while a large history is being indexed
+        pipe.expire(REBUILD_LOCK_KEY, REBUILD_LOCK_TTL)
+        pipe.execute()
+
+        if cursor == 0:
+            break
+
+    if counters:
+        redis_client.hset(temp(STATS_KEY), mapping=dict(counters))
+    return indexed
+
+
+def _reindex_recent(redis_client: Any, pks: List[str]) -> None:
+    """Re-apply the indexes of records that may have changed during a rebuild."""
+    for i in range(0, len(pks), 500):
+        for inference_request in load_requests(pks[i : i + 500]):
+            pipe = redis_client.pipeline(transaction=True)
+            changes = add_to_indexes(pipe, inference_request)
+            update_counters(redis_client, pipe.execute(), changes)
+
+
+def rebuild_indexes(batch_size: int = 500) -> Optional[int]:
+    """
+    Rebuild every index and stats counter from the stored records.
+
+    The new indexes are built under temporary keys and swapped in with
+    RENAME in one transaction, so queries keep using the old indexes until
+    the new ones are complete. A SET NX lock lets only one process rebuild
+    at a time. Records written during the rebuild are indexed again after
+    the swap if they were created within REBUILD_CATCH_UP_SECONDS of its
+    start; older records fix their index entries on their next save.
+
+    Args:
+        batch_size: Keys examined per SCAN/pipeline round-trip
+
+    Returns:
+        Number of records indexed, or None if another process is rebuilding
+    """
+    redis_client = InferenceRequest.db()
+    token = _acquire_rebuild_lock(redis_client)
+    if token is None:
+        return None
+    try:
+        # Leftovers of rebuilds that died before their swap
+        orphans = list(
+            redis_client.scan_iter(match=f"{INDEX_KEY_PREFIX}rebuild:*", count=1000)
+        )
+        if orphans:
+            redis_client.delete(*orphans)
+
+        started = time.time()
+        prefix = f"{INDEX_KEY_PREFIX}rebuild:{token}:"
+        indexed = _build_indexes(redis_client, prefix, batch_size)
+
+        recent = [
+            _decode(pk)
+            for pk in redis_client.zrangebyscore(
+                TIME_INDEX_KEY, started - REBUILD_CATCH_UP_SECONDS, "+inf"
+            )
+        ]
+        live = {
+            _decode(key)
+            for key in redis_client.scan_iter(match=f"{INDEX_KEY_PREFIX}*", count=1000)
+        }
+        built = [
+            _decode(key)
+            for key in redis_client.scan_iter(match=f"{prefix}*", count=1000)
+        ]
+        pipe = redis_client.pipeline(transaction=True)
+        for key in built:
+            target = INDEX_KEY_PREFIX + key[len(prefix) :]
+            pipe.rename(key, target)
+            live.discard(target)
+        # Indexes of values no record has any more
+        stale = [key for key in live if _is_live_index_key(key)]
+        if stale:
+            pipe.delete(*stale)
+        pipe.set(INDEX_VERSION_KEY, INDEX_VERSION)
+        pipe.execute()
+
+        _reindex_recent(redis_client, recent)
+        return indexed
+    finally:
+        _release_rebuild_lock(redis_client, token)
+
+
+def ensure_indexes() -> None:
+    """Build the indexes if they are missing or from an older layout."""
+    try:
+        version = _decode(InferenceRequest.db().get(INDEX_VERSION_KEY))
+        if version == INDEX_VERSION:
+            return
+        logger.info("Rebuilding inference request indexes")
+        count = rebuild_indexes()
+        if count is None:
+            logger.info("Inference request indexes are being rebuilt by another worker")
+        else:
+            logger.info(f"Indexed {count} inference requests")
+    except Exception as e:
+        logger.warning(f"Failed to build inference request indexes: {e}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    count = rebuild_indexes()
+    if count is None:
+        logger.info("Another process is rebuilding the indexes")
+    else:
+        logger.info(f"Indexed {count} inference requests")
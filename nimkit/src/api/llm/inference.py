@@ -1,24 +1,83 @@
 """LLM inference API endpoints."""
 
+import asyncio
 import json
 import logging
+import os
+import time
 import uuid
+from contextlib import nullcontext
 from datetime import datetime
-from typing import Dict, Any, Optional
+from urllib.parse import urlsplit
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 import httpx
 from fastapi import APIRouter, HTTPException, Depends, Response, Query
-from fastapi.responses import StreamingResponse
-from pydantic import BaseModel, validator
-
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field, validator
+
+from nimkit.src.api.llm.batching import COMPLETION_BATCHING_ENABLED, completion_batcher
+from nimkit.src.api.llm.cache import (
+    LLM_CACHE_ENABLED,
+    get_cache_key,
+    is_cacheable,
+    iter_sse_replay,
+    response_cache,
+)
+from nimkit.src.api.llm.cleanup import delete_requests
+from nimkit.src.api.llm.cursors import decode_cursor, encode_cursor
+from nimkit.src.api.llm.indexes import (
+    get_counters,
+    get_pk,
+    load_requests,
+    query_indexes,
+    query_indexes_after,
+)
+from nimkit.src.api.llm.latency import record_request_latency, record_stream_latency
 from nimkit.src.api.llm.models import InferenceRequest
+from nimkit.src.api.llm.projections import (
+    load_projections,
+    parse_fields,
+    project_request,
+)
+from nimkit.src.api.llm.streaming import (
+    SSEDataParser,
+    StreamAccumulator,
+    consume_sse_bytes,
+)
 from nimkit.src.api.config.nims import nim_manager
-from nimkit.src.api.utils import get_nvidia_api_headers, validate_nim_exists
+from nimkit.src.api.admission import (
+    PermitStreamingResponse,
+    admission_controller,
+    release_after,
+)
+from nimkit.src.api.http_clients import client_registry
+from nimkit.src.api.persistence import request_persister
+from nimkit.src.api.replicas import replica_router
+from nimkit.src.api.route_table import route_table
+from nimkit.src.api.singleflight import make_flight_key, single_flight
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/llm", tags=["llm"])
 
+# Forward upstream SSE bytes untouched and parse them in a background consumer
+STREAM_PASSTHROUGH = os.getenv("LLM_STREAM_PASSTHROUGH", "false").lower() == "true"
+
+# Strong references to fire-and-forget tasks so they are not garbage collected
+_background_tasks: Set["asyncio.Task[None]"] = set()
+
 
 class InferenceRequestBody(BaseModel):
     """Request body for inference endpoint - matches OpenAI API spec."""
@@ -30,6 +89,7 @@ class InferenceRequestBody(BaseModel):
     stream: Optional[bool] = False
     logprobs: Optional[bool] = False
     top_logprobs: Optional[int] = None
+    seed: Optional[int] = None
     nvext: Optional[Dict[str, Any]] = None
 
     @validator("top_logprobs")
@@ -52,6 +112,7 @@ class CompletionRequestBody(BaseModel):
     stream: Optional[bool] = False
     logprobs: Optional[bool] = False
     top_logprobs: Optional[int] = None
+    seed: Optional[int] = None
     nvext: Optional[Dict[str, Any]] = None
 
     @validator("top_logprobs")
@@ -66,12 +127,27 @@ class CompletionRequestBody(BaseModel):
 
 async def get_nim_endpoint(nim_id: str) -> str:
     """Get NIM endpoint URL for the given NIM ID."""
-    nim_data = nim_manager.get_nim_data(nim_id)
+    nim_data = await nim_manager.get_nim_data(nim_id)
     if not nim_data:
         raise HTTPException(status_code=404, detail=f"NIM {nim_id} not found")
     return f"http://{nim_data.host}:{nim_data.port}"
 
 
+async def get_upstream_client(
+    nim_id: str, endpoint: str, use_nvidia_api: bool = False
+) -> httpx.AsyncClient:
+    """Get the pooled client for the upstream serving the given endpoint."""
+    # Local NIMs may configure their own pool limits; the NVIDIA API client is
+    # shared by every NIM and uses the defaults
+    nim_data = None if use_nvidia_api else await nim_manager.get_nim_data(nim_id)
+    return client_registry.get_client(endpoint, nim_data)
+
+
+def get_route(endpoint: str, use_nvidia_api: bool = False) -> str:
+    """Identify the upstream API independently of the replica serving it."""
+    return f"{'nvidia_api' if use_nvidia_api else 'nim'}:{urlsplit(endpoint).path}"
+
+
 async def get_inference_endpoint(
     nim_id: str, use_nvidia_api: bool = False, stream: bool = False
 ) -> tuple[str, dict]:
@@ -81,41 +157,11 @@ async def get_inference_endpoint(
     Returns:
         tuple: (endpoint_url, headers)
     """
+    route = await route_table.get(nim_id, use_nvidia_api)
+    endpoint = f"{route.base_url()}/chat/completions"
     if use_nvidia_api:
-        # For NVIDIA API, use the invoke_url from NIM metadata as base URL
-        from nimkit.src.api.utils import validate_nim_exists
-
-        nim_data, nim_metadata = validate_nim_exists(nim_id)
-
-        invoke_url = nim_metadata.get("invoke_url")
-        if not invoke_url:
-            raise HTTPException(
-                status_code=400,
-                detail=f"NVIDIA API invoke_url not found for NIM {nim_id}",
-            )
-
-        # Use the invoke_url directly as the base URL for OpenAI client format
-        endpoint = f"{invoke_url}/chat/completions"
-
         logger.info(f"Constructed NVIDIA API endpoint for {nim_id}: {endpoint}")
-        logger.info(f"Base invoke_url from metadata: {invoke_url}")
-
-        headers = get_nvidia_api_headers()
-        if stream:
-            headers["Accept"] = "text/event-stream"
-        return endpoint, headers
-    else:
-        # Use local NIM endpoint
-        nim_data = nim_manager.get_nim_data(nim_id)
-        if not nim_data:
-            raise HTTPException(status_code=404, detail=f"NIM {nim_id} not found")
-
-        endpoint = f"http://{nim_data.host}:{nim_data.port}/v1/chat/completions"
-        headers = {
-            "Content-Type": "application/json",
-            "Accept": "text/event-stream" if stream else "application/json",
-        }
-        return endpoint, headers
+    return endpoint, route.headers(stream)
 
 
 async def get_completion_endpoint(
@@ -127,43 +173,291 @@ async def get_completion_endpoint(
     Returns:
         tuple: (endpoint_url, headers)
     """
+    route = await route_table.get(nim_id, use_nvidia_api)
+    endpoint = f"{route.base_url()}/completions"
     if use_nvidia_api:
-        # For NVIDIA API, use the invoke_url from NIM metadata as base URL
-        from nimkit.src.api.utils import validate_nim_exists
+        logger.info(
+            f"Constructed NVIDIA API completion endpoint for {nim_id}: {endpoint}"
+        )
+    return endpoint, route.headers(stream)
+
+
+async def save_stream_result(
+    inference_request: InferenceRequest,
+    accumulator: StreamAccumulator,
+    error: Optional[Exception] = None,
+    cache_key: Optional[str] = None,
+) -> None:
+    """Persist the reduced output (or the error) of a finished stream."""
+    if error is None:
+        output = accumulator.result()
+        await asyncio.to_thread(inference_request.set_output, output)
+        inference_request.status = "completed"
+        record_stream_latency(inference_request, accumulator)
+        if cache_key:
+            await response_cache.set(cache_key, output)
+    else:
+        inference_request.set_error({"error": str(error), "type": "streaming_error"})
+        inference_request.status = "error"
+    inference_request.update_timestamp()
+    request_persister.save(inference_request)
+    logger.info(
+        f"Saved streaming {inference_request.request_type} response with "
+        f"{accumulator.total_chunks} chunks for request {inference_request.request_id}"
+    )
 
-        nim_data, nim_metadata = validate_nim_exists(nim_id)
 
-        invoke_url = nim_metadata.get("invoke_url")
-        if not invoke_url:
-            raise HTTPException(
-                status_code=400,
-                detail=f"NVIDIA API invoke_url not found for NIM {nim_id}",
-            )
+async def _save_after_consumer(
+    consumer: "asyncio.Task[None]",
+    inference_request: InferenceRequest,
+    accumulator: StreamAccumulator,
+    cache_key: Optional[str] = None,
+) -> None:
+    """Wait for the background parser to drain, then persist the result."""
+    try:
+        await consumer
+        await save_stream_result(inference_request, accumulator, cache_key=cache_key)
+    except Exception as e:
+        logger.error(f"Failed to persist pass-through stream: {e}")
+        await save_stream_result(inference_request, accumulator, error=e)
+
+
+async def stream_from_nim(
+    nim_id: str,
+    endpoint: str,
+    headers: dict,
+    nim_request_data: Dict[str, Any],
+    inference_request: InferenceRequest,
+    use_nvidia_api: bool = False,
+    cache_key: Optional[str] = None,
+    started_at: Optional[float] = None,
+) -> AsyncIterator[Union[str, bytes]]:
+    """
+    Proxy an upstream SSE stream to the client and persist the reduced result.
 
-        # Use the invoke_url directly as the base URL for OpenAI client format
-        endpoint = f"{invoke_url}/completions"
+    In pass-through mode the upstream bytes are forwarded unchanged and
+    parsed by a background consumer; otherwise each line is forwarded and
+    parsed inline.
+    """
+    accumulator = StreamAccumulator(
+        request_type=inference_request.request_type, started_at=started_at
+    )
+    queue: Optional["asyncio.Queue[Optional[Tuple[float, bytes]]]"] = None
+    consumer: Optional["asyncio.Task[None]"] = None
+    if STREAM_PASSTHROUGH:
+        queue = asyncio.Queue()
+        consumer = asyncio.create_task(consume_sse_bytes(queue, accumulator))
+        # Raw bytes are forwarded as-is, so the body must not be compressed
+        headers = {**headers, "Accept-Encoding": "identity"}
+
+    finished = False
+    try:
+        # Optional: send an SSE comment to open the pipe quickly
+        yield ": ping\n\n"
 
-        logger.info(
-            f"Constructed NVIDIA API completion endpoint for {nim_id}: {endpoint}"
+        # Local NIM calls count towards the chosen replica's load and health
+        tracker = (
+            nullcontext() if use_nvidia_api else replica_router.track_url(endpoint)
         )
-        logger.info(f"Base invoke_url from metadata: {invoke_url}")
+        with tracker:
+            # IMPORTANT: use streaming request, NOT client.post(...)
+            client = await get_upstream_client(nim_id, endpoint, use_nvidia_api)
+            async with client.stream(
+                "POST",
+                endpoint,
+                json=nim_request_data,
+                headers=headers,
+                timeout=None,
+            ) as response:
+                logger.info(f"NIM response status: {response.status_code}")
+                logger.info(f"NIM response headers: {dict(response.headers)}")
+                response.raise_for_status()
+
+                if queue is not None:
+                    async for data in response.aiter_raw():
+                        yield data
+                        queue.put_nowait((time.monotonic(), data))
+                else:
+                    async for line in response.aiter_lines():
+                        # httpx yields as soon as data arrives
+                        if line is None:
+                            continue
+                        if line == "":
+                            # keep-alive heartbeat; propagate to client
+                            yield "\n"
+                            continue
+
+                        # Forward the line as-is to the client (SSE requires \n\n between events)
+                        yield f"{line}\n"
+
+                        # Save parsed chunks for DB
+                        if line.startswith("data: "):
+                            accumulator.add_data(line[6:])
+        finished = True
+    except Exception as e:
+        finished = True
+        logger.error(f"Failed to process streaming response: {e}")
+        if consumer is not None:
+            queue.put_nowait(None)
+            consumer.cancel()
+        await save_stream_result(inference_request, accumulator, error=e)
+        # Re-raise so requests sharing this stream record the same error
+        raise
+    finally:
+        if not finished:
+            # The client went away (GeneratorExit) or the task was cancelled.
+            # Nothing may be awaited here: a cancelled scope cancels it again.
+            logger.info(
+                f"Stream for request {inference_request.request_id} closed by "
+                f"the client after {accumulator.total_chunks} chunks"
+            )
+            if consumer is not None:
+                consumer.cancel()
+            inference_request.set_error(
+                {"error": "Client disconnected", "type": "cancelled"}
+            )
+            inference_request.status = "error"
+            inference_request.update_timestamp()
+            request_persister.save(inference_request)
 
-        headers = get_nvidia_api_headers()
-        if stream:
-            headers["Accept"] = "text/event-stream"
-        return endpoint, headers
+    if consumer is None:
+        await save_stream_result(inference_request, accumulator, cache_key=cache_key)
     else:
-        # Use local NIM endpoint
-        nim_data = nim_manager.get_nim_data(nim_id)
-        if not nim_data:
-            raise HTTPException(status_code=404, detail=f"NIM {nim_id} not found")
-
-        endpoint = f"http://{nim_data.host}:{nim_data.port}/v1/completions"
-        headers = {
-            "Content-Type": "application/json",
-            "Accept": "text/event-stream" if stream else "application/json",
-        }
-        return endpoint, headers
+        # Persist once the parser has drained, without holding up the client
+        queue.put_nowait(None)
+        task = asyncio.create_task(
+            _save_after_consumer(consumer, inference_request, accumulator, cache_key)
+        )
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+
+async def post_to_nim(
+    client: httpx.AsyncClient,
+    endpoint: str,
+    headers: dict,
+    nim_request_data: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Send a non-streaming request upstream and return the parsed response."""
+    response = await client.post(
+        endpoint,
+        json=nim_request_data,
+        headers=headers,
+    )
+    logger.info(f"NIM response status: {response.status_code}")
+    logger.info(f"NIM response headers: {dict(response.headers)}")
+    response.raise_for_status()
+    return response.json()
+
+
+async def run_upstream(
+    nim_id: str,
+    endpoint: str,
+    use_nvidia_api: bool,
+    fn: Callable[[], Awaitable[Any]],
+) -> Any:
+    """Run an upstream call within the NIM's admission limits and replica stats."""
+    # Limits and replica routing apply to local NIMs; the hosted NVIDIA API
+    # enforces its own
+    if use_nvidia_api:
+        return await fn()
+    async with admission_controller.admit(
+        nim_id, await nim_manager.get_nim_data(nim_id)
+    ):
+        with replica_router.track_url(endpoint):
+            return await fn()
+
+
+async def end_stream_on_error(
+    source: AsyncIterator[Union[str, bytes]],
+) -> AsyncIterator[Union[str, bytes]]:
+    """
+    Forward the leader's own stream, ending it quietly if it fails.
+
+    stream_from_nim has already recorded the error in the leader's record, so
+    the client just sees the stream end instead of an aborted response.
+    """
+    try:
+        async for chunk in source:
+            yield chunk
+    except Exception:
+        return
+
+
+async def stream_shared(
+    source: AsyncIterator[Union[str, bytes]],
+    inference_request: InferenceRequest,
+    started_at: Optional[float] = None,
+) -> AsyncIterator[Union[str, bytes]]:
+    """
+    Forward a stream joined from another in-flight request.
+
+    The leader's own record is persisted by stream_from_nim; this reduces the
+    same chunks into the joining request's record.
+    """
+    accumulator = StreamAccumulator(
+        request_type=inference_request.request_type, started_at=started_at
+    )
+    parser = SSEDataParser()
+    finished = False
+    try:
+        async for chunk in source:
+            yield chunk
+            data = chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+            for data_content in parser.feed(data):
+                accumulator.add_data(data_content)
+        finished = True
+    except Exception as e:
+        finished = True
+        logger.error(f"Shared stream failed: {e}")
+        await save_stream_result(inference_request, accumulator, error=e)
+        return
+    finally:
+        if not finished:
+            # As in stream_from_nim: the client went away, nothing may be awaited
+            logger.info(
+                f"Shared stream for request {inference_request.request_id} closed "
+                f"by the client after {accumulator.total_chunks} chunks"
+            )
+            inference_request.set_error(
+                {"error": "Client disconnected", "type": "cancelled"}
+            )
+            inference_request.status = "error"
+            inference_request.duration_ms = round(
+                (time.monotonic() - accumulator.started_at) * 1000, 3
+            )
+            inference_request.update_timestamp()
+            request_persister.save(inference_request)
+    await save_stream_result(inference_request, accumulator)
+
+
+async def serve_cached_response(
+    inference_request: InferenceRequest,
+    cached_response: Dict[str, Any],
+    stream: bool,
+) -> Union[JSONResponse, StreamingResponse]:
+    """Record a cache hit and return the cached response in the requested form."""
+    await asyncio.to_thread(
+        inference_request.set_output,
+        {**cached_response, "streaming": True} if stream else cached_response,
+    )
+    inference_request.status = "completed"
+    inference_request.cached = "true"
+    inference_request.update_timestamp()
+    request_persister.save(inference_request)
+    logger.info(f"Served request {inference_request.request_id} from response cache")
+
+    if stream:
+        return StreamingResponse(
+            iter_sse_replay(cached_response, inference_request.request_type),
+            media_type="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                "X-Accel-Buffering": "no",  # nginx
+                "X-Cache": "HIT",
+            },
+        )
+    return JSONResponse(content=cached_response, headers={"X-Cache": "HIT"})
 
 
 @router.post("/inference")
@@ -179,6 +473,7 @@ async def inference(
 
     # Generate UUID for the request
     request_id = str(uuid.uuid4())
+    started_at = time.monotonic()
 
     logger.info(f"Starting inference request {request_id} for NIM {nim_id}")
     logger.info(f"NIM endpoint: {nim_endpoint}")
@@ -195,8 +490,8 @@ async def inference(
         stream=str(request_body.stream or False).lower(),
         status="pending",
     )
-    inference_request.set_input(request_body.model_dump())
-    inference_request.save()
+    await asyncio.to_thread(inference_request.set_input, request_body.model_dump())
+    request_persister.save(inference_request)
 
     logger.info(
         f"Saved inference request {request_id} to Redis with metadata: "
@@ -209,10 +504,7 @@ async def inference(
 
         # For NVIDIA API, use the model name from NIM metadata instead of the request body
         if use_nvidia_api:
-            from nimkit.src.api.utils import validate_nim_exists
-
-            nim_data, nim_metadata = validate_nim_exists(nim_id)
-            model_name = nim_metadata.get("model")
+            model_name = (await route_table.get(nim_id, use_nvidia_api)).model
             if model_name:
                 nim_request_data["model"] = model_name
                 logger.info(f"Using model name from NIM metadata: {model_name}")
@@ -244,80 +536,64 @@ async def inference(
         logger.info(f"Using endpoint: {endpoint}")
         logger.info(f"Using headers: {headers}")
 
+        # Deterministic requests may be answered from the response cache
+        cache_key = None
+        if LLM_CACHE_ENABLED and is_cacheable(nim_request_data):
+            cache_key = get_cache_key(
+                nim_id, get_route(endpoint, use_nvidia_api), nim_request_data
+            )
+            cached_response = await response_cache.get(cache_key)
+            if cached_response is not None:
+                return await serve_cached_response(
+                    inference_request, cached_response, request_body.stream or False
+                )
+
         # Make request to NIM
         if request_body.stream:
             logger.info("Processing streaming response")
 
-            async def stream_generator():
-                all_chunks = []
-                try:
-                    # Optional: send an SSE comment to open the pipe quickly
-                    yield ": ping\n\n"
-
-                    # IMPORTANT: use streaming request, NOT client.post(...)
-                    async with httpx.AsyncClient(timeout=None) as client:
-                        async with client.stream(
-                            "POST",
-                            endpoint,
-                            json=nim_request_data,
-                            headers=headers,
-                        ) as response:
-                            logger.info(f"NIM response status: {response.status_code}")
-                            logger.info(
-                                f"NIM response headers: {dict(response.headers)}"
-                            )
-                            response.raise_for_status()
-
-                            async for line in response.aiter_lines():
-                                # httpx yields as soon as data arrives
-                                if line is None:
-                                    continue
-                                if line == "":
-                                    # keep-alive heartbeat; propagate to client
-                                    yield "\n"
-                                    continue
-
-                                # Forward the line as-is to the client (SSE requires \n\n between events)
-                                yield f"{line}\n"
-
-                                # Save parsed chunks for DB (non-blocking parsing)
-                                if line.startswith("data: "):
-                                    data_content = line[6:]
-                                    if data_content.strip() == "[DONE]":
-                                        continue
-                                    try:
-                                        chunk_data = json.loads(data_content)
-                                        all_chunks.append(chunk_data)
-                                    except json.JSONDecodeError:
-                                        logger.warning(
-                                            f"Failed to parse chunk: {data_content}"
-                                        )
-
-                    # Store after stream completes
-                    response_data = {
-                        "chunks": all_chunks,
-                        "total_chunks": len(all_chunks),
-                        "streaming": True,
-                    }
-                    inference_request.set_output(response_data)
-                    inference_request.status = "completed"
-                    inference_request.update_timestamp()
-                    inference_request.save()
-                    logger.info(
-                        f"Saved streaming response with {len(all_chunks)} chunks "
-                        f"for request {request_id}"
-                    )
-                except Exception as e:
-                    logger.error(f"Failed to process streaming response: {e}")
-                    error_data = {"error": str(e), "type": "streaming_error"}
-                    inference_request.set_error(error_data)
-                    inference_request.status = "error"
-                    inference_request.update_timestamp()
-                    inference_request.save()
-
             # Proper SSE response & headers to prevent buffering
-            return StreamingResponse(
-                stream_generator(),
+            flight_key = make_flight_key(
+                "llm", nim_id, get_route(endpoint, use_nvidia_api), nim_request_data
+            )
+
+            # A new upstream stream needs a slot on the NIM; joining one does not
+            permit = None
+            if not use_nvidia_api and not single_flight.is_streaming(flight_key):
+                permit = await admission_controller.acquire(
+                    nim_id, await nim_manager.get_nim_data(nim_id)
+                )
+
+            def open_stream() -> AsyncIterator[Union[str, bytes]]:
+                source = stream_from_nim(
+                    nim_id,
+                    endpoint,
+                    headers,
+                    nim_request_data,
+                    inference_request,
+                    use_nvidia_api,
+                    cache_key,
+                    started_at,
+                )
+                return release_after(permit, source) if permit else source
+
+            # Identical in-flight streams share one upstream call
+            source, shared_from = single_flight.stream(
+                flight_key, request_id, open_stream
+            )
+            if shared_from is not None:
+                if permit:
+                    permit.release()
+                inference_request.shared_from = shared_from
+                request_persister.save(inference_request)
+                body = stream_shared(source, inference_request, started_at)
+            else:
+                body = end_stream_on_error(source)
+
+            return PermitStreamingResponse(
+                body,
+                permit=permit,
+                source=source,
                 media_type="text/event-stream",
                 headers={
                     "Cache-Control": "no-cache",
@@ -327,31 +603,49 @@ async def inference(
             )
         else:
             # Non-streaming path
-            async with httpx.AsyncClient(timeout=120.0) as client:
-                logger.info("Processing non-streaming response")
-                logger.info(f"Making request to endpoint: {endpoint}")
-                logger.info(f"Request data: {nim_request_data}")
-                logger.info(f"Request headers: {headers}")
-
-                response = await client.post(
+            client = await get_upstream_client(nim_id, endpoint, use_nvidia_api)
+            logger.info("Processing non-streaming response")
+            logger.info(f"Making request to endpoint: {endpoint}")
+            logger.info(f"Request data: {nim_request_data}")
+            logger.info(f"Request headers: {headers}")
+
+            # Identical in-flight requests share one upstream call
+            response_data, shared_from = await single_flight.do(
+                make_flight_key(
+                    "llm", nim_id, get_route(endpoint, use_nvidia_api), nim_request_data
+                ),
+                request_id,
+                lambda: run_upstream(
+                    nim_id,
                     endpoint,
-                    json=nim_request_data,
-                    headers=headers,
-                )
-                logger.info(f"NIM response status: {response.status_code}")
-                logger.info(f"NIM response headers: {dict(response.headers)}")
-                response.raise_for_status()
-
-                response_data = response.json()
-                logger.info(f"Parsed response data: {response_data}")
-
-                inference_request.set_output(response_data)
-                inference_request.status = "completed"
-                inference_request.update_timestamp()
-                inference_request.save()
+                    use_nvidia_api,
+                    lambda: post_to_nim(client, endpoint, headers, nim_request_data),
+                ),
+            )
+            logger.info(f"Parsed response data: {response_data}")
+
+            inference_request.shared_from = shared_from
+            await asyncio.to_thread(inference_request.set_output, response_data)
+            inference_request.status = "completed"
+            record_request_latency(inference_request, started_at)
+            inference_request.update_timestamp()
+            request_persister.save(inference_request)
+            if cache_key:
+                await response_cache.set(cache_key, response_data)
+
+            logger.info(f"Inference request {request_id} completed successfully")
+            return response_data
+
+    except HTTPException as e:
+        # Raised before reaching the NIM, e.g. when admission control sheds load
+        error_data = {"error": e.detail, "type": "rejected"}
+        inference_request.set_error(error_data)
+        inference_request.status = "error"
+        inference_request.update_timestamp()
+        request_persister.save(inference_request)
 
-                logger.info(f"Inference request {request_id} completed successfully")
-                return response_data
+        logger.warning(f"Inference request {request_id} rejected: {e.detail}")
+        raise
 
     except httpx.HTTPError as e:
         logger.error(f"HTTP error for request {request_id}: {e}")
@@ -366,7 +660,7 @@ async def inference(
         inference_request.set_error(error_data)
         inference_request.status = "error"
         inference_request.update_timestamp()
-        inference_request.save()
+        request_persister.save(inference_request)
 
         logger.error(f"Inference request {request_id} failed with HTTP error: {e}")
         raise HTTPException(status_code=500, detail=f"NIM request failed: {str(e)}")
@@ -381,7 +675,7 @@ async def inference(
         inference_request.set_error(error_data)
         inference_request.status = "error"
         inference_request.update_timestamp()
-        inference_request.save()
+        request_persister.save(inference_request)
 
         logger.error(
             f"Inference request {request_id} failed with JSON decode error: {e}"
@@ -399,7 +693,7 @@ async def inference(
         inference_request.set_error(error_data)
         inference_request.status = "error"
         inference_request.update_timestamp()
-        inference_request.save()
+        request_persister.save(inference_request)
 
         logger.error(f"Inference request {request_id} failed with internal error: {e}")
         raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
@@ -418,6 +712,7 @@ async def completion(
 
     # Generate UUID for the request
     request_id = str(uuid.uuid4())
+    started_at = time.monotonic()
 
     logger.info(f"Starting completion request {request_id} for NIM {nim_id}")
     logger.info(f"NIM endpoint: {nim_endpoint}")
@@ -434,8 +729,8 @@ async def completion(
         stream=str(request_body.stream or False).lower(),
         status="pending",
     )
-    inference_request.set_input(request_body.model_dump())
-    inference_request.save()
+    await asyncio.to_thread(inference_request.set_input, request_body.model_dump())
+    request_persister.save(inference_request)
 
     logger.info(
         f"Saved completion request {request_id} to Redis with metadata: "
@@ -448,10 +743,7 @@ async def completion(
 
         # For NVIDIA API, use the model name from NIM metadata instead of the request body
         if use_nvidia_api:
-            from nimkit.src.api.utils import validate_nim_exists
-
-            nim_data, nim_metadata = validate_nim_exists(nim_id)
-            model_name = nim_metadata.get("model")
+            model_name = (await route_table.get(nim_id, use_nvidia_api)).model
             if model_name:
                 nim_request_data["model"] = model_name
                 logger.info(f"Using model name from NIM metadata: {model_name}")
@@ -481,82 +773,64 @@ async def completion(
         logger.info(f"Using endpoint: {endpoint}")
         logger.info(f"Using headers: {headers}")
 
+        # Deterministic requests may be answered from the response cache
+        cache_key = None
+        if LLM_CACHE_ENABLED and is_cacheable(nim_request_data):
+            cache_key = get_cache_key(
+                nim_id, get_route(endpoint, use_nvidia_api), nim_request_data
+            )
+            cached_response = await response_cache.get(cache_key)
+            if cached_response is not None:
+                return await serve_cached_response(
+                    inference_request, cached_response, request_body.stream or False
+                )
+
         # Make request to NIM
         if request_body.stream:
             logger.info("Processing streaming completion response")
 
-            async def stream_generator():
-                all_chunks = []
-                try:
-                    # Optional: send an SSE comment to open the pipe quickly
-                    yield ": ping\n\n"
-
-                    # IMPORTANT: use streaming request, NOT client.post(...)
-                    async with httpx.AsyncClient(timeout=None) as client:
-                        async with client.stream(
-                            "POST",
-                            endpoint,
-                            json=nim_request_data,
-                            headers=headers,
-                        ) as response:
-                            logger.info(f"NIM response status: {response.status_code}")
-                            logger.info(
-                                f"NIM response headers: {dict(response.headers)}"
-                            )
-                            response.raise_for_status()
-
-                            async for line in response.aiter_lines():
-                                # httpx yields as soon as data arrives
-                                if line is None:
-                                    continue
-                                if line == "":
-                                    # keep-alive heartbeat; propagate to client
-                                    yield "\n"
-                                    continue
-
-                                # Forward the line as-is to the client (SSE requires \n\n between events)
-                                yield f"{line}\n"
-
-                                # Save parsed chunks for DB (non-blocking parsing)
-                                if line.startswith("data: "):
-                                    data_content = line[6:]
-                                    if data_content.strip() == "[DONE]":
-                                        continue
-                                    try:
-                                        chunk_data = json.loads(data_content)
-                                        all_chunks.append(chunk_data)
-                                    except json.JSONDecodeError:
-                                        logger.warning(
-                                            f"Failed to parse chunk: {data_content}"
-                                        )
-
-                    # Store after stream completes
-                    response_data = {
-                        "chunks": all_chunks,
-                        "total_chunks": len(all_chunks),
-                        "streaming": True,
-                    }
-                    inference_request.set_output(response_data)
-                    inference_request.status = "completed"
-                    inference_request.update_timestamp()
-                    inference_request.save()
-                    logger.info(
-                        f"Saved streaming completion response with {len(all_chunks)} chunks "
-                        f"for request {request_id}"
-                    )
-                except Exception as e:
-                    logger.error(
-                        f"Failed to process streaming completion response: {e}"
-                    )
-                    error_data = {"error": str(e), "type": "streaming_error"}
-                    inference_request.set_error(error_data)
-                    inference_request.status = "error"
-                    inference_request.update_timestamp()
-                    inference_request.save()
-
             # Proper SSE response & headers to prevent buffering
-            return StreamingResponse(
-                stream_generator(),
+            flight_key = make_flight_key(
+                "llm", nim_id, get_route(endpoint, use_nvidia_api), nim_request_data
+            )
+
+            # A new upstream stream needs a slot on the NIM; joining one does not
+            permit = None
+            if not use_nvidia_api and not single_flight.is_streaming(flight_key):
+                permit = await admission_controller.acquire(
+                    nim_id, await nim_manager.get_nim_data(nim_id)
+                )
+
+            def open_stream() -> AsyncIterator[Union[str, bytes]]:
+                source = stream_from_nim(
+                    nim_id,
+                    endpoint,
+                    headers,
+                    nim_request_data,
+                    inference_request,
+                    use_nvidia_api,
+                    cache_key,
+                    started_at,
+                )
+                return release_after(permit, source) if permit else source
+
+            # Identical in-flight streams share one upstream call
+            source, shared_from = single_flight.stream(
+                flight_key, request_id, open_stream
+            )
+            if shared_from is not None:
+                if permit:
+                    permit.release()
+                inference_request.shared_from = shared_from
+                request_persister.save(inference_request)
+                body = stream_shared(source, inference_request, started_at)
+            else:
+                body = end_stream_on_error(source)
+
+            return PermitStreamingResponse(
+                body,
+                permit=permit,
+                source=source,
                 media_type="text/event-stream",
                 headers={
                     "Cache-Control": "no-cache",
@@ -566,31 +840,55 @@ async def completion(
             )
         else:
             # Non-streaming path
-            async with httpx.AsyncClient(timeout=120.0) as client:
-                logger.info("Processing non-streaming completion response")
-                logger.info(f"Making request to endpoint: {endpoint}")
-                logger.info(f"Request data: {nim_request_data}")
-                logger.info(f"Request headers: {headers}")
-
-                response = await client.post(
+            client = await get_upstream_client(nim_id, endpoint, use_nvidia_api)
+            logger.info("Processing non-streaming completion response")
+            logger.info(f"Making request to endpoint: {endpoint}")
+            logger.info(f"Request data: {nim_request_data}")
+            logger.info(f"Request headers: {headers}")
+
+            if COMPLETION_BATCHING_ENABLED:
+                # Coalesce with concurrent requests that share the same params
+                send = completion_batcher.submit
+            else:
+                send = post_to_nim
+
+            # Identical in-flight requests share one upstream call
+            response_data, shared_from = await single_flight.do(
+                make_flight_key(
+                    "llm", nim_id, get_route(endpoint, use_nvidia_api), nim_request_data
+                ),
+                request_id,
+                lambda: run_upstream(
+                    nim_id,
                     endpoint,
-                    json=nim_request_data,
-                    headers=headers,
-                )
-                logger.info(f"NIM response status: {response.status_code}")
-                logger.info(f"NIM response headers: {dict(response.headers)}")
-                response.raise_for_status()
-
-                response_data = response.json()
-                logger.info(f"Parsed completion response data: {response_data}")
-
-                inference_request.set_output(response_data)
-                inference_request.status = "completed"
-                inference_request.update_timestamp()
-                inference_request.save()
+                    use_nvidia_api,
+                    lambda: send(client, endpoint, headers, nim_request_data),
+                ),
+            )
+            logger.info(f"Parsed completion response data: {response_data}")
+
+            inference_request.shared_from = shared_from
+            await asyncio.to_thread(inference_request.set_output, response_data)
+            inference_request.status = "completed"
+            record_request_latency(inference_request, started_at)
+            inference_request.update_timestamp()
+            request_persister.save(inference_request)
+            if cache_key:
+                await response_cache.set(cache_key, response_data)
+
+            logger.info(f"Completion request {request_id} completed successfully")
+            return response_data
+
+    except HTTPException as e:
+        # Raised before reaching the NIM, e.g. when admission control sheds load
+        error_data = {"error": e.detail, "type": "rejected"}
+        inference_request.set_error(error_data)
+        inference_request.status = "error"
+        inference_request.update_timestamp()
+        request_persister.save(inference_request)
 
-                logger.info(f"Completion request {request_id} completed successfully")
-                return response_data
+        logger.warning(f"Completion request {request_id} rejected: {e.detail}")
+        raise
 
     except httpx.HTTPError as e:
         logger.error(f"HTTP error for completion request {request_id}: {e}")
@@ -605,7 +903,7 @@ async def completion(
         inference_request.set_error(error_data)
         inference_request.status = "error"
         inference_request.update_timestamp()
-        inference_request.save()
+        request_persister.save(inference_request)
 
         logger.error(f"Completion request {request_id} failed with HTTP error: {e}")
         raise HTTPException(status_code=500, detail=f"NIM request failed: {str(e)}")
@@ -620,7 +918,7 @@ async def completion(
         inference_request.set_error(error_data)
         inference_request.status = "error"
         inference_request.update_timestamp()
-        inference_request.save()
+        request_persister.save(inference_request)
 
         logger.error(
             f"Completion request {request_id} failed with JSON decode error: {e}"
@@ -638,65 +936,51 @@ async def completion(
         inference_request.set_error(error_data)
         inference_request.status = "error"
         inference_request.update_timestamp()
-        inference_request.save()
+        request_persister.save(inference_request)
 
         logger.error(f"Completion request {request_id} failed with internal error: {e}")
         raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
 
 
 @router.get("/inference/{request_id}")
-async def get_inference_request(request_id: str) -> Dict[str, Any]:
+async def get_inference_request(
+    request_id: str,
+    fields: str = Query(
+        default="full",
+        description='"full", "summary", or a comma-separated list of fields',
+    ),
+) -> Dict[str, Any]:
     """Get inference request by ID."""
     try:
-        # Use direct Redis query since RedisOM find() seems to have issues
-        redis_client = InferenceRequest.Meta.database
-
-        # Get all InferenceRequest keys
-        pattern = ":nimkit.src.api.llm.models.InferenceRequest:*"
-        keys = redis_client.keys(pattern)
-        # Filter out the index key - handle both bytes and string keys
-        filtered_keys = []
-        for key in keys:
-            if isinstance(key, bytes):
-                if not key.endswith(b":index:hash"):
-                    filtered_keys.append(key)
-            else:
-                if not key.endswith(":index:hash"):
-                    filtered_keys.append(key)
-        keys = filtered_keys
-
-        # Find the key with matching request_id
-        target_key = None
-        for key in keys:
-            try:
-                # Get the request_id field from the hash
-                stored_request_id = redis_client.hget(key, "request_id")
-                if (
-                    stored_request_id
-                    and stored_request_id.decode("utf-8") == request_id
-                ):
-                    target_key = key
-                    break
-            except Exception:
-                continue
-
-        if not target_key:
-            raise HTTPException(status_code=404, detail="Inference request not found")
-
-        # Get the hash data and create InferenceRequest object
-        hash_data = redis_client.hgetall(target_key)
-        if not hash_data:
-            raise HTTPException(status_code=404, detail="Inference request not found")
-
-        # Convert bytes to strings
-        data = {
-            k.decode("utf-8") if isinstance(k, bytes) else k: (
-                v.decode("utf-8") if isinstance(v, bytes) else v
+        projection = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        # Updates still queued for write-behind are newer than Redis
+        inference_request = request_persister.find_pending(request_id)
+        if inference_request is None and projection is not None:
+            pk = await asyncio.to_thread(get_pk, request_id)
+            rows = (
+                await asyncio.to_thread(load_projections, [pk], projection)
+                if pk
+                else []
             )
-            for k, v in hash_data.items()
-        }
-
-        inference_request = InferenceRequest(**data)
+            if not rows:
+                raise HTTPException(
+                    status_code=404, detail="Inference request not found"
+                )
+            return rows[0]
+        if projection is not None:
+            return project_request(inference_request, projection)
+        if inference_request is None:
+            # Resolve the key through the request_id index, not a keyspace scan
+            pk = await asyncio.to_thread(get_pk, request_id)
+            loaded = await asyncio.to_thread(load_requests, [pk]) if pk else []
+            if not loaded:
+                raise HTTPException(
+                    status_code=404, detail="Inference request not found"
+                )
+            inference_request = loaded[0]
 
         return {
             "id": inference_request.request_id,
@@ -708,6 +992,9 @@ async def get_inference_request(request_id: str) -> Dict[str, Any]:
             "nim_id": inference_request.nim_id,
             "model": inference_request.model,
             "stream": inference_request.get_stream(),
+            "cached": inference_request.cached == "true",
+            "shared_from": inference_request.shared_from,
+            "latency": inference_request.get_latency(),
             "status": inference_request.status,
             "date_created": inference_request.date_created,
             "date_updated": inference_request.date_updated,
@@ -738,35 +1025,36 @@ async def debug_streaming(
     logger.info(f"Sending test request: {test_request}")
 
     try:
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.post(
-                f"{nim_endpoint}/v1/chat/completions",
-                json=test_request,
-                headers={"Content-Type": "application/json"},
-            )
+        endpoint = f"{nim_endpoint}/v1/chat/completions"
+        client = await get_upstream_client(nim_id, endpoint)
+        response = await client.post(
+            endpoint,
+            json=test_request,
+            headers={"Content-Type": "application/json"},
+        )
 
-            logger.info(f"Response status: {response.status_code}")
-            logger.info(f"Response headers: {dict(response.headers)}")
+        logger.info(f"Response status: {response.status_code}")
+        logger.info(f"Response headers: {dict(response.headers)}")
 
-            response.raise_for_status()
+        response.raise_for_status()
 
-            # Collect the streaming response
-            response_text = ""
-            chunk_count = 0
-            async for chunk in response.aiter_text():
-                chunk_count += 1
-                logger.info(f"Chunk {chunk_count}: {repr(chunk)}")
-                response_text += chunk
+        # Collect the streaming response
+        response_text = ""
+        chunk_count = 0
+        async for chunk in response.aiter_text():
+            chunk_count += 1
+            logger.info(f"Chunk {chunk_count}: {repr(chunk)}")
+            response_text += chunk
 
-            logger.info(f"Total chunks received: {chunk_count}")
-            logger.info(f"Complete response: {repr(response_text)}")
+        logger.info(f"Total chunks received: {chunk_count}")
+        logger.info(f"Complete response: {repr(response_text)}")
 
-            return {
-                "status": "success",
-                "chunk_count": chunk_count,
-                "response_text": response_text,
-                "response_length": len(response_text),
-            }
+        return {
+            "status": "success",
+            "chunk_count": chunk_count,
+            "response_text": response_text,
+            "response_length": len(response_text),
+        }
 
     except Exception as e:
         logger.error(f"Debug streaming failed: {e}")
@@ -782,63 +1070,78 @@ async def list_inference_requests(
     nim_id: Optional[str] = None,
     status: Optional[str] = None,
     type: Optional[str] = None,
-    limit: int = 100,
+    limit: int = Query(
+        default=100, ge=1, le=1000, description="Number of results to return"
+    ),
+    fields: str = Query(
+        default="summary",
+        description='"summary", "full", or a comma-separated list of fields',
+    ),
+    cursor: Optional[str] = Query(
+        default=None,
+        description="next_cursor of the previous page; pass it empty to start "
+        "cursor pagination",
+    ),
 ) -> Dict[str, Any]:
     """List inference requests with optional filtering."""
     try:
-        # Get all inference requests
-        all_requests = list(InferenceRequest.all_pks())
-
-        # Apply filters and collect all valid requests
-        filtered_requests = []
-        for pk in all_requests:
-            try:
-                request = InferenceRequest.get(pk)
-
-                # Apply filters
-                if request_type and request.request_type != request_type:
-                    continue
-                if nim_id and request.nim_id != nim_id:
-                    continue
-                if status and request.status != status:
-                    continue
-                if type and request.type != type:
-                    continue
-
-                filtered_requests.append(
-                    {
-                        "id": request.request_id,
-                        "request_type": request.request_type,
-                        "nim_id": request.nim_id,
-                        "model": request.model,
-                        "stream": request.get_stream(),
-                        "status": request.status,
-                        "date_created": request.date_created,
-                        "date_updated": request.date_updated,
-                        "input": request.get_input(),
-                        "output": request.get_output(),
-                        "error": request.get_error(),
-                    }
-                )
-            except Exception as e:
-                logger.warning(f"Failed to get request {pk}: {e}")
-                continue
-
-        # Sort by date_created in descending order (newest first)
-        filtered_requests.sort(key=lambda x: x["date_created"], reverse=True)
+        projection = parse_fields(fields)
+        page_cursor = decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        filters = {
+            "request_type": request_type,
+            "nim_id": nim_id,
+            "status": status,
+            "type": type,
+        }
+        next_cursor = None
+        if cursor is not None:
+            # Keyset pagination: read the indexes from the cursor position
+            total = None
+            pks, next_cursor = await asyncio.to_thread(
+                query_indexes_after, filters, page_cursor, limit=limit
+            )
+        else:
+            # Intersect the secondary indexes and fetch only the returned page
+            total, pks = await asyncio.to_thread(query_indexes, filters, limit=limit)
 
-        # Apply limit after sorting
-        limited_requests = filtered_requests[:limit]
+        if projection is not None:
+            # Read only the projected hash fields; no records are constructed
+            limited_requests = await asyncio.to_thread(
+                load_projections, pks, projection
+            )
+        else:
+            limited_requests = [
+                {
+                    "id": request.request_id,
+                    "request_type": request.request_type,
+                    "nim_id": request.nim_id,
+                    "model": request.model,
+                    "stream": request.get_stream(),
+                    "status": request.status,
+                    "date_created": request.date_created,
+                    "date_updated": request.date_updated,
+                    "input": request.get_input(blobs="url"),
+                    "output": request.get_output(blobs="url"),
+                    "error": request.get_error(),
+                    "latency": request.get_latency(),
+                }
+                for request in await asyncio.to_thread(load_requests, pks)
+            ]
 
         return {
             "requests": limited_requests,
-            "total": len(filtered_requests),  # Total before limiting
+            "total": total,  # Total before limiting; None when paging by cursor
+            "next_cursor": encode_cursor(next_cursor) if next_cursor else None,
             "filters": {
                 "request_type": request_type,
                 "nim_id": nim_id,
                 "status": status,
                 "type": type,
                 "limit": limit,
+                "fields": fields,
             },
         }
     except Exception as e:
@@ -852,8 +1155,13 @@ async def list_inference_requests(
 async def delete_inference_request(request_id: str) -> Dict[str, Any]:
     """Delete inference request by ID."""
     try:
+        # Drop queued saves first so a flush cannot recreate the record
+        discarded = request_persister.discard(request_id)
         # Use the efficient model method to delete the request
-        success = InferenceRequest.delete_by_request_id(request_id)
+        deleted = await asyncio.to_thread(
+            InferenceRequest.delete_by_request_id, request_id
+        )
+        success = deleted or discarded
 
         if not success:
             raise HTTPException(status_code=404, detail="Inference request not found")
@@ -873,47 +1181,66 @@ async def delete_inference_request(request_id: str) -> Dict[str, Any]:
         )
 
 
+class BulkDeleteRequestBody(BaseModel):
+    """Request body for deleting many inference requests at once."""
+
+    request_ids: List[str] = Field(..., min_length=1, max_length=10000)
+    delete_media: bool = False
+
+
+@router.post("/requests/bulk-delete")
+async def bulk_delete_inference_requests(
+    body: BulkDeleteRequestBody,
+) -> Dict[str, Any]:
+    """Delete many inference requests, optionally with their media files."""
+    try:
+        # Drop queued saves first so a flush cannot recreate the records
+        discarded = request_persister.discard_many(body.request_ids)
+        deleted, not_found = await asyncio.to_thread(
+            delete_requests, body.request_ids, body.delete_media
+        )
+        not_found = [rid for rid in not_found if rid not in discarded]
+
+        logger.info(f"Bulk deleted {len(set(deleted) | discarded)} inference requests")
+
+        return {
+            "message": "Inference requests deleted",
+            "deleted": len(set(deleted) | discarded),
+            "not_found": not_found,
+        }
+    except Exception as e:
+        logger.error(f"Failed to bulk delete inference requests: {e}")
+        raise HTTPException(
+            status_code=500, detail=f"Failed to delete requests: {str(e)}"
+        )
+
+
 @router.get("/requests/stats")
 async def get_inference_stats() -> Dict[str, Any]:
     """Get statistics about inference requests."""
     try:
-        all_requests = list(InferenceRequest.all_pks())
+        # Counters are kept up to date on every save and delete
+        counters = await asyncio.to_thread(get_counters)
 
         stats = {
-            "total_requests": len(all_requests),
+            "total_requests": counters.get("total", 0),
             "by_type": {"chat": 0, "completion": 0},
             "by_status": {"pending": 0, "completed": 0, "error": 0},
             "by_nim": {},
-            "streaming_vs_non_streaming": {"streaming": 0, "non_streaming": 0},
+            "streaming_vs_non_streaming": {
+                "streaming": counters.get("stream:true", 0),
+                "non_streaming": counters.get("stream:false", 0),
+            },
         }
 
-        for pk in all_requests:
-            try:
-                request = InferenceRequest.get(pk)
-
-                # Count by type
-                if request.request_type in stats["by_type"]:
-                    stats["by_type"][request.request_type] += 1
-
-                # Count by status
-                if request.status in stats["by_status"]:
-                    stats["by_status"][request.status] += 1
-
-                # Count by NIM
-                if request.nim_id:
-                    if request.nim_id not in stats["by_nim"]:
-                        stats["by_nim"][request.nim_id] = 0
-                    stats["by_nim"][request.nim_id] += 1
-
-                # Count streaming vs non-streaming
-                if request.get_stream():
-                    stats["streaming_vs_non_streaming"]["streaming"] += 1
-                else:
-                    stats["streaming_vs_non_streaming"]["non_streaming"] += 1
-
-            except Exception as e:
-                logger.warning(f"Failed to get request {pk} for stats: {e}")
-                continue
+        for counter, count in counters.items():
+            field, _, value = counter.partition(":")
+            if field == "request_type" and value in stats["by_type"]:
+                stats["by_type"][value] = count
+            elif field == "status" and value in stats["by_status"]:
+                stats["by_status"][value] = count
+            elif field == "nim_id" and count:
+                stats["by_nim"][value] = count
 
         return stats
     except Exception as e:
@@ -0,0 +1,162 @@
+"""Client-observed latency metrics for LLM requests."""
+
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from prometheus_client import Histogram
+
+from nimkit.src.api.llm.models import InferenceRequest
+from nimkit.src.api.llm.streaming import StreamAccumulator
+
+logger = logging.getLogger(__name__)
+
+_LATENCY_BUCKETS = (
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+    60,
+    120,
+)
+
+REQUEST_DURATION_SECONDS = Histogram(
+    "nimkit_llm_request_duration_seconds",
+    "End-to-end LLM request duration observed by the kit",
+    ["nim_id", "model", "stream"],
+    buckets=_LATENCY_BUCKETS,
+)
+TIME_TO_FIRST_TOKEN_SECONDS = Histogram(
+    "nimkit_llm_time_to_first_token_seconds",
+    "Time from receiving a streamed request to its first generated token",
+    ["nim_id", "model"],
+    buckets=_LATENCY_BUCKETS,
+)
+INTER_TOKEN_LATENCY_SECONDS = Histogram(
+    "nimkit_llm_inter_token_latency_seconds",
+    "Time between consecutive generated tokens of a streamed request",
+    ["nim_id", "model"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.02, 0.035, 0.05, 0.1, 0.25, 0.5, 1),
+)
+OUTPUT_TOKENS = Histogram(
+    "nimkit_llm_output_tokens",
+    "Generated tokens per streamed request",
+    ["nim_id", "model"],
+    buckets=(1, 8, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192),
+)
+TOKENS_PER_SECOND = Histogram(
+    "nimkit_llm_tokens_per_second",
+    "Decode rate of a streamed request after its first token",
+    ["nim_id", "model"],
+    buckets=(1, 5, 10, 20, 35, 50, 75, 100, 150, 250, 500),
+)
+
+
+def _percentile(values: List[float], percentile: float) -> Optional[float]:
+    """Nearest-rank percentile of a list of values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(percentile / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _to_ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+def record_request_latency(
+    inference_request: InferenceRequest, started_at: float
+) -> None:
+    """
+    Record the duration of a non-streaming request.
+
+    Args:
+        inference_request: Request record to annotate
+        started_at: time.monotonic() when the request was received
+    """
+    duration = time.monotonic() - started_at
+    inference_request.duration_ms = _to_ms(duration)
+    REQUEST_DURATION_SECONDS.labels(
+        nim_id=inference_request.nim_id,
+        model=inference_request.model,
+        stream="false",
+    ).observe(duration)
+
+
+def record_stream_latency(
+    inference_request: InferenceRequest, accumulator: StreamAccumulator
+) -> Dict[str, Any]:
+    """
+    Record token-level latency of a finished stream.
+
+    Output tokens come from the upstream usage block when present and are
+    otherwise counted as one per text-bearing chunk, which is how NIMs
+    stream.
+
+    Args:
+        inference_request: Request record to annotate
+        accumulator: Accumulator that reduced the stream
+
+    Returns:
+        The latency fields that were set on the record
+    """
+    now = time.monotonic()
+    labels = {"nim_id": inference_request.nim_id, "model": inference_request.model}
+
+    duration = now - accumulator.started_at
+    ttft = (
+        accumulator.first_token_at - accumulator.started_at
+        if accumulator.first_token_at is not None
+        else None
+    )
+    usage = accumulator.usage or {}
+    output_tokens = usage.get("completion_tokens") or accumulator.token_chunks
+    decode_seconds = (
+        accumulator.last_token_at - accumulator.first_token_at
+        if accumulator.first_token_at is not None
+        else 0
+    )
+    tokens_per_second = (
+        (output_tokens - 1) / decode_seconds
+        if output_tokens > 1 and decode_seconds > 0
+        else None
+    )
+    gaps = accumulator.inter_token_gaps
+
+    latency = {
+        "duration_ms": _to_ms(duration),
+        "ttft_ms": _to_ms(ttft),
+        "itl_p50_ms": _to_ms(_percentile(gaps, 50)),
+        "itl_p99_ms": _to_ms(_percentile(gaps, 99)),
+        "output_tokens": output_tokens,
+        "tokens_per_second": (
+            round(tokens_per_second, 3) if tokens_per_second is not None else None
+        ),
+    }
+    for field, value in latency.items():
+        setattr(inference_request, field, value)
+
+    REQUEST_DURATION_SECONDS.labels(**labels, stream="true").observe(duration)
+    if ttft is not None:
+        TIME_TO_FIRST_TOKEN_SECONDS.labels(**labels).observe(ttft)
+    itl_histogram = INTER_TOKEN_LATENCY_SECONDS.labels(**labels)
+    for gap in gaps:
+        itl_histogram.observe(gap)
+    OUTPUT_TOKENS.labels(**labels).observe(output_tokens)
+    if tokens_per_second is not None:
+        TOKENS_PER_SECOND.labels(**labels).observe(tokens_per_second)
+
+    logger.info(
+        f"Stream latency for request {inference_request.request_id}: "
+        f"ttft_ms={latency['ttft_ms']}, itl_p99_ms={latency['itl_p99_ms']}, "
+        f"tokens={output_tokens}, tokens_per_second={latency['tokens_per_second']}"
+    )
+    return latency
@@ -0,0 +1,152 @@
+"""Migration of stored inference requests to the current payload encoding."""
+
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+from redis.exceptions import WatchError
+
+from nimkit.src.api.blobs import blob_store
+from nimkit.src.api.codecs import payload_codec
+from nimkit.src.api.llm.models import InferenceRequest, build_summary, load_json
+
+logger = logging.getLogger(__name__)
+
+PAYLOAD_FIELDS = ("input_json", "output_json", "error_json")
+# Codec settings the stored payloads were last migrated to
+PAYLOAD_FORMAT_KEY = "nimkit:requests:payload_format"
+# Bumped when records gain derived fields the migration should fill
+RECORD_LAYOUT_VERSION = "2"
+
+
+def _decode(value: Optional[bytes]) -> Optional[str]:
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+def get_payload_format() -> str:
+    """Describe the current codec settings and record layout, e.g. "zstd:4096:2"."""
+    return (
+        f"{payload_codec.compression}:{payload_codec.threshold}:"
+        f"{RECORD_LAYOUT_VERSION}"
+    )
+
+
+def reencode_payload(field: str, raw: Optional[str]) -> Optional[str]:
+    """
+    Re-encode a stored payload the way set_input/set_output/set_error would.
+
+    Args:
+        field: Name of the payload field
+        raw: Stored value
+
+    Returns:
+        The new value, or None if the stored value is already current
+    """
+    if not raw:
+        return None
+    data = payload_codec.decode(raw)
+    if field != "error_json":
+        data = blob_store.offload(data)
+    encoded = payload_codec.encode(data)
+    return encoded if encoded != raw else None
+
+
+def migrate_payloads(
+    batch_size: int = 500, stop: Optional[threading.Event] = None
+) -> Tuple[int, int]:
+    """
+    Re-encode every stored payload with the current codec.
+
+    Records saved before the summary fields existed get them filled in.
+
+    Each batch is read after WATCHing its keys and written in one MULTI, so
+    a record saved by the application in the meantime aborts the batch
+    instead of being overwritten with stale data. Aborted batches are left
+    for the next run.
+
+    Args:
+        batch_size: Keys examined per SCAN/pipeline round-trip
+        stop: Event that ends the migration between batches
+
+    Returns:
+        Tuple of (records re-encoded, records skipped)
+    """
+    redis_client = InferenceRequest.db()
+    migrated = 0
+    skipped = 0
+    cursor = 0
+    while not (stop and stop.is_set()):
+        cursor, keys = redis_client.scan(
+            cursor, match=InferenceRequest.make_key("*"), count=batch_size
+        )
+        keys = [key for key in keys if not _decode(key).endswith(":index:hash")]
+        if keys:
+            with redis_client.pipeline(transaction=True) as write_pipe:
+                try:
+                    write_pipe.watch(*keys)
+                    read_pipe = redis_client.pipeline(transaction=False)
+                    for key in keys:
+                        read_pipe.hmget(key, [*PAYLOAD_FIELDS, "prompt_preview"])
+                    rows = read_pipe.execute()
+
+                    write_pipe.multi()
+                    changed = 0
+                    for key, row in zip(keys, rows):
+                        mapping: Dict[str, str] = {}
+                        payloads = dict(zip(PAYLOAD_FIELDS, map(_decode, row)))
+                        for field, raw in payloads.items():
+                            try:
+                                value = reencode_payload(field, raw)
+                            except ValueError as e:
+                                logger.warning(f"Skipping {field} of {key}: {e}")
+                                continue
+                            if value is not None:
+                                mapping[field] = payloads[field] = value
+                        if row[-1] is None:
+                            summary = build_summary(
+                                load_json(payloads["input_json"]),
+                                load_json(payloads["output_json"]),
+                            )
+                            mapping.update(
+                                {k: v for k, v in summary.items() if v is not None}
+                            )
+                        if mapping:
+                            write_pipe.hset(key, mapping=mapping)
+                            changed += 1
+                    write_pipe.execute()
+                    migrated += changed
+                except WatchError:
+                    skipped += len(keys)
+
+        if cursor == 0:
+            break
+    return migrated, skipped
+
+
+def ensure_payload_format(stop: Optional[threading.Event] = None) -> None:
+    """
+    Migrate stored payloads if the codec settings changed since the last run.
+
+    Args:
+        stop: Event that ends the migration between batches
+    """
+    try:
+        current = get_payload_format()
+        if _decode(InferenceRequest.db().get(PAYLOAD_FORMAT_KEY)) == current:
+            return
+        logger.info(f"Re-encoding inference request payloads as {current}")
+        migrated, skipped = migrate_payloads(stop=stop)
+        logger.info(
+            f"Re-encoded {migrated} inference requests ({skipped} skipped while busy)"
+        )
+        # Leave the marker unset so an interrupted or partial run resumes
+        if not skipped and not (stop and stop.is_set()):
+            InferenceRequest.db().set(PAYLOAD_FORMAT_KEY, current)
+    except Exception as e:
+        logger.warning(f"Failed to re-encode inference request payloads: {e}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    migrated, skipped = migrate_payloads()
+    logger.info(f"Re-encoded {migrated} inference requests ({skipped} skipped)")
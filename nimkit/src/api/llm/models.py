@@ -1,45 +1,206 @@
 """LLM inference data models."""
 
-import json
-import os
-from datetime import datetime
-from typing import Optional, Dict, Any
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List, Tuple
+from pydantic import PrivateAttr, model_validator
 from redis_om import HashModel, Field
-import redis
+
+from nimkit.src.api.blobs import BLOB_REF_KEY, blob_store, is_blob_ref
+from nimkit.src.api.codecs import payload_codec
+from nimkit.src.api.db import get_redis_client
+
+# Payload keys whose string values are worth searching; other keys hold
+# parameters, IDs or base64 media
+SEARCHABLE_KEYS = {"prompt", "negative_prompt", "content", "text", "transcript"}
+SEARCH_TEXT_MAX_CHARS = 4096
+PREVIEW_MAX_CHARS = 200
+# Blob extensions a gallery card can show as a thumbnail
+_THUMBNAIL_EXTENSIONS = (".png", ".jpg")
+
+
+def extract_search_text(*payloads: Any) -> str:
+    """
+    Collect the human-readable text of request/response payloads.
+
+    Args:
+        *payloads: Decoded input/output JSON payloads
+
+    Returns:
+        Space-joined text, truncated to SEARCH_TEXT_MAX_CHARS
+    """
+    parts: List[str] = []
+
+    def walk(value: Any, key: Optional[str] = None) -> None:
+        if key in SEARCHABLE_KEYS and is_blob_ref(value):
+            # Long prompts are offloaded as text blobs
+            if value.get("encoding") == "text":
+                walk(blob_store.read(value), key)
+        elif isinstance(value, dict):
+            for k, v in value.items():
+                walk(v, k)
+        elif isinstance(value, list):
+            for item in value:
+                walk(item, key)
+        elif isinstance(value, str) and key in SEARCHABLE_KEYS and value.strip():
+            parts.append(value.strip())
+
+    for payload in payloads:
+        walk(payload)
+    return " ".join(parts)[:SEARCH_TEXT_MAX_CHARS]
+
+
+def find_thumbnail_url(*payloads: Any) -> Optional[str]:
+    """
+    Find the first offloaded image in request/response payloads.
+
+    Args:
+        *payloads: Stored payloads, with blob references unresolved
+
+    Returns:
+        /media URL of the image, or None if no image was offloaded
+    """
+
+    def walk(value: Any) -> Optional[str]:
+        if isinstance(value, dict):
+            if is_blob_ref(value):
+                name = value[BLOB_REF_KEY]
+                if name.endswith(_THUMBNAIL_EXTENSIONS):
+                    return blob_store.url_for(value)
+                return None
+            value = list(value.values())
+        if isinstance(value, list):
+            for item in value:
+                url = walk(item)
+                if url:
+                    return url
+        return None
+
+    for payload in payloads:
+        url = walk(payload)
+        if url:
+            return url
+    return None
+
+
+def build_summary(
+    input_data: Any,
+    output_data: Any,
+    stored: Optional[Tuple[Any, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Compute the preview fields listings read instead of full payloads.
+
+    Args:
+        input_data: Input payload, original or as stored
+        output_data: Output payload, original or as stored
+        stored: (input, output) as stored, with blob references unresolved,
+            when input_data and output_data are the original payloads
+
+    Returns:
+        prompt_preview, output_preview and thumbnail_url values
+    """
+    stored_input, stored_output = stored or (input_data, output_data)
+    return {
+        "prompt_preview": extract_search_text(input_data)[:PREVIEW_MAX_CHARS],
+        "output_preview": extract_search_text(output_data)[:PREVIEW_MAX_CHARS],
+        # Generated images first, then input images such as a 3D source image
+        "thumbnail_url": find_thumbnail_url(stored_output, stored_input),
+    }
+
+
+def load_json(raw: Optional[str]) -> Any:
+    """Decode a stored payload field, treating unreadable values as empty."""
+    try:
+        return payload_codec.decode(raw)
+    except (TypeError, ValueError):
+        return {}
+
+
+def decode_payload(raw: Optional[str], blobs: str) -> Dict[str, Any]:
+    """Decode a stored payload, resolving blob references only if present."""
+    if not raw:
+        return {}
+    data = payload_codec.decode(raw)
+    if BLOB_REF_KEY in raw or payload_codec.is_compressed(raw):
+        return blob_store.resolve(data, blobs)
+    return data
+
+
+def to_timestamp(date_created: str) -> Optional[float]:
+    """Convert a naive UTC ISO timestamp to Unix time."""
+    try:
+        created = datetime.fromisoformat(date_created)
+    except (TypeError, ValueError):
+        return None
+    return created.replace(tzinfo=timezone.utc).timestamp()
 
 
 class InferenceRequest(HashModel, index=True):
     """Inference request data model using RedisOM."""
 
     request_id: str = Field(..., description="Request ID (UUID)")
-    input_json: str = Field(..., description="Input request data as JSON string")
+    input_json: str = Field(
+        ..., description="Input request data, encoded by payload_codec"
+    )
     output_json: Optional[str] = Field(
-        default=None, description="Output response data as JSON string"
+        default=None, description="Output response data, encoded by payload_codec"
     )
     error_json: Optional[str] = Field(
-        default=None, description="Error data as JSON string"
+        default=None, description="Error data, encoded by payload_codec"
     )
-    type: str = Field(default="LLM", description="Request type")
+    type: str = Field(default="LLM", index=True, description="Request type")
     request_type: str = Field(
-        default="chat", description="Request type: chat, completion"
+        default="chat", index=True, description="Request type: chat, completion"
+    )
+    nim_id: str = Field(
+        default="", index=True, description="NIM ID used for this request"
     )
-    nim_id: str = Field(default="", description="NIM ID used for this request")
     # deprecate
     model: str = Field(default="", description="Model name used")
     # deprecate
     stream: str = Field(
         default="false", description="Whether this was a streaming request"
     )
+    cached: str = Field(
+        default="false", description="Whether the response was served from cache"
+    )
+    shared_from: Optional[str] = Field(
+        default=None,
+        description="Request ID whose in-flight upstream call served this request",
+    )
     date_created: str = Field(
         default_factory=lambda: datetime.utcnow().isoformat(),
         description="Creation timestamp",
     )
+    created_ts: Optional[float] = Field(
+        default=None,
+        index=True,
+        sortable=True,
+        description="Creation time as a Unix timestamp, for sorted index queries",
+    )
     date_updated: str = Field(
         default_factory=lambda: datetime.utcnow().isoformat(),
         description="Last update timestamp",
     )
     status: str = Field(
-        default="pending", description="Request status: pending, completed, error"
+        default="pending",
+        index=True,
+        description="Request status: pending, completed, error",
+    )
+    search_text: str = Field(
+        default="",
+        index=True,
+        full_text_search=True,
+        description="Prompt and response text indexed for gallery search",
+    )
+    prompt_preview: str = Field(
+        default="", description="Start of the prompt text, for listings"
+    )
+    output_preview: str = Field(
+        default="", description="Start of the response text, for listings"
+    )
+    thumbnail_url: Optional[str] = Field(
+        default=None, description="/media URL of the first image, for listings"
     )
     audio_file_path: Optional[str] = Field(
         default=None, description="Path to uploaded audio file for ASR requests"
@@ -48,36 +209,134 @@ class InferenceRequest(HashModel, index=True):
         default=None,
         description="Path to generated output audio file for speech enhancement requests",
     )
-    # TODO: add field for inference duration in ms
+    duration_ms: Optional[float] = Field(
+        default=None, description="End-to-end duration observed by the kit in ms"
+    )
+    ttft_ms: Optional[float] = Field(
+        default=None, description="Time to first token of a streamed request in ms"
+    )
+    itl_p50_ms: Optional[float] = Field(
+        default=None, description="Median inter-token latency in ms"
+    )
+    itl_p99_ms: Optional[float] = Field(
+        default=None, description="99th percentile inter-token latency in ms"
+    )
+    output_tokens: Optional[int] = Field(
+        default=None, description="Generated tokens of a streamed request"
+    )
+    tokens_per_second: Optional[float] = Field(
+        default=None, description="Decode rate after the first token"
+    )
     # TODO: add field for generated image file path
     # TODO: add field for generated 3D model file path
 
+    # field -> (original payload, payload as stored) for payloads set on this
+    # instance, so derived fields are computed without decoding them again
+    _payloads: Any = PrivateAttr(default_factory=dict)
+
     class Meta:
-        database = redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+        database = get_redis_client()
+
+    @model_validator(mode="before")
+    @classmethod
+    def fill_index_fields(cls, data: Any) -> Any:
+        """Derive index fields missing from records saved before they existed."""
+        if not isinstance(data, dict):
+            return data
+        # Stamp the creation time here so created_ts matches date_created
+        data.setdefault("date_created", datetime.utcnow().isoformat())
+        if data.get("created_ts") in (None, ""):
+            data["created_ts"] = to_timestamp(data["date_created"])
+        if "search_text" not in data or "prompt_preview" not in data:
+            input_data = load_json(data.get("input_json"))
+            output_data = load_json(data.get("output_json"))
+            data.setdefault("search_text", extract_search_text(input_data, output_data))
+            for field, value in build_summary(input_data, output_data).items():
+                data.setdefault(field, value)
+        return data
 
     def set_input(self, data: Dict[str, Any]) -> None:
-        """Set input data as JSON string."""
-        self.input_json = json.dumps(data)
+        """
+        Set input data, moving large values to the blob store.
+
+        This writes blob files and compresses the payload; on the event loop,
+        call it through asyncio.to_thread.
+        """
+        stored = blob_store.offload(data)
+        self.input_json = payload_codec.encode(stored)
+        self._payloads["input_json"] = (data, stored)
+        self.refresh_derived_fields()
 
     def set_output(self, data: Dict[str, Any]) -> None:
-        """Set output data as JSON string."""
-        self.output_json = json.dumps(data)
+        """
+        Set output data, moving large values to the blob store.
+
+        This writes blob files and compresses the payload; on the event loop,
+        call it through asyncio.to_thread.
+        """
+        stored = blob_store.offload(data)
+        self.output_json = payload_codec.encode(stored)
+        self._payloads["output_json"] = (data, stored)
+        self.refresh_derived_fields()
+
+    def _get_payload(self, field: str) -> Tuple[Any, Any]:
+        """Get (original, stored) for a payload field, decoding it if needed."""
+        payload = self._payloads.get(field)
+        if payload is None:
+            # Loaded from Redis: text blobs are read back for search_text
+            stored = load_json(getattr(self, field))
+            payload = (stored, stored)
+        return payload
+
+    def refresh_derived_fields(self) -> None:
+        """Rebuild search_text and the summary fields from input and output."""
+        input_data, stored_input = self._get_payload("input_json")
+        output_data, stored_output = self._get_payload("output_json")
+        self.search_text = extract_search_text(input_data, output_data)
+        summary = build_summary(
+            input_data, output_data, stored=(stored_input, stored_output)
+        )
+        for field, value in summary.items():
+            setattr(self, field, value)
 
     def set_error(self, data: Dict[str, Any]) -> None:
-        """Set error data as JSON string."""
-        self.error_json = json.dumps(data)
+        """Set error data."""
+        self.error_json = payload_codec.encode(data)
 
-    def get_input(self) -> Dict[str, Any]:
-        """Get input data as dict."""
-        return json.loads(self.input_json) if self.input_json else {}
+    def get_input(self, blobs: str = "inline") -> Dict[str, Any]:
+        """
+        Get input data as dict.
 
-    def get_output(self) -> Dict[str, Any]:
-        """Get output data as dict."""
-        return json.loads(self.output_json) if self.output_json else {}
+        Args:
+            blobs: "inline" to restore offloaded values, "url" to replace them
+                with /media URLs
+        """
+        return decode_payload(self.input_json, blobs)
+
+    def get_output(self, blobs: str = "inline") -> Dict[str, Any]:
+        """
+        Get output data as dict.
+
+        Args:
+            blobs: "inline" to restore offloaded values, "url" to replace them
+                with /media URLs
+        """
+        return decode_payload(self.output_json, blobs)
 
     def get_error(self) -> Dict[str, Any]:
         """Get error data as dict."""
-        return json.loads(self.error_json) if self.error_json else {}
+        return payload_codec.decode(self.error_json)
+
+    def get_latency(self) -> Dict[str, Any]:
+        """Get the latency fields as a dict."""
+        return {
+            "duration_ms": self.duration_ms,
+            "ttft_ms": self.ttft_ms,
+            "itl_p50_ms": self.itl_p50_ms,
+            "itl_p99_ms": self.itl_p99_ms,
+            "output_tokens": self.output_tokens,
+            "tokens_per_second": self.tokens_per_second,
+        }
 
     def get_date_created(self) -> datetime:
         """Get date_created as datetime object."""
@@ -91,6 +350,19 @@ class InferenceRequest(HashModel, index=True):
         """Update the date_updated timestamp."""
         self.date_updated = datetime.utcnow().isoformat()
 
+    def copy_result_from(self, other: "InferenceRequest") -> None:
+        """Copy the outcome of another request whose upstream call was shared."""
+        self.status = other.status
+        self.output_json = other.output_json
+        self.error_json = other.error_json
+        if "output_json" in other._payloads:
+            self._payloads["output_json"] = other._payloads["output_json"]
+        else:
+            self._payloads.pop("output_json", None)
+        self.refresh_derived_fields()
+        self.output_audio_path = other.output_audio_path
+        self.shared_from = other.request_id
+
     def get_stream(self) -> bool:
         """Get stream as boolean."""
         return self.stream.lower() == "true"
@@ -111,45 +383,11 @@ class InferenceRequest(HashModel, index=True):
             bool: True if deletion was successful, False otherwise
         """
         try:
-            # Use direct Redis query since RedisOM find() seems to have issues
-            # This is more reliable than the find() method
-            redis_client = cls.Meta.database
-
-            # Get all InferenceRequest keys
-            pattern = ":nimkit.src.api.llm.models.InferenceRequest:*"
-            keys = redis_client.keys(pattern)
-            # Filter out the index key - handle both bytes and string keys
-            filtered_keys = []
-            for key in keys:
-                if isinstance(key, bytes):
-                    if not key.endswith(b":index:hash"):
-                        filtered_keys.append(key)
-                else:
-                    if not key.endswith(":index:hash"):
-                        filtered_keys.append(key)
-            keys = filtered_keys
-
-            # Find the key with matching request_id
-            target_key = None
-            for key in keys:
-                try:
-                    # Get the request_id field from the hash
-                    stored_request_id = redis_client.hget(key, "request_id")
-                    if (
-                        stored_request_id
-                        and stored_request_id.decode("utf-8") == request_id
-                    ):
-                        target_key = key
-                        break
-                except Exception:
-                    continue
-
-            if not target_key:
-                return False
-
-            # Delete the key from Redis
-            result = redis_client.delete(target_key)
-            return bool(result)
+            # Imported here because the cleanup module builds on this model
+            from nimkit.src.api.llm.cleanup import delete_requests
+
+            deleted, _ = delete_requests([request_id])
+            return bool(deleted)
 
         except Exception as e:
             # Log the error for debugging
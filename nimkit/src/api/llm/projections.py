@@ -0,0 +1,159 @@
+"""Field projections for listing inference requests without loading full records."""
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from nimkit.src.api.llm.models import InferenceRequest, decode_payload
+
+logger = logging.getLogger(__name__)
+
+# Projected names of the payload fields, decoded on output
+PAYLOAD_FIELDS = {"input": "input_json", "output": "output_json", "error": "error_json"}
+# Fields a gallery card or list row needs; all are small scalars
+SUMMARY_FIELDS = (
+    "request_id",
+    "type",
+    "request_type",
+    "nim_id",
+    "model",
+    "stream",
+    "status",
+    "date_created",
+    "date_updated",
+    "duration_ms",
+    "prompt_preview",
+    "output_preview",
+    "thumbnail_url",
+)
+PROJECTABLE_FIELDS = tuple(
+    name
+    for name in InferenceRequest.model_fields
+    if name not in ("pk", "search_text", *PAYLOAD_FIELDS.values())
+) + tuple(PAYLOAD_FIELDS)
+
+_FLOAT_FIELDS = {
+    "created_ts",
+    "duration_ms",
+    "ttft_ms",
+    "itl_p50_ms",
+    "itl_p99_ms",
+    "tokens_per_second",
+}
+_INT_FIELDS = {"output_tokens"}
+_BOOL_FIELDS = {"stream", "cached"}
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """
+    Parse a fields= query parameter.
+
+    Args:
+        fields: "full", "summary", or a comma-separated list of field names
+
+    Returns:
+        Field names to project, or None for full records
+
+    Raises:
+        ValueError: If a field name is not projectable
+    """
+    if not fields or fields == "full":
+        return None
+    if fields == "summary":
+        return list(SUMMARY_FIELDS)
+    names = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [name for name in names if name not in PROJECTABLE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+
+def get_stored_fields(fields: Iterable[str]) -> List[str]:
+    """Get the hash fields to read for a projection; request_id is always read."""
+    stored = [PAYLOAD_FIELDS.get(name, name) for name in fields]
+    return list(dict.fromkeys(["request_id", *stored]))
+
+
+def _convert(field: str, value: Any) -> Any:
+    if isinstance(value, bytes):
+        value = value.decode("utf-8")
+    if not isinstance(value, str):
+        return value
+    if field in _BOOL_FIELDS:
+        return value.lower() == "true"
+    if value == "" and field in _FLOAT_FIELDS | _INT_FIELDS:
+        return None
+    if field in _FLOAT_FIELDS:
+        return float(value)
+    if field in _INT_FIELDS:
+        return int(value)
+    return value
+
+
+def project(fields: Iterable[str], values: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build a projected row from stored field values.
+
+    Payload fields are decoded with blob references as /media URLs.
+
+    Args:
+        fields: Projected field names
+        values: Stored field -> value, raw from Redis or from a model
+
+    Returns:
+        Projected field -> converted value
+    """
+    row: Dict[str, Any] = {}
+    for name in fields:
+        if name in PAYLOAD_FIELDS:
+            raw = _convert(name, values.get(PAYLOAD_FIELDS[name]))
+            try:
+                row[name] = decode_payload(raw, "url")
+            except ValueError as e:
+                logger.warning(
+                    f"Failed to decode {name} of {values.get('request_id')}: {e}"
+                )
+                row[name] = {}
+        else:
+            row[name] = _convert(name, values.get(name))
+    return row
+
+
+def project_request(
+    inference_request: InferenceRequest, fields: Iterable[str]
+) -> Dict[str, Any]:
+    """Build a projected row from an in-memory record."""
+    values = {
+        name: getattr(inference_request, name) for name in get_stored_fields(fields)
+    }
+    return project(fields, values)
+
+
+def load_projections(pks: Iterable[str], fields: List[str]) -> List[Dict[str, Any]]:
+    """
+    Read only the projected fields of records in one pipelined HMGET.
+
+    Records deleted since they were indexed are skipped.
+
+    Args:
+        pks: Primary keys, in the order results should be returned
+        fields: Projected field names
+
+    Returns:
+        Projected rows of the records that still exist
+    """
+    pks = list(pks)
+    stored = get_stored_fields(fields)
+    pipe = InferenceRequest.db().pipeline(transaction=False)
+    for pk in pks:
+        pipe.hmget(InferenceRequest.make_key(pk), stored)
+
+    rows = []
+    for pk, raw in zip(pks, pipe.execute() if pks else []):
+        values = dict(zip(stored, raw))
+        if values["request_id"] is None:
+            continue
+        try:
+            rows.append(project(fields, values))
+        except ValueError as e:
+            logger.warning(f"Failed to project inference request {pk}: {e}")
+    return rows
@@ -0,0 +1,361 @@
+"""Retention policies and on-disk archives of expired inference requests."""
+
+import gzip
+import json
+import logging
+import os
+import re
+import time
+import zlib
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from nimkit.src.api.llm.cleanup import DELETE_BATCH_SIZE, delete_records
+from nimkit.src.api.llm.indexes import (
+    TIME_INDEX_KEY,
+    get_counters,
+    get_index_key,
+)
+from nimkit.src.api.llm.models import InferenceRequest, decode_payload
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DIR = os.getenv(
+    "REQUEST_ARCHIVE_DIR",
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "archive"
+    ),
+)
+# Days to keep requests of each type in Redis, e.g.
+# "LLM=30,IMAGE_GENERATION=7,3D_GENERATION=7,TTS=14,ASR=14"
+REQUEST_RETENTION_DAYS = os.getenv("REQUEST_RETENTION_DAYS", "")
+# Days to keep requests of types without their own policy; 0 keeps them
+REQUEST_RETENTION_DEFAULT_DAYS = float(os.getenv("REQUEST_RETENTION_DEFAULT_DAYS", "0"))
+# Upper bound per run so a first run over a large history fits the task limits
+RETENTION_MAX_RECORDS_PER_RUN = int(
+    os.getenv("RETENTION_MAX_RECORDS_PER_RUN", "100000")
+)
+
+_PAYLOAD_FIELDS = {
+    "input_json": "input",
+    "output_json": "output",
+    "error_json": "error",
+}
+_ARCHIVE_NAME = re.compile(r"^[\w.-]+$")
+_ARCHIVE_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_ARCHIVE_SUFFIX = ".jsonl.gz"
+
+
+def parse_retention_policy(spec: str) -> Dict[str, float]:
+    """
+    Parse a retention spec such as "LLM=30,IMAGE_GENERATION=7".
+
+    Args:
+        spec: Comma-separated TYPE=DAYS pairs; TYPE is the request's type
+            field (LLM, IMAGE_GENERATION, 3D_GENERATION, TTS, ASR,
+            SPEECH_ENHANCEMENT, PADDLEOCR)
+
+    Returns:
+        Request type -> days to keep
+
+    Raises:
+        ValueError: If a pair is malformed
+    """
+    policy: Dict[str, float] = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        request_type, sep, days = item.partition("=")
+        if not sep or not request_type.strip():
+            raise ValueError(f"Invalid retention policy entry: {item!r}")
+        policy[request_type.strip()] = float(days)
+    return policy
+
+
+def get_retention_policy() -> Dict[str, float]:
+    """
+    Get the days to keep each known request type.
+
+    Returns:
+        Request type -> days; types that are kept forever are left out
+    """
+    policy = parse_retention_policy(REQUEST_RETENTION_DAYS)
+    if REQUEST_RETENTION_DEFAULT_DAYS > 0:
+        for counter, count in get_counters().items():
+            field, _, value = counter.partition(":")
+            if field == "type" and count > 0:
+                policy.setdefault(value, REQUEST_RETENTION_DEFAULT_DAYS)
+    return {t: days for t, days in policy.items() if days > 0}
+
+
+def _safe_name(value: str) -> str:
+    return re.sub(r"[^\w.-]", "_", value) or "_"
+
+
+def get_archive_dir(
+    request_type: str, date: str, archive_dir: str = ARCHIVE_DIR
+) -> str:
+    """Get the directory archiving requests of a type created on a date."""
+    return os.path.join(archive_dir, _safe_name(request_type), date)
+
+
+def to_archive_record(values: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Convert a stored hash into a self-contained archive line.
+
+    Payloads are decoded with blob contents inline, since blobs no longer
+    referenced from Redis are removed by the blob sweep.
+
+    Args:
+        values: Decoded hash fields of the record
+
+    Returns:
+        JSON-serializable record
+    """
+    record: Dict[str, Any] = {}
+    for field, value in values.items():
+        if field == "search_text":
+            continue
+        if field in _PAYLOAD_FIELDS:
+            try:
+                record[_PAYLOAD_FIELDS[field]] = decode_payload(value, "inline")
+            except ValueError:
+                record[_PAYLOAD_FIELDS[field] + "_raw"] = value
+        else:
+            record[field] = value
+    return record
+
+
+def write_archive(directory: str, records: List[Dict[str, Any]]) -> str:
+    """
+    Write records to a new gzip-compressed JSONL file and sync it to disk.
+
+    Every batch gets its own file, written under a temporary name and
+    renamed once synced, so a crash leaves no partial file behind that
+    could hide the batches written after it.
+
+    Args:
+        directory: Archive directory from get_archive_dir
+        records: Records from to_archive_record
+
+    Returns:
+        Path of the new file
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{time.time_ns()}-{os.getpid()}{_ARCHIVE_SUFFIX}")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb") as fh:
+            for record in records:
+                fh.write(json.dumps(record).encode("utf-8") + b"\n")
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(tmp_path, path)
+    # Make the rename itself durable before the records leave Redis
+    dir_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+    return path
+
+
+def _archive_files(directory: str) -> List[str]:
+    # Oldest batch first; temporary files of interrupted writes are skipped
+    return [
+        os.path.join(directory, name)
+        for name in sorted(os.listdir(directory))
+        if name.endswith(_ARCHIVE_SUFFIX)
+    ]
+
+
+def _decode(value: Any) -> Any:
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+def _partition_date(values: Dict[str, str]) -> str:
+    created_ts = values.get("created_ts")
+    if created_ts:
+        created = datetime.fromtimestamp(float(created_ts), tz=timezone.utc)
+        return created.strftime("%Y-%m-%d")
+    return (values.get("date_created") or "unknown")[:10]
+
+
+def archive_expired(
+    request_type: str,
+    cutoff: float,
+    archive_dir: str = ARCHIVE_DIR,
+    batch_size: int = DELETE_BATCH_SIZE,
+    max_records: int = RETENTION_MAX_RECORDS_PER_RUN,
+) -> int:
+    """
+    Archive and delete requests of a type created before a cutoff.
+
+    Expired records are found through the type's sorted-set index, so no
+    keyspace scan is needed. Each batch is written to new files in its
+    daily archive directories and synced before it is deleted, so a crash
+    can at worst archive a record twice, never lose it.
+
+    Args:
+        request_type: Request type to expire
+        cutoff: Unix time; older requests are archived
+        archive_dir: Root directory of the archives
+        batch_size: Records per batch
+        max_records: Stop after this many records
+
+    Returns:
+        Number of records archived
+    """
+    redis_client = InferenceRequest.db()
+    index_key = get_index_key("type", request_type)
+    archived = 0
+    while archived < max_records:
+        pks = [
+            _decode(pk)
+            for pk in redis_client.zrangebyscore(
+                index_key, "-inf", cutoff, start=0, num=batch_size
+            )
+        ]
+        if not pks:
+            break
+
+        pipe = redis_client.pipeline(transaction=False)
+        for pk in pks:
+            pipe.hgetall(InferenceRequest.make_key(pk))
+        partitions: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        live_pks = []
+        stale_pks = []
+        for pk, hash_data in zip(pks, pipe.execute()):
+            if not hash_data:
+                stale_pks.append(pk)
+                continue
+            values = {_decode(k): _decode(v) for k, v in hash_data.items()}
+            partitions[_partition_date(values)].append(to_archive_record(values))
+            live_pks.append(pk)
+
+        if stale_pks:
+            # Index entries left behind by records deleted outside the app
+            redis_client.zrem(index_key, *stale_pks)
+            redis_client.zrem(TIME_INDEX_KEY, *stale_pks)
+        for date, records in partitions.items():
+            write_archive(get_archive_dir(request_type, date, archive_dir), records)
+        archived += len(delete_records(live_pks))
+
+    return archived
+
+
+def apply_retention(
+    now: Optional[float] = None, archive_dir: str = ARCHIVE_DIR
+) -> Dict[str, int]:
+    """
+    Archive every request older than its type's retention period.
+
+    Args:
+        now: Current Unix time, for testing
+        archive_dir: Root directory of the archives
+
+    Returns:
+        Request type -> number of records archived
+    """
+    now = time.time() if now is None else now
+    results = {}
+    for request_type, days in get_retention_policy().items():
+        cutoff = now - days * 86400
+        count = archive_expired(request_type, cutoff, archive_dir=archive_dir)
+        if count:
+            logger.info(
+                f"Archived {count} {request_type} requests older than {days:g} days"
+            )
+        results[request_type] = count
+    return results
+
+
+def list_archives(archive_dir: str = ARCHIVE_DIR) -> List[Dict[str, Any]]:
+    """
+    List the daily archives, newest first within each type.
+
+    Args:
+        archive_dir: Root directory of the archives
+
+    Returns:
+        Dicts with type, date and size_bytes
+    """
+    archives = []
+    if not os.path.isdir(archive_dir):
+        return archives
+    for request_type in sorted(os.listdir(archive_dir)):
+        type_dir = os.path.join(archive_dir, request_type)
+        if not os.path.isdir(type_dir):
+            continue
+        for date in sorted(os.listdir(type_dir), reverse=True):
+            date_dir = os.path.join(type_dir, date)
+            if not os.path.isdir(date_dir):
+                continue
+            files = _archive_files(date_dir)
+            if files:
+                archives.append(
+                    {
+                        "type": request_type,
+                        "date": date,
+                        "size_bytes": sum(os.path.getsize(path) for path in files),
+                    }
+                )
+    return archives
+
+
+def read_archive(
+    request_type: str,
+    date: str,
+    filters: Optional[Dict[str, Optional[str]]] = None,
+    offset: int = 0,
+    limit: int = 100,
+    archive_dir: str = ARCHIVE_DIR,
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Read archived records of one type and day.
+
+    The files are streamed, so only the requested page is held in memory.
+    A damaged file is logged and skipped; the other batches stay readable.
+
+    Args:
+        request_type: Request type of the archive
+        date: Day of the archive, YYYY-MM-DD
+        filters: Record field -> required value; None values are ignored
+        offset: Number of matching records to skip
+        limit: Maximum number of records to return
+        archive_dir: Root directory of the archives
+
+    Returns:
+        Tuple of (matching records on this page, whether more follow)
+
+    Raises:
+        ValueError: If the type or date is not a valid archive name
+        FileNotFoundError: If there is no archive for the type and day
+    """
+    if not _ARCHIVE_NAME.match(request_type) or not _ARCHIVE_DATE.match(date):
+        raise ValueError("Invalid archive type or date")
+    filters = {k: v for k, v in (filters or {}).items() if v is not None}
+    files = _archive_files(get_archive_dir(request_type, date, archive_dir))
+    if not files:
+        raise FileNotFoundError(f"No archive for {request_type} on {date}")
+
+    records: List[Dict[str, Any]] = []
+    matched = 0
+    for path in files:
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as fh:
+                for line in fh:
+                    record = json.loads(line)
+                    if any(record.get(k) != v for k, v in filters.items()):
+                        continue
+                    matched += 1
+                    if matched <= offset:
+                        continue
+                    if len(records) == limit:
+                        return records, True
+                    records.append(record)
+        except (EOFError, OSError, zlib.error, json.JSONDecodeError) as e:
+            # Includes gzip.BadGzipFile; records read before the damage are kept
+            logger.warning(f"Skipping the rest of damaged archive file {path}: {e}")
+    return records, False
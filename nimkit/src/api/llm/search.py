@@ -0,0 +1,326 @@
+"""RediSearch queries over stored inference requests."""
+
+import logging
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from redis.commands.search.query import Query
+from redis.commands.search.result import Result
+from redis.exceptions import WatchError
+from redis_om import Migrator
+
+from nimkit.src.api.db import get_redis_client
+from nimkit.src.api.llm.cursors import Cursor, paginate_after
+from nimkit.src.api.llm.models import (
+    InferenceRequest,
+    extract_search_text,
+    load_json,
+    to_timestamp,
+)
+from nimkit.src.api.llm.projections import get_stored_fields, project
+
+logger = logging.getLogger(__name__)
+
+_index_ready = False
+
+# Set once every record has created_ts and search_text
+INDEX_FIELDS_KEY = "nimkit:requests:search_fields"
+INDEX_FIELDS_VERSION = "1"
+
+# Characters with a meaning in RediSearch query syntax
+_TAG_SPECIAL_CHARS = re.compile(r"([^\w])")
+
+
+def ensure_search_index() -> None:
+    """
+    Create or update the InferenceRequest index once per process.
+
+    redis-om drops and recreates the index when the schema changes; Redis
+    then reindexes existing hashes in the background.
+    """
+    global _index_ready
+    if _index_ready:
+        return
+    try:
+        Migrator().run()
+        _index_ready = True
+        logger.info("InferenceRequest search index created/verified")
+    except Exception as e:
+        logger.warning(f"Failed to create InferenceRequest search index: {e}")
+
+
+def escape_tag(value: str) -> str:
+    """Escape a value for use inside a TAG filter."""
+    return _TAG_SPECIAL_CHARS.sub(r"\\\1", value)
+
+
+def _tag_filter(field: str, values: Iterable[str]) -> Optional[str]:
+    values = [v.strip() for v in values if v and v.strip()]
+    if not values:
+        return None
+    return f"@{field}:{{{'|'.join(escape_tag(v) for v in values)}}}"
+
+
+def build_search_query(
+    search: Optional[str] = None,
+    nim_ids: Optional[Iterable[str]] = None,
+    statuses: Optional[Iterable[str]] = None,
+    types: Optional[Iterable[str]] = None,
+) -> str:
+    """
+    Build a RediSearch query string for the given filters.
+
+    Args:
+        search: Free text matched against prompts and responses; each word
+            matches as a prefix
+        nim_ids: NIM IDs to include
+        statuses: Request statuses to include
+        types: Request types to include
+
+    Returns:
+        Query string, "*" when nothing is filtered
+    """
+    clauses = [
+        clause
+        for clause in (
+            _tag_filter("nim_id", nim_ids or []),
+            _tag_filter("status", statuses or []),
+            _tag_filter("type", types or []),
+        )
+        if clause
+    ]
+    words = re.findall(r"\w+", (search or "").lower())
+    if words:
+        terms = " ".join(f"{w}*" if len(w) >= 2 else w for w in words)
+        clauses.append(f"@search_text_fts:({terms})")
+    return " ".join(clauses) or "*"
+
+
+def _search(
+    query: str, offset: int, limit: int, return_fields: Optional[List[str]] = None
+) -> Result:
+    ensure_search_index()
+    search_query = (
+        Query(query).sort_by("created_ts", asc=False).paging(offset, limit).dialect(2)
+    )
+    if return_fields:
+        search_query = search_query.return_fields(*return_fields)
+    return get_redis_client().ft(InferenceRequest.Meta.index_name).search(search_query)
+
+
+def _doc_fields(doc: Any) -> Dict[str, Any]:
+    return {k: v for k, v in doc.__dict__.items() if k not in ("id", "payload")}
+
+
+def _to_requests(docs: Iterable[Any]) -> List[InferenceRequest]:
+    requests: List[InferenceRequest] = []
+    for doc in docs:
+        try:
+            requests.append(InferenceRequest(**_doc_fields(doc)))
+        except Exception as e:
+            logger.warning(f"Failed to load inference request {doc.id}: {e}")
+    return requests
+
+
+def _to_projections(docs: Iterable[Any], fields: List[str]) -> List[Dict[str, Any]]:
+    rows = []
+    for doc in docs:
+        try:
+            rows.append(project(fields, doc.__dict__))
+        except ValueError as e:
+            logger.warning(f"Failed to project inference request {doc.id}: {e}")
+    return rows
+
+
+def search_inference_requests(
+    query: str, offset: int = 0, limit: int = 10
+) -> Tuple[int, List[InferenceRequest]]:
+    """
+    Run a query against the index, newest requests first.
+
+    Args:
+        query: Query string from build_search_query
+        offset: Number of results to skip
+        limit: Maximum number of results to return
+
+    Returns:
+        Tuple of (total matching requests, requests on this page)
+    """
+    result = _search(query, offset, limit)
+    return result.total, _to_requests(result.docs)
+
+
+def search_projections(
+    query: str, fields: List[str], offset: int = 0, limit: int = 10
+) -> Tuple[int, List[Dict[str, Any]]]:
+    """
+    Run a query against the index, returning only the projected fields.
+
+    Args:
+        query: Query string from build_search_query
+        fields: Projected field names, see projections.parse_fields
+        offset: Number of results to skip
+        limit: Maximum number of results to return
+
+    Returns:
+        Tuple of (total matching requests, projected rows on this page)
+    """
+    result = _search(query, offset, limit, get_stored_fields(fields))
+    return result.total, _to_projections(result.docs, fields)
+
+
+def _sort_ts(doc: Any) -> float:
+    # Records saved before created_ts existed lack it until the backfill
+    # reaches them; RediSearch sorts them last, so they go at the bottom
+    created_ts = getattr(doc, "created_ts", None)
+    return float(created_ts) if created_ts not in (None, "") else 0.0
+
+
+def search_after(
+    query: str,
+    cursor: Optional[Cursor],
+    limit: int = 10,
+    fields: Optional[List[str]] = None,
+) -> Tuple[Optional[int], List[Any], Optional[Cursor]]:
+    """
+    Run a query against the index from a cursor position, newest first.
+
+    The cursor becomes a created_ts range filter, so RediSearch returns the
+    page from the top of the remaining results instead of skipping an
+    offset.
+
+    Args:
+        query: Query string from build_search_query
+        cursor: Position from a previous page, or None for the first page
+        limit: Maximum number of results to return
+        fields: Projected field names, or None for full records
+
+    Returns:
+        Tuple of (total matching requests on the first page, None after it;
+        InferenceRequests or projected rows; cursor for the next page)
+    """
+    if cursor:
+        range_filter = f"@created_ts:[-inf {cursor.ts!r}]"
+        query = range_filter if query == "*" else f"{query} {range_filter}"
+    want = limit + (len(cursor.pks) if cursor else 0) + 1
+    return_fields = (
+        list(dict.fromkeys([*get_stored_fields(fields), "pk", "created_ts"]))
+        if fields is not None
+        else None
+    )
+    result = _search(query, 0, want, return_fields)
+
+    docs = {doc.pk: doc for doc in result.docs}
+    items = [(_sort_ts(doc), doc.pk) for doc in result.docs]
+    page, next_cursor = paginate_after(cursor, items, limit)
+    page_docs = [docs[pk] for _, pk in page]
+    results = (
+        _to_requests(page_docs)
+        if fields is None
+        else _to_projections(page_docs, fields)
+    )
+    return (None if cursor else result.total), results, next_cursor
+
+
+def backfill_index_fields(
+    batch_size: int = 500, stop: Optional[threading.Event] = None
+) -> Tuple[int, int]:
+    """
+    Fill created_ts and search_text on records saved before they existed.
+
+    Each batch is read after WATCHing its keys and written in one MULTI, so
+    a record saved or deleted by the application in the meantime aborts the
+    batch instead of being overwritten or recreated. Aborted batches are
+    left for the next run.
+
+    Args:
+        batch_size: Keys examined per SCAN/pipeline round-trip
+        stop: Event that ends the backfill between batches
+
+    Returns:
+        Tuple of (records updated, records skipped)
+    """
+    redis_client = get_redis_client()
+    fields = ("created_ts", "search_text", "date_created", "input_json", "output_json")
+    updated = 0
+    skipped = 0
+    cursor = 0
+    while not (stop and stop.is_set()):
+        cursor, keys = redis_client.scan(
+            cursor, match=InferenceRequest.make_key("*"), count=batch_size
+        )
+        keys = [key for key in keys if not key.endswith(":index:hash")]
+        if keys:
+            with redis_client.pipeline(transaction=True) as write_pipe:
+                try:
+                    write_pipe.watch(*keys)
+                    read_pipe = redis_client.pipeline(transaction=False)
+                    for key in keys:
+                        read_pipe.hmget(key, fields)
+                    rows = read_pipe.execute()
+
+                    write_pipe.multi()
+                    changed = 0
+                    for key, row in zip(keys, rows):
+                        (
+                            created_ts,
+                            search_text,
+                            date_created,
+                            input_json,
+                            output_json,
+                        ) = row
+                        mapping = {}
+                        if (
+                            created_ts is None
+                            and to_timestamp(date_created) is not None
+                        ):
+                            mapping["created_ts"] = to_timestamp(date_created)
+                        if search_text is None:
+                            mapping["search_text"] = extract_search_text(
+                                load_json(input_json), load_json(output_json)
+                            )
+                        if mapping:
+                            write_pipe.hset(key, mapping=mapping)
+                            changed += 1
+                    write_pipe.execute()
+                    updated += changed
+                except WatchError:
+                    skipped += len(keys)
+
+        if cursor == 0:
+            break
+    return updated, skipped
+
+
+def ensure_index_fields(stop: Optional[threading.Event] = None) -> None:
+    """
+    Backfill index fields once, on the first start after an upgrade.
+
+    Args:
+        stop: Event that ends the backfill between batches
+    """
+    try:
+        redis_client = get_redis_client()
+        if redis_client.get(INDEX_FIELDS_KEY) == INDEX_FIELDS_VERSION:
+            return
+        logger.info("Backfilling search fields on inference requests")
+        updated, skipped = backfill_index_fields(stop=stop)
+        logger.info(
+            f"Backfilled index fields on {updated} inference requests "
+            f"({skipped} skipped while busy)"
+        )
+        # Leave the marker unset so an interrupted or partial run resumes
+        if not skipped and not (stop and stop.is_set()):
+            redis_client.set(INDEX_FIELDS_KEY, INDEX_FIELDS_VERSION)
+    except Exception as e:
+        logger.warning(f"Failed to backfill search fields: {e}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    ensure_search_index()
+    updated, skipped = backfill_index_fields()
+    logger.info(
+        f"Backfilled index fields on {updated} inference requests ({skipped} skipped)"
+    )
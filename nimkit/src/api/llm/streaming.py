@@ -0,0 +1,265 @@
+"""Helpers for reducing streamed LLM responses."""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StreamAccumulator:
+    """
+    Fold OpenAI-compatible streaming chunks into a single reduced response.
+
+    Only the pieces needed to rebuild the final answer are kept (text parts,
+    finish reason, usage and compact logprob arrays), so memory per stream
+    grows with the generated text rather than with the raw chunk payloads.
+    The reduced output has the same shape as a non-streaming response.
+
+    Arrival times of chunks that carry generated text are tracked as well, for
+    time-to-first-token and inter-token latency.
+    """
+
+    def __init__(self, request_type: str = "chat", started_at: Optional[float] = None):
+        """
+        Initialize the accumulator.
+
+        Args:
+            request_type: "chat" for chat completions or "completion" for
+                text completions
+            started_at: time.monotonic() when the request was received;
+                defaults to now
+        """
+        self.request_type = request_type
+        self.started_at = time.monotonic() if started_at is None else started_at
+        self.first_token_at: Optional[float] = None
+        self.last_token_at: Optional[float] = None
+        self.token_chunks = 0
+        self.inter_token_gaps: List[float] = []
+        self.total_chunks = 0
+        self.id: Optional[str] = None
+        self.model: Optional[str] = None
+        self.created: Optional[int] = None
+        self.usage: Optional[Dict[str, Any]] = None
+        self._choices: Dict[int, Dict[str, Any]] = {}
+
+    def _get_choice_state(self, index: int) -> Dict[str, Any]:
+        """Get or create the running state for a choice index."""
+        state = self._choices.get(index)
+        if state is None:
+            state = {
+                "role": None,
+                "parts": [],
+                "finish_reason": None,
+                "tokens": [],
+                "token_logprobs": [],
+                "top_logprobs": [],
+            }
+            self._choices[index] = state
+        return state
+
+    def add_chunk(
+        self, chunk: Dict[str, Any], received_at: Optional[float] = None
+    ) -> None:
+        """
+        Fold one parsed streaming chunk into the running state.
+
+        Args:
+            chunk: A parsed `data:` payload from the upstream SSE stream
+            received_at: time.monotonic() when the chunk arrived; defaults
+                to now
+        """
+        self.total_chunks += 1
+        has_text = False
+
+        if self.id is None:
+            self.id = chunk.get("id")
+        if self.model is None:
+            self.model = chunk.get("model")
+        if self.created is None:
+            self.created = chunk.get("created")
+        if chunk.get("usage"):
+            self.usage = chunk["usage"]
+
+        for choice in chunk.get("choices") or []:
+            state = self._get_choice_state(choice.get("index", 0))
+
+            if self.request_type == "chat":
+                delta = choice.get("delta") or {}
+                if delta.get("role"):
+                    state["role"] = delta["role"]
+                if delta.get("content"):
+                    state["parts"].append(delta["content"])
+                    has_text = True
+                logprobs = choice.get("logprobs") or delta.get("logprobs")
+                if logprobs:
+                    self._add_chat_logprobs(state, logprobs)
+            else:
+                if choice.get("text"):
+                    state["parts"].append(choice["text"])
+                    has_text = True
+                if choice.get("logprobs"):
+                    self._add_completion_logprobs(state, choice["logprobs"])
+
+            if choice.get("finish_reason") is not None:
+                state["finish_reason"] = choice["finish_reason"]
+
+        if has_text:
+            self._mark_token(time.monotonic() if received_at is None else received_at)
+
+    def _mark_token(self, received_at: float) -> None:
+        """Record the arrival of a chunk carrying generated text."""
+        if self.first_token_at is None:
+            self.first_token_at = received_at
+        else:
+            self.inter_token_gaps.append(received_at - self.last_token_at)
+        self.last_token_at = received_at
+        self.token_chunks += 1
+
+    def add_data(self, data_content: str, received_at: Optional[float] = None) -> None:
+        """
+        Parse and fold the payload of one SSE `data:` line.
+
+        Args:
+            data_content: The text after the `data:` prefix
+            received_at: time.monotonic() when the line arrived
+        """
+        data_content = data_content.strip()
+        if not data_content or data_content == "[DONE]":
+            return
+        try:
+            self.add_chunk(json.loads(data_content), received_at)
+        except json.JSONDecodeError:
+            logger.warning(f"Failed to parse chunk: {data_content}")
+
+    @staticmethod
+    def _add_chat_logprobs(state: Dict[str, Any], logprobs: Dict[str, Any]) -> None:
+        """Append chat-style logprobs (list of token objects) as flat arrays."""
+        for entry in logprobs.get("content") or []:
+            state["tokens"].append(entry.get("token"))
+            state["token_logprobs"].append(entry.get("logprob"))
+            top = entry.get("top_logprobs")
+            state["top_logprobs"].append(
+                {item.get("token"): item.get("logprob") for item in top}
+                if top
+                else None
+            )
+
+    @staticmethod
+    def _add_completion_logprobs(
+        state: Dict[str, Any], logprobs: Dict[str, Any]
+    ) -> None:
+        """Append completion-style logprobs (parallel arrays)."""
+        tokens = logprobs.get("tokens") or []
+        state["tokens"].extend(tokens)
+        state["token_logprobs"].extend(
+            logprobs.get("token_logprobs") or [None] * len(tokens)
+        )
+        state["top_logprobs"].extend(
+            logprobs.get("top_logprobs") or [None] * len(tokens)
+        )
+
+    def get_text(self, index: int = 0) -> str:
+        """Get the text generated so far for a choice."""
+        state = self._choices.get(index)
+        return "".join(state["parts"]) if state else ""
+
+    def result(self) -> Dict[str, Any]:
+        """
+        Build the reduced response.
+
+        Returns:
+            Dict shaped like a non-streaming chat/completion response, with
+            `streaming` and `total_chunks` markers
+        """
+        choices: List[Dict[str, Any]] = []
+        for index in sorted(self._choices):
+            state = self._choices[index]
+            text = "".join(state["parts"])
+            if self.request_type == "chat":
+                choice: Dict[str, Any] = {
+                    "index": index,
+                    "message": {
+                        "role": state["role"] or "assistant",
+                        "content": text,
+                    },
+                }
+            else:
+                choice = {"index": index, "text": text}
+            choice["finish_reason"] = state["finish_reason"]
+            if state["tokens"]:
+                choice["logprobs"] = {
+                    "tokens": state["tokens"],
+                    "token_logprobs": state["token_logprobs"],
+                    "top_logprobs": state["top_logprobs"],
+                }
+            choices.append(choice)
+
+        return {
+            "id": self.id,
+            "object": (
+                "chat.completion" if self.request_type == "chat" else "text_completion"
+            ),
+            "created": self.created,
+            "model": self.model,
+            "choices": choices,
+            "usage": self.usage,
+            "streaming": True,
+            "total_chunks": self.total_chunks,
+        }
+
+
+class SSEDataParser:
+    """Incrementally split raw SSE bytes into `data:` payloads."""
+
+    def __init__(self):
+        """Initialize with an empty line buffer."""
+        self._buffer = b""
+
+    def feed(self, data: bytes) -> List[str]:
+        """
+        Add raw bytes and return the payloads of any completed `data:` lines.
+
+        Args:
+            data: Bytes exactly as received from the upstream
+
+        Returns:
+            List of decoded payloads, without the `data:` prefix
+        """
+        self._buffer += data
+        lines = self._buffer.split(b"\n")
+        # The last element is an incomplete line (or empty); keep it buffered
+        self._buffer = lines.pop()
+
+        payloads = []
+        for line in lines:
+            line = line.rstrip(b"\r")
+            if line.startswith(b"data:"):
+                payloads.append(line[5:].decode("utf-8", errors="replace").strip())
+        return payloads
+
+
+async def consume_sse_bytes(
+    queue: "asyncio.Queue[Optional[Tuple[float, bytes]]]",
+    accumulator: StreamAccumulator,
+) -> None:
+    """
+    Parse raw SSE bytes from a queue into an accumulator until a None sentinel.
+
+    Runs as a background task next to a pass-through stream so JSON parsing
+    never delays forwarding bytes to the client.
+
+    Args:
+        queue: Queue of (arrival time, raw upstream bytes), terminated by None
+        accumulator: Accumulator that receives the parsed chunks
+    """
+    parser = SSEDataParser()
+    while True:
+        item = await queue.get()
+        if item is None:
+            break
+        received_at, data = item
+        for data_content in parser.feed(data):
+            accumulator.add_data(data_content, received_at)
@@ -0,0 +1,256 @@
+"""Streaming NDJSON export and bulk import of inference request history."""
+
+import argparse
+import json
+import logging
+import os
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+from nimkit.src.api.blobs import media_path
+from nimkit.src.api.llm.cleanup import delete_records
+from nimkit.src.api.llm.cursors import Cursor
+from nimkit.src.api.llm.indexes import REQUEST_ID_INDEX_KEY, query_indexes_after
+from nimkit.src.api.llm.models import InferenceRequest
+from nimkit.src.api.llm.retention import to_archive_record
+from nimkit.src.api.persistence import write_requests
+
+logger = logging.getLogger(__name__)
+
+TRANSFER_BATCH_SIZE = int(os.getenv("TRANSFER_BATCH_SIZE", "500"))
+# Import errors reported back in detail; the rest are only counted
+MAX_REPORTED_ERRORS = 20
+
+# Exported fields that are rebuilt on import rather than copied
+_DERIVED_FIELDS = {
+    "pk",
+    "input_json",
+    "output_json",
+    "error_json",
+    "search_text",
+    "prompt_preview",
+    "output_preview",
+    "thumbnail_url",
+}
+# Exported fields naming files under MEDIA_DIR
+_MEDIA_FIELDS = ("audio_file_path", "output_audio_path")
+
+
+def _decode(value: Any) -> Any:
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+def to_timestamp(value: Optional[datetime]) -> Optional[float]:
+    """Convert a datetime, naive meaning UTC, to Unix time."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def export_requests(
+    start_ts: Optional[float] = None,
+    end_ts: Optional[float] = None,
+    nim_id: Optional[str] = None,
+    type: Optional[str] = None,
+    batch_size: int = TRANSFER_BATCH_SIZE,
+) -> Iterator[str]:
+    """
+    Stream matching records as NDJSON lines, newest first.
+
+    Records are walked through the sorted-set indexes one batch at a time
+    and read with one pipelined HGETALL per batch, so memory stays constant
+    however large the history is. Each line has the archive format: payloads
+    decoded, with blob contents inline so the file is self-contained.
+
+    Args:
+        start_ts: Only export requests created at or after this Unix time
+        end_ts: Only export requests created at or before this Unix time
+        nim_id: Only export requests to this NIM
+        type: Only export requests of this type
+        batch_size: Records read per round-trip
+
+    Yields:
+        One JSON document per record, newline terminated
+    """
+    filters = {"nim_id": nim_id, "type": type}
+    cursor: Optional[Cursor] = Cursor(end_ts, ()) if end_ts is not None else None
+    redis_client = InferenceRequest.db()
+    while True:
+        pks, cursor = query_indexes_after(
+            filters, cursor, limit=batch_size, min_ts=start_ts
+        )
+        if pks:
+            pipe = redis_client.pipeline(transaction=False)
+            for pk in pks:
+                pipe.hgetall(InferenceRequest.make_key(pk))
+            for hash_data in pipe.execute():
+                if hash_data:
+                    values = {_decode(k): _decode(v) for k, v in hash_data.items()}
+                    yield json.dumps(to_archive_record(values)) + "\n"
+        if cursor is None:
+            return
+
+
+def from_export_record(record: Dict[str, Any]) -> InferenceRequest:
+    """
+    Build a new record from an exported line.
+
+    Payloads go through set_input/set_output/set_error, so they are encoded
+    and offloaded for this environment and the derived fields are rebuilt.
+    Media paths outside MEDIA_DIR are dropped, since deleting the record
+    with its media would otherwise remove whatever they point at.
+
+    Args:
+        record: Decoded NDJSON line from export_requests
+
+    Returns:
+        Unsaved record with a new primary key
+
+    Raises:
+        ValueError: If the line is not an exported record, or its request_id
+            is not a plain name
+    """
+    if not isinstance(record, dict) or not record.get("request_id"):
+        raise ValueError("Record has no request_id")
+    request_id = record["request_id"]
+    # Request IDs name media files and directories
+    if (
+        not isinstance(request_id, str)
+        or request_id in (".", "..")
+        or any(sep in request_id for sep in ("/", "\\", os.sep))
+    ):
+        raise ValueError(f"Invalid request_id: {request_id!r}")
+    fields = {
+        k: v
+        for k, v in record.items()
+        if k in InferenceRequest.model_fields and k not in _DERIVED_FIELDS
+    }
+    for field in _MEDIA_FIELDS:
+        if fields.get(field):
+            fields[field] = media_path(fields[field])
+            if fields[field] is None:
+                logger.warning(
+                    f"Dropped {field} of imported request {request_id}: "
+                    f"outside the media directory"
+                )
+    inference_request = InferenceRequest(input_json="", **fields)
+    inference_request.set_input(record.get("input") or {})
+    if record.get("output"):
+        inference_request.set_output(record["output"])
+    if record.get("error"):
+        inference_request.set_error(record["error"])
+    return inference_request
+
+
+def _write_import_batch(
+    batch: List[InferenceRequest], on_conflict: str, counts: Dict[str, int]
+) -> None:
+    # Later lines for the same request_id win
+    batch = list({r.request_id: r for r in batch}.values())
+    redis_client = InferenceRequest.db()
+    existing = redis_client.hmget(REQUEST_ID_INDEX_KEY, [r.request_id for r in batch])
+    if on_conflict == "replace":
+        delete_records([_decode(pk) for pk in existing if pk])
+    else:
+        counts["skipped"] += sum(1 for pk in existing if pk)
+        batch = [r for r, pk in zip(batch, existing) if not pk]
+    if batch:
+        write_requests(batch)
+    counts["imported"] += len(batch)
+
+
+def import_requests(
+    lines: Iterable[Union[str, bytes]],
+    on_conflict: str = "skip",
+    batch_size: int = TRANSFER_BATCH_SIZE,
+) -> Dict[str, Any]:
+    """
+    Ingest NDJSON lines from export_requests with pipelined writes.
+
+    Args:
+        lines: NDJSON lines; blank lines are ignored
+        on_conflict: "skip" to keep records whose request_id already exists,
+            "replace" to overwrite them
+        batch_size: Records written per pipeline
+
+    Returns:
+        Counts of imported, skipped and failed lines, plus the first errors
+    """
+    if on_conflict not in ("skip", "replace"):
+        raise ValueError(f"Invalid on_conflict value: {on_conflict}")
+    counts = {"imported": 0, "skipped": 0, "failed": 0}
+    errors: List[str] = []
+    batch: List[InferenceRequest] = []
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            batch.append(from_export_record(json.loads(line)))
+        except (ValueError, TypeError) as e:
+            counts["failed"] += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append(f"line {line_number}: {e}")
+            continue
+        if len(batch) >= batch_size:
+            _write_import_batch(batch, on_conflict, counts)
+            batch = []
+    if batch:
+        _write_import_batch(batch, on_conflict, counts)
+    return {**counts, "errors": errors}
+
+
+def _parse_datetime(value: str) -> float:
+    return to_timestamp(datetime.fromisoformat(value))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Export or import history from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="Write history as NDJSON")
+    export_parser.add_argument("--start", type=_parse_datetime, help="ISO datetime")
+    export_parser.add_argument("--end", type=_parse_datetime, help="ISO datetime")
+    export_parser.add_argument("--nim-id")
+    export_parser.add_argument("--type")
+    export_parser.add_argument("--output", default="-", help="File, or - for stdout")
+
+    import_parser = commands.add_parser("import", help="Read history from NDJSON")
+    import_parser.add_argument("input", help="File, or - for stdin")
+    import_parser.add_argument(
+        "--on-conflict", choices=("skip", "replace"), default="skip"
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "export":
+        out = sys.stdout if args.output == "-" else open(args.output, "w")
+        try:
+            count = 0
+            for line in export_requests(args.start, args.end, args.nim_id, args.type):
+                out.write(line)
+                count += 1
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        logger.info(f"Exported {count} inference requests")
+    else:
+        source = sys.stdin if args.input == "-" else open(args.input)
+        try:
+            result = import_requests(source, on_conflict=args.on_conflict)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+        logger.info(
+            f"Imported {result['imported']} inference requests "
+            f"({result['skipped']} skipped, {result['failed']} failed)"
+        )
+        for error in result["errors"]:
+            logger.warning(error)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
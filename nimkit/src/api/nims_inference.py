@@ -1,5 +1,6 @@
 """NIM inference API endpoints."""
 
+import asyncio
 import json
 import logging
 import uuid
@@ -11,8 +12,11 @@ from pydantic import BaseModel, field_validator
 from typing import ClassVar
 
 from .llm.models import InferenceRequest
-from .utils import validate_nim_exists
+from .persistence import request_persister
+from .route_table import route_table
 from .inference_utils import perform_inference
+from .admission import admission_controller
+from .singleflight import make_flight_key, single_flight
 
 logger = logging.getLogger(__name__)
 
@@ -164,8 +168,9 @@ async def nim_inference(
 
     try:
         logger.debug(f"Validating NIM exists for: {nim_id}")
-        # Validate NIM exists
-        nim_data, nim_metadata = validate_nim_exists(nim_id)
+        # Validate NIM exists and resolve its compiled route
+        route = await route_table.get(nim_id, use_nvidia_api)
+        nim_data, nim_metadata = route.nim_data, route.metadata
         logger.debug(
             f"NIM validation successful. Host: {nim_data.host}, Port: {nim_data.port}, Type: {nim_data.nim_type}"
         )
@@ -176,14 +181,9 @@ async def nim_inference(
 
         # Determine request type based on NIM type
         # Get NIM type from metadata (YAML) first, fallback to Redis config
-        nim_type = nim_metadata.get("type", "").lower()
-        if not nim_type:
-            # Fallback to Redis config nim_type
-            nim_type = getattr(nim_data, "nim_type", "").lower()
+        nim_type = route.nim_type
 
-        logger.debug(
-            f"Determined NIM type: {nim_type} (from metadata: {nim_metadata.get('type', '')}, from Redis: {getattr(nim_data, 'nim_type', '')})"
-        )
+        logger.debug(f"Determined NIM type: {nim_type}")
 
         if nim_type == "image":
             request_type = "IMAGE_GENERATION"
@@ -219,9 +219,9 @@ async def nim_inference(
 
         # Set input data
         logger.debug("Setting input data and saving InferenceRequest")
-        inference_request.set_input(request_data)
+        await asyncio.to_thread(inference_request.set_input, request_data)
         try:
-            inference_request.save()
+            request_persister.save(inference_request)
             logger.debug("InferenceRequest saved successfully")
         except Exception as save_error:
             logger.error(f"Failed to save InferenceRequest: {save_error}")
@@ -235,12 +235,49 @@ async def nim_inference(
 
         # Perform inference
         logger.debug("Starting inference process")
-        response_data = await perform_inference(
-            nim_id, request_data, inference_request, use_nvidia_api
-        )
-        logger.debug(
-            f"Inference completed successfully. Response data keys: {list(response_data.keys()) if isinstance(response_data, dict) else 'Not a dict'}"
-        )
+
+        async def run_inference() -> InferenceRequest:
+            # Limits protect local NIMs; the hosted NVIDIA API enforces its own
+            if use_nvidia_api:
+                await perform_inference(
+                    nim_id, request_data, inference_request, use_nvidia_api
+                )
+            else:
+                async with admission_controller.admit(nim_id, nim_data):
+                    await perform_inference(
+                        nim_id, request_data, inference_request, use_nvidia_api
+                    )
+            return inference_request
+
+        # Identical in-flight requests share one upstream call
+        try:
+            leader_request, shared_from = await single_flight.do(
+                make_flight_key("nims", nim_id, use_nvidia_api, request_data),
+                request_id,
+                run_inference,
+            )
+        except HTTPException as e:
+            # perform_inference records its own errors; a request shed by
+            # admission control or sharing another request's call is still
+            # pending here
+            if inference_request.status == "pending":
+                inference_request.status = "error"
+                inference_request.set_error(
+                    {
+                        "error": e.detail,
+                        "nim_id": nim_id,
+                        "status_code": e.status_code,
+                    }
+                )
+                inference_request.update_timestamp()
+                request_persister.save(inference_request)
+            raise
+
+        if shared_from is not None:
+            inference_request.copy_result_from(leader_request)
+            inference_request.update_timestamp()
+            request_persister.save(inference_request)
+            logger.info(f"Request {request_id} shared the result of {shared_from}")
 
         # Use the inference_request object that was updated by perform_inference
         logger.debug(
@@ -256,6 +293,7 @@ async def nim_inference(
             "request_type": inference_request.request_type,
             "model": inference_request.model,
             "status": inference_request.status,
+            "shared_from": inference_request.shared_from,
             "date_created": inference_request.date_created,
             "date_updated": inference_request.date_updated,
             "input": inference_request.get_input(),
@@ -4,6 +4,7 @@ import logging
 from typing import Dict, Any
 from fastapi import APIRouter, HTTPException, status
 
+from .config.nims import nim_manager
 from .utils import (
     get_nvidia_api_key_preview,
     set_nvidia_api_key,
@@ -21,9 +22,9 @@ router = APIRouter(prefix="/api/nvidia", tags=["nvidia-api"])
 async def get_nvidia_api_key_status() -> Dict[str, Any]:
     """Get the status of the NVIDIA API key (preview only)."""
     try:
-        preview = get_nvidia_api_key_preview()
+        preview = await get_nvidia_api_key_preview()
         has_key = preview != "No API key configured"
-        source = get_nvidia_api_key_source()
+        source = await get_nvidia_api_key_source()
 
         return {
             "preview": preview,
@@ -56,7 +57,7 @@ async def set_nvidia_api_key_endpoint(api_key_data: Dict[str, str]) -> Dict[str,
                 detail="API key must start with 'nvapi-'",
             )
 
-        success = set_nvidia_api_key(api_key)
+        success = await set_nvidia_api_key(api_key)
 
         if success:
             return {
@@ -83,7 +84,7 @@ async def set_nvidia_api_key_endpoint(api_key_data: Dict[str, str]) -> Dict[str,
 async def delete_nvidia_api_key_endpoint() -> Dict[str, Any]:
     """Delete the NVIDIA API key from Redis."""
     try:
-        success = delete_nvidia_api_key()
+        success = await delete_nvidia_api_key()
 
         if success:
             return {
@@ -109,10 +110,10 @@ async def delete_nvidia_api_key_endpoint() -> Dict[str, Any]:
 async def get_nvidia_api_toggle() -> Dict[str, Any]:
     """Get the NVIDIA API toggle state."""
     try:
-        from .db import get_redis_client
+        from .db import get_async_redis_client
 
         # Check if API key is available
-        api_key = get_nvidia_api_key()
+        api_key = await get_nvidia_api_key()
         if not api_key:
             # No API key available, toggle should be False
             return {
@@ -122,8 +123,8 @@ async def get_nvidia_api_toggle() -> Dict[str, Any]:
             }
 
         # Get toggle state from Redis
-        redis_client = get_redis_client()
-        toggle_state = redis_client.get("nims:nvidia_api_toggle")
+        redis_client = get_async_redis_client()
+        toggle_state = await redis_client.get("nims:nvidia_api_toggle")
 
         enabled = toggle_state == "true" if toggle_state else False
 
@@ -140,10 +141,10 @@ async def get_nvidia_api_toggle() -> Dict[str, Any]:
 async def set_nvidia_api_toggle(toggle_data: Dict[str, bool]) -> Dict[str, Any]:
     """Set the NVIDIA API toggle state."""
     try:
-        from .db import get_redis_client
+        from .db import get_async_redis_client
 
         # Check if API key is available
-        api_key = get_nvidia_api_key()
+        api_key = await get_nvidia_api_key()
         if not api_key:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -153,8 +154,10 @@ async def set_nvidia_api_toggle(toggle_data: Dict[str, bool]) -> Dict[str, Any]:
         enabled = toggle_data.get("enabled", False)
 
         # Store toggle state in Redis
-        redis_client = get_redis_client()
-        redis_client.set("nims:nvidia_api_toggle", str(enabled).lower())
+        redis_client = get_async_redis_client()
+        await redis_client.set("nims:nvidia_api_toggle", str(enabled).lower())
+        # Have every worker rebuild its routes for the new setting
+        await nim_manager.publish_invalidation()
 
         return {"enabled": enabled, "can_enable": True, "status": "success"}
     except HTTPException:
@@ -0,0 +1,271 @@
+"""Write-behind persistence of InferenceRequest state transitions."""
+
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set
+
+from .llm.cleanup import delete_requests
+from .llm.indexes import add_to_indexes, update_counters
+from .llm.models import InferenceRequest
+
+logger = logging.getLogger(__name__)
+
+# "write_behind" queues saves and flushes them in the background; "sync"
+# saves inline on every state transition (the pre-write-behind behaviour)
+INFERENCE_PERSISTENCE_MODE = os.getenv("INFERENCE_PERSISTENCE_MODE", "write_behind")
+# Longest a state transition waits in memory before it is written; this is
+# the window of transitions lost if the process dies without shutting down
+PERSISTENCE_FLUSH_INTERVAL_MS = float(os.getenv("PERSISTENCE_FLUSH_INTERVAL_MS", "50"))
+# Records written per pipelined round-trip
+PERSISTENCE_MAX_BATCH = int(os.getenv("PERSISTENCE_MAX_BATCH", "256"))
+# Queued records above which saves fall back to writing inline
+PERSISTENCE_MAX_PENDING = int(os.getenv("PERSISTENCE_MAX_PENDING", "10000"))
+
+
+def write_requests(batch: List[InferenceRequest]) -> None:
+    """
+    Write records and their index entries in one pipeline.
+
+    Args:
+        batch: Records to save
+    """
+    redis_client = InferenceRequest.db()
+    pipeline = redis_client.pipeline(transaction=False)
+    changes = []
+    for inference_request in batch:
+        inference_request.save(pipeline=pipeline)
+        changes.extend(add_to_indexes(pipeline, inference_request))
+    update_counters(redis_client, pipeline.execute(), changes)
+
+
+class RequestPersister:
+    """
+    Take InferenceRequest saves off the request's critical path.
+
+    save() snapshots the record and returns immediately; a background task
+    writes queued snapshots to Redis in pipelined batches every flush
+    interval. Transitions of the same record that are still queued are
+    coalesced, so a request that goes pending -> completed within one
+    interval costs a single write. Until start() is called (and in "sync"
+    mode) save() writes inline, so scripts and tests that never run the
+    application lifespan keep the old behaviour.
+
+    Records of the batch being written stay visible to find_pending() until
+    the write completes. Discarding one of them leaves a tombstone, and the
+    record is deleted again once the write lands, so a delete that raced a
+    flush is not undone.
+    """
+
+    def __init__(
+        self,
+        mode: str = INFERENCE_PERSISTENCE_MODE,
+        flush_interval_ms: float = PERSISTENCE_FLUSH_INTERVAL_MS,
+        max_batch: int = PERSISTENCE_MAX_BATCH,
+        max_pending: int = PERSISTENCE_MAX_PENDING,
+    ):
+        """
+        Initialize the persister.
+
+        Args:
+            mode: "write_behind" or "sync"
+            flush_interval_ms: Longest a queued save waits before it is written
+            max_batch: Records written per pipelined round-trip
+            max_pending: Queue size above which saves are written inline
+        """
+        self.mode = mode
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self._pending: "OrderedDict[str, InferenceRequest]" = OrderedDict()
+        # pk -> snapshot in the batch currently being written
+        self._in_flight: Dict[str, InferenceRequest] = {}
+        # request IDs discarded while their snapshot was being written
+        self._tombstones: Set[str] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._stopping = False
+
+    @property
+    def running(self) -> bool:
+        """Whether saves are currently being queued."""
+        return self._task is not None and not self._task.done()
+
+    @property
+    def pending(self) -> int:
+        """Number of records waiting to be written."""
+        return len(self._pending)
+
+    def start(self) -> None:
+        """Start the background flush task (no-op in "sync" mode)."""
+        if self.mode != "write_behind" or self.running:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Write-behind persistence started "
+            f"(flush interval {self.flush_interval * 1000:.0f}ms)"
+        )
+
+    async def stop(self) -> None:
+        """Stop the background task and write everything still queued."""
+        if self._task is not None:
+            # Let an in-progress batch finish rather than cancelling it
+            self._stopping = True
+            if self._wakeup is not None:
+                self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+        if self._pending:
+            logger.error(
+                f"Dropping {len(self._pending)} inference request updates "
+                f"that could not be written on shutdown"
+            )
+        logger.info("Write-behind persistence stopped")
+
+    def save(self, inference_request: InferenceRequest) -> None:
+        """
+        Persist the current state of a record.
+
+        Args:
+            inference_request: Record to save; later changes to it are not
+                seen by this save
+        """
+        if not self.running:
+            self._write_batch([inference_request])
+            return
+
+        pk = inference_request.pk
+        if pk not in self._pending and len(self._pending) >= self.max_pending:
+            logger.warning("Write-behind queue is full, saving inline")
+            self._write_batch([inference_request])
+            return
+
+        self._pending[pk] = inference_request.model_copy()
+        if len(self._pending) >= self.max_batch and self._wakeup is not None:
+            self._wakeup.set()
+
+    def find_pending(self, request_id: str) -> Optional[InferenceRequest]:
+        """
+        Get the queued snapshot of a record not yet written to Redis.
+
+        Args:
+            request_id: The request ID to look up
+
+        Returns:
+            The latest queued or in-flight snapshot, or None if there is none
+        """
+        for snapshots in (self._pending, self._in_flight):
+            for inference_request in snapshots.values():
+                if inference_request.request_id == request_id:
+                    return inference_request
+        return None
+
+    def discard(self, request_id: str) -> bool:
+        """
+        Drop queued saves of a record so a delete is not undone by a flush.
+
+        Args:
+            request_id: The request ID being deleted
+
+        Returns:
+            True if a queued or in-flight save was dropped
+        """
+        return bool(self.discard_many([request_id]))
+
+    def discard_many(self, request_ids: Iterable[str]) -> Set[str]:
+        """
+        Drop queued saves of several records; see discard().
+
+        Args:
+            request_ids: The request IDs being deleted
+
+        Returns:
+            The request IDs whose queued or in-flight saves were dropped
+        """
+        wanted = set(request_ids)
+        discarded = set()
+        for pk, inference_request in list(self._pending.items()):
+            if inference_request.request_id in wanted:
+                del self._pending[pk]
+                discarded.add(inference_request.request_id)
+        for inference_request in self._in_flight.values():
+            if inference_request.request_id in wanted:
+                self._tombstones.add(inference_request.request_id)
+                discarded.add(inference_request.request_id)
+        return discarded
+
+    async def flush(self) -> None:
+        """Write every queued record, one pipelined batch at a time."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            while self._pending:
+                batch: List[InferenceRequest] = []
+                while self._pending and len(batch) < self.max_batch:
+                    pk, inference_request = self._pending.popitem(last=False)
+                    self._in_flight[pk] = inference_request
+                    batch.append(inference_request)
+                try:
+                    await asyncio.to_thread(self._write_batch, batch)
+                except Exception as e:
+                    logger.error(
+                        f"Failed to write {len(batch)} inference requests: {e}"
+                    )
+                    # Re-queue unless a newer snapshot was queued meanwhile
+                    # or the record was deleted
+                    for inference_request in reversed(batch):
+                        request_id = inference_request.request_id
+                        if (
+                            inference_request.pk not in self._pending
+                            and request_id not in self._tombstones
+                        ):
+                            self._pending[inference_request.pk] = inference_request
+                            self._pending.move_to_end(inference_request.pk, last=False)
+                    self._finish_batch(batch)
+                    return
+                deleted = self._finish_batch(batch)
+                if deleted:
+                    await asyncio.to_thread(delete_requests, deleted)
+                    logger.info(
+                        f"Deleted {len(deleted)} inference requests removed "
+                        f"while being written"
+                    )
+
+    def _finish_batch(self, batch: List[InferenceRequest]) -> List[str]:
+        """Stop exposing a written batch; return its discarded request IDs."""
+        deleted = []
+        for inference_request in batch:
+            self._in_flight.pop(inference_request.pk, None)
+            if inference_request.request_id in self._tombstones:
+                self._tombstones.discard(inference_request.request_id)
+                deleted.append(inference_request.request_id)
+        return deleted
+
+    @staticmethod
+    def _write_batch(batch: List[InferenceRequest]) -> None:
+        """Write a batch of records and their index entries in one pipeline."""
+        write_requests(batch)
+
+    async def _run(self) -> None:
+        """Flush on every interval, or early when a full batch is queued."""
+        assert self._wakeup is not None
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Write-behind flush failed: {e}")
+
+
+# Global instance for use throughout the application
+request_persister = RequestPersister()
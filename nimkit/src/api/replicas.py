@@ -0,0 +1,262 @@
+"""Load-balanced routing across the replicas of a NIM."""
+
+import contextvars
+import functools
+import logging
+import os
+import random
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, TypeVar
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from fastapi import HTTPException
+
+from .config.nims import NIMData, NIMReplica
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Consecutive failures after which a replica is taken out of rotation
+REPLICA_EJECT_AFTER_FAILURES = int(os.getenv("REPLICA_EJECT_AFTER_FAILURES", "3"))
+# Seconds an ejected replica stays out of rotation
+REPLICA_EJECT_SECONDS = float(os.getenv("REPLICA_EJECT_SECONDS", "30"))
+
+
+def get_replica_key(host: str, port: int) -> str:
+    """Get the key used to track a replica's state."""
+    return f"{host}:{port}"
+
+
+def is_replica_failure(error: BaseException) -> bool:
+    """
+    Decide whether an error says something about the replica's health.
+
+    Connection errors, timeouts and 5xx responses count; client errors and
+    cancellations do not.
+
+    Args:
+        error: Exception raised while calling the replica
+
+    Returns:
+        True if the error should count towards ejection
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    if isinstance(error, (httpx.TransportError, requests.exceptions.RequestException)):
+        return True
+    if isinstance(error, HTTPException):
+        # perform_*_inference handlers surface upstream failures as 5xx
+        return error.status_code >= 500
+    return False
+
+
+class ReplicaState:
+    """Load and health of one replica endpoint."""
+
+    def __init__(self):
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+
+    def is_ejected(self, now: float) -> bool:
+        """Check whether the replica is currently out of rotation."""
+        return self.ejected_until > now
+
+
+class _DispatchScope:
+    """Replicas chosen while a dispatch() block is active."""
+
+    def __init__(self):
+        self.keys: List[str] = []
+
+
+_dispatch_scope: "contextvars.ContextVar[Optional[_DispatchScope]]" = (
+    contextvars.ContextVar("replica_dispatch_scope", default=None)
+)
+
+
+class ReplicaRouter:
+    """
+    Pick a replica for each request and eject replicas that keep failing.
+
+    Selection is power-of-two-choices over outstanding requests: two healthy
+    replicas are sampled at random and the less loaded one wins. A replica
+    that fails REPLICA_EJECT_AFTER_FAILURES times in a row is skipped for
+    REPLICA_EJECT_SECONDS. If every replica is ejected, all of them are
+    tried again rather than failing the request outright.
+    """
+
+    def __init__(
+        self,
+        eject_after_failures: int = REPLICA_EJECT_AFTER_FAILURES,
+        eject_seconds: float = REPLICA_EJECT_SECONDS,
+    ):
+        """
+        Initialize the router.
+
+        Args:
+            eject_after_failures: Consecutive failures before ejection
+            eject_seconds: How long an ejected replica is skipped
+        """
+        self.eject_after_failures = eject_after_failures
+        self.eject_seconds = eject_seconds
+        self._states: Dict[str, ReplicaState] = {}
+
+    def _get_state(self, key: str) -> ReplicaState:
+        state = self._states.get(key)
+        if state is None:
+            state = ReplicaState()
+            self._states[key] = state
+        return state
+
+    def choose(self, nim_id: str, nim_data: NIMData) -> NIMReplica:
+        """
+        Choose the replica that should serve the next request for a NIM.
+
+        Inside a dispatch() block the choice is also tracked until the block
+        exits.
+
+        Args:
+            nim_id: NIM instance ID (for logging)
+            nim_data: NIM configuration with its replica set
+
+        Returns:
+            The chosen replica
+        """
+        replicas = nim_data.get_replicas()
+        now = time.monotonic()
+        healthy = [
+            r
+            for r in replicas
+            if not self._get_state(get_replica_key(r.host, r.port)).is_ejected(now)
+        ]
+        if not healthy:
+            logger.warning(f"All replicas of NIM {nim_id} are ejected, using all")
+            healthy = replicas
+
+        if len(healthy) == 1:
+            replica = healthy[0]
+        else:
+            first, second = random.sample(healthy, 2)
+            first_load = self._get_state(get_replica_key(first.host, first.port))
+            second_load = self._get_state(get_replica_key(second.host, second.port))
+            replica = (
+                second if second_load.outstanding < first_load.outstanding else first
+            )
+
+        scope = _dispatch_scope.get()
+        if scope is not None:
+            key = get_replica_key(replica.host, replica.port)
+            self._get_state(key).outstanding += 1
+            scope.keys.append(key)
+
+        if len(replicas) > 1:
+            logger.debug(
+                f"Routing request for NIM {nim_id} to {replica.host}:{replica.port}"
+            )
+        return replica
+
+    def record_result(self, key: str, error: Optional[BaseException] = None) -> None:
+        """
+        Record the outcome of a call to a replica.
+
+        Args:
+            key: Replica key from get_replica_key
+            error: Exception that ended the call, if any
+        """
+        state = self._get_state(key)
+        if error is None or not is_replica_failure(error):
+            state.consecutive_failures = 0
+            return
+
+        state.consecutive_failures += 1
+        if state.consecutive_failures >= self.eject_after_failures:
+            state.ejected_until = time.monotonic() + self.eject_seconds
+            state.consecutive_failures = 0
+            logger.warning(
+                f"Ejecting replica {key} for {self.eject_seconds}s after "
+                f"repeated failures (last: {error})"
+            )
+
+    @contextmanager
+    def track(self, host: str, port: int) -> Iterator[None]:
+        """Count a call to a replica as outstanding and record its outcome."""
+        key = get_replica_key(host, port)
+        state = self._get_state(key)
+        state.outstanding += 1
+        try:
+            yield
+        except BaseException as e:
+            self.record_result(key, e)
+            raise
+        else:
+            self.record_result(key)
+        finally:
+            state.outstanding -= 1
+
+    @contextmanager
+    def track_url(self, url: str) -> Iterator[None]:
+        """Track a call by the URL it is sent to; see track()."""
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        with self.track(parts.hostname or "", port):
+            yield
+
+    @contextmanager
+    def dispatch(self) -> Iterator[None]:
+        """
+        Track every replica chosen inside the block until it exits.
+
+        For handlers that choose a replica and call it in one step, such as
+        the perform_*_inference handlers.
+        """
+        scope = _DispatchScope()
+        token = _dispatch_scope.set(scope)
+        error: Optional[BaseException] = None
+        try:
+            yield
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            _dispatch_scope.reset(token)
+            for key in scope.keys:
+                self._get_state(key).outstanding -= 1
+                self.record_result(key, error)
+
+    def dispatched(
+        self, fn: Callable[..., Awaitable[T]]
+    ) -> Callable[..., Awaitable[T]]:
+        """Decorate an async handler so its replica choices are tracked."""
+
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            with self.dispatch():
+                return await fn(*args, **kwargs)
+
+        return wrapper
+
+    def describe(self, nim_data: NIMData) -> List[Dict[str, object]]:
+        """Get the routing state of each replica of a NIM."""
+        now = time.monotonic()
+        result = []
+        for replica in nim_data.get_replicas():
+            state = self._get_state(get_replica_key(replica.host, replica.port))
+            result.append(
+                {
+                    "host": replica.host,
+                    "port": replica.port,
+                    "outstanding": state.outstanding,
+                    "ejected": state.is_ejected(now),
+                    "ejected_for_seconds": max(0.0, state.ejected_until - now),
+                }
+            )
+        return result
+
+
+# Global instance for use throughout the application
+replica_router = ReplicaRouter()
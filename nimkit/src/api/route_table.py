@@ -0,0 +1,231 @@
+"""Precompiled upstream routes for NIM inference.
+
+Resolving where an inference request goes takes the NIM config, its catalog
+entry and, for the NVIDIA API, the API key. RouteTable compiles these once
+per (nim_id, use_nvidia_api) into an immutable NIMRoute, so handlers only do
+a dict lookup. Routes are rebuilt when a NIM config changes (including the
+NVIDIA API key and toggle, which publish on the same channel) or when the
+catalog is reloaded.
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from .config.catalog import nim_catalog
+from .config.nims import NIMData, nim_manager
+from .replicas import replica_router
+from .utils import get_nvidia_api_headers, get_nvidia_api_key
+
+logger = logging.getLogger(__name__)
+
+# Inference path on a local replica, by NIM type; others use the root URL
+LOCAL_PATHS = {
+    "image": "/v1/infer",
+    "3d": "/v1/infer",
+    "tts": "/v1/audio/synthesize",
+}
+
+# Headers sent to local NIMs, by NIM type
+LOCAL_HEADERS = {
+    "tts": {"accept": "audio/wav"},
+}
+DEFAULT_LOCAL_HEADERS = {
+    "Content-Type": "application/json",
+    "Accept": "application/json",
+}
+
+
+@dataclass(frozen=True)
+class NIMRoute:
+    """
+    Everything needed to call one NIM, either locally or on the NVIDIA API.
+
+    Routes are shared between requests and must not be modified; use
+    headers() for a copy of the headers.
+    """
+
+    nim_id: str
+    use_nvidia_api: bool
+    nim_type: str
+    nim_data: NIMData
+    # Catalog entry, shared with the catalog snapshot
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    # NVIDIA API endpoint from the catalog; None for local routes and for
+    # NIMs the NVIDIA API serves over gRPC
+    invoke_url: Optional[str] = None
+    # Model name the NVIDIA API expects instead of the one in the request
+    model: Optional[str] = None
+    api_key: Optional[str] = None
+    base_headers: Mapping[str, str] = field(default_factory=dict)
+
+    def _replica_url(self) -> str:
+        # A replica is chosen on every call, so call once per upstream request
+        replica = replica_router.choose(self.nim_id, self.nim_data)
+        return f"http://{replica.host}:{replica.port}"
+
+    def _invoke_url(self) -> str:
+        if not self.invoke_url:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"NVIDIA API invoke_url not found for NIM {self.nim_id}",
+            )
+        return self.invoke_url
+
+    def base_url(self) -> str:
+        """Get the OpenAI-compatible base URL: the invoke_url, or /v1 on a replica."""
+        if self.use_nvidia_api:
+            return self._invoke_url()
+        return f"{self._replica_url()}/v1"
+
+    def endpoint(self) -> str:
+        """Get the inference URL: the invoke_url, or the type's path on a replica."""
+        if self.use_nvidia_api:
+            return self._invoke_url()
+        return f"{self._replica_url()}{LOCAL_PATHS.get(self.nim_type, '')}"
+
+    def headers(self, stream: bool = False) -> Dict[str, str]:
+        """Get a copy of the request headers, asking for SSE when streaming."""
+        headers = dict(self.base_headers)
+        if stream:
+            headers["Accept"] = "text/event-stream"
+        return headers
+
+
+async def compile_route(nim_id: str, use_nvidia_api: bool) -> NIMRoute:
+    """
+    Build the route for a NIM from its config, catalog entry and credentials.
+
+    Local NIMs missing from the catalog are routed by their configured type.
+
+    Args:
+        nim_id: The NIM ID in format 'publisher/model_name'
+        use_nvidia_api: Whether to route to the NVIDIA API
+
+    Returns:
+        The compiled route
+
+    Raises:
+        HTTPException: If the NIM is not configured, or the NVIDIA API is
+            requested for a NIM missing from the catalog
+    """
+    nim_data = await nim_manager.get_nim_data(nim_id)
+    if not nim_data:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"NIM {nim_id} not found in configuration",
+        )
+
+    try:
+        metadata = nim_catalog.get(nim_id)
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="NIMs catalog file not found",
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error loading NIM metadata: {str(e)}",
+        )
+
+    # Catalog type first, falling back to the configured type
+    nim_type = ((metadata or {}).get("type") or nim_data.nim_type or "").lower()
+
+    if not use_nvidia_api:
+        return NIMRoute(
+            nim_id=nim_id,
+            use_nvidia_api=False,
+            nim_type=nim_type,
+            nim_data=nim_data,
+            metadata=metadata or {},
+            base_headers=MappingProxyType(
+                LOCAL_HEADERS.get(nim_type, DEFAULT_LOCAL_HEADERS)
+            ),
+        )
+
+    if not metadata:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"NIM {nim_id} not found in catalog",
+        )
+    return NIMRoute(
+        nim_id=nim_id,
+        use_nvidia_api=True,
+        nim_type=nim_type,
+        nim_data=nim_data,
+        metadata=metadata,
+        invoke_url=metadata.get("invoke_url"),
+        model=metadata.get("model"),
+        api_key=await get_nvidia_api_key(),
+        base_headers=MappingProxyType(await get_nvidia_api_headers()),
+    )
+
+
+class RouteTable:
+    """
+    Process-local table of compiled routes.
+
+    Routes are only kept while the NIM config cache is kept coherent by its
+    invalidation listener; otherwise every lookup compiles a fresh route, as
+    config changes made by other processes would go unnoticed. Every
+    invalidation or catalog reload empties the table, and entries also
+    expire with the NIM config cache TTL.
+    """
+
+    def __init__(self):
+        """Initialize an empty table."""
+        # (nim_id, use_nvidia_api) -> (expires_at, route)
+        self._routes: Dict[Tuple[str, bool], Tuple[float, NIMRoute]] = {}
+        # (config generation, catalog version) the routes were compiled from
+        self._stamp: Tuple[int, int] = (-1, -1)
+
+    def _current_stamp(self) -> Tuple[int, int]:
+        try:
+            catalog_version = nim_catalog.version
+        except Exception:
+            # compile_route reports the catalog error
+            catalog_version = -1
+        return nim_manager.generation, catalog_version
+
+    async def get(self, nim_id: str, use_nvidia_api: bool = False) -> NIMRoute:
+        """
+        Get the route for a NIM, compiling it if needed.
+
+        Args:
+            nim_id: The NIM ID in format 'publisher/model_name'
+            use_nvidia_api: Whether to route to the NVIDIA API
+
+        Returns:
+            The compiled route
+
+        Raises:
+            HTTPException: If no route can be compiled
+        """
+        stamp = self._current_stamp()
+        if stamp != self._stamp:
+            self._routes.clear()
+            self._stamp = stamp
+
+        key = (nim_id, use_nvidia_api)
+        if nim_manager.caching:
+            entry = self._routes.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                return entry[1]
+
+        route = await compile_route(nim_id, use_nvidia_api)
+        # Routes compiled across an invalidation may already be stale
+        if nim_manager.caching and self._current_stamp() == stamp:
+            self._routes[key] = (time.monotonic() + nim_manager.cache_ttl, route)
+            logger.debug(
+                f"Compiled {'NVIDIA API' if use_nvidia_api else 'local'} route for {nim_id}"
+            )
+        return route
+
+
+# Global instance for use throughout the application
+route_table = RouteTable()
@@ -0,0 +1,330 @@
+"""Single-flight deduplication of identical in-flight upstream calls."""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+logger = logging.getLogger(__name__)
+
+SINGLEFLIGHT_ENABLED = os.getenv("SINGLEFLIGHT_ENABLED", "true").lower() == "true"
+# Bytes of a stream kept for replay to late joiners; once a stream outgrows
+# this it can no longer be joined and chunks are dropped once delivered
+SINGLEFLIGHT_REPLAY_MAX_BYTES = int(
+    os.getenv("SINGLEFLIGHT_REPLAY_MAX_BYTES", str(256 * 1024))
+)
+
+
+def make_flight_key(*parts: Any) -> str:
+    """
+    Build a canonical key identifying byte-identical requests.
+
+    Args:
+        *parts: JSON-serializable values that together identify the request
+
+    Returns:
+        Hex digest of the canonical JSON encoding of the parts
+    """
+    canonical = json.dumps(
+        list(parts), sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class _Call:
+    """One in-flight call and the request that started it."""
+
+    def __init__(self, task: "asyncio.Task[Any]", leader_id: str):
+        self.task = task
+        self.leader_id = leader_id
+
+
+class StreamBroadcast:
+    """
+    Fan one chunk feed out to any number of subscribers.
+
+    Chunks are kept in a replay buffer so a subscriber that joins late still
+    receives the stream from the start. The buffer is capped at
+    `max_replay_bytes`: past that the broadcast stops accepting subscribers
+    and only keeps the chunks its current subscribers have not read yet.
+    """
+
+    def __init__(
+        self, leader_id: str, max_replay_bytes: int = SINGLEFLIGHT_REPLAY_MAX_BYTES
+    ):
+        """
+        Initialize an empty broadcast.
+
+        Args:
+            leader_id: Request ID of the caller whose upstream call is shared
+            max_replay_bytes: Size of the replay buffer for late subscribers
+        """
+        self.leader_id = leader_id
+        self.max_replay_bytes = max_replay_bytes
+        self.chunks: List[Any] = []
+        # Absolute index of chunks[0]; earlier chunks have been dropped
+        self.offset = 0
+        self.buffered_bytes = 0
+        self.joinable = True
+        self.finished = False
+        self.error: Optional[BaseException] = None
+        self.producer: Optional["asyncio.Task[None]"] = None
+        # Next absolute chunk index of each subscriber
+        self._positions: Dict[object, int] = {}
+        self._changed = asyncio.Event()
+
+    @property
+    def subscribers(self) -> int:
+        """Number of subscribers currently reading the feed."""
+        return len(self._positions)
+
+    def publish(self, chunk: Any) -> None:
+        """Append a chunk and wake every waiting subscriber."""
+        self.chunks.append(chunk)
+        if self.joinable:
+            self.buffered_bytes += len(chunk)
+            if self.buffered_bytes > self.max_replay_bytes:
+                self.joinable = False
+        self._trim()
+        self._notify()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        """Mark the feed as complete, optionally with the error that ended it."""
+        self.finished = True
+        self.error = error
+        self._notify()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def _trim(self) -> None:
+        """Drop chunks every subscriber has read, once replay is no longer needed."""
+        if self.joinable:
+            return
+        end = self.offset + len(self.chunks)
+        low = min(self._positions.values(), default=end)
+        if low > self.offset:
+            del self.chunks[: low - self.offset]
+            self.offset = low
+
+    def subscribe(self) -> "Subscription":
+        """
+        Iterate over the feed from its first chunk.
+
+        The subscriber is registered immediately, so no chunk is dropped
+        before it starts reading. A subscriber that may never be iterated
+        must be closed to let go of the feed.
+
+        Returns:
+            Iterator over the chunks in the order they were published
+
+        Raises:
+            RuntimeError: If the replay buffer has already overflowed
+        """
+        if not self.joinable:
+            raise RuntimeError("Stream can no longer be joined")
+        token = object()
+        self._positions[token] = self.offset
+        return Subscription(self, token)
+
+    def unsubscribe(self, token: object) -> None:
+        """Remove a subscriber, stopping the upstream call if it was the last."""
+        if self._positions.pop(token, None) is None:
+            return
+        self._trim()
+        if not self._positions and not self.finished and self.producer:
+            # A stream being torn down must not pick up new subscribers
+            self.joinable = False
+            self.producer.cancel()
+
+    async def _read(self, token: object) -> AsyncIterator[Any]:
+        try:
+            while True:
+                while self._positions[token] < self.offset + len(self.chunks):
+                    index = self._positions[token]
+                    chunk = self.chunks[index - self.offset]
+                    self._positions[token] = index + 1
+                    self._trim()
+                    yield chunk
+                if self.finished:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                await self._changed.wait()
+        finally:
+            self.unsubscribe(token)
+
+
+class Subscription:
+    """One subscriber's iterator over a StreamBroadcast."""
+
+    def __init__(self, broadcast: StreamBroadcast, token: object):
+        """
+        Initialize the iterator for a registered subscriber.
+
+        Args:
+            broadcast: Broadcast the subscriber is registered with
+            token: Registration token from StreamBroadcast.subscribe
+        """
+        self._broadcast = broadcast
+        self._token = token
+        self._reader = broadcast._read(token)
+
+    def __aiter__(self) -> "Subscription":
+        return self
+
+    async def __anext__(self) -> Any:
+        return await self._reader.__anext__()
+
+    async def aclose(self) -> None:
+        """Leave the broadcast, whether or not iteration ever started."""
+        # Unsubscribe first: a generator that never started runs no finally
+        self._broadcast.unsubscribe(self._token)
+        await self._reader.aclose()
+
+
+class SingleFlight:
+    """
+    Share one upstream call between concurrent identical requests.
+
+    The first caller for a key becomes the leader and its work runs in a
+    task of its own; callers arriving while it is in flight await the same
+    task (or subscribe to the same stream) instead of calling the upstream
+    again. Keys are forgotten as soon as the call finishes, so later
+    requests always start a fresh call.
+    """
+
+    def __init__(self, enabled: bool = SINGLEFLIGHT_ENABLED):
+        """
+        Initialize with no calls in flight.
+
+        Args:
+            enabled: When False every caller performs its own call
+        """
+        self.enabled = enabled
+        self._calls: Dict[str, _Call] = {}
+        self._streams: Dict[str, StreamBroadcast] = {}
+
+    async def do(
+        self,
+        key: str,
+        leader_id: str,
+        fn: Callable[[], Awaitable[Any]],
+    ) -> Tuple[Any, Optional[str]]:
+        """
+        Run fn once per key for all concurrent callers.
+
+        Args:
+            key: Key from make_flight_key
+            leader_id: Request ID of this caller, recorded if it leads
+            fn: Coroutine function performing the upstream call
+
+        Returns:
+            Tuple of (result, leader request ID); the leader ID is None when
+            this caller performed the call itself
+
+        Raises:
+            Exception: Whatever fn raised, re-raised in every caller
+        """
+        if not self.enabled:
+            return await fn(), None
+
+        call = self._calls.get(key)
+        if call is None:
+            task = asyncio.ensure_future(fn())
+            call = _Call(task, leader_id)
+            self._calls[key] = call
+            task.add_done_callback(lambda _: self._forget(self._calls, key, call))
+            shared_from = None
+        else:
+            logger.info(
+                f"Request {leader_id} joined in-flight request {call.leader_id}"
+            )
+            shared_from = call.leader_id
+
+        # Shield so a disconnecting caller does not cancel the shared work
+        return await asyncio.shield(call.task), shared_from
+
+    def stream(
+        self,
+        key: str,
+        leader_id: str,
+        source_factory: Callable[[], AsyncIterator[Any]],
+    ) -> Tuple[AsyncIterator[Any], Optional[str]]:
+        """
+        Subscribe to the shared stream for a key, starting it if needed.
+
+        Args:
+            key: Key from make_flight_key
+            leader_id: Request ID of this caller, recorded if it leads
+            source_factory: Creates the upstream chunk iterator
+
+        Returns:
+            Tuple of (chunk iterator, leader request ID); the leader ID is None
+            when this caller started the stream itself
+        """
+        if not self.enabled:
+            return source_factory(), None
+
+        broadcast = self._streams.get(key)
+        if broadcast is None or not broadcast.joinable:
+            # Streams too long to replay are left to their subscribers
+            broadcast = StreamBroadcast(leader_id)
+            self._streams[key] = broadcast
+            broadcast.producer = asyncio.ensure_future(
+                self._produce(broadcast, source_factory())
+            )
+            # A callback, since a producer cancelled before it ran has no finally
+            broadcast.producer.add_done_callback(
+                lambda _: self._forget(self._streams, key, broadcast)
+            )
+            return broadcast.subscribe(), None
+
+        logger.info(
+            f"Request {leader_id} joined in-flight stream {broadcast.leader_id}"
+        )
+        return broadcast.subscribe(), broadcast.leader_id
+
+    async def _produce(
+        self, broadcast: StreamBroadcast, source: AsyncIterator[Any]
+    ) -> None:
+        """Pump the upstream iterator into the broadcast."""
+        try:
+            async for chunk in source:
+                broadcast.publish(chunk)
+            broadcast.finish()
+        except asyncio.CancelledError:
+            broadcast.finish(RuntimeError("Shared stream was cancelled"))
+            raise
+        except Exception as e:
+            broadcast.finish(e)
+
+    def is_streaming(self, key: str) -> bool:
+        """Check whether a stream for the key is in flight and can be joined."""
+        broadcast = self._streams.get(key) if self.enabled else None
+        return broadcast is not None and broadcast.joinable
+
+    @staticmethod
+    def _forget(registry: Dict[str, Any], key: str, entry: Any) -> None:
+        if registry.get(key) is entry:
+            del registry[key]
+
+    def in_flight(self) -> int:
+        """Get the number of calls and streams currently in flight."""
+        return len(self._calls) + len(self._streams)
+
+
+# Global instance for use throughout the application
+single_flight = SingleFlight()
@@ -1,5 +1,6 @@
 """TTS (Text-to-Speech) API endpoints for Magpie TTS NIM."""
 
+import asyncio
 import json
 import logging
 import os
@@ -17,7 +18,8 @@ from fastapi import (
 )
 
 from .llm.models import InferenceRequest
-from .utils import validate_nim_exists, get_nvidia_api_headers
+from .persistence import request_persister
+from .route_table import route_table
 from .inference_utils import perform_tts_inference
 
 logger = logging.getLogger(__name__)
@@ -49,13 +51,12 @@ async def list_voices(
     logger.info(f"Fetching available voices for NIM: {nim_id}")
 
     try:
-        # Validate NIM exists
-        nim_data, nim_metadata = validate_nim_exists(nim_id)
+        # Validate NIM exists and resolve its compiled route
+        route = await route_table.get(nim_id, use_nvidia_api)
+        nim_data, nim_metadata = route.nim_data, route.metadata
 
         # Check if this is a TTS NIM
-        nim_type = nim_metadata.get("type", "").lower()
-        if not nim_type:
-            nim_type = getattr(nim_data, "nim_type", "").lower()
+        nim_type = route.nim_type
 
         if nim_type != "tts":
             raise HTTPException(
@@ -64,17 +65,9 @@ async def list_voices(
             )
 
         if use_nvidia_api:
-            # Use NVIDIA API endpoint
-            invoke_url = nim_metadata.get("invoke_url")
-            if not invoke_url:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"NVIDIA API invoke_url not found for NIM {nim_id}",
-                )
-
-            # Replace synthesize with list_voices
-            voices_url = invoke_url.replace("/synthesize", "/list_voices")
-            headers = get_nvidia_api_headers()
+            # Replace synthesize with list_voices in the NVIDIA API endpoint
+            voices_url = route.endpoint().replace("/synthesize", "/list_voices")
+            headers = route.headers()
         else:
             # Use local NIM endpoint
             base_url = f"http://{nim_data.host}:{nim_data.port}"
@@ -172,13 +165,12 @@ async def tts_inference(
     logger.info(f"Text length: {len(text)}, Language: {language}, Voice: {voice}")
 
     try:
-        # Validate NIM exists
-        nim_data, nim_metadata = validate_nim_exists(nim_id)
+        # Validate NIM exists and resolve its compiled route
+        route = await route_table.get(nim_id, use_nvidia_api)
+        nim_data, nim_metadata = route.nim_data, route.metadata
 
         # Check if this is a TTS NIM
-        nim_type = nim_metadata.get("type", "").lower()
-        if not nim_type:
-            nim_type = getattr(nim_data, "nim_type", "").lower()
+        nim_type = route.nim_type
 
         if nim_type != "tts":
             raise HTTPException(
@@ -217,8 +209,8 @@ async def tts_inference(
             "sample_rate_hz": sample_rate_hz,
         }
 
-        inference_request.set_input(request_data)
-        inference_request.save()
+        await asyncio.to_thread(inference_request.set_input, request_data)
+        request_persister.save(inference_request)
 
         logger.info(f"Created TTS inference request {request_id} for NIM {nim_id}")
 
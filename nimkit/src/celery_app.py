@@ -33,6 +33,11 @@ celery_app.conf.update(
         #     "schedule": 5.0,  # Every 5 seconds
         #     "options": {"queue": "nimkit_tasks"},
         # },
+        "apply-retention": {
+            "task": "apply_retention",
+            "schedule": float(os.getenv("RETENTION_INTERVAL_SECONDS", "3600")),
+            "options": {"queue": "nimkit_tasks"},
+        },
     },
 )
 
@@ -1,12 +1,16 @@
 """Main FastAPI application for NVIDIA NIM Kit."""
 
+import asyncio
 import logging
+import threading
+from contextlib import asynccontextmanager, suppress
 from datetime import datetime
-from typing import Dict, Any
+from typing import AsyncIterator, Dict, Any
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from prometheus_client import make_asgi_app
 
 from nimkit.src.tasks import debug_task
 from nimkit.src.api.llm.health import router as health_router
@@ -16,9 +20,19 @@ from nimkit.src.api.nims_inference import router as nims_inference_router
 from nimkit.src.api.asr import router as asr_router
 from nimkit.src.api.speech_enhancement import router as speech_enhancement_router
 from nimkit.src.api.gallery import router as gallery_router
+from nimkit.src.api.llm.archive import router as archive_router
+from nimkit.src.api.llm.history import router as history_router
 from nimkit.src.api.image_conversion import router as image_conversion_router
 from nimkit.src.api.nvidia_api import router as nvidia_api_router
 from nimkit.src.api.tts import router as tts_router
+from nimkit.src.api.http_clients import client_registry
+from nimkit.src.api.config.catalog import nim_catalog
+from nimkit.src.api.config.nims import nim_manager
+from nimkit.src.api.db import disconnect_async_redis
+from nimkit.src.api.llm.indexes import ensure_indexes
+from nimkit.src.api.llm.migrations import ensure_payload_format
+from nimkit.src.api.llm.search import ensure_index_fields, ensure_search_index
+from nimkit.src.api.persistence import request_persister
 
 # Set up logging
 import os
@@ -31,6 +45,50 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Manage shared resources for the lifetime of the application."""
+    # Upstream clients are created lazily per NIM/NVIDIA API host and reused
+    # across requests; expose the registry for handlers that need it
+    app.state.http_clients = client_registry
+    logger.info("Upstream HTTP client registry ready")
+    # Parse nims.yml once; readers pick up edits through the mtime check
+    try:
+        await asyncio.to_thread(nim_catalog.load)
+    except Exception as e:
+        logger.error(f"Failed to load NIMs catalog: {e}")
+    # Create or migrate the search index once instead of on every query
+    await asyncio.to_thread(ensure_search_index)
+    # Build the request history indexes on first start after an upgrade
+    await asyncio.to_thread(ensure_indexes)
+    # Inference request records are written behind the request path;
+    # stopping flushes whatever is still queued
+    request_persister.start()
+    # Keep the process-local NIM config cache coherent across workers
+    nim_config_listener = asyncio.create_task(nim_manager.listen_for_invalidations())
+    # Re-encode stored payloads in the background after a codec change
+    migration_stop = threading.Event()
+    payload_migration = asyncio.create_task(
+        asyncio.to_thread(ensure_payload_format, migration_stop)
+    )
+    # Give records from before the search fields existed created_ts and
+    # search_text so queries and cursors see them
+    index_backfill = asyncio.create_task(
+        asyncio.to_thread(ensure_index_fields, migration_stop)
+    )
+    yield
+    nim_config_listener.cancel()
+    with suppress(asyncio.CancelledError):
+        await nim_config_listener
+    migration_stop.set()
+    await payload_migration
+    await index_backfill
+    await request_persister.stop()
+    await client_registry.aclose()
+    await disconnect_async_redis()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="NVIDIA NIM Kit API",
@@ -39,6 +97,7 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -71,6 +130,12 @@ app.include_router(speech_enhancement_router)
 # Include gallery routes
 app.include_router(gallery_router)
 
+# Include request archive routes
+app.include_router(archive_router)
+
+# Include request history export/import routes
+app.include_router(history_router)
+
 # Include image conversion routes
 app.include_router(image_conversion_router)
 
@@ -80,6 +145,9 @@ app.include_router(nvidia_api_router)
 # Include TTS routes
 app.include_router(tts_router)
 
+# Expose Prometheus metrics (admission control queueing and load shedding)
+app.mount("/metrics", make_asgi_app())
+
 # Mount static files for NIM images
 app.mount(
     "/static/nims", StaticFiles(directory="/app/nimkit/static/nims"), name="nims_images"
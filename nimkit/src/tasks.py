@@ -2,6 +2,9 @@
 
 import time
 import logging
+from typing import Dict
+
+from nimkit.src.api.llm.retention import apply_retention
 from nimkit.src.celery_app import celery_app
 
 # Set up logging
@@ -27,3 +30,16 @@ def debug_task(self) -> str:
     logger.info(f"Task completed: {result}")
 
     return result
+
+
+@celery_app.task(name="apply_retention")
+def apply_retention_task() -> Dict[str, int]:
+    """
+    Archive and delete requests older than their type's retention period.
+
+    Returns:
+        Dict[str, int]: Number of records archived per request type
+    """
+    results = apply_retention()
+    logger.info(f"Retention run archived {sum(results.values())} requests")
+    return results
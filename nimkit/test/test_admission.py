@@ -0,0 +1,202 @@
+"""Tests for per-NIM admission control."""
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from nimkit.src.api.admission import (
+    AdmissionController,
+    NIMLimiter,
+    PermitStreamingResponse,
+    release_after,
+)
+from nimkit.src.api.config.nims import NIMData
+from nimkit.src.api.singleflight import SingleFlight
+
+
+class TestNIMLimiter:
+    """Test concurrency limits, queueing and load shedding."""
+
+    def test_waiters_are_admitted_in_order(self):
+        """Test that queued requests run as slots are released."""
+
+        async def run():
+            limiter = NIMLimiter("nim", max_concurrency=1, max_queue_size=2)
+            order = []
+
+            async def job(name):
+                permit = await limiter.acquire()
+                order.append(name)
+                await asyncio.sleep(0.01)
+                permit.release()
+
+            await asyncio.gather(job("a"), job("b"), job("c"))
+            return limiter, order
+
+        limiter, order = asyncio.run(run())
+        assert order == ["a", "b", "c"]
+        assert limiter.active == 0
+        assert limiter.waiting == 0
+
+    def test_full_queue_sheds_with_retry_after(self):
+        """Test that requests beyond the queue get a fast 429."""
+
+        async def run():
+            limiter = NIMLimiter("nim", max_concurrency=1, max_queue_size=1)
+            permit = await limiter.acquire()
+            queued = asyncio.ensure_future(limiter.acquire())
+            await asyncio.sleep(0)
+            with pytest.raises(HTTPException) as exc_info:
+                await limiter.acquire()
+            permit.release()
+            (await queued).release()
+            return exc_info.value
+
+        error = asyncio.run(run())
+        assert error.status_code == 429
+        assert int(error.headers["Retry-After"]) >= 1
+
+    def test_queue_timeout_returns_503(self):
+        """Test that a request gives up after the queue timeout."""
+
+        async def run():
+            limiter = NIMLimiter(
+                "nim", max_concurrency=1, max_queue_size=1, queue_timeout=0.01
+            )
+            permit = await limiter.acquire()
+            with pytest.raises(HTTPException) as exc_info:
+                await limiter.acquire()
+            permit.release()
+            return limiter, exc_info.value
+
+        limiter, error = asyncio.run(run())
+        assert error.status_code == 503
+        assert limiter.active == 0
+        assert limiter.waiting == 0
+
+
+class TestAdmissionController:
+    """Test limits configured through NIMData."""
+
+    def test_limits_follow_nim_config(self):
+        """Test that per-NIM limits are applied and updated."""
+        controller = AdmissionController()
+        nim_data = NIMData(
+            nim_id="nim",
+            host="localhost",
+            port=8000,
+            nim_type="llm",
+            max_concurrency=4,
+            max_queue_size=8,
+        )
+
+        limiter = controller.get_limiter("nim", nim_data)
+        assert (limiter.max_concurrency, limiter.max_queue_size) == (4, 8)
+
+        nim_data.max_concurrency = 2
+        assert controller.get_limiter("nim", nim_data) is limiter
+        assert limiter.max_concurrency == 2
+
+
+class TestStreamingPermits:
+    """Test that streaming responses always return their permit."""
+
+    def serve(self, limiter, send):
+        """Serve one streamed response holding a permit; return chunks read."""
+        read = []
+
+        async def body():
+            for chunk in ("a", "b"):
+                read.append(chunk)
+                yield chunk
+
+        async def receive():
+            await asyncio.sleep(10)
+
+        async def run():
+            permit = await limiter.acquire()
+            response = PermitStreamingResponse(
+                release_after(permit, body()), permit=permit
+            )
+            scope = {"type": "http", "asgi": {"spec_version": "2.4"}}
+            try:
+                await response(scope, receive, send)
+            except Exception:
+                pass
+            return read
+
+        return asyncio.run(run())
+
+    def test_permit_is_released_when_the_body_never_starts(self):
+        """Test a client that disconnects before the first chunk."""
+        limiter = NIMLimiter("nim", max_concurrency=1)
+
+        async def send(message):
+            raise OSError("client went away")
+
+        assert self.serve(limiter, send) == []
+        assert limiter.active == 0
+
+    def test_streamed_permit_is_released_once(self):
+        """Test that a consumed body releases the permit exactly once."""
+        limiter = NIMLimiter("nim", max_concurrency=1)
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        assert self.serve(limiter, send) == ["a", "b"]
+        assert limiter.active == 0
+        assert sent[-1] == {
+            "type": "http.response.body",
+            "body": b"",
+            "more_body": False,
+        }
+
+    def test_shared_stream_permit_is_released_when_the_body_never_starts(self):
+        """Test a dropped response whose upstream already started streaming."""
+        limiter = NIMLimiter("nim", max_concurrency=1)
+        upstream = []
+
+        async def body():
+            upstream.append("started")
+            try:
+                await asyncio.sleep(10)
+                yield "a"
+            finally:
+                upstream.append("closed")
+
+        async def receive():
+            await asyncio.sleep(10)
+
+        async def send(message):
+            raise OSError("client went away")
+
+        async def run():
+            flight = SingleFlight(enabled=True)
+            permit = await limiter.acquire()
+            source, _ = flight.stream(
+                "k", "req-1", lambda: release_after(permit, body())
+            )
+            # The shared producer starts (and claims the permit) right away
+            await asyncio.sleep(0.01)
+            claimed = limiter.active
+            response = PermitStreamingResponse(source, permit=permit, source=source)
+            scope = {"type": "http", "asgi": {"spec_version": "2.4"}}
+            try:
+                await response(scope, receive, send)
+            except Exception:
+                pass
+            await asyncio.sleep(0.01)
+            return claimed, flight
+
+        claimed, flight = asyncio.run(run())
+        assert claimed == 1
+        assert upstream == ["started", "closed"]
+        assert limiter.active == 0
+        assert flight.in_flight() == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,113 @@
+"""Tests for completion micro-batching."""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from nimkit.src.api.llm.batching import CompletionBatcher, get_batch_key
+
+
+def make_client(calls):
+    """Create a client whose upstream echoes one choice per prompt."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        calls.append(payload)
+        prompts = payload["prompt"]
+        if isinstance(prompts, str):
+            prompts = [prompts]
+        return httpx.Response(
+            200,
+            json={
+                "id": "cmpl-1",
+                "model": payload["model"],
+                "choices": [
+                    {"index": i, "text": f"<{p}>", "finish_reason": "stop"}
+                    for i, p in enumerate(prompts)
+                ],
+                "usage": {"total_tokens": 3 * len(prompts)},
+            },
+        )
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+class TestCompletionBatcher:
+    """Test coalescing and fan-out of completion requests."""
+
+    def test_batch_key_ignores_prompt_only(self):
+        """Test that only the prompt may differ within a batch."""
+        base = {"model": "m", "prompt": "a", "temperature": 0}
+        assert get_batch_key("http://nim/v1/completions", base) == get_batch_key(
+            "http://nim/v1/completions", {**base, "prompt": "b"}
+        )
+        assert get_batch_key("http://nim/v1/completions", base) != get_batch_key(
+            "http://nim/v1/completions", {**base, "temperature": 1}
+        )
+
+    def test_concurrent_requests_share_one_call(self):
+        """Test that concurrent requests are sent as one list-prompt call."""
+        calls = []
+
+        async def run():
+            client = make_client(calls)
+            batcher = CompletionBatcher(max_wait_ms=20, max_batch_size=8)
+            results = await asyncio.gather(
+                *[
+                    batcher.submit(
+                        client,
+                        "http://nim/v1/completions",
+                        {},
+                        {"model": "m", "prompt": prompt, "max_tokens": 4},
+                    )
+                    for prompt in ["a", "b", "c"]
+                ]
+            )
+            await client.aclose()
+            return results
+
+        results = asyncio.run(run())
+
+        assert len(calls) == 1
+        assert calls[0]["prompt"] == ["a", "b", "c"]
+        assert [r["choices"][0]["text"] for r in results] == ["<a>", "<b>", "<c>"]
+        assert all(r["choices"][0]["index"] == 0 for r in results)
+        assert results[1]["batch"] == {
+            "size": 3,
+            "index": 1,
+            "usage": {"total_tokens": 9},
+        }
+
+    def test_max_batch_size_splits_batches(self):
+        """Test that a full batch is sent without waiting for the window."""
+        calls = []
+
+        async def run():
+            client = make_client(calls)
+            batcher = CompletionBatcher(max_wait_ms=1000, max_batch_size=2)
+            results = await asyncio.wait_for(
+                asyncio.gather(
+                    *[
+                        batcher.submit(
+                            client,
+                            "http://nim/v1/completions",
+                            {},
+                            {"model": "m", "prompt": prompt},
+                        )
+                        for prompt in ["a", "b"]
+                    ]
+                ),
+                timeout=0.5,
+            )
+            await client.aclose()
+            return results
+
+        results = asyncio.run(run())
+        assert len(calls) == 1
+        assert [r["choices"][0]["text"] for r in results] == ["<a>", "<b>"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,143 @@
+"""Tests for the content-addressed blob store."""
+
+import base64
+import json
+import os
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+
+from nimkit.src.api import blobs
+from nimkit.src.api.blobs import BlobStore, is_blob_ref
+from nimkit.src.api.llm import cleanup
+from nimkit.src.api.llm.models import InferenceRequest
+
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 8
+
+
+class TestBlobStore:
+    """Test offloading, deduplication and resolution of large values."""
+
+    def setup_method(self):
+        """Use a small threshold so test payloads are offloaded."""
+        self.threshold = 64
+
+    def make_store(self, tmp_path) -> BlobStore:
+        return BlobStore(root=str(tmp_path / "blobs"), threshold=self.threshold)
+
+    def test_offload_and_resolve_round_trip(self, tmp_path):
+        """Test that every kind of large value comes back unchanged."""
+        store = self.make_store(tmp_path)
+        image = base64.b64encode(PNG).decode("ascii")
+        payload = {
+            "artifacts": [{"base64": image, "seed": 1}],
+            "image": f"data:image/png;base64,{image}",
+            "text": "a long caption " * 10,
+            "prompt": "short",
+        }
+
+        stored = store.offload(payload)
+        assert stored["prompt"] == "short"
+        assert stored["artifacts"][0]["seed"] == 1
+        ref = stored["artifacts"][0]["base64"]
+        assert is_blob_ref(ref) and ref["$blob"].endswith(".png")
+        # The same image is stored once, whatever its encoding
+        assert stored["image"]["$blob"] == ref["$blob"]
+        assert stored["text"]["encoding"] == "text"
+        assert len(json.dumps(stored)) < 1000
+
+        with open(store.path_for(ref), "rb") as fh:
+            assert fh.read() == PNG
+        assert store.resolve(stored) == payload
+
+    def test_url_resolution(self, tmp_path):
+        """Test that listings get /media URLs instead of content."""
+        with patch.object(blobs, "MEDIA_DIR", str(tmp_path)):
+            store = self.make_store(tmp_path)
+            stored = store.offload({"image": base64.b64encode(PNG).decode("ascii")})
+            url = store.resolve(stored, mode="url")["image"]
+        assert url.startswith("/media/blobs/") and url.endswith(".png")
+
+    def test_missing_blob_resolves_empty(self, tmp_path):
+        """Test that a deleted blob does not break reading the record."""
+        store = self.make_store(tmp_path)
+        stored = store.offload({"text": "y" * 100})
+        os.remove(store.path_for(stored["text"]))
+        assert store.resolve(stored) == {"text": ""}
+
+    def test_user_data_cannot_reference_files(self, tmp_path):
+        """Test that "$blob" keys in user input are kept as plain data."""
+        store = self.make_store(tmp_path)
+        secret = tmp_path / "secret.txt"
+        secret.write_text("secret")
+        message = {"role": "user", "$blob": str(secret), "encoding": "text"}
+        payload = {"messages": [message, {"$$blob": "../secret.txt"}]}
+
+        stored = store.offload(payload)
+        assert "$blob" not in stored["messages"][0]
+        assert store.resolve(stored) == payload
+
+        for name in (str(secret), "../secret.txt", "ab/../../secret.txt"):
+            assert not is_blob_ref({"$blob": name})
+            with pytest.raises(ValueError):
+                store.path_for({"$blob": name})
+        # References stored before keys were escaped are not followed either
+        assert store.resolve({"content": message}) == {"content": message}
+
+    def test_model_offloads_payloads(self, tmp_path):
+        """Test that records keep only references in their JSON fields."""
+        store = self.make_store(tmp_path)
+        image = base64.b64encode(PNG).decode("ascii")
+        request = InferenceRequest(request_id="r1", input_json="")
+        with patch("nimkit.src.api.llm.models.blob_store", store):
+            request.set_input({"prompt": "a cat", "image": image})
+            request.set_output({"artifacts": [{"base64": image}]})
+            assert image not in request.input_json
+            assert image not in request.output_json
+            assert request.get_input()["image"] == image
+            assert request.get_output()["artifacts"][0]["base64"] == image
+            assert request.get_output(blobs="url")["artifacts"][0]["base64"].endswith(
+                ".png"
+            )
+        assert request.search_text == "a cat"
+
+    def test_derived_fields_do_not_read_blobs(self, tmp_path):
+        """Test that summaries of new records come from the in-memory payloads."""
+        store = self.make_store(tmp_path)
+        prompt = "a long prompt " * 10
+        request = InferenceRequest(request_id="r1", input_json="")
+        with patch("nimkit.src.api.llm.models.blob_store", store), patch.object(
+            store, "read", side_effect=AssertionError("blob read")
+        ):
+            request.set_input({"prompt": prompt})
+            request.set_output({"choices": [{"text": "a reply"}]})
+            copy = InferenceRequest(request_id="r2", input_json="")
+            copy.copy_result_from(request)
+        assert prompt not in request.input_json
+        assert request.search_text == f"{prompt.strip()} a reply"
+        assert copy.output_json == request.output_json
+
+    def test_sweep_removes_only_unreferenced_blobs(self, tmp_path):
+        """Test that the sweep keeps referenced and recent blobs."""
+        store = self.make_store(tmp_path)
+        redis = fakeredis.FakeRedis()
+        with patch.object(InferenceRequest.Meta, "database", redis), patch(
+            "nimkit.src.api.llm.models.blob_store", store
+        ), patch.object(cleanup, "blob_store", store):
+            request = InferenceRequest(request_id="r1", input_json="")
+            request.set_input({"text": "kept " * 20})
+            request.save()
+            kept = store.path_for(json.loads(request.input_json)["text"])
+            orphan = store.path_for(store.put("orphan " * 20))
+            recent = store.path_for(store.put("recent " * 20))
+            for path in (kept, orphan):
+                os.utime(path, (0, 0))
+
+            assert cleanup.sweep_blobs() == 1
+        assert os.path.exists(kept) and os.path.exists(recent)
+        assert not os.path.exists(orphan)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,81 @@
+"""Tests for the in-memory NIM catalog."""
+
+import os
+
+import pytest
+
+from nimkit.src.api.config.catalog import NIMCatalog
+
+CATALOG = """
+- id: meta/llama
+  type: llm
+  tags: [chat, run-on-rtx]
+- id: flux/schnell
+  type: image
+  tags: [run-on-rtx]
+- id: meta/llama-guard
+  type: llm
+  tags: [safety]
+"""
+
+
+def write(path, text, mtime_ns):
+    path.write_text(text)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+class TestNIMCatalog:
+    """Test catalog indexes and hot reload."""
+
+    def test_indexes(self, tmp_path):
+        """Test lookups by id, type and tag."""
+        path = tmp_path / "nims.yml"
+        write(path, CATALOG, 1_000_000_000)
+        catalog = NIMCatalog(str(path), reload_interval=0)
+
+        assert [n["id"] for n in catalog.all()] == [
+            "meta/llama",
+            "flux/schnell",
+            "meta/llama-guard",
+        ]
+        assert catalog.get("flux/schnell")["type"] == "image"
+        assert catalog.get("missing") is None
+        assert [n["id"] for n in catalog.find(type="llm")] == [
+            "meta/llama",
+            "meta/llama-guard",
+        ]
+        assert [n["id"] for n in catalog.find(tag="run-on-rtx")] == [
+            "meta/llama",
+            "flux/schnell",
+        ]
+        assert [n["id"] for n in catalog.find(type="llm", tag="run-on-rtx")] == [
+            "meta/llama"
+        ]
+
+    def test_reload_on_mtime_change(self, tmp_path):
+        """Test that edits are picked up and bad edits are ignored."""
+        path = tmp_path / "nims.yml"
+        write(path, CATALOG, 1_000_000_000)
+        catalog = NIMCatalog(str(path), reload_interval=0)
+        assert catalog.version == 1
+
+        # Unchanged mtime: the file is not parsed again
+        assert catalog.snapshot() is catalog.snapshot()
+
+        write(path, "- id: only/one\n  type: llm\n", 2_000_000_000)
+        assert [n["id"] for n in catalog.all()] == ["only/one"]
+        assert catalog.version == 2
+
+        write(path, "- id: [unterminated\n", 3_000_000_000)
+        assert [n["id"] for n in catalog.all()] == ["only/one"]
+        assert catalog.version == 2
+
+    def test_missing_file(self, tmp_path):
+        """Test that a missing file is reported."""
+        catalog = NIMCatalog(str(tmp_path / "nims.yml"), reload_interval=0)
+        with pytest.raises(FileNotFoundError):
+            catalog.get("meta/llama")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
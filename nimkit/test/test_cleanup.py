@@ -0,0 +1,107 @@
+"""Tests for bulk deletion of inference requests."""
+
+import os
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+
+from nimkit.src.api.llm import cleanup, indexes
+from nimkit.src.api.llm.models import InferenceRequest
+from nimkit.src.api.persistence import RequestPersister
+
+
+class TestDeleteRequests:
+    """Test request_id lookups and pipelined bulk deletes."""
+
+    def setup_method(self):
+        """Point the model at an in-memory Redis and save some requests."""
+        self.redis = fakeredis.FakeRedis()
+        self.patcher = patch.object(InferenceRequest.Meta, "database", self.redis)
+        self.patcher.start()
+
+        persister = RequestPersister()
+        self.requests = []
+        for i in range(5):
+            request = InferenceRequest(
+                request_id=f"r{i}", input_json="{}", nim_id="nim", status="completed"
+            )
+            persister.save(request)
+            self.requests.append(request)
+
+    def teardown_method(self):
+        """Restore the real Redis connection."""
+        self.patcher.stop()
+
+    def test_request_id_index_resolves_keys(self):
+        """Test that request_ids map straight to primary keys."""
+        assert indexes.get_pk("r2") == self.requests[2].pk
+        assert indexes.get_pk("missing") is None
+
+    def test_bulk_delete_in_batches(self):
+        """Test deleting across batches, with unknown and repeated IDs."""
+        deleted, not_found = cleanup.delete_requests(
+            ["r0", "r1", "missing", "r3", "r1"], batch_size=2
+        )
+        assert sorted(deleted) == ["r0", "r1", "r3"]
+        assert not_found == ["missing"]
+        assert not self.redis.exists(self.requests[0].key())
+        assert self.redis.exists(self.requests[2].key())
+        assert indexes.get_pk("r1") is None
+        assert indexes.get_counters()["total"] == 2
+        assert indexes.query_indexes({"nim_id": "nim"})[0] == 2
+
+    def test_single_delete_uses_index(self):
+        """Test delete_by_request_id on existing and missing records."""
+        assert InferenceRequest.delete_by_request_id("r4")
+        assert not InferenceRequest.delete_by_request_id("r4")
+
+    def test_bulk_delete_removes_media(self, tmp_path):
+        """Test that media files go only when asked for."""
+        upload = tmp_path / "upload.wav"
+        upload.write_bytes(b"RIFF")
+        glb_dir = tmp_path / "models"
+        glb_dir.mkdir()
+        (glb_dir / "r1.glb").write_bytes(b"glTF")
+        self.requests[0].audio_file_path = str(upload)
+        RequestPersister().save(self.requests[0])
+
+        with patch.object(cleanup, "MEDIA_DIR", str(tmp_path)):
+            cleanup.delete_requests(["r0", "r1"], delete_media=True)
+            cleanup.delete_requests(["r2"])
+
+        assert not upload.exists()
+        assert not (glb_dir / "r1.glb").exists()
+        assert os.path.isdir(glb_dir)
+
+    def test_media_paths_stay_inside_media_dir(self, tmp_path):
+        """Test that stored paths and request IDs cannot escape MEDIA_DIR."""
+        media = tmp_path / "media"
+        (media / "models").mkdir(parents=True)
+        (media / "paddleocr").mkdir()
+        outside = tmp_path / "outside.wav"
+        outside.write_bytes(b"RIFF")
+        (media / "paddleocr" / "r0").mkdir()
+        values = {"audio_file_path": str(outside), "output_audio_path": "../x.wav"}
+
+        with patch.object(cleanup, "MEDIA_DIR", str(media)):
+            assert cleanup.get_media_paths("r0", values) == [
+                str(media / "models" / "r0.glb"),
+                str(media / "tts" / "output" / "r0.wav"),
+                str(media / "paddleocr" / "r0"),
+            ]
+            assert str(media / "paddleocr") not in cleanup.get_media_paths("..", {})
+            assert cleanup.get_media_paths("../models", {}) == []
+
+            request = InferenceRequest(
+                request_id="../models", input_json="{}", audio_file_path=str(outside)
+            )
+            RequestPersister().save(request)
+            cleanup.delete_requests(["../models"], delete_media=True)
+
+        assert outside.exists()
+        assert (media / "models").is_dir()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
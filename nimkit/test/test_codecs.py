@@ -0,0 +1,130 @@
+"""Tests for stored payload encoding and its migration."""
+
+import json
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+
+from nimkit.src.api.codecs import ZLIB_JSON_TAG, PayloadCodec
+from nimkit.src.api.llm import migrations
+from nimkit.src.api.llm.indexes import load_requests
+from nimkit.src.api.llm.models import InferenceRequest
+
+# A chat response with logprobs, the kind of payload that dominates memory
+CHAT_OUTPUT = {
+    "choices": [
+        {
+            "message": {"role": "assistant", "content": "Hello there"},
+            "logprobs": {
+                "content": [
+                    {"token": f"tok{i % 7}", "logprob": -0.5, "top_logprobs": []}
+                    for i in range(500)
+                ]
+            },
+        }
+    ]
+}
+
+
+class TestPayloadCodec:
+    """Test encoding, compression and reading of older formats."""
+
+    def test_small_payloads_are_compact_json(self):
+        """Test that small payloads stay readable, untagged JSON."""
+        codec = PayloadCodec(compression="zlib", threshold=4096)
+        encoded = codec.encode({"prompt": "a cat", "n": 1})
+        assert encoded == '{"prompt":"a cat","n":1}'
+        assert not codec.is_compressed(encoded)
+
+    def test_large_payloads_are_compressed(self):
+        """Test that large payloads round-trip through compression."""
+        codec = PayloadCodec(compression="zlib", threshold=4096)
+        encoded = codec.encode(CHAT_OUTPUT)
+        assert encoded.startswith(ZLIB_JSON_TAG)
+        assert len(encoded) * 5 < len(json.dumps(CHAT_OUTPUT))
+        assert codec.decode(encoded) == CHAT_OUTPUT
+
+    def test_zstd_round_trip(self):
+        """Test the msgpack + zstd format when its packages are installed."""
+        pytest.importorskip("msgpack")
+        pytest.importorskip("zstandard")
+        codec = PayloadCodec(compression="zstd", threshold=4096)
+        encoded = codec.encode(CHAT_OUTPUT)
+        assert codec.is_compressed(encoded)
+        assert codec.decode(encoded) == CHAT_OUTPUT
+
+    def test_reads_existing_formats(self):
+        """Test that values written with json.dumps still decode."""
+        codec = PayloadCodec(compression="none")
+        assert codec.decode(json.dumps({"a": [1, 2]})) == {"a": [1, 2]}
+        assert codec.decode(json.dumps({"x": float("nan")}))["x"] != 0
+        assert codec.decode("") == {}
+        assert codec.decode(None) == {}
+
+    def test_corrupt_values_raise_value_error(self):
+        """Test that damaged compressed values fail with ValueError."""
+        codec = PayloadCodec(compression="zlib")
+        with pytest.raises(ValueError):
+            codec.decode(ZLIB_JSON_TAG + "bm90IHpsaWI=")
+
+
+class TestPayloadMigration:
+    """Test re-encoding of records written in older formats."""
+
+    def setup_method(self):
+        """Point the model at an in-memory Redis and use a zlib codec."""
+        self.redis = fakeredis.FakeRedis()
+        codec = PayloadCodec(compression="zlib", threshold=4096)
+        self.patchers = [
+            patch.object(InferenceRequest.Meta, "database", self.redis),
+            patch("nimkit.src.api.llm.models.payload_codec", codec),
+            patch.object(migrations, "payload_codec", codec),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+
+    def teardown_method(self):
+        """Restore the real Redis connection and codec."""
+        for patcher in self.patchers:
+            patcher.stop()
+
+    def test_model_stores_compressed_output(self):
+        """Test that records save compressed payloads and load them back."""
+        request = InferenceRequest(request_id="r1", input_json="")
+        request.set_input({"messages": [{"role": "user", "content": "Hi"}]})
+        request.set_output(CHAT_OUTPUT)
+        request.save()
+        assert request.output_json.startswith(ZLIB_JSON_TAG)
+        assert request.search_text == "Hi Hello there"
+
+        (loaded,) = load_requests([request.pk])
+        assert loaded.get_output() == CHAT_OUTPUT
+        assert loaded.get_input()["messages"][0]["content"] == "Hi"
+
+    def test_migration_reencodes_legacy_records(self):
+        """Test that a migration rewrites old records once."""
+        legacy = InferenceRequest(
+            request_id="r1",
+            input_json=json.dumps({"prompt": "a cat"}),
+            output_json=json.dumps(CHAT_OUTPUT),
+            error_json=None,
+        )
+        legacy.save()
+
+        migrations.ensure_payload_format()
+        stored = self.redis.hgetall(InferenceRequest.make_key(legacy.pk))
+        assert stored[b"input_json"] == b'{"prompt":"a cat"}'
+        assert stored[b"output_json"].startswith(ZLIB_JSON_TAG.encode())
+        assert (
+            self.redis.get(migrations.PAYLOAD_FORMAT_KEY)
+            == migrations.get_payload_format().encode()
+        )
+        assert migrations.migrate_payloads() == (0, 0)
+
+        (loaded,) = load_requests([legacy.pk])
+        assert loaded.get_output() == CHAT_OUTPUT
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
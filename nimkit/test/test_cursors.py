@@ -0,0 +1,138 @@
+"""Tests for keyset pagination of request history."""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import fakeredis
+import pytest
+
+from nimkit.src.api.llm import indexes, search
+from nimkit.src.api.llm.cursors import (
+    Cursor,
+    decode_cursor,
+    encode_cursor,
+    paginate_after,
+)
+from nimkit.src.api.llm.models import InferenceRequest
+from nimkit.src.api.persistence import RequestPersister
+
+
+class TestCursors:
+    """Test cursor tokens and cutting pages at a cursor position."""
+
+    def test_token_round_trip(self):
+        """Test that tokens are opaque, URL-safe and reversible."""
+        cursor = Cursor(1704067200.123456, ("pk1", "pk2"))
+        token = encode_cursor(cursor)
+        assert "=" not in token and "/" not in token
+        assert decode_cursor(token) == cursor
+        assert decode_cursor("") is None
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor")
+
+    def test_ties_are_not_repeated_or_skipped(self):
+        """Test paging through items that share a timestamp."""
+        items = [(3.0, "c"), (2.0, "b3"), (2.0, "b2"), (2.0, "b1"), (1.0, "a")]
+        page, cursor = paginate_after(None, items[:3], 2)
+        assert page == [(3.0, "c"), (2.0, "b3")]
+        assert cursor == Cursor(2.0, ("b3",))
+
+        # The next fetch starts at ts=2.0 inclusive and may order ties differently
+        page, cursor = paginate_after(
+            cursor, [(2.0, "b1"), (2.0, "b3"), (2.0, "b2"), (1.0, "a")], 2
+        )
+        assert page == [(2.0, "b1"), (2.0, "b2")]
+        assert cursor == Cursor(2.0, ("b3", "b1", "b2"))
+
+        page, cursor = paginate_after(cursor, items[1:], 2)
+        assert page == [(1.0, "a")]
+        assert cursor is None
+
+
+class TestIndexCursorPagination:
+    """Test keyset pages over the sorted-set indexes."""
+
+    def setup_method(self):
+        """Save requests with some shared timestamps."""
+        self.redis = fakeredis.FakeRedis()
+        self.patcher = patch.object(InferenceRequest.Meta, "database", self.redis)
+        self.patcher.start()
+
+        persister = RequestPersister()
+        for i in range(30):
+            persister.save(
+                InferenceRequest(
+                    request_id=f"r{i}",
+                    input_json="{}",
+                    created_ts=float(i // 3),
+                    nim_id="a" if i % 2 else "b",
+                    status="completed" if i % 5 else "error",
+                )
+            )
+
+    def teardown_method(self):
+        """Restore the real Redis connection."""
+        self.patcher.stop()
+
+    def walk(self, filters, limit):
+        pages = []
+        cursor = None
+        while True:
+            pks, cursor = indexes.query_indexes_after(filters, cursor, limit=limit)
+            pages.append(pks)
+            if cursor is None:
+                return pages
+
+    @pytest.mark.parametrize(
+        "filters", [{}, {"nim_id": "a"}, {"nim_id": "a", "status": "completed"}]
+    )
+    def test_walk_matches_offset_listing(self, filters):
+        """Test that cursor pages concatenate to the full listing."""
+        total, expected = indexes.query_indexes(filters, limit=100)
+        pages = self.walk(filters, limit=4)
+        assert [pk for page in pages for pk in page] == expected
+        assert all(len(page) == 4 for page in pages[:-1])
+        assert len(pages) == (total + 3) // 4
+
+
+class TestSearchCursorPagination:
+    """Test keyset pages over the RediSearch index."""
+
+    def test_cursor_becomes_range_filter(self):
+        """Test the query sent for a cursor page and the next cursor."""
+        docs = [
+            SimpleNamespace(
+                id=InferenceRequest.make_key(pk),
+                payload=None,
+                pk=pk,
+                request_id=pk,
+                input_json="{}",
+                created_ts=ts,
+            )
+            for pk, ts in [("seen", "5.5"), ("x", "5.5"), ("y", "4.0"), ("z", "3.0")]
+        ]
+        index = MagicMock()
+        index.search.return_value = SimpleNamespace(total=4, docs=docs)
+        client = MagicMock()
+        client.ft.return_value = index
+
+        with patch.object(
+            search, "get_redis_client", return_value=client
+        ), patch.object(search, "ensure_search_index"):
+            total, rows, cursor = search.search_after(
+                "@status:{completed}",
+                Cursor(5.5, ("seen",)),
+                limit=2,
+                fields=["request_id"],
+            )
+
+        assert total is None
+        assert rows == [{"request_id": "x"}, {"request_id": "y"}]
+        assert cursor == Cursor(4.0, ("y",))
+        args = index.search.call_args.args[0].get_args()
+        assert args[0] == "@status:{completed} @created_ts:[-inf 5.5]"
+        assert args[args.index("LIMIT") + 1 : args.index("LIMIT") + 3] == [0, 4]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
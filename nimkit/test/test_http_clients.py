@@ -0,0 +1,103 @@
+"""Tests for the pooled upstream HTTP client registry."""
+
+import asyncio
+
+import pytest
+
+from nimkit.src.api.config.nims import NIMData
+from nimkit.src.api.http_clients import (
+    UpstreamClientRegistry,
+    get_pool_limits,
+    get_upstream_key,
+)
+
+
+class TestUpstreamClientRegistry:
+    """Test client reuse and per-NIM pool limits."""
+
+    def test_upstream_key_normalizes_origin(self):
+        """Test that endpoints on the same upstream share a key."""
+        assert (
+            get_upstream_key("http://10.0.0.5:8000/v1/chat/completions")
+            == "http://10.0.0.5:8000"
+        )
+        assert (
+            get_upstream_key("https://integrate.api.nvidia.com/v1/completions")
+            == "https://integrate.api.nvidia.com:443"
+        )
+
+    def test_client_is_reused_per_upstream(self):
+        """Test that the same upstream gets the same client."""
+        registry = UpstreamClientRegistry()
+        chat = registry.get_client("http://nim:8000/v1/chat/completions")
+        completion = registry.get_client("http://nim:8000/v1/completions")
+        other = registry.get_client("http://other-nim:8000/v1/completions")
+
+        assert chat is completion
+        assert chat is not other
+        asyncio.run(registry.aclose())
+        assert chat.is_closed and other.is_closed
+
+    def test_per_nim_pool_limits(self):
+        """Test that NIM pool settings override the defaults."""
+        nim_data = NIMData(
+            nim_id="meta/llama-3_1-8b-instruct",
+            host="nim",
+            port=8000,
+            nim_type="llm",
+            max_connections=8,
+            max_keepalive_connections=4,
+        )
+        limits = get_pool_limits(nim_data)
+        assert limits.max_connections == 8
+        assert limits.max_keepalive_connections == 4
+
+    def test_limit_change_replaces_client(self):
+        """Test that changed pool limits produce a new client."""
+        registry = UpstreamClientRegistry()
+        nim_data = NIMData(
+            nim_id="meta/llama-3_1-8b-instruct",
+            host="nim",
+            port=8000,
+            nim_type="llm",
+            max_connections=8,
+        )
+        first = registry.get_client("http://nim:8000/v1/completions")
+        second = registry.get_client("http://nim:8000/v1/completions", nim_data)
+
+        assert first is not second
+        # The old client is not closed under streams still using it
+        assert not first.is_closed
+        asyncio.run(registry.aclose())
+        assert first.is_closed
+
+    def test_nims_sharing_an_upstream_keep_their_limits(self):
+        """Test that NIMs on one host:port with different limits do not thrash."""
+        registry = UpstreamClientRegistry()
+        small, large = (
+            NIMData(
+                nim_id=f"meta/llama-{size}",
+                host="nim",
+                port=8000,
+                nim_type="llm",
+                max_connections=size,
+            )
+            for size in (4, 64)
+        )
+        first = [
+            registry.get_client("http://nim:8000/v1/completions", nim_data)
+            for nim_data in (small, large)
+        ]
+        second = [
+            registry.get_client("http://nim:8000/v1/completions", nim_data)
+            for nim_data in (small, large)
+        ]
+
+        assert first == second
+        assert first[0] is not first[1]
+        assert len(registry._clients) == 2
+        asyncio.run(registry.aclose())
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,175 @@
+"""Tests for the sorted-set request history indexes."""
+
+import time
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+from fastapi.testclient import TestClient
+
+from nimkit.src.api.llm import indexes
+from nimkit.src.api.llm.models import InferenceRequest
+from nimkit.src.api.persistence import RequestPersister
+from nimkit.src.main import app
+
+
+def make_request(request_id: str, created_ts: float, **fields) -> InferenceRequest:
+    """Create an unsaved inference request record."""
+    return InferenceRequest(
+        request_id=request_id, input_json="{}", created_ts=created_ts, **fields
+    )
+
+
+class TestRequestIndexes:
+    """Test index maintenance on save/delete and index queries."""
+
+    def setup_method(self):
+        """Point the model at an in-memory Redis and save a few requests."""
+        self.redis = fakeredis.FakeRedis()
+        self.patcher = patch.object(InferenceRequest.Meta, "database", self.redis)
+        self.patcher.start()
+
+        self.persister = RequestPersister()
+        self.requests = [
+            make_request("r1", 1.0, nim_id="a", type="LLM", status="completed"),
+            make_request("r2", 2.0, nim_id="b", type="LLM", status="completed"),
+            make_request("r3", 3.0, nim_id="a", type="TTS", status="error"),
+            make_request("r4", 4.0, nim_id="a", type="LLM", status="pending"),
+        ]
+        for request in self.requests:
+            self.persister.save(request)
+
+    def teardown_method(self):
+        """Restore the real Redis connection."""
+        self.patcher.stop()
+
+    def query(self, **filters):
+        total, pks = indexes.query_indexes(filters, limit=10)
+        return total, [r.request_id for r in indexes.load_requests(pks)]
+
+    def test_lists_newest_first_with_limit(self):
+        """Test unfiltered listing and paging."""
+        assert self.query() == (4, ["r4", "r3", "r2", "r1"])
+        total, pks = indexes.query_indexes({}, offset=1, limit=2)
+        assert total == 4
+        assert [r.request_id for r in indexes.load_requests(pks)] == ["r3", "r2"]
+
+    def test_empty_pages(self):
+        """Test that non-positive limits return no keys, not the whole history."""
+        assert indexes.query_indexes({}, limit=0) == (4, [])
+        assert indexes.query_indexes({}, limit=-1) == (4, [])
+        assert indexes.query_indexes({"nim_id": "a", "type": "LLM"}, limit=0) == (
+            2,
+            [],
+        )
+        total, pks = indexes.query_indexes({}, offset=-2, limit=1)
+        assert [r.request_id for r in indexes.load_requests(pks)] == ["r4"]
+
+        client = TestClient(app)
+        for limit in (0, -1, 1001):
+            response = client.get("/api/llm/requests", params={"limit": limit})
+            assert response.status_code == 422
+
+    def test_filters_intersect(self):
+        """Test single and combined filters."""
+        assert self.query(nim_id="a") == (3, ["r4", "r3", "r1"])
+        assert self.query(nim_id="a", type="LLM") == (2, ["r4", "r1"])
+        assert self.query(nim_id="b", status="error") == (0, [])
+
+    def test_status_transition_moves_between_indexes(self):
+        """Test that a re-saved record leaves its old status index."""
+        pending = self.requests[3]
+        pending.status = "completed"
+        self.persister.save(pending)
+        assert self.query(status="pending") == (0, [])
+        assert self.query(status="completed") == (3, ["r4", "r2", "r1"])
+
+    def test_delete_removes_index_entries(self):
+        """Test that deleted records disappear from every index."""
+        assert InferenceRequest.delete_by_request_id("r3")
+        assert self.query() == (3, ["r4", "r2", "r1"])
+        assert self.query(status="error") == (0, [])
+
+    def test_rebuild_indexes(self):
+        """Test rebuilding from records saved without index maintenance."""
+        make_request("r5", 5.0, nim_id="a", status="completed").save()
+        assert self.query(nim_id="a")[0] == 3
+
+        assert indexes.rebuild_indexes() == 5
+        assert self.query(nim_id="a", status="completed") == (2, ["r5", "r1"])
+        assert (
+            self.redis.get(indexes.INDEX_VERSION_KEY) == indexes.INDEX_VERSION.encode()
+        )
+
+    def test_counters_follow_creates_transitions_and_deletes(self):
+        """Test that stats counters count each change exactly once."""
+        counters = indexes.get_counters()
+        assert counters["total"] == 4
+        assert counters["nim_id:a"] == 3
+        assert counters["status:pending"] == 1
+        assert counters["stream:false"] == 4
+
+        pending = self.requests[3]
+        pending.status = "completed"
+        self.persister.save(pending)
+        self.persister.save(pending)
+        InferenceRequest.delete_by_request_id("r3")
+
+        counters = indexes.get_counters()
+        assert counters["total"] == 3
+        assert counters["status:pending"] == 0
+        assert counters["status:completed"] == 3
+        assert counters["status:error"] == 0
+        assert counters["type:TTS"] == 0
+
+    def test_rebuild_recomputes_counters(self):
+        """Test that a rebuild replaces drifted counters."""
+        self.redis.hset(indexes.STATS_KEY, "total", 99)
+        indexes.rebuild_indexes()
+        counters = indexes.get_counters()
+        assert counters["total"] == 4
+        assert counters["status:completed"] == 2
+
+    def test_rebuild_swaps_in_complete_indexes(self):
+        """Test that saves during a rebuild survive and stale indexes go."""
+        stale_key = indexes.get_index_key("nim_id", "removed")
+        self.redis.zadd(stale_key, {"gone": 1.0})
+        build = indexes._build_indexes
+
+        def build_while_serving(redis_client, prefix, batch_size):
+            indexed = build(redis_client, prefix, batch_size)
+            # Live indexes keep answering until the swap
+            assert self.query(nim_id="a")[0] == 3
+            # Saved after the scan, so only the catch-up can index it
+            self.persister.save(
+                make_request("r6", time.time(), nim_id="a", status="pending")
+            )
+            return indexed
+
+        with patch.object(indexes, "_build_indexes", build_while_serving):
+            assert indexes.rebuild_indexes() == 4
+
+        assert self.query(nim_id="a")[1][0] == "r6"
+        assert indexes.get_counters()["total"] == 5
+        assert not self.redis.exists(stale_key)
+        assert not self.redis.keys(f"{indexes.INDEX_KEY_PREFIX}rebuild*")
+
+    def test_only_one_process_rebuilds(self):
+        """Test that a held rebuild lock makes other processes skip."""
+        self.redis.set(indexes.REBUILD_LOCK_KEY, "other")
+        self.redis.delete(indexes.INDEX_VERSION_KEY)
+
+        assert indexes.rebuild_indexes() is None
+        indexes.ensure_indexes()
+        assert not self.redis.exists(indexes.INDEX_VERSION_KEY)
+
+        self.redis.delete(indexes.REBUILD_LOCK_KEY)
+        indexes.ensure_indexes()
+        assert (
+            self.redis.get(indexes.INDEX_VERSION_KEY) == indexes.INDEX_VERSION.encode()
+        )
+        assert not self.redis.exists(indexes.REBUILD_LOCK_KEY)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
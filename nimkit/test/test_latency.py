@@ -0,0 +1,53 @@
+"""Tests for LLM stream latency instrumentation."""
+
+import pytest
+
+from nimkit.src.api.llm.latency import record_stream_latency
+from nimkit.src.api.llm.models import InferenceRequest
+from nimkit.src.api.llm.streaming import StreamAccumulator
+
+
+def chat_chunk(content=None, usage=None):
+    """Build a chat streaming chunk."""
+    chunk = {"choices": [{"index": 0, "delta": {"content": content}}]}
+    if usage:
+        chunk["usage"] = usage
+    return chunk
+
+
+class TestStreamLatency:
+    """Test time-to-first-token, inter-token latency and throughput."""
+
+    def test_token_timings_are_recorded(self):
+        """Test that only text-bearing chunks count as tokens."""
+        accumulator = StreamAccumulator(request_type="chat", started_at=10.0)
+        accumulator.add_chunk({"choices": [{"index": 0, "delta": {"role": "a"}}]}, 10.1)
+        accumulator.add_chunk(chat_chunk("Hel"), 10.5)
+        accumulator.add_chunk(chat_chunk("lo"), 10.52)
+        accumulator.add_chunk(chat_chunk("!"), 10.6)
+
+        assert accumulator.first_token_at == 10.5
+        assert accumulator.token_chunks == 3
+        assert accumulator.inter_token_gaps == pytest.approx([0.02, 0.08])
+
+    def test_latency_fields_are_set_on_request(self):
+        """Test that the record gets TTFT, ITL percentiles and tokens/sec."""
+        accumulator = StreamAccumulator(request_type="chat", started_at=10.0)
+        for i in range(5):
+            accumulator.add_chunk(chat_chunk("x"), 10.25 + i * 0.05)
+        accumulator.add_chunk({"choices": [], "usage": {"completion_tokens": 5}}, 10.5)
+
+        inference_request = InferenceRequest(
+            request_id="r1", input_json="{}", nim_id="nim", model="m"
+        )
+        latency = record_stream_latency(inference_request, accumulator)
+
+        assert latency["ttft_ms"] == pytest.approx(250)
+        assert latency["itl_p50_ms"] == pytest.approx(50)
+        assert latency["output_tokens"] == 5
+        assert latency["tokens_per_second"] == pytest.approx(20)
+        assert inference_request.ttft_ms == latency["ttft_ms"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
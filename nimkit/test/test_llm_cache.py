@@ -0,0 +1,111 @@
+"""Tests for the exact-match LLM response cache."""
+
+import asyncio
+import json
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+
+from nimkit.src.api.llm.cache import (
+    ResponseCache,
+    get_cache_key,
+    is_cacheable,
+    iter_sse_replay,
+)
+from nimkit.src.api.llm.streaming import StreamAccumulator
+
+CHAT_RESPONSE = {
+    "id": "chatcmpl-1",
+    "object": "chat.completion",
+    "created": 1,
+    "model": "m",
+    "choices": [
+        {
+            "index": 0,
+            "message": {"role": "assistant", "content": "Hello there"},
+            "finish_reason": "stop",
+        }
+    ],
+    "usage": {"total_tokens": 5},
+}
+
+
+class TestResponseCache:
+    """Test cache keys, both cache tiers and SSE replay."""
+
+    def test_only_deterministic_requests_are_cacheable(self):
+        """Test that temperature 0 or a pinned seed is required."""
+        assert is_cacheable({"temperature": 0})
+        assert is_cacheable({"temperature": 0.7, "seed": 42})
+        assert not is_cacheable({"temperature": 0.7})
+        assert not is_cacheable({"temperature": None, "seed": None})
+
+    def test_cache_key_ignores_stream_flag(self):
+        """Test that streaming and non-streaming requests share entries."""
+        data = {"model": "m", "messages": [{"role": "user", "content": "hi"}]}
+        key = get_cache_key("nim", "http://nim/v1/chat/completions", data)
+        assert key == get_cache_key(
+            "nim", "http://nim/v1/chat/completions", {**data, "stream": True}
+        )
+        assert key != get_cache_key(
+            "other", "http://nim/v1/chat/completions", {**data, "stream": True}
+        )
+        assert key != get_cache_key(
+            "nim", "http://nim/v1/chat/completions", {**data, "max_tokens": 5}
+        )
+
+    def test_redis_tier_serves_other_processes(self):
+        """Test that an entry stored by one cache is found by another."""
+        fake_redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+
+        async def run():
+            await ResponseCache().set("k", {**CHAT_RESPONSE, "streaming": True})
+            return await ResponseCache().get("k"), await fake_redis.ttl("k")
+
+        with patch(
+            "nimkit.src.api.llm.cache.get_async_redis_client", return_value=fake_redis
+        ):
+            cached, ttl = asyncio.run(run())
+
+        assert cached == CHAT_RESPONSE
+        assert 0 < ttl <= 86400
+
+    def test_local_tier_evicts_least_recently_used(self):
+        """Test LRU eviction of the in-process tier."""
+        cache = ResponseCache(max_entries=2)
+
+        async def run():
+            await cache.set("a", {"id": "a"})
+            await cache.set("b", {"id": "b"})
+            assert await cache.get("a") == {"id": "a"}
+            await cache.set("c", {"id": "c"})
+
+            assert await cache.get("b") is None
+            assert await cache.get("a") == {"id": "a"}
+            assert await cache.get("c") == {"id": "c"}
+
+        with patch(
+            "nimkit.src.api.llm.cache.get_async_redis_client",
+            side_effect=ConnectionError("redis down"),
+        ):
+            asyncio.run(run())
+
+    def test_replay_reduces_to_the_cached_response(self):
+        """Test that replayed SSE folds back into the same answer."""
+        accumulator = StreamAccumulator(request_type="chat")
+        events = list(iter_sse_replay(CHAT_RESPONSE, "chat"))
+        assert events[-1] == "data: [DONE]\n\n"
+        for event in events:
+            accumulator.add_data(event[len("data: ") :])
+
+        result = accumulator.result()
+        assert result["choices"] == CHAT_RESPONSE["choices"]
+        assert result["usage"] == CHAT_RESPONSE["usage"]
+        assert json.loads(events[0][len("data: ") :])["object"] == (
+            "chat.completion.chunk"
+        )
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
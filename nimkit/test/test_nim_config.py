@@ -1,9 +1,11 @@
 """Tests for NIM configuration API endpoints."""
 
+import asyncio
+import fakeredis
 import pytest
 import json
 from fastapi.testclient import TestClient
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, AsyncMock
 
 from nimkit.src.main import app
 from nimkit.src.api.config.nims import RedisNIMManager, NIMData, NIMDataUpdate
@@ -32,7 +34,9 @@ class TestNIMConfigAPI:
 
     def test_get_nim_data_not_found(self):
         """Test getting NIM data when it doesn't exist."""
-        with patch("nimkit.src.api.config.routes.nim_manager") as mock_manager:
+        with patch(
+            "nimkit.src.api.config.routes.nim_manager", new_callable=AsyncMock
+        ) as mock_manager:
             mock_manager.get_nim_data.return_value = None
 
             response = client.get(f"/api/nims/{self.test_nim_id}")
@@ -42,7 +46,10 @@ class TestNIMConfigAPI:
 
     def test_set_nim_data_success(self):
         """Test setting NIM data successfully."""
-        with patch("nimkit.src.api.config.routes.nim_manager") as mock_manager:
+        with patch(
+            "nimkit.src.api.config.routes.nim_manager", new_callable=AsyncMock
+        ) as mock_manager:
+            mock_manager.get_nim_data.return_value = None
             mock_manager.set_nim_data.return_value = True
 
             response = client.post(
@@ -67,7 +74,10 @@ class TestNIMConfigAPI:
 
     def test_set_nim_data_failure(self):
         """Test setting NIM data when it fails."""
-        with patch("nimkit.src.api.config.routes.nim_manager") as mock_manager:
+        with patch(
+            "nimkit.src.api.config.routes.nim_manager", new_callable=AsyncMock
+        ) as mock_manager:
+            mock_manager.get_nim_data.return_value = None
             mock_manager.set_nim_data.return_value = False
 
             response = client.post(
@@ -85,7 +95,9 @@ class TestNIMConfigAPI:
 
     def test_get_nim_data_success(self):
         """Test getting NIM data successfully."""
-        with patch("nimkit.src.api.config.routes.nim_manager") as mock_manager:
+        with patch(
+            "nimkit.src.api.config.routes.nim_manager", new_callable=AsyncMock
+        ) as mock_manager:
             mock_manager.get_nim_data.return_value = self.test_nim_data
 
             response = client.get(f"/api/nims/{self.test_nim_id}")
@@ -100,7 +112,9 @@ class TestNIMConfigAPI:
 
     def test_update_nim_data_success(self):
         """Test updating NIM data successfully."""
-        with patch("nimkit.src.api.config.routes.nim_manager") as mock_manager:
+        with patch(
+            "nimkit.src.api.config.routes.nim_manager", new_callable=AsyncMock
+        ) as mock_manager:
             mock_manager.get_nim_data.return_value = self.test_nim_data
             mock_manager.set_nim_data.return_value = True
 
@@ -120,9 +134,41 @@ class TestNIMConfigAPI:
                 in data["message"]
             )
 
+    def test_update_keeps_settings_the_client_did_not_send(self):
+        """Test that saving host/port/type keeps replicas and limits."""
+        stored = NIMData(
+            nim_id=self.test_nim_id,
+            host=self.test_host,
+            port=self.test_port,
+            nim_type=self.test_nim_type,
+            max_concurrency=4,
+            replicas=[{"host": "gpu-1", "port": 8000}],
+        )
+        for method in (client.put, client.post):
+            with patch(
+                "nimkit.src.api.config.routes.nim_manager", new_callable=AsyncMock
+            ) as mock_manager:
+                mock_manager.get_nim_data.return_value = stored
+                mock_manager.set_nim_data.return_value = True
+
+                response = method(
+                    f"/api/nims/{self.test_nim_id}",
+                    json={"host": "new-host", "port": 9000, "nim_type": "llm"},
+                )
+
+                assert response.status_code == 200
+                saved = mock_manager.set_nim_data.call_args.kwargs
+                assert saved["host"] == "new-host"
+                assert saved["port"] == 9000
+                assert saved["max_concurrency"] == 4
+                assert saved["replicas"] == [{"host": "gpu-1", "port": 8000}]
+                assert response.json()["replicas"] == saved["replicas"]
+
     def test_update_nim_data_not_found(self):
         """Test updating NIM data when it doesn't exist."""
-        with patch("nimkit.src.api.config.routes.nim_manager") as mock_manager:
+        with patch(
+            "nimkit.src.api.config.routes.nim_manager", new_callable=AsyncMock
+        ) as mock_manager:
             mock_manager.get_nim_data.return_value = None
 
             response = client.put(
@@ -140,7 +186,9 @@ class TestNIMConfigAPI:
 
     def test_delete_nim_data_success(self):
         """Test deleting NIM data successfully."""
-        with patch("nimkit.src.api.config.routes.nim_manager") as mock_manager:
+        with patch(
+            "nimkit.src.api.config.routes.nim_manager", new_callable=AsyncMock
+        ) as mock_manager:
             mock_manager.delete_nim_data.return_value = True
 
             response = client.delete(f"/api/nims/{self.test_nim_id}")
@@ -156,7 +204,9 @@ class TestNIMConfigAPI:
 
     def test_delete_nim_data_not_found(self):
         """Test deleting NIM data when it doesn't exist."""
-        with patch("nimkit.src.api.config.routes.nim_manager") as mock_manager:
+        with patch(
+            "nimkit.src.api.config.routes.nim_manager", new_callable=AsyncMock
+        ) as mock_manager:
             mock_manager.delete_nim_data.return_value = False
 
             response = client.delete(f"/api/nims/{self.test_nim_id}")
@@ -167,29 +217,35 @@ class TestNIMConfigAPI:
 
     def test_list_nims_success(self):
         """Test listing all NIMs successfully."""
-        test_nim_ids = [self.test_nim_id, "another/nim-id"]
+        other = NIMData(nim_id="another/nim-id", host="gpu", port=8001, nim_type="llm")
 
-        with patch("nimkit.src.api.config.routes.nim_manager") as mock_manager:
-            mock_manager.list_nim_ids.return_value = test_nim_ids
+        with patch(
+            "nimkit.src.api.config.routes.nim_manager", new_callable=AsyncMock
+        ) as mock_manager:
+            mock_manager.get_all_nim_data.return_value = [self.test_nim_data, other]
 
             response = client.get("/api/nims/")
 
             assert response.status_code == 200
             data = response.json()
-            assert data["nim_ids"] == test_nim_ids
+            assert data["nim_ids"] == [self.test_nim_id, "another/nim-id"]
+            assert data["nims"][1]["host"] == "gpu"
             assert data["count"] == 2
             assert data["status"] == "success"
 
     def test_list_nims_empty(self):
         """Test listing NIMs when none exist."""
-        with patch("nimkit.src.api.config.routes.nim_manager") as mock_manager:
-            mock_manager.list_nim_ids.return_value = []
+        with patch(
+            "nimkit.src.api.config.routes.nim_manager", new_callable=AsyncMock
+        ) as mock_manager:
+            mock_manager.get_all_nim_data.return_value = []
 
             response = client.get("/api/nims/")
 
             assert response.status_code == 200
             data = response.json()
             assert data["nim_ids"] == []
+            assert data["nims"] == []
             assert data["count"] == 0
             assert data["status"] == "success"
 
@@ -222,7 +278,10 @@ class TestNIMConfigAPI:
         """Test handling special characters in NIM ID."""
         special_nim_id = "meta/llama-3_1-8b-instruct"
 
-        with patch("nimkit.src.api.config.routes.nim_manager") as mock_manager:
+        with patch(
+            "nimkit.src.api.config.routes.nim_manager", new_callable=AsyncMock
+        ) as mock_manager:
+            mock_manager.get_nim_data.return_value = None
             mock_manager.set_nim_data.return_value = True
 
             response = client.post(
@@ -251,27 +310,38 @@ class TestRedisNIMManager:
 
     def test_redis_manager_initialization(self):
         """Test RedisNIMManager initialization."""
-        mock_redis_client = MagicMock()
-        with patch("nimkit.src.api.config.nims.redis.from_url") as mock_redis_from_url:
-            mock_redis_from_url.return_value = mock_redis_client
+        mock_redis_client = AsyncMock()
+        with patch(
+            "nimkit.src.api.config.nims.get_async_redis_client"
+        ) as mock_get_client:
+            mock_get_client.return_value = mock_redis_client
 
-            manager = RedisNIMManager("redis://test:6379/0")
+            manager = RedisNIMManager()
 
             assert manager.redis_client == mock_redis_client
             assert manager.key_prefix == "nim:"
-            mock_redis_from_url.assert_called_once_with(
-                "redis://test:6379/0", decode_responses=True
-            )
+
+        with patch(
+            "nimkit.src.api.config.nims.create_async_redis_pool"
+        ) as mock_create_pool:
+            manager = RedisNIMManager("redis://test:6379/0")
+
+            assert manager.redis_client.connection_pool == mock_create_pool.return_value
+            mock_create_pool.assert_called_once_with("redis://test:6379/0")
 
     def test_set_nim_data_success(self):
         """Test setting NIM data successfully."""
-        mock_redis_client = MagicMock()
-        with patch("nimkit.src.api.config.nims.redis.from_url") as mock_redis_from_url:
-            mock_redis_from_url.return_value = mock_redis_client
+        mock_redis_client = AsyncMock()
+        with patch(
+            "nimkit.src.api.config.nims.get_async_redis_client"
+        ) as mock_get_client:
+            mock_get_client.return_value = mock_redis_client
 
             manager = RedisNIMManager()
-            result = manager.set_nim_data(
-                self.test_nim_id, self.test_host, self.test_port, self.test_nim_type
+            result = asyncio.run(
+                manager.set_nim_data(
+                    self.test_nim_id, self.test_host, self.test_port, self.test_nim_type
+                )
             )
 
             assert result is True
@@ -279,7 +349,7 @@ class TestRedisNIMManager:
 
     def test_get_nim_data_success(self):
         """Test getting NIM data successfully."""
-        mock_redis_client = MagicMock()
+        mock_redis_client = AsyncMock()
         test_data = {
             "nim_id": self.test_nim_id,
             "host": self.test_host,
@@ -288,11 +358,13 @@ class TestRedisNIMManager:
         }
         mock_redis_client.get.return_value = json.dumps(test_data)
 
-        with patch("nimkit.src.api.config.nims.redis.from_url") as mock_redis_from_url:
-            mock_redis_from_url.return_value = mock_redis_client
+        with patch(
+            "nimkit.src.api.config.nims.get_async_redis_client"
+        ) as mock_get_client:
+            mock_get_client.return_value = mock_redis_client
 
             manager = RedisNIMManager()
-            result = manager.get_nim_data(self.test_nim_id)
+            result = asyncio.run(manager.get_nim_data(self.test_nim_id))
 
             assert result is not None
             assert isinstance(result, NIMData)
@@ -303,74 +375,129 @@ class TestRedisNIMManager:
 
     def test_get_nim_data_not_found(self):
         """Test getting NIM data when it doesn't exist."""
-        mock_redis_client = MagicMock()
+        mock_redis_client = AsyncMock()
         mock_redis_client.get.return_value = None
 
-        with patch("nimkit.src.api.config.nims.redis.from_url") as mock_redis_from_url:
-            mock_redis_from_url.return_value = mock_redis_client
+        with patch(
+            "nimkit.src.api.config.nims.get_async_redis_client"
+        ) as mock_get_client:
+            mock_get_client.return_value = mock_redis_client
 
             manager = RedisNIMManager()
-            result = manager.get_nim_data(self.test_nim_id)
+            result = asyncio.run(manager.get_nim_data(self.test_nim_id))
 
             assert result is None
 
     def test_delete_nim_data_success(self):
         """Test deleting NIM data successfully."""
-        mock_redis_client = MagicMock()
+        mock_redis_client = AsyncMock()
         mock_redis_client.delete.return_value = 1  # Redis returns 1 when key is deleted
 
-        with patch("nimkit.src.api.config.nims.redis.from_url") as mock_redis_from_url:
-            mock_redis_from_url.return_value = mock_redis_client
+        with patch(
+            "nimkit.src.api.config.nims.get_async_redis_client"
+        ) as mock_get_client:
+            mock_get_client.return_value = mock_redis_client
 
             manager = RedisNIMManager()
-            result = manager.delete_nim_data(self.test_nim_id)
+            result = asyncio.run(manager.delete_nim_data(self.test_nim_id))
 
             assert result is True
             mock_redis_client.delete.assert_called_once()
 
     def test_delete_nim_data_not_found(self):
         """Test deleting NIM data when it doesn't exist."""
-        mock_redis_client = MagicMock()
+        mock_redis_client = AsyncMock()
         mock_redis_client.delete.return_value = (
             0  # Redis returns 0 when key doesn't exist
         )
 
-        with patch("nimkit.src.api.config.nims.redis.from_url") as mock_redis_from_url:
-            mock_redis_from_url.return_value = mock_redis_client
+        with patch(
+            "nimkit.src.api.config.nims.get_async_redis_client"
+        ) as mock_get_client:
+            mock_get_client.return_value = mock_redis_client
 
             manager = RedisNIMManager()
-            result = manager.delete_nim_data(self.test_nim_id)
+            result = asyncio.run(manager.delete_nim_data(self.test_nim_id))
 
             assert result is False
 
-    def test_list_nim_ids_success(self):
-        """Test listing NIM IDs successfully."""
-        mock_redis_client = MagicMock()
-        mock_redis_client.keys.return_value = [
-            f"nim:{self.test_nim_id}",
-            "nim:another/nim-id",
+    def make_manager(self, server):
+        with patch(
+            "nimkit.src.api.config.nims.get_async_redis_client",
+            return_value=fakeredis.FakeAsyncRedis(server=server, decode_responses=True),
+        ):
+            return RedisNIMManager()
+
+    def test_list_nim_ids_backfills_id_set(self):
+        """Test that NIMs saved before the ID set existed are listed."""
+        server = fakeredis.FakeServer()
+        legacy = fakeredis.FakeRedis(server=server)
+        legacy.set(f"nim:{self.test_nim_id}", "{}")
+        legacy.set("nim:another/nim-id", "{}")
+        manager = self.make_manager(server)
+
+        result = asyncio.run(manager.list_nim_ids())
+
+        assert result == ["another/nim-id", self.test_nim_id]
+        assert legacy.scard("nims:ids") == 2
+
+    def test_list_nim_ids_backfills_alongside_new_ids(self):
+        """Test that older NIMs are listed after a new one filled the ID set."""
+        server = fakeredis.FakeServer()
+        legacy = fakeredis.FakeRedis(server=server)
+        legacy.set(f"nim:{self.test_nim_id}", "{}")
+        legacy.sadd("nims:ids", "new/nim-id")
+        legacy.set("nim:new/nim-id", "{}")
+
+        assert asyncio.run(self.make_manager(server).list_nim_ids()) == [
+            self.test_nim_id,
+            "new/nim-id",
+        ]
+        # Later workers trust the marker instead of scanning again
+        legacy.set("nim:stray/nim-id", "{}")
+        assert asyncio.run(self.make_manager(server).list_nim_ids()) == [
+            self.test_nim_id,
+            "new/nim-id",
         ]
-
-        with patch("nimkit.src.api.config.nims.redis.from_url") as mock_redis_from_url:
-            mock_redis_from_url.return_value = mock_redis_client
-
-            manager = RedisNIMManager()
-            result = manager.list_nim_ids()
-
-            assert result == [self.test_nim_id, "another/nim-id"]
 
     def test_list_nim_ids_empty(self):
         """Test listing NIM IDs when none exist."""
-        mock_redis_client = MagicMock()
-        mock_redis_client.keys.return_value = []
-
-        with patch("nimkit.src.api.config.nims.redis.from_url") as mock_redis_from_url:
-            mock_redis_from_url.return_value = mock_redis_client
-
-            manager = RedisNIMManager()
-            result = manager.list_nim_ids()
-
-            assert result == []
+        manager = self.make_manager(fakeredis.FakeServer())
+        assert asyncio.run(manager.list_nim_ids()) == []
+        assert asyncio.run(manager.get_all_nim_data()) == []
+
+    def test_cache_is_invalidated_across_workers(self):
+        """Test that a write in one worker evicts the copy cached by another."""
+        server = fakeredis.FakeServer()
+        writer = self.make_manager(server)
+        reader = self.make_manager(server)
+
+        async def run():
+            listener = asyncio.create_task(reader.listen_for_invalidations())
+            while not reader._listening:
+                await asyncio.sleep(0.01)
+
+            await writer.set_nim_data(self.test_nim_id, "gpu-0", 8000, "llm")
+            # Let the listener consume the notification for the first write
+            await asyncio.sleep(0.2)
+            first = await reader.get_nim_data(self.test_nim_id)
+            assert await reader.get_nim_data(self.test_nim_id) is first
+
+            await writer.set_nim_data(self.test_nim_id, "gpu-1", 8000, "llm")
+            for _ in range(100):
+                if self.test_nim_id not in reader._cache:
+                    break
+                await asyncio.sleep(0.01)
+            updated = await reader.get_nim_data(self.test_nim_id)
+
+            everything = await reader.get_all_nim_data()
+            listener.cancel()
+            return first, updated, everything
+
+        first, updated, everything = asyncio.run(run())
+        assert first.host == "gpu-0"
+        assert updated.host == "gpu-1"
+        assert [nim.host for nim in everything] == ["gpu-1"]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,156 @@
+"""Tests for write-behind persistence of inference requests."""
+
+import asyncio
+import threading
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+
+from nimkit.src.api.llm import indexes
+from nimkit.src.api.llm.models import InferenceRequest
+from nimkit.src.api.persistence import RequestPersister, write_requests
+
+
+def make_request(request_id: str) -> InferenceRequest:
+    """Create an unsaved inference request record."""
+    return InferenceRequest(request_id=request_id, input_json="{}", nim_id="nim")
+
+
+class TestRequestPersister:
+    """Test queueing, coalescing and flushing of saves."""
+
+    def setup_method(self):
+        """Point the model at an in-memory Redis."""
+        self.redis = fakeredis.FakeRedis()
+        self.patcher = patch.object(InferenceRequest.Meta, "database", self.redis)
+        self.patcher.start()
+
+    def teardown_method(self):
+        """Restore the real Redis connection."""
+        self.patcher.stop()
+
+    def test_saves_inline_when_not_started(self):
+        """Test that saves are written immediately outside the app lifespan."""
+        persister = RequestPersister()
+        record = make_request("r1")
+        persister.save(record)
+        assert self.redis.hget(record.key(), "request_id") == b"r1"
+        assert persister.pending == 0
+
+    def test_coalesces_transitions_and_flushes_in_background(self):
+        """Test that one write carries the latest state of a record."""
+
+        async def run():
+            persister = RequestPersister(flush_interval_ms=20)
+            persister.start()
+            record = make_request("r1")
+            persister.save(record)
+            record.status = "completed"
+            persister.save(record)
+            # Snapshot taken at save time, not the live object
+            record.status = "error"
+            queued = persister.pending
+            before_flush = self.redis.exists(record.key())
+            await asyncio.sleep(0.1)
+            await persister.stop()
+            return record, queued, before_flush
+
+        record, queued, before_flush = asyncio.run(run())
+        assert queued == 1
+        assert not before_flush
+        assert self.redis.hget(record.key(), "status") == b"completed"
+
+    def test_pending_records_are_readable_and_discardable(self):
+        """Test read-after-write and delete before a flush."""
+
+        async def run():
+            persister = RequestPersister(flush_interval_ms=60_000)
+            persister.start()
+            kept, dropped = make_request("kept"), make_request("dropped")
+            persister.save(kept)
+            persister.save(dropped)
+            found = persister.find_pending("kept")
+            discarded = persister.discard("dropped")
+            await persister.stop()
+            return kept, dropped, found, discarded
+
+        kept, dropped, found, discarded = asyncio.run(run())
+        assert found is not None and found.request_id == "kept"
+        assert discarded
+        # stop() flushed the queue despite the long interval
+        assert self.redis.exists(kept.key())
+        assert not self.redis.exists(dropped.key())
+
+    def test_records_being_written_stay_readable_and_discardable(self):
+        """Test read-after-write and delete while a batch is in flight."""
+        writing = threading.Event()
+        release = threading.Event()
+
+        def slow_write(batch):
+            writing.set()
+            release.wait(5)
+            write_requests(batch)
+
+        async def run():
+            persister = RequestPersister(flush_interval_ms=60_000)
+            persister.start()
+            kept, dropped = make_request("kept"), make_request("dropped")
+            persister.save(kept)
+            persister.save(dropped)
+            with patch.object(RequestPersister, "_write_batch", side_effect=slow_write):
+                flush = asyncio.create_task(persister.flush())
+                await asyncio.to_thread(writing.wait, 5)
+                found = persister.find_pending("kept")
+                # The record is not in Redis yet, so deleting it finds nothing
+                discarded = persister.discard("dropped")
+                deleted = InferenceRequest.delete_by_request_id("dropped")
+                release.set()
+                await flush
+            await persister.stop()
+            return kept, dropped, found, discarded, deleted
+
+        kept, dropped, found, discarded, deleted = asyncio.run(run())
+        assert found is not None and found.request_id == "kept"
+        assert discarded and not deleted
+        assert self.redis.exists(kept.key())
+        assert not self.redis.exists(dropped.key())
+        assert indexes.get_pk("dropped") is None
+
+    def test_sync_mode_never_queues(self):
+        """Test that the durability knob can disable write-behind."""
+
+        async def run():
+            persister = RequestPersister(mode="sync")
+            persister.start()
+            record = make_request("r1")
+            persister.save(record)
+            return persister, record
+
+        persister, record = asyncio.run(run())
+        assert not persister.running
+        assert self.redis.exists(record.key())
+
+    def test_failed_batches_are_requeued(self):
+        """Test that a Redis error does not lose queued updates."""
+
+        async def run():
+            persister = RequestPersister(flush_interval_ms=60_000)
+            persister.start()
+            record = make_request("r1")
+            persister.save(record)
+            with patch.object(
+                RequestPersister, "_write_batch", side_effect=ConnectionError("down")
+            ):
+                await persister.flush()
+            requeued = persister.pending
+            await persister.stop()
+            return record, requeued
+
+        record, requeued = asyncio.run(run())
+        assert requeued == 1
+        assert self.redis.exists(record.key())
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
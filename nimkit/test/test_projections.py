@@ -0,0 +1,100 @@
+"""Tests for summary fields and field projections."""
+
+import base64
+import json
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+
+from nimkit.src.api.blobs import BlobStore
+from nimkit.src.api.llm import migrations
+from nimkit.src.api.llm.models import InferenceRequest
+from nimkit.src.api.llm.projections import (
+    SUMMARY_FIELDS,
+    load_projections,
+    parse_fields,
+    project_request,
+)
+
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 8
+
+
+class TestProjections:
+    """Test summary fields written at save time and projected reads."""
+
+    def setup_method(self):
+        """Point the model at an in-memory Redis."""
+        self.redis = fakeredis.FakeRedis()
+        self.patcher = patch.object(InferenceRequest.Meta, "database", self.redis)
+        self.patcher.start()
+
+    def teardown_method(self):
+        """Restore the real Redis connection."""
+        self.patcher.stop()
+
+    def test_parse_fields(self):
+        """Test the fields= parameter values."""
+        assert parse_fields(None) is None
+        assert parse_fields("full") is None
+        assert parse_fields("summary") == list(SUMMARY_FIELDS)
+        assert parse_fields("request_id, output,request_id") == ["request_id", "output"]
+        with pytest.raises(ValueError):
+            parse_fields("request_id,search_text")
+
+    def test_summary_fields_are_written_with_payloads(self, tmp_path):
+        """Test previews and the thumbnail URL of an image request."""
+        store = BlobStore(root=str(tmp_path / "blobs"), threshold=64)
+        image = base64.b64encode(PNG).decode("ascii")
+        request = InferenceRequest(request_id="r1", input_json="", type="IMAGE")
+        with patch("nimkit.src.api.llm.models.blob_store", store):
+            request.set_input({"prompt": "a cat " * 100, "seed": 3})
+            request.set_output({"artifacts": [{"base64": image}]})
+        assert request.prompt_preview == ("a cat " * 100)[:200]
+        assert request.output_preview == ""
+        assert request.thumbnail_url.endswith(".png")
+
+    def test_load_projections_reads_only_requested_fields(self):
+        """Test typed projected rows without constructing records."""
+        request = InferenceRequest(request_id="r1", input_json="", duration_ms=12.5)
+        request.set_input({"messages": [{"role": "user", "content": "Hi"}]})
+        request.set_output({"choices": [{"message": {"content": "Hello"}}]})
+        request.save()
+
+        with patch.object(
+            InferenceRequest, "__init__", side_effect=AssertionError("constructed")
+        ):
+            (summary,) = load_projections(
+                [request.pk, "missing"], parse_fields("summary")
+            )
+            (row,) = load_projections([request.pk], ["status", "stream", "output"])
+
+        assert summary["request_id"] == "r1"
+        assert summary["prompt_preview"] == "Hi"
+        assert summary["output_preview"] == "Hello"
+        assert summary["duration_ms"] == 12.5
+        assert summary["stream"] is False
+        assert summary["thumbnail_url"] is None
+        assert "input" not in summary
+        assert row == {
+            "status": "pending",
+            "stream": False,
+            "output": {"choices": [{"message": {"content": "Hello"}}]},
+        }
+        assert project_request(request, ["status", "stream", "output"]) == row
+
+    def test_migration_fills_summary_of_old_records(self):
+        """Test that records saved without summary fields get them."""
+        request = InferenceRequest(
+            request_id="r1", input_json=json.dumps({"prompt": "a dog"})
+        )
+        request.save()
+        self.redis.hdel(request.key(), "prompt_preview", "output_preview")
+
+        migrations.migrate_payloads()
+        (row,) = load_projections([request.pk], ["prompt_preview"])
+        assert row == {"prompt_preview": "a dog"}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,128 @@
+"""Tests for the shared, instrumented Redis connection pools."""
+
+import asyncio
+
+import fakeredis
+import pytest
+import redis
+from prometheus_client import REGISTRY
+
+from nimkit.src.api import db
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class TestRedisPool:
+    """Test pool accounting and command latency metrics."""
+
+    def setup_method(self):
+        """Share one in-memory server between the pools under test."""
+        self.server = fakeredis.FakeServer()
+
+    def test_sync_commands_and_pipelines_are_measured(self):
+        """Test latency samples and that connections are returned."""
+        pool = db.InstrumentedBlockingConnectionPool(
+            connection_class=fakeredis.FakeConnection,
+            server=self.server,
+            max_connections=2,
+            decode_responses=True,
+        )
+        client = db.InstrumentedRedis(connection_pool=pool)
+        gets = sample(
+            "nimkit_redis_command_duration_seconds_count", pool="sync", command="GET"
+        )
+        pipelines = sample(
+            "nimkit_redis_command_duration_seconds_count",
+            pool="sync",
+            command="PIPELINE",
+        )
+
+        client.set("key", "value")
+        assert client.get("key") == "value"
+        pipe = client.pipeline(transaction=False)
+        pipe.get("key")
+        pipe.get("missing")
+        assert pipe.execute() == ["value", None]
+
+        assert pool.in_use == 0
+        assert sample(
+            "nimkit_redis_pool_max_connections", pool="sync"
+        ) == pytest.approx(2)
+        assert (
+            sample(
+                "nimkit_redis_command_duration_seconds_count",
+                pool="sync",
+                command="GET",
+            )
+            == gets + 1
+        )
+        assert (
+            sample(
+                "nimkit_redis_command_duration_seconds_count",
+                pool="sync",
+                command="PIPELINE",
+            )
+            == pipelines + 1
+        )
+
+    def test_exhausted_pool_fails_after_timeout(self):
+        """Test that commands wait at most the pool timeout for a connection."""
+        pool = db.InstrumentedBlockingConnectionPool(
+            connection_class=fakeredis.FakeConnection,
+            server=self.server,
+            max_connections=1,
+            timeout=0.05,
+            decode_responses=True,
+        )
+        client = db.InstrumentedRedis(connection_pool=pool)
+        errors = sample("nimkit_redis_command_errors_total", pool="sync", command="GET")
+
+        held = pool.get_connection()
+        assert pool.in_use == 1
+        with pytest.raises(redis.ConnectionError):
+            client.get("key")
+        pool.release(held)
+
+        assert pool.in_use == 0
+        assert (
+            sample("nimkit_redis_command_errors_total", pool="sync", command="GET")
+            == errors + 1
+        )
+
+    def test_async_client_shares_the_accounting(self):
+        """Test the asyncio pool and client."""
+        pool = db.InstrumentedAsyncBlockingConnectionPool(
+            connection_class=fakeredis.FakeAsyncConnection,
+            server=self.server,
+            max_connections=2,
+            decode_responses=True,
+        )
+        client = db.InstrumentedAsyncRedis(connection_pool=pool)
+        transactions = sample(
+            "nimkit_redis_command_duration_seconds_count",
+            pool="async",
+            command="MULTI",
+        )
+
+        async def run():
+            await client.set("key", "value")
+            pipe = client.pipeline()
+            pipe.get("key")
+            return await pipe.execute()
+
+        assert asyncio.run(run()) == ["value"]
+        assert pool.in_use == 0
+        assert (
+            sample(
+                "nimkit_redis_command_duration_seconds_count",
+                pool="async",
+                command="MULTI",
+            )
+            == transactions + 1
+        )
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,153 @@
+"""Tests for replica routing and passive ejection."""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from nimkit.src.api.config.nims import NIMData, NIMReplica
+from nimkit.src.api.replicas import ReplicaRouter
+from nimkit.src.main import app
+
+client = TestClient(app)
+
+
+def make_nim_data() -> NIMData:
+    """Create a NIM with two replicas besides its primary host/port."""
+    return NIMData(
+        nim_id="meta/llama",
+        host="gpu-0",
+        port=8000,
+        nim_type="llm",
+        replicas=[
+            NIMReplica(host="gpu-1", port=8000),
+            NIMReplica(host="gpu-2", port=8000),
+            NIMReplica(host="gpu-0", port=8000),
+        ],
+    )
+
+
+class TestReplicaRouter:
+    """Test replica selection, load tracking and ejection."""
+
+    def test_replicas_include_primary_once(self):
+        """Test that host/port is the first replica and duplicates are dropped."""
+        replicas = make_nim_data().get_replicas()
+        assert [(r.host, r.port) for r in replicas] == [
+            ("gpu-0", 8000),
+            ("gpu-1", 8000),
+            ("gpu-2", 8000),
+        ]
+
+    def test_busy_replica_is_avoided(self):
+        """Test that the least loaded of two sampled replicas is chosen."""
+        router = ReplicaRouter()
+        nim_data = make_nim_data()
+
+        with router.track("gpu-0", 8000), router.track("gpu-1", 8000):
+            chosen = {router.choose("meta/llama", nim_data).host for _ in range(50)}
+
+        # gpu-2 wins every pair it is sampled in; gpu-0/gpu-1 tie otherwise
+        assert "gpu-2" in chosen
+
+        with router.track("gpu-0", 8000), router.track("gpu-0", 8000):
+            with router.track("gpu-1", 8000):
+                chosen = {router.choose("meta/llama", nim_data).host for _ in range(50)}
+        assert "gpu-0" not in chosen
+
+    def test_failing_replica_is_ejected(self):
+        """Test that consecutive failures take a replica out of rotation."""
+        router = ReplicaRouter(eject_after_failures=2, eject_seconds=60)
+        nim_data = make_nim_data()
+        request = httpx.Request("POST", "http://gpu-1:8000/v1/chat/completions")
+
+        for _ in range(2):
+            with pytest.raises(httpx.ConnectError):
+                with router.track_url("http://gpu-1:8000/v1/chat/completions"):
+                    raise httpx.ConnectError("refused", request=request)
+
+        chosen = {router.choose("meta/llama", nim_data).host for _ in range(50)}
+        assert chosen == {"gpu-0", "gpu-2"}
+
+    def test_client_errors_do_not_eject(self):
+        """Test that 4xx responses are not held against the replica."""
+        router = ReplicaRouter(eject_after_failures=1, eject_seconds=60)
+        nim_data = NIMData(nim_id="n", host="gpu-0", port=8000, nim_type="llm")
+
+        with pytest.raises(HTTPException):
+            with router.track("gpu-0", 8000):
+                raise HTTPException(status_code=400, detail="bad request")
+
+        assert router.describe(nim_data)[0]["ejected"] is False
+
+    def test_dispatched_handler_tracks_chosen_replica(self):
+        """Test that handlers choosing their own replica are tracked."""
+        router = ReplicaRouter(eject_after_failures=1, eject_seconds=60)
+        nim_data = NIMData(
+            nim_id="n",
+            host="gpu-0",
+            port=8000,
+            nim_type="image",
+            replicas=[NIMReplica(host="gpu-1", port=8000)],
+        )
+        seen = {}
+
+        @router.dispatched
+        async def handler():
+            replica = router.choose("n", nim_data)
+            seen["replica"] = replica.host
+            seen["outstanding"] = {
+                r["host"]: r["outstanding"] for r in router.describe(nim_data)
+            }
+            raise HTTPException(status_code=502, detail="NIM inference failed")
+
+        with pytest.raises(HTTPException):
+            asyncio.run(handler())
+
+        assert seen["outstanding"][seen["replica"]] == 1
+        state = {r["host"]: r for r in router.describe(nim_data)}
+        assert state[seen["replica"]]["ejected"] is True
+        assert state[seen["replica"]]["outstanding"] == 0
+
+
+class TestReplicaRoutes:
+    """Test the replica configuration endpoints."""
+
+    def test_add_replica(self):
+        """Test adding a replica to an existing NIM."""
+        with patch(
+            "nimkit.src.api.config.routes.nim_manager", new_callable=AsyncMock
+        ) as mock_manager:
+            mock_manager.get_nim_data.return_value = make_nim_data()
+            mock_manager.add_replica.return_value = True
+
+            response = client.post(
+                "/api/nims/replicas/meta/llama", json={"host": "gpu-3", "port": 8000}
+            )
+
+        assert response.status_code == 200
+        assert response.json()["host"] == "gpu-3"
+        mock_manager.add_replica.assert_called_once_with("meta/llama", "gpu-3", 8000)
+
+    def test_list_replicas(self):
+        """Test listing replicas with their routing state."""
+        with patch(
+            "nimkit.src.api.config.routes.nim_manager", new_callable=AsyncMock
+        ) as mock_manager:
+            mock_manager.get_nim_data.return_value = make_nim_data()
+
+            response = client.get("/api/nims/replicas/meta/llama")
+
+        assert response.status_code == 200
+        assert [r["host"] for r in response.json()["replicas"]] == [
+            "gpu-0",
+            "gpu-1",
+            "gpu-2",
+        ]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,129 @@
+"""Tests for retention policies and request archives."""
+
+import gzip
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+
+from nimkit.src.api.llm import indexes, retention
+from nimkit.src.api.llm.models import InferenceRequest
+from nimkit.src.api.persistence import RequestPersister
+
+DAY = 86400
+NOW = 1_800_000_000.0
+
+
+class TestRetention:
+    """Test archiving expired requests and reading the archives back."""
+
+    def setup_method(self):
+        """Save requests of two types and ages to an in-memory Redis."""
+        self.redis = fakeredis.FakeRedis()
+        self.patcher = patch.object(InferenceRequest.Meta, "database", self.redis)
+        self.patcher.start()
+
+        persister = RequestPersister()
+        for request_id, type_, age_days in [
+            ("old-llm-1", "LLM", 40),
+            ("old-llm-2", "LLM", 31),
+            ("new-llm", "LLM", 1),
+            ("old-tts", "TTS", 40),
+        ]:
+            request = InferenceRequest(
+                request_id=request_id,
+                input_json="",
+                type=type_,
+                nim_id="nim",
+                created_ts=NOW - age_days * DAY,
+            )
+            request.set_input({"prompt": request_id})
+            persister.save(request)
+
+    def teardown_method(self):
+        """Restore the real Redis connection."""
+        self.patcher.stop()
+
+    def test_parse_retention_policy(self):
+        """Test the TYPE=DAYS spec."""
+        assert retention.parse_retention_policy("LLM=30, IMAGE_GENERATION=7,") == {
+            "LLM": 30.0,
+            "IMAGE_GENERATION": 7.0,
+        }
+        with pytest.raises(ValueError):
+            retention.parse_retention_policy("LLM")
+
+    def test_default_policy_covers_known_types(self):
+        """Test that the default applies to every stored type."""
+        with patch.object(
+            retention, "REQUEST_RETENTION_DAYS", "LLM=30,TTS=0"
+        ), patch.object(retention, "REQUEST_RETENTION_DEFAULT_DAYS", 7):
+            assert retention.get_retention_policy() == {"LLM": 30.0}
+        with patch.object(retention, "REQUEST_RETENTION_DAYS", "LLM=30"), patch.object(
+            retention, "REQUEST_RETENTION_DEFAULT_DAYS", 7
+        ):
+            assert retention.get_retention_policy() == {"LLM": 30.0, "TTS": 7}
+
+    def test_expired_requests_are_archived_and_deleted(self, tmp_path):
+        """Test the archive files and what is left in Redis."""
+        with patch.object(retention, "REQUEST_RETENTION_DAYS", "LLM=30"):
+            results = retention.apply_retention(now=NOW, archive_dir=str(tmp_path))
+        assert results == {"LLM": 2}
+
+        assert indexes.get_pk("old-llm-1") is None
+        assert indexes.get_pk("new-llm") is not None
+        assert indexes.get_pk("old-tts") is not None
+        counters = indexes.get_counters()
+        assert counters["total"] == 2
+        assert counters["type:LLM"] == 1
+
+        archives = retention.list_archives(str(tmp_path))
+        assert [(a["type"], a["date"]) for a in archives] == [
+            ("LLM", "2026-12-15"),
+            ("LLM", "2026-12-06"),
+        ]
+        records, has_next = retention.read_archive(
+            "LLM", "2026-12-06", archive_dir=str(tmp_path)
+        )
+        assert not has_next
+        assert [r["request_id"] for r in records] == ["old-llm-1"]
+        assert records[0]["input"] == {"prompt": "old-llm-1"}
+        assert "input_json" not in records[0]
+
+    def test_archives_append_and_filter(self, tmp_path):
+        """Test paging and filters over several batches, one damaged."""
+        directory = retention.get_archive_dir("LLM", "2026-01-01", str(tmp_path))
+        paths = [
+            retention.write_archive(
+                directory,
+                [{"request_id": f"r{batch}{i}", "status": "ok"} for i in range(2)],
+            )
+            for batch in range(4)
+        ]
+        # A damaged batch must not hide the batches written after it
+        with open(paths[2], "r+b") as fh:
+            fh.truncate(20)
+        # Nor may a write interrupted before its rename
+        with open(f"{paths[3]}.tmp", "wb") as fh:
+            fh.write(gzip.compress(b'{"request_id": "partial"}\n')[:20])
+        with open(paths[1], "r+b") as fh:
+            fh.write(b"garbage")
+
+        records, has_next = retention.read_archive(
+            "LLM", "2026-01-01", offset=1, limit=3, archive_dir=str(tmp_path)
+        )
+        assert [r["request_id"] for r in records] == ["r01", "r30", "r31"]
+        assert not has_next
+        records, _ = retention.read_archive(
+            "LLM", "2026-01-01", {"request_id": "r31"}, archive_dir=str(tmp_path)
+        )
+        assert len(records) == 1
+
+        with pytest.raises(ValueError):
+            retention.read_archive("../LLM", "2026-01-01", archive_dir=str(tmp_path))
+        with pytest.raises(FileNotFoundError):
+            retention.read_archive("LLM", "2026-01-02", archive_dir=str(tmp_path))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,145 @@
+"""Tests for the compiled per-NIM route table."""
+
+import asyncio
+import os
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+from fastapi import HTTPException
+
+from nimkit.src.api.config.catalog import NIMCatalog
+from nimkit.src.api.config.nims import RedisNIMManager
+from nimkit.src.api.route_table import RouteTable
+
+CATALOG = """
+- id: meta/llama
+  type: llm
+  invoke_url: https://integrate.api.nvidia.com/v1
+  model: meta/llama-3.1-8b-instruct
+- id: nvidia/studiovoice
+  type: speech_enhancement
+  invoke_url: null
+"""
+
+
+def write(path, text, mtime_ns):
+    path.write_text(text)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+class TestRouteTable:
+    """Test route compilation and when routes are rebuilt."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """Point the route table at an in-memory Redis and a temporary catalog."""
+        self.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        with patch(
+            "nimkit.src.api.config.nims.get_async_redis_client",
+            return_value=self.redis,
+        ):
+            self.manager = RedisNIMManager()
+        self.catalog_path = tmp_path / "nims.yml"
+        write(self.catalog_path, CATALOG, 1_000_000_000)
+        self.catalog = NIMCatalog(str(self.catalog_path), reload_interval=0)
+        self.table = RouteTable()
+
+        with patch("nimkit.src.api.route_table.nim_manager", self.manager), patch(
+            "nimkit.src.api.route_table.nim_catalog", self.catalog
+        ), patch(
+            "nimkit.src.api.utils.get_async_redis_client", return_value=self.redis
+        ), patch.dict(
+            os.environ, {"NVIDIA_API_KEY": ""}
+        ):
+            asyncio.run(self.manager.set_nim_data("meta/llama", "gpu-0", 8000, "llm"))
+            asyncio.run(self.manager.set_nim_data("local/tts", "gpu-1", 9000, "TTS"))
+            yield
+
+    def test_local_and_nvidia_routes(self):
+        """Test URLs, headers and model override of compiled routes."""
+
+        async def run():
+            await self.redis.set("nims:nvidia_api_key", "nvapi-test")
+            return (
+                await self.table.get("meta/llama"),
+                await self.table.get("meta/llama", use_nvidia_api=True),
+                await self.table.get("local/tts"),
+            )
+
+        local, nvidia, tts = asyncio.run(run())
+
+        assert local.base_url() == "http://gpu-0:8000/v1"
+        assert local.headers(stream=True)["Accept"] == "text/event-stream"
+        assert local.model is None
+        assert nvidia.base_url() == "https://integrate.api.nvidia.com/v1"
+        assert nvidia.model == "meta/llama-3.1-8b-instruct"
+        assert nvidia.api_key == "nvapi-test"
+        assert nvidia.headers()["Authorization"] == "Bearer nvapi-test"
+        # Not in the catalog: routed by its configured type
+        assert tts.nim_type == "tts"
+        assert tts.endpoint() == "http://gpu-1:9000/v1/audio/synthesize"
+        assert tts.headers() == {"accept": "audio/wav"}
+
+    def test_routes_are_rebuilt_on_changes(self):
+        """Test that config, catalog and API key changes rebuild routes."""
+        self.manager._listening = True
+
+        async def run():
+            first = await self.table.get("meta/llama", use_nvidia_api=True)
+            assert await self.table.get("meta/llama", use_nvidia_api=True) is first
+
+            await self.redis.set("nims:nvidia_api_key", "nvapi-new")
+            await self.manager.publish_invalidation()
+            keyed = await self.table.get("meta/llama", use_nvidia_api=True)
+            assert keyed.api_key == "nvapi-new"
+
+            await self.manager.set_nim_data("meta/llama", "gpu-9", 8000, "llm")
+            moved = await self.table.get("meta/llama")
+            assert moved.base_url() == "http://gpu-9:8000/v1"
+
+            write(
+                self.catalog_path,
+                CATALOG.replace("meta/llama-3.1-8b-instruct", "meta/renamed"),
+                2_000_000_000,
+            )
+            renamed = await self.table.get("meta/llama", use_nvidia_api=True)
+            assert renamed.model == "meta/renamed"
+            assert await self.table.get("meta/llama", use_nvidia_api=True) is renamed
+
+        asyncio.run(run())
+
+    def test_routes_are_not_kept_without_listener(self):
+        """Test that every lookup compiles while the config cache is off."""
+
+        async def run():
+            return await self.table.get("meta/llama"), await self.table.get(
+                "meta/llama"
+            )
+
+        first, second = asyncio.run(run())
+        assert first is not second
+
+    def test_errors(self):
+        """Test missing NIMs and NVIDIA API routes without an invoke_url."""
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(self.table.get("missing/nim"))
+        assert exc_info.value.status_code == 404
+
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(self.table.get("local/tts", use_nvidia_api=True))
+        assert exc_info.value.status_code == 404
+
+        asyncio.run(
+            self.manager.set_nim_data(
+                "nvidia/studiovoice", "gpu-2", 8001, "speech_enhancement"
+            )
+        )
+        route = asyncio.run(self.table.get("nvidia/studiovoice", use_nvidia_api=True))
+        with pytest.raises(HTTPException) as exc_info:
+            route.endpoint()
+        assert exc_info.value.status_code == 400
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
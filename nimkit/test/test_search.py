@@ -0,0 +1,157 @@
+"""Tests for RediSearch-backed inference request queries."""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import fakeredis
+import pytest
+
+from nimkit.src.api.llm import search
+from nimkit.src.api.llm.models import InferenceRequest, extract_search_text
+
+
+class TestInferenceRequestSearch:
+    """Test index fields, query building and result loading."""
+
+    def test_index_fields_are_derived(self):
+        """Test that created_ts and search_text follow the stored payloads."""
+        request = InferenceRequest(
+            request_id="r1", input_json="", date_created="2024-01-01T00:00:00"
+        )
+        assert request.created_ts == 1704067200.0
+
+        request.set_input(
+            {
+                "model": "m",
+                "messages": [{"role": "user", "content": "Draw a lighthouse"}],
+            }
+        )
+        request.set_output(
+            {"artifacts": [{"base64": "aGVsbG8="}], "text": "A lighthouse at dusk"}
+        )
+        assert request.search_text == "Draw a lighthouse A lighthouse at dusk"
+
+        # Records saved before the field existed get it when loaded
+        loaded = InferenceRequest(
+            request_id="r2", input_json='{"prompt": "a red fox"}', output_json=""
+        )
+        assert loaded.search_text == "a red fox"
+        assert extract_search_text({"seed": 1, "image": "data:..."}) == ""
+
+    def test_build_search_query(self):
+        """Test TAG escaping and prefix text matching."""
+        assert search.build_search_query() == "*"
+        query = search.build_search_query(
+            search="Red fox!",
+            nim_ids=["meta/llama-3.1-8b-instruct", " "],
+            statuses=["completed", "error"],
+        )
+        assert query == (
+            r"@nim_id:{meta\/llama\-3\.1\-8b\-instruct} "
+            r"@status:{completed|error} "
+            r"@search_text_fts:(red* fox*)"
+        )
+
+    def test_search_sorts_pages_and_loads_documents(self):
+        """Test that sorting and paging are delegated to Redis."""
+        doc = SimpleNamespace(
+            id=InferenceRequest.make_key("pk1"),
+            payload=None,
+            pk="pk1",
+            request_id="r1",
+            input_json="{}",
+            nim_id="nim",
+            status="completed",
+            created_ts="1704067200",
+        )
+        index = MagicMock()
+        index.search.return_value = SimpleNamespace(total=42, docs=[doc])
+        client = MagicMock()
+        client.ft.return_value = index
+
+        with patch.object(
+            search, "get_redis_client", return_value=client
+        ), patch.object(search, "ensure_search_index"):
+            total, requests = search.search_inference_requests(
+                "@status:{completed}", offset=20, limit=10
+            )
+
+        assert total == 42
+        assert [r.request_id for r in requests] == ["r1"]
+        query = index.search.call_args.args[0]
+        args = query.get_args()
+        assert args[0] == "@status:{completed}"
+        assert "SORTBY" in args and "DESC" in args
+        assert args[args.index("LIMIT") + 1 : args.index("LIMIT") + 3] == [20, 10]
+
+    def test_backfill_index_fields(self):
+        """Test that old records gain created_ts and search_text once."""
+        redis_client = fakeredis.FakeRedis(decode_responses=True)
+        key = InferenceRequest.make_key("old")
+        redis_client.hset(
+            key,
+            mapping={
+                "pk": "old",
+                "request_id": "old",
+                "input_json": '{"prompt": "a quiet harbor"}',
+                "date_created": "2024-01-01T00:00:00",
+            },
+        )
+
+        with patch.object(search, "get_redis_client", return_value=redis_client):
+            assert search.backfill_index_fields() == (1, 0)
+            assert search.backfill_index_fields() == (0, 0)
+
+        assert redis_client.hget(key, "created_ts") == "1704067200.0"
+        assert redis_client.hget(key, "search_text") == "a quiet harbor"
+
+    def test_backfill_runs_once(self):
+        """Test that the startup backfill only scans until it completes."""
+        redis_client = fakeredis.FakeRedis(decode_responses=True)
+
+        with patch.object(
+            search, "get_redis_client", return_value=redis_client
+        ), patch.object(
+            search, "backfill_index_fields", return_value=(0, 3)
+        ) as backfill:
+            # Busy records are left for the next start
+            search.ensure_index_fields()
+            backfill.return_value = (3, 0)
+            search.ensure_index_fields()
+            search.ensure_index_fields()
+
+        assert backfill.call_count == 2
+        assert redis_client.get(search.INDEX_FIELDS_KEY) == search.INDEX_FIELDS_VERSION
+
+    def test_cursor_tolerates_records_without_created_ts(self):
+        """Test that records the backfill has not reached yet sort last."""
+        docs = [
+            SimpleNamespace(
+                id=InferenceRequest.make_key("new"),
+                pk="new",
+                request_id="new",
+                created_ts="5.0",
+            ),
+            SimpleNamespace(
+                id=InferenceRequest.make_key("old"), pk="old", request_id="old"
+            ),
+        ]
+        index = MagicMock()
+        index.search.return_value = SimpleNamespace(total=2, docs=docs)
+        client = MagicMock()
+        client.ft.return_value = index
+
+        with patch.object(
+            search, "get_redis_client", return_value=client
+        ), patch.object(search, "ensure_search_index"):
+            total, rows, cursor = search.search_after(
+                "*", None, limit=1, fields=["request_id"]
+            )
+
+        assert total == 2
+        assert rows == [{"request_id": "new"}]
+        assert cursor.ts == 5.0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
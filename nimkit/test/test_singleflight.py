@@ -0,0 +1,244 @@
+"""Tests for single-flight deduplication of in-flight requests."""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+
+from nimkit.src.api.llm import inference
+from nimkit.src.api.llm.models import InferenceRequest
+from nimkit.src.api.singleflight import SingleFlight, StreamBroadcast, make_flight_key
+
+
+class TestSingleFlight:
+    """Test sharing of calls and streams between identical requests."""
+
+    def test_flight_key_is_canonical(self):
+        """Test that dict ordering does not change the key."""
+        assert make_flight_key("llm", {"a": 1, "b": 2}) == make_flight_key(
+            "llm", {"b": 2, "a": 1}
+        )
+        assert make_flight_key("llm", {"a": 1}) != make_flight_key("llm", {"a": 2})
+
+    def test_concurrent_calls_share_one_result(self):
+        """Test that concurrent callers run the function once."""
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"answer": 42}
+
+        async def run():
+            flight = SingleFlight(enabled=True)
+            results = await asyncio.gather(
+                *[flight.do("k", f"req-{i}", fn) for i in range(3)]
+            )
+            return flight, results
+
+        flight, results = asyncio.run(run())
+
+        assert len(calls) == 1
+        assert [result for result, _ in results] == [{"answer": 42}] * 3
+        assert [shared_from for _, shared_from in results] == [
+            None,
+            "req-0",
+            "req-0",
+        ]
+        assert flight.in_flight() == 0
+
+    def test_errors_reach_every_caller(self):
+        """Test that a failed call fails all of its callers."""
+
+        async def fn():
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream failed")
+
+        async def run():
+            flight = SingleFlight(enabled=True)
+            return await asyncio.gather(
+                flight.do("k", "a", fn), flight.do("k", "b", fn), return_exceptions=True
+            )
+
+        results = asyncio.run(run())
+        assert all(isinstance(r, ValueError) for r in results)
+
+    def test_stream_subscribers_get_every_chunk(self):
+        """Test that a late subscriber replays the stream from the start."""
+        starts = []
+
+        async def source():
+            starts.append(1)
+            for chunk in ["a", "b", "c"]:
+                await asyncio.sleep(0.01)
+                yield chunk
+
+        async def collect(iterator):
+            return [chunk async for chunk in iterator]
+
+        async def run():
+            flight = SingleFlight(enabled=True)
+            first, leader = flight.stream("k", "req-1", source)
+            first_task = asyncio.ensure_future(collect(first))
+            await asyncio.sleep(0.015)
+            second, shared_from = flight.stream("k", "req-2", source)
+            return leader, shared_from, await first_task, await collect(second)
+
+        leader, shared_from, first_chunks, second_chunks = asyncio.run(run())
+
+        assert len(starts) == 1
+        assert leader is None
+        assert shared_from == "req-1"
+        assert first_chunks == second_chunks == ["a", "b", "c"]
+
+    def test_long_streams_are_not_buffered(self):
+        """Test that streams past the replay cap drop chunks and are not joined."""
+        starts = []
+        broadcasts = []
+        buffered = []
+
+        def make_broadcast(leader_id):
+            broadcasts.append(StreamBroadcast(leader_id, max_replay_bytes=6))
+            return broadcasts[-1]
+
+        async def source():
+            starts.append(1)
+            for chunk in ["aaaa", "bbbb", "cccc", "dddd"]:
+                await asyncio.sleep(0.01)
+                yield chunk
+
+        async def collect(iterator):
+            chunks = []
+            async for chunk in iterator:
+                chunks.append(chunk)
+                buffered.append(len(broadcasts[0].chunks))
+            return chunks
+
+        async def run():
+            flight = SingleFlight(enabled=True)
+            first, _ = flight.stream("k", "req-1", source)
+            first_task = asyncio.ensure_future(collect(first))
+            await asyncio.sleep(0.035)
+            assert not flight.is_streaming("k")
+            second, shared_from = flight.stream("k", "req-2", source)
+            return shared_from, await first_task, await collect(second)
+
+        with patch("nimkit.src.api.singleflight.StreamBroadcast", make_broadcast):
+            shared_from, first_chunks, second_chunks = asyncio.run(run())
+
+        assert len(starts) == 2
+        assert shared_from is None
+        assert first_chunks == second_chunks == ["aaaa", "bbbb", "cccc", "dddd"]
+        # Once over the cap, chunks are dropped as soon as they are read
+        assert buffered[:4] == [1, 0, 0, 0]
+
+    def test_response_dropped_before_the_first_chunk(self):
+        """Test that closing an unread subscriber stops the upstream call."""
+        events = []
+
+        async def source():
+            try:
+                while True:
+                    await asyncio.sleep(0.01)
+                    events.append("chunk")
+                    yield "chunk"
+            finally:
+                events.append("closed")
+
+        async def run():
+            flight = SingleFlight(enabled=True)
+            first, _ = flight.stream("k", "req-1", source)
+            second, _ = flight.stream("k", "req-2", source)
+            await asyncio.sleep(0.025)
+            # One subscriber leaving keeps the stream alive for the other
+            await first.aclose()
+            await asyncio.sleep(0.01)
+            kept = flight.in_flight()
+            await second.aclose()
+            await asyncio.sleep(0)
+            return flight, kept
+
+        flight, kept = asyncio.run(run())
+
+        assert kept == 1
+        assert events[-1] == "closed"
+        assert flight.in_flight() == 0
+        assert not flight.is_streaming("k")
+
+    def test_failed_stream_is_recorded_by_every_request(self):
+        """Test that requests joining a failed stream record the error."""
+        client = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(500))
+        )
+        leader = InferenceRequest(request_id="r1", input_json="", request_type="chat")
+        joiner = InferenceRequest(request_id="r2", input_json="", request_type="chat")
+
+        def open_stream():
+            return inference.stream_from_nim(
+                "meta/llama", "https://nvidia.test/v1", {}, {}, leader, True
+            )
+
+        async def collect(iterator):
+            return [chunk async for chunk in iterator]
+
+        async def run():
+            flight = SingleFlight(enabled=True)
+            first, _ = flight.stream("k", "r1", open_stream)
+            second, _ = flight.stream("k", "r2", open_stream)
+            return await asyncio.gather(
+                collect(inference.end_stream_on_error(first)),
+                collect(inference.stream_shared(second, joiner)),
+            )
+
+        with patch.object(inference, "request_persister", MagicMock()), patch.object(
+            inference, "get_upstream_client", AsyncMock(return_value=client)
+        ):
+            asyncio.run(run())
+
+        assert leader.status == joiner.status == "error"
+        assert leader.error_json == joiner.error_json
+        assert "500" in json.loads(joiner.error_json)["error"]
+
+    def test_disconnected_joiner_is_recorded_as_cancelled(self):
+        """Test that a joiner leaving mid-stream does not stay pending."""
+        joiner = InferenceRequest(request_id="r2", input_json="", request_type="chat")
+        persister = MagicMock()
+
+        async def source():
+            for chunk in ('data: {"choices": []}\n\n', "data: [DONE]\n\n"):
+                yield chunk
+
+        async def run():
+            stream = inference.stream_shared(source(), joiner)
+            await stream.__anext__()
+            await stream.aclose()
+
+        with patch.object(inference, "request_persister", persister):
+            asyncio.run(run())
+
+        assert joiner.status == "error"
+        assert json.loads(joiner.error_json)["type"] == "cancelled"
+        assert joiner.duration_ms is not None
+        persister.save.assert_called_once_with(joiner)
+
+    def test_disabled_runs_every_call(self):
+        """Test that a disabled instance does not share calls."""
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            return len(calls)
+
+        async def run():
+            flight = SingleFlight(enabled=False)
+            return await asyncio.gather(
+                flight.do("k", "a", fn), flight.do("k", "b", fn)
+            )
+
+        assert asyncio.run(run()) == [(1, None), (2, None)]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,187 @@
+"""Tests for the streaming response accumulator."""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+
+from nimkit.src.api.llm import inference
+from nimkit.src.api.llm.models import InferenceRequest
+from nimkit.src.api.llm.streaming import SSEDataParser, StreamAccumulator
+
+
+class TestStreamAccumulator:
+    """Test folding streamed chunks into a reduced response."""
+
+    def test_chat_stream_reduces_to_message(self):
+        """Test that chat deltas, finish_reason and usage are folded."""
+        accumulator = StreamAccumulator(request_type="chat")
+        chunks = [
+            {
+                "id": "chatcmpl-1",
+                "model": "llama-3.1-8b-instruct",
+                "created": 1,
+                "choices": [{"index": 0, "delta": {"role": "assistant"}}],
+            },
+            {"choices": [{"index": 0, "delta": {"content": "Hello"}}]},
+            {"choices": [{"index": 0, "delta": {"content": " there"}}]},
+            {"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]},
+            {"choices": [], "usage": {"completion_tokens": 2, "total_tokens": 7}},
+        ]
+        for chunk in chunks:
+            accumulator.add_chunk(chunk)
+
+        result = accumulator.result()
+        assert result["id"] == "chatcmpl-1"
+        assert result["object"] == "chat.completion"
+        assert result["choices"][0]["message"] == {
+            "role": "assistant",
+            "content": "Hello there",
+        }
+        assert result["choices"][0]["finish_reason"] == "stop"
+        assert result["usage"]["total_tokens"] == 7
+        assert result["streaming"] is True
+        assert result["total_chunks"] == 5
+        assert "chunks" not in result
+
+    def test_chat_logprobs_are_compacted(self):
+        """Test that chat logprob objects become parallel arrays."""
+        accumulator = StreamAccumulator(request_type="chat")
+        accumulator.add_chunk(
+            {
+                "choices": [
+                    {
+                        "index": 0,
+                        "delta": {"content": "Hi"},
+                        "logprobs": {
+                            "content": [
+                                {
+                                    "token": "Hi",
+                                    "logprob": -0.1,
+                                    "bytes": [72, 105],
+                                    "top_logprobs": [
+                                        {"token": "Hi", "logprob": -0.1},
+                                        {"token": "Hello", "logprob": -2.3},
+                                    ],
+                                }
+                            ]
+                        },
+                    }
+                ]
+            }
+        )
+
+        logprobs = accumulator.result()["choices"][0]["logprobs"]
+        assert logprobs == {
+            "tokens": ["Hi"],
+            "token_logprobs": [-0.1],
+            "top_logprobs": [{"Hi": -0.1, "Hello": -2.3}],
+        }
+
+    def test_completion_stream_reduces_to_text(self):
+        """Test that completion text and logprob arrays are concatenated."""
+        accumulator = StreamAccumulator(request_type="completion")
+        for token, logprob in [("The", -0.5), (" sky", -0.2)]:
+            accumulator.add_chunk(
+                {
+                    "choices": [
+                        {
+                            "index": 0,
+                            "text": token,
+                            "logprobs": {
+                                "tokens": [token],
+                                "token_logprobs": [logprob],
+                                "top_logprobs": [{token: logprob}],
+                            },
+                        }
+                    ]
+                }
+            )
+        accumulator.add_chunk(
+            {"choices": [{"index": 0, "text": "", "finish_reason": "length"}]}
+        )
+
+        choice = accumulator.result()["choices"][0]
+        assert choice["text"] == "The sky"
+        assert choice["finish_reason"] == "length"
+        assert choice["logprobs"]["tokens"] == ["The", " sky"]
+        assert choice["logprobs"]["token_logprobs"] == [-0.5, -0.2]
+
+
+class TestSSEDataParser:
+    """Test splitting raw SSE bytes into data payloads."""
+
+    def test_payloads_split_across_reads(self):
+        """Test that lines split across network reads are reassembled."""
+        parser = SSEDataParser()
+        raw = b'data: {"a": 1}\r\n\n: comment\ndata: [DONE]\n\n'
+
+        payloads = []
+        for i in range(0, len(raw), 5):
+            payloads.extend(parser.feed(raw[i : i + 5]))
+
+        assert payloads == ['{"a": 1}', "[DONE]"]
+
+    def test_accumulator_ignores_done_and_bad_json(self):
+        """Test that add_data skips [DONE] and unparseable payloads."""
+        accumulator = StreamAccumulator(request_type="completion")
+        accumulator.add_data('{"choices": [{"index": 0, "text": "ok"}]}')
+        accumulator.add_data("[DONE]")
+        accumulator.add_data("{not json")
+
+        assert accumulator.total_chunks == 1
+        assert accumulator.get_text() == "ok"
+
+
+class TestStreamFromNIM:
+    """Test proxying upstream streams."""
+
+    @pytest.mark.parametrize("passthrough", [False, True])
+    def test_client_disconnect_is_recorded(self, passthrough):
+        """Test that a stream closed by the client is saved as cancelled."""
+
+        async def body():
+            for i in range(100):
+                yield f'data: {{"choices": [{{"delta": {{"content": "{i}"}}}}]}}\n\n'.encode()
+
+        client = httpx.AsyncClient(
+            transport=httpx.MockTransport(
+                lambda request: httpx.Response(200, content=body())
+            )
+        )
+        request = InferenceRequest(request_id="r1", input_json="", request_type="chat")
+        persister = MagicMock()
+
+        async def run():
+            stream = inference.stream_from_nim(
+                "meta/llama", "https://nvidia.test/v1", {}, {}, request, True
+            )
+            assert await stream.__anext__() == ": ping\n\n"
+            await stream.__anext__()
+            await stream.aclose()
+            # The pass-through consumer must not be left waiting for bytes
+            await asyncio.sleep(0)
+            return [
+                task
+                for task in asyncio.all_tasks()
+                if getattr(task.get_coro(), "__name__", None) == "consume_sse_bytes"
+                and not task.done()
+            ]
+
+        with patch.object(inference, "STREAM_PASSTHROUGH", passthrough), patch.object(
+            inference, "request_persister", persister
+        ), patch.object(
+            inference, "get_upstream_client", AsyncMock(return_value=client)
+        ):
+            leftover = asyncio.run(run())
+
+        assert leftover == []
+        assert request.status == "error"
+        assert json.loads(request.error_json)["type"] == "cancelled"
+        persister.save.assert_called_once_with(request)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,113 @@
+"""Tests for NDJSON export and bulk import of request history."""
+
+import json
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+
+from nimkit.src.api.llm import indexes, transfer
+from nimkit.src.api.llm.models import InferenceRequest
+from nimkit.src.api.persistence import RequestPersister
+
+
+class TestTransfer:
+    """Test exporting history and importing it into another store."""
+
+    def setup_method(self):
+        """Save requests of two NIMs and types to an in-memory Redis."""
+        self.redis = fakeredis.FakeRedis()
+        self.patcher = patch.object(InferenceRequest.Meta, "database", self.redis)
+        self.patcher.start()
+
+        persister = RequestPersister()
+        for i in range(12):
+            request = InferenceRequest(
+                request_id=f"r{i}",
+                input_json="",
+                type="LLM" if i % 3 else "IMAGE",
+                nim_id="a" if i % 2 else "b",
+                created_ts=float(i // 2),
+                status="completed",
+            )
+            request.set_input({"prompt": f"prompt {i}"})
+            request.set_output({"text": f"answer {i}"})
+            persister.save(request)
+
+    def teardown_method(self):
+        """Restore the real Redis connection."""
+        self.patcher.stop()
+
+    def export(self, **kwargs):
+        return [json.loads(line) for line in transfer.export_requests(**kwargs)]
+
+    def test_export_filters(self):
+        """Test time range, NIM and type filters across several batches."""
+        records = self.export(batch_size=5)
+        assert sorted(r["request_id"] for r in records) == sorted(
+            f"r{i}" for i in range(12)
+        )
+        timestamps = [float(r["created_ts"]) for r in records]
+        assert timestamps == sorted(timestamps, reverse=True)
+        assert records[0]["input"]["prompt"].startswith("prompt")
+        assert "input_json" not in records[0]
+
+        records = self.export(start_ts=2.0, end_ts=3.0, batch_size=1)
+        assert sorted(r["request_id"] for r in records) == ["r4", "r5", "r6", "r7"]
+
+        records = self.export(nim_id="a", type="LLM", batch_size=2)
+        assert sorted(r["request_id"] for r in records) == ["r1", "r11", "r5", "r7"]
+
+    def test_round_trip_and_conflicts(self):
+        """Test import into an empty store, then skip and replace."""
+        lines = list(transfer.export_requests())
+        self.redis.flushall()
+
+        result = transfer.import_requests(lines + ["", "not json"], batch_size=5)
+        assert result["imported"] == 12
+        assert result["failed"] == 1
+        assert result["errors"][0].startswith("line 14:")
+        assert indexes.get_counters()["total"] == 12
+
+        pk = indexes.get_pk("r3")
+        request = InferenceRequest.get(pk)
+        assert request.get_input() == {"prompt": "prompt 3"}
+        assert request.get_output() == {"text": "answer 3"}
+        assert request.nim_id == "a" and request.created_ts == 1.0
+        assert request.prompt_preview == "prompt 3"
+
+        result = transfer.import_requests(lines)
+        assert (result["imported"], result["skipped"]) == (0, 12)
+
+        edited = json.loads(lines[0])
+        edited["output"] = {"text": "edited"}
+        result = transfer.import_requests([json.dumps(edited)], on_conflict="replace")
+        assert result["imported"] == 1
+        pk = indexes.get_pk(edited["request_id"])
+        assert InferenceRequest.get(pk).get_output() == {"text": "edited"}
+        assert indexes.get_counters()["total"] == 12
+
+    def test_import_rejects_paths_outside_media(self, tmp_path):
+        """Test that imported records cannot point media deletes elsewhere."""
+        record = {"request_id": "x1", "input": {"prompt": "hi"}}
+        media = tmp_path / "media"
+        with patch("nimkit.src.api.blobs.MEDIA_DIR", str(media)):
+            request = transfer.from_export_record(
+                {
+                    **record,
+                    "audio_file_path": str(media / "asr" / "x1.wav"),
+                    "output_audio_path": str(media / ".." / "secret.wav"),
+                }
+            )
+            assert request.audio_file_path == str(media / "asr" / "x1.wav")
+            assert request.output_audio_path is None
+
+        for request_id in ("../x1", "a/b", "a\\b", ".."):
+            with pytest.raises(ValueError):
+                transfer.from_export_record({**record, "request_id": request_id})
+        result = transfer.import_requests([json.dumps({**record, "request_id": ".."})])
+        assert (result["imported"], result["failed"]) == (0, 1)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])